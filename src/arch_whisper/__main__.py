@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import argparse
 import logging
 import signal
 import sys
+from pathlib import Path
 
-from arch_whisper.app import App
+from arch_whisper import tracing
 from arch_whisper.config import load_config
 from arch_whisper.notifications import init_notifications, notify
 from arch_whisper.preflight import check_dependencies, check_optional_dependencies
@@ -21,8 +23,170 @@ def setup_logging() -> None:
     )
 
 
-def main() -> None:
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog="arch-whisper",
+        description="Push-to-talk voice transcription.",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without GTK, tray icon or desktop notifications",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    stats = commands.add_parser("stats", help="print latency percentiles per stage")
+    stats.add_argument(
+        "--last",
+        type=int,
+        metavar="N",
+        help="only use the most recent N utterances",
+    )
+
+    history = commands.add_parser(
+        "history",
+        help="search past transcripts",
+        description="List past transcripts, newest first, optionally matching words.",
+    )
+    history.add_argument("query", nargs="*", metavar="WORD", help="words to search for")
+    history.add_argument(
+        "-n", "--limit", type=int, default=20, metavar="N", help="entries shown (default: 20)"
+    )
+    history.add_argument(
+        "--copy", type=int, metavar="ID", help="copy one transcript to the clipboard"
+    )
+
+    serve = commands.add_parser(
+        "serve",
+        help="transcribe for other arch-whisper clients",
+        description="Load one Whisper model and transcribe for remote clients.",
+    )
+    serve.add_argument(
+        "--listen",
+        metavar="ADDR",
+        help="host:port or socket path (default: transcribe.sock in the runtime directory)",
+    )
+
+    transcribe = commands.add_parser(
+        "transcribe",
+        help="transcribe audio files",
+        description="Transcribe audio files, skipping those already done.",
+    )
+    transcribe.add_argument(
+        "paths", nargs="+", metavar="PATH", help="audio files or directories of them"
+    )
+    transcribe.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        metavar="DIR",
+        help="write outputs here instead of next to each file",
+    )
+    transcribe.add_argument(
+        "-f",
+        "--format",
+        action="append",
+        choices=("txt", "json", "srt"),
+        dest="formats",
+        help="output format; repeat for several (default: all)",
+    )
+    transcribe.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        metavar="N",
+        help="files transcribed at once (default: one per 4 cores)",
+    )
+    transcribe.add_argument(
+        "--no-cleanup",
+        action="store_false",
+        dest="cleanup",
+        help="skip Claude cleanup even if it is enabled",
+    )
+    return parser
+
+
+def show_stats(last: int | None) -> None:
+    """Print p50/p95/p99 per traced stage."""
+    traces = tracing.load_traces(last=last)
+    if traces:
+        print(f"{len(traces)} utterances from {tracing.TRACE_PATH}\n")
+    print(tracing.format_summary(tracing.summarize(traces)))
+
+
+def show_history(args: argparse.Namespace) -> int:
+    """Print matching transcripts, or copy one; returns the exit status."""
+    import time
+
+    from arch_whisper.history import HISTORY_PATH, HistoryStore
+
+    if not HISTORY_PATH.exists():
+        print("No transcript history yet", file=sys.stderr)
+        return 1
+    store = HistoryStore()
+    try:
+        if args.copy is not None:
+            from arch_whisper.paste.clipboard import copy_to_clipboard
+
+            entry = store.get(args.copy)
+            if entry is None:
+                print(f"No transcript {args.copy}", file=sys.stderr)
+                return 1
+            return 0 if copy_to_clipboard(entry.text) else 1
+        for entry in reversed(store.search(" ".join(args.query), args.limit)):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.created))
+            app = f" {entry.app}" if entry.app else ""
+            print(f"{entry.id:>6}  {when}{app}\n        {entry.text}")
+    finally:
+        store.close()
+    return 0
+
+
+def transcribe_files(args: argparse.Namespace) -> int:
+    """Run batch transcription; returns the exit status."""
+    from arch_whisper import batch
+
+    setup_logging()
+    formats = tuple(dict.fromkeys(args.formats)) if args.formats else batch.FORMATS
+    return batch.run(
+        args.paths,
+        load_config(),
+        workers=args.workers,
+        formats=formats,
+        output_dir=args.output_dir,
+        cleanup=args.cleanup,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
     """Main entry point for arch-whisper."""
+    args = build_parser().parse_args(argv)
+    if args.command == "stats":
+        show_stats(args.last)
+        return
+    if args.command == "transcribe":
+        sys.exit(transcribe_files(args))
+    if args.command == "history":
+        sys.exit(show_history(args))
+    if args.command == "serve":
+        from arch_whisper.server import serve
+
+        setup_logging()
+        serve(load_config(), args.listen)
+        return
+    run(headless=args.headless)
+
+
+def run(headless: bool = False) -> None:
+    """Run the app until it is stopped.
+
+    Args:
+        headless: Skip GTK, the tray and desktop notifications
+    """
+    # Imported here so subcommands start fast
+    from arch_whisper.app import App
+
     setup_logging()
     logger = logging.getLogger(__name__)
 
@@ -32,10 +196,11 @@ def main() -> None:
     config = load_config()
 
     # Initialize notifications early for preflight messages
-    init_notifications("arch-whisper")
+    if not headless:
+        init_notifications("arch-whisper")
 
     # Run preflight checks
-    missing = check_dependencies()
+    missing = check_dependencies(gui=not headless)
     if missing:
         msg = "Missing: " + ", ".join(missing)
         logger.warning(msg)
@@ -48,7 +213,7 @@ def main() -> None:
         logger.info("Feature %s: %s", feature, status)
 
     # Create application
-    app = App(config)
+    app = App(config, headless=headless)
 
     # Setup signal handlers for graceful shutdown
     def on_shutdown(signum: int, frame) -> None:
@@ -58,6 +223,8 @@ def main() -> None:
 
     signal.signal(signal.SIGINT, on_shutdown)
     signal.signal(signal.SIGTERM, on_shutdown)
+    # kill -USR1 <pid> profiles the next few utterances
+    signal.signal(signal.SIGUSR1, lambda signum, frame: app.start_profiling())
 
     # Run application
     try:
@@ -0,0 +1,179 @@
+"""Shared asyncio event loop for arch_whisper's I/O-bound work.
+
+GTK owns the main thread, so asyncio runs on one dedicated loop thread for
+the whole process. Claude requests, the output socket and clipboard
+restores all share it, instead of each starting its own loop or thread.
+Blocking code hands coroutines over with submit() or run(). A CancelToken
+passed to run() cancels the task, so cancellation reaches whatever the
+coroutine is awaiting: an HTTP request, a subprocess, a socket write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Callable, Coroutine, TypeVar
+
+from arch_whisper.cancel import Cancelled, CancelToken
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LoopThread:
+    """An asyncio event loop running in a daemon thread."""
+
+    def __init__(self, name: str = "asyncio") -> None:
+        """Create the loop; call start() to run it.
+
+        Args:
+            name: Thread name
+        """
+        self._name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, starting it on first use."""
+        if self._loop is None:
+            self.start()
+        assert self._loop is not None
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        """Whether the loop thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the loop thread and wait until it is running."""
+        if self.running:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        """Thread body: run the loop until stop()."""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Give cancelled tasks a chance to clean up
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            self._loop = None
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        """Schedule a coroutine on the loop from any thread.
+
+        Returns:
+            Future for the coroutine's result; cancelling it cancels the task
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(
+        self,
+        coro: Coroutine[Any, Any, T],
+        cancel: CancelToken | None = None,
+        timeout: float | None = None,
+    ) -> T:
+        """Run a coroutine on the loop and wait for its result.
+
+        Must not be called from the loop thread itself.
+
+        Args:
+            coro: Coroutine to run
+            cancel: Token that cancels the task
+            timeout: Longest wait in seconds; the task is cancelled after it
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            Cancelled: If the token was cancelled
+            TimeoutError: If the timeout expired
+        """
+        if cancel is not None and cancel.cancelled:
+            coro.close()
+            raise Cancelled()
+
+        future = self.submit(coro)
+        unregister = cancel.on_cancel(future.cancel) if cancel is not None else None
+        try:
+            return future.result(timeout)
+        except concurrent.futures.CancelledError:
+            raise Cancelled() from None
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Timed out after {timeout}s") from None
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Run a plain callback on the loop thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the loop, cancelling pending tasks."""
+        if not self.running or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        assert self._thread is not None
+        self._thread.join(timeout)
+        self._thread = None
+
+
+_default: LoopThread | None = None
+_default_lock = threading.Lock()
+
+
+def get_loop_thread() -> LoopThread:
+    """Get the process-wide loop thread, starting it on first use."""
+    global _default
+    with _default_lock:
+        if _default is None or not _default.running:
+            _default = LoopThread()
+            _default.start()
+        return _default
+
+
+def run(
+    coro: Coroutine[Any, Any, T],
+    cancel: CancelToken | None = None,
+    timeout: float | None = None,
+) -> T:
+    """Run a coroutine on the shared loop and wait for its result.
+
+    See LoopThread.run().
+    """
+    return get_loop_thread().run(coro, cancel, timeout)
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+    """Schedule a coroutine on the shared loop without waiting."""
+    return get_loop_thread().submit(coro)
+
+
+def shutdown() -> None:
+    """Stop the shared loop if it is running."""
+    global _default
+    with _default_lock:
+        if _default is not None:
+            _default.stop()
+            _default = None
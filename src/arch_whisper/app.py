@@ -2,30 +2,70 @@
 
 from __future__ import annotations
 
+import importlib
 import logging
+import os
+import queue
 import threading
+import time
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import TYPE_CHECKING
-
-import numpy as np
-import gi
-
-gi.require_version("Gtk", "3.0")
-from gi.repository import GLib, Gtk
+from typing import TYPE_CHECKING, Callable
 
 if TYPE_CHECKING:
-    from arch_whisper.config import Config
+    import numpy as np
 
-from arch_whisper.audio.player import play_ding
-from arch_whisper.audio.recorder import AudioRecorder
+    from arch_whisper.audio.recorder import AudioRecorder
+    from arch_whisper.audio.vad import SilenceTracker
+    from arch_whisper.config import Config
+    from arch_whisper.history import HistoryStore
+    from arch_whisper.paste.manager import PasteManager
+    from arch_whisper.postprocess.claude import ClaudePostProcessor
+    from arch_whisper.retranscribe import Retranscriber
+    from arch_whisper.status import StatusServer
+    from arch_whisper.transcription.remote import RemoteTranscriber, Upload
+    from arch_whisper.transcription.residency import ModelResidency
+    from arch_whisper.transcription.whisper import WhisperTranscriber
+    from arch_whisper.tray.indicator import TrayIndicator
+
+# Heavy modules (numpy, sounddevice, faster-whisper, Xlib) are imported by
+# _load_components() on a background thread once the tray and hotkeys are up
+from arch_whisper import aio, metrics, tracing
+from arch_whisper.audio import SAMPLE_RATE
+from arch_whisper.cancel import CancelToken
+from arch_whisper.hotkey.bindings import Action
 from arch_whisper.hotkey.manager import HotkeyManager
+from arch_whisper.mainloop import GtkMainLoop, Loop, MainLoop
 from arch_whisper.notifications import init_notifications, notify
-from arch_whisper.paste.manager import PasteManager
-from arch_whisper.transcription.whisper import WhisperTranscriber
-from arch_whisper.tray.indicator import TrayIndicator
+from arch_whisper.pipeline import Job, Pipeline, Stage
+from arch_whisper.profiling import Profiler
 
 logger = logging.getLogger(__name__)
 
+RECORD_MODES = ("push_to_talk", "toggle", "continuous")
+
+# Continuous mode: cut a segment at this length even without a pause
+# (Whisper decodes in 30 s windows)
+MAX_SEGMENT_SECONDS = 30.0
+
+# Recordings waiting for transcription before new ones are dropped
+MAX_QUEUED_RECORDINGS = 4
+
+# Concurrent Claude requests (network-bound, so they can overlap)
+CLEANUP_WORKERS = 2
+
+
+@dataclass
+class Utterance:
+    """A recording's text as it moves through the pipeline."""
+
+    raw_text: str  # Whisper's transcript
+    text: str  # After cleanup
+    audio_seconds: float
+    app: str | None = None  # Focused app when it was pasted
+    pasted: bool = False
+    audio: np.ndarray | None = field(default=None, repr=False)  # For re-transcription
+
 
 class AppState(Enum):
     """Application state for tray indicator."""
@@ -35,28 +75,87 @@ class AppState(Enum):
     PROCESSING = auto()
 
 
+def _job_status(job: Job) -> str:
+    """Outcome of a pipeline job, for its trace."""
+    if job.cancelled:
+        return "cancelled"
+    if job.error is not None:
+        return "error"
+    if job.skipped:
+        return "empty"
+    return "ok"
+
+
 class App:
     """Main application orchestrator."""
 
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, headless: bool = False) -> None:
         """Initialize the application.
 
         Args:
             config: Application configuration
+            headless: Run without GTK, tray or desktop notifications;
+                status goes to the log and the status socket
         """
         self._config = config
         self._state = AppState.IDLE
+        self._headless = headless
+
+        # Main thread loop: GTK with the tray, a plain queue headless
+        self._loop: Loop = MainLoop() if headless else GtkMainLoop()
 
-        # Initialize notifications
-        init_notifications("arch-whisper")
+        # Initialize notifications (headless, notify() only logs)
+        if not headless:
+            init_notifications("arch-whisper")
 
         # Components (initialized lazily or on run)
         self._tray: TrayIndicator | None = None
         self._hotkey_manager: HotkeyManager | None = None
         self._recorder: AudioRecorder | None = None
-        self._transcriber: WhisperTranscriber | None = None
-        self._postprocessor = None  # Optional, P1
+        self._transcriber: WhisperTranscriber | RemoteTranscriber | None = None
+        self._remote: RemoteTranscriber | None = None  # Set when transcribing remotely
+        self._residency: ModelResidency | None = None  # Local model only
+        self._postprocessor: ClaudePostProcessor | None = None  # Optional, P1
         self._paste_manager: PasteManager | None = None
+        self._status_server: StatusServer | None = None
+        self._retranscriber: Retranscriber | None = None  # Set with retranscribe_model
+        self._history: HistoryStore | None = None
+        self._last_text: str | None = None  # For re-paste when history is off
+        self._profiler = Profiler(SAMPLE_RATE)
+        self._ready = threading.Event()  # Set once _load_components() is done
+        self._started = time.time()
+
+        self._record_mode = config.record_mode
+        if self._record_mode not in RECORD_MODES:
+            logger.warning("Unknown record_mode %r, using push_to_talk", self._record_mode)
+            self._record_mode = "push_to_talk"
+
+        # Cancellation token of the current recording and its processing
+        self._job = CancelToken()
+        # Latency trace of the current recording
+        self._trace: tracing.Trace | None = None
+        # Remote transcription: the current recording, streamed as it is made
+        self._upload: Upload | None = None
+
+        # State is derived from these under _state_lock
+        self._state_lock = threading.RLock()
+        self._recording = False
+        self._inflight: dict[CancelToken, int] = {}  # Token -> jobs in the pipeline
+        self._pipeline: Pipeline | None = None
+
+        # Hands-free recording: "toggle" or "continuous" while active
+        self._hands_free_mode: str | None = None
+        self._silence: SilenceTracker | None = None
+
+        # (press, release) handlers for each hotkey action
+        self._hotkey_handlers: dict[Action, tuple[Callable[[], None] | None, ...]] = {
+            Action.RECORD: (self._on_record_press, self._on_record_release),
+            Action.TOGGLE: (self._on_toggle_press, None),
+            Action.CANCEL: (self._on_cancel_press, None),
+            # On release, so the combo's keys aren't held during the paste
+            Action.REPASTE: (None, self._on_repaste_release),
+            Action.HISTORY: (self._on_history_press, None),
+        }
 
     @property
     def state(self) -> AppState:
@@ -74,96 +173,540 @@ class App:
 
         if self._tray is not None:
             # Schedule UI update on GTK thread
-            GLib.idle_add(self._tray.set_state, state)
+            self._loop.call_soon(self._tray.set_state, state)
+
+    def _refresh_state(self) -> None:
+        """Derive the state from the recording flag and in-flight jobs."""
+        with self._state_lock:
+            if self._recording:
+                state = AppState.RECORDING
+            elif self._inflight:
+                state = AppState.PROCESSING
+            else:
+                state = AppState.IDLE
+            if state != self._state:
+                self._set_state(state)
+
+    def _transcribe_stage(self, audio: np.ndarray, cancel: CancelToken) -> Utterance | None:
+        """Pipeline stage: speech to text."""
+        assert self._transcriber is not None
+        text = self._transcriber.transcribe(audio, cancel)
+        if not text.strip():
+            logger.info("No speech detected, skipping paste")
+            return None
+        return Utterance(
+            raw_text=text,
+            text=text,
+            audio_seconds=audio.size / SAMPLE_RATE,
+            audio=audio if self._retranscriber is not None else None,
+        )
 
-    def _process_recording(self, audio: np.ndarray) -> None:
-        """Process recorded audio: transcribe, cleanup, paste.
+    def _cleanup_stage(self, utterance: Utterance, cancel: CancelToken) -> Utterance:
+        """Pipeline stage: optional Claude cleanup."""
+        if self._config.claude_enabled and self._postprocessor is not None:
+            if self._postprocessor.available:
+                utterance.text = self._postprocessor.process(utterance.raw_text, cancel)
+        return utterance
+
+    def _paste_stage(self, utterance: Utterance, cancel: CancelToken) -> Utterance:
+        """Pipeline stage: deliver text to the focused app."""
+        assert self._paste_manager is not None
+        utterance.pasted = self._paste_manager.paste(utterance.text, cancel)
+        utterance.app = self._paste_manager.last_app
+        if not utterance.pasted:
+            notify(
+                "Copied to clipboard",
+                "Paste simulation failed. Use Ctrl+V to paste.",
+            )
+        return utterance
+
+    def _remember(self, utterance: Utterance, timings: dict[str, float]) -> None:
+        """Keep a delivered transcript for re-paste, the history and re-transcription."""
+        self._last_text = utterance.text
+        history_id = None
+        if self._history is not None:
+            from arch_whisper.history import Entry
+
+            try:
+                history_id = self._history.add(
+                    Entry(
+                        raw_text=utterance.raw_text,
+                        text=utterance.text,
+                        app=utterance.app,
+                        pasted=utterance.pasted,
+                        audio_seconds=round(utterance.audio_seconds, 3),
+                        timings={name: round(t, 4) for name, t in timings.items()},
+                    )
+                )
+            except Exception as e:
+                logger.warning("Failed to save transcript to history: %s", e)
+        if self._retranscriber is not None and utterance.audio is not None:
+            self._retranscriber.add(utterance.audio, utterance.raw_text, history_id)
+
+    def _new_trace(self) -> tracing.Trace | None:
+        """Start a latency trace for a recording, if tracing is enabled."""
+        # Profiling finds its utterances by their trace
+        if self._config.trace_enabled or self._profiler.armed:
+            return tracing.Trace()
+        return None
+
+    def _finish_trace(self, trace: tracing.Trace, status: str) -> None:
+        """Log a finished utterance's trace and hand it to the profiler."""
+        if self._config.trace_enabled:
+            trace.finish(status=status)
+        session = self._profiler.complete(trace)
+        if session is not None:
+            notify("Profile saved", str(session))
+
+    def _submit(
+        self,
+        audio: np.ndarray,
+        cancel: CancelToken,
+        trace: tracing.Trace | None = None,
+    ) -> None:
+        """Queue recorded audio for processing.
 
         Args:
             audio: Recorded audio samples
+            cancel: Token for the job
+            trace: Latency trace of the recording
         """
-        self._set_state(AppState.PROCESSING)
+        if self._pipeline is None or audio.size == 0:
+            self._refresh_state()
+            return
+
+        if trace is not None:
+            trace.attrs["audio_seconds"] = round(audio.size / SAMPLE_RATE, 3)
+            trace.begin("processing")
 
+        self._profiler.claim(trace, audio)
+
+        with self._state_lock:
+            self._inflight[cancel] = self._inflight.get(cancel, 0) + 1
         try:
-            # Step 1: Transcribe
-            if self._transcriber is None:
-                logger.error("Transcriber not initialized")
+            # Audio can't wait, so a full queue drops it rather than blocking
+            # the hotkey or GTK thread
+            self._pipeline.submit(audio, cancel, block=False, trace=trace)
+        except queue.Full:
+            self._finish_job(cancel)
+            if trace is not None:
+                self._finish_trace(trace, "dropped")
+            logger.warning(
+                "Transcription is falling behind, dropping %.1fs of audio",
+                audio.size / SAMPLE_RATE,
+            )
+            notify("Still busy", "Recording dropped, transcription is falling behind.")
+        self._refresh_state()
+
+    def _finish_job(self, cancel: CancelToken) -> None:
+        """Stop counting a job as in flight."""
+        with self._state_lock:
+            count = self._inflight.get(cancel)
+            if count is None:
+                return  # Cancelled jobs were already forgotten
+            if count > 1:
+                self._inflight[cancel] = count - 1
+            else:
+                del self._inflight[cancel]
+
+    def _on_job_complete(self, job: Job) -> None:
+        """Report a finished pipeline job and update the state."""
+        if job.error is not None:
+            stage = (job.failed_stage or "processing").capitalize()
+            notify("Error", f"{stage} failed: {job.error}")
+        elif isinstance(job.value, Utterance) and not job.cancelled:
+            self._remember(job.value, job.timings)
+        if job.trace is not None:
+            job.trace.end("processing")
+            self._finish_trace(job.trace, _job_status(job))
+        self._finish_job(job.cancel)
+        self._refresh_state()
+
+    def _on_hotkey_press(self) -> None:
+        """Handle hotkey press - start recording."""
+        with self._state_lock:
+            if self._recording:
+                logger.debug("Already recording, ignoring hotkey press")
                 return
+            self._recording = True
+            self._job = CancelToken()
+            self._trace = trace = self._new_trace()
+            self._upload = upload = self._remote.upload() if self._remote is not None else None
+        self._refresh_state()
+        if self._retranscriber is not None:
+            # Give the cores back to dictation
+            self._retranscriber.interrupt()
+        if self._residency is not None:
+            # An unloaded model reloads while the user speaks
+            self._residency.touch()
 
-            text = self._transcriber.transcribe(audio)
+        if self._config.ding_enabled:
+            from arch_whisper.audio.player import play_ding
 
-            if not text.strip():
-                logger.info("No speech detected, skipping paste")
-                return
+            play_ding(self._config.assets_dir)
 
-            # Step 2: Optional Claude cleanup
-            if self._config.claude_enabled and self._postprocessor is not None:
-                if self._postprocessor.available:
-                    text = self._postprocessor.process(text)
+        if self._recorder is not None:
+            on_block = self._on_audio_block if self._hands_free_mode else None
+            job = self._job
+            self._recorder.start(
+                on_block,
+                on_limit=lambda: self._loop.call_soon(self._stop_at_limit, job),
+                # Continuous mode cuts segments, so only it keeps a rolling window
+                rolling=self._hands_free_mode == "continuous",
+                feed=upload.feed if upload is not None else None,
+            )
+            if trace is not None:
+                trace.add_span("stream_start", trace.t0, time.perf_counter())
 
-            # Step 3: Paste
-            if self._paste_manager is None:
-                logger.error("Paste manager not initialized")
-                notify("Error", "Paste manager not available")
+    def _on_hotkey_release(self) -> None:
+        """Handle hotkey release - stop recording and process."""
+        with self._state_lock:
+            if not self._recording:
+                logger.debug("Not recording, ignoring hotkey release")
                 return
+            self._recording = False
+            trace, self._trace = self._trace, None
+            upload, self._upload = self._upload, None
 
-            success = self._paste_manager.paste(text)
+        if self._recorder is None:
+            self._refresh_state()
+            return
 
-            if not success:
-                notify(
-                    "Copied to clipboard",
-                    "Paste simulation failed. Use Ctrl+V to paste.",
-                )
+        first_block_at = self._recorder.first_block_at
+        audio = self._recorder.stop()
+        if upload is not None:
+            upload.end()
+        if trace is not None:
+            released = time.perf_counter()
+            if first_block_at is not None:
+                trace.add_span("first_block", trace.t0, first_block_at)
+            trace.add_span("recording", trace.t0, released)
+        self._submit(audio, self._job, trace)
+
+    def _stop_at_limit(self, job: CancelToken) -> None:
+        """Stop a recording that reached max_record_seconds and process it."""
+        with self._state_lock:
+            if not self._recording or self._job is not job:
+                return  # Already stopped, or a newer recording
+        notify(
+            "Recording stopped",
+            f"Reached the {self._config.max_record_seconds:.0f}s limit (max_record_seconds).",
+        )
+        if self._hands_free_mode is not None:
+            self._stop_hands_free()
+        else:
+            self._on_hotkey_release()
+
+    def _on_record_press(self) -> None:
+        """Handle the record binding being pressed."""
+        if self._hands_free_mode is not None:
+            self._stop_hands_free()
+        elif self._record_mode == "push_to_talk":
+            self._on_hotkey_press()
+        else:
+            self._start_hands_free(self._record_mode)
+
+    def _on_record_release(self) -> None:
+        """Handle the record binding being released."""
+        if self._hands_free_mode is None:
+            self._on_hotkey_release()
+
+    def _on_toggle_press(self) -> None:
+        """Start or stop hands-free recording."""
+        if self._hands_free_mode is not None:
+            self._stop_hands_free()
+        else:
+            mode = "continuous" if self._record_mode == "continuous" else "toggle"
+            self._start_hands_free(mode)
+
+    def _start_hands_free(self, mode: str) -> None:
+        """Start recording until tapped again or stopped by silence.
 
-        except Exception as e:
-            logger.error("Processing failed: %s", e)
-            notify("Error", f"Processing failed: {e}")
+        Args:
+            mode: "toggle" for one recording, "continuous" to transcribe
+                each segment at pauses while recording carries on
+        """
+        if self._recording:
+            logger.debug("Already recording, ignoring hands-free start")
+            return
 
-        finally:
-            self._set_state(AppState.IDLE)
+        logger.info("Hands-free recording (%s)", mode)
+        self._hands_free_mode = mode
+        if self._silence is not None:
+            self._silence.reset()
+        self._on_hotkey_press()
+
+    def _stop_hands_free(self) -> None:
+        """Stop hands-free recording and process what is left."""
+        mode, self._hands_free_mode = self._hands_free_mode, None
+        if mode is not None:
+            self._on_hotkey_release()
+
+    def _on_cancel_press(self) -> None:
+        """Abort the current recording and in-flight jobs."""
+        with self._state_lock:
+            if not self._recording and not self._inflight:
+                return
+            self._recording = False
+            self._hands_free_mode = None
+            tokens = [self._job, *self._inflight]
+            self._inflight.clear()
+            self._trace = None
+            upload, self._upload = self._upload, None
+
+        logger.info("Cancelling recording and %d jobs", len(tokens) - 1)
+        if upload is not None:
+            upload.abort()
+        for token in tokens:
+            token.cancel()
+        if self._recorder is not None and self._recorder.is_recording:
+            self._recorder.stop()  # Audio is discarded
+        self._refresh_state()
 
-    def _on_hotkey_press(self) -> None:
-        """Handle hotkey press - start recording."""
-        if self._state != AppState.IDLE:
-            logger.debug("Not idle, ignoring hotkey press")
+    def _paste_again(self, text: str) -> None:
+        """Thread body: paste a transcript from the history."""
+        if self._paste_manager is None:
             return
+        metrics.inc("history_repastes_total")
+        if not self._paste_manager.paste(text):
+            notify("Copied to clipboard", "Paste simulation failed. Use Ctrl+V to paste.")
+
+    def repaste(self, text: str) -> None:
+        """Paste text again without transcribing it, off the calling thread."""
+        threading.Thread(
+            target=self._paste_again, args=(text,), name="repaste", daemon=True
+        ).start()
+
+    def _on_repaste_release(self) -> None:
+        """Paste the last transcript again."""
+        text = self._last_text
+        if self._history is not None:
+            try:
+                entry = self._history.last()
+            except Exception as e:
+                logger.warning("History unavailable: %s", e)
+            else:
+                text = entry.text if entry is not None else text
+        if not text:
+            notify("Nothing to paste", "No transcript yet.")
+            return
+        self.repaste(text)
 
-        self._set_state(AppState.RECORDING)
+    def _on_history_press(self) -> None:
+        """Open the history picker (on the main thread)."""
+        if self._history is None:
+            notify("History", "Transcript history is disabled.")
+            return
+        if self._tray is None:
+            logger.info("The history picker needs the desktop; use `arch-whisper history`")
+            return
+        self._loop.call_soon(self._show_history_picker)
 
-        if self._config.ding_enabled:
-            play_ding(self._config.assets_dir)
+    def _show_history_picker(self) -> None:
+        """Show the searchable history; the chosen transcript is pasted."""
+        from arch_whisper.tray.picker import HistoryPicker
 
-        if self._recorder is not None:
-            self._recorder.start()
+        assert self._history is not None
+        HistoryPicker(self._history, on_pick=self.repaste).show()
 
-    def _on_hotkey_release(self) -> None:
-        """Handle hotkey release - stop recording and process."""
-        if self._state != AppState.RECORDING:
-            logger.debug("Not recording, ignoring hotkey release")
+    def _on_audio_block(self, block: np.ndarray) -> None:
+        """Check each recorder block for pauses (runs on the audio thread)."""
+        silence = self._silence
+        if silence is None or self._hands_free_mode is None:
+            return
+        silence.feed(block)
+        mode = self._hands_free_mode
+
+        if mode == "continuous":
+            paused = silence.heard_speech and silence.trailing_silence >= self._config.segment_silence
+            too_long = self._recorder is not None and (
+                self._recorder.buffered_seconds >= MAX_SEGMENT_SECONDS
+            )
+            if paused or too_long:
+                silence.reset()
+                self._loop.call_soon(self._cut_segment)
+
+        elif mode == "toggle":
+            timeout = self._config.silence_timeout
+            if timeout > 0 and silence.heard_speech and silence.trailing_silence >= timeout:
+                silence.reset()
+                logger.info("Stopping after %.1fs of silence", timeout)
+                self._loop.call_soon(self._stop_hands_free)
+
+    def _cut_segment(self) -> None:
+        """Send the audio so far for processing and keep recording."""
+        if self._hands_free_mode != "continuous" or self._recorder is None:
+            return
+        # The next segment gets its own trace, starting at this cut
+        with self._state_lock:
+            trace, self._trace = self._trace, self._new_trace()
+            upload = self._upload
+            remote = self._remote
+            self._upload = next_upload = remote.upload() if remote is not None else None
+        # The recorder switches uploads at the same block it cuts the audio
+        audio = self._recorder.take(feed=next_upload.feed if next_upload is not None else None)
+        if upload is not None:
+            upload.end()
+        if trace is not None:
+            trace.add_span("recording", trace.t0, time.perf_counter())
+        self._submit(audio, self._job, trace)
+
+    def _on_hotkey_modifiers(self) -> None:
+        """The record binding's modifiers went down; the key may follow."""
+        residency = self._residency
+        if residency is not None:
+            residency.prime()
+
+    def _on_hotkey_event(self, action: Action, pressed: bool) -> None:
+        """Dispatch a binding press or release to its handler.
+
+        Runs on the listener thread, so it never waits for startup: presses
+        before the components have loaded are dropped with a notification.
+        """
+        if not self._ready.is_set():
+            if pressed:
+                logger.warning("Still starting up, ignoring hotkey")
+                notify("Still starting up", "Try again in a moment.")
+            return
+        handlers = self._hotkey_handlers.get(action)
+        if handlers is None:
+            logger.debug("No handler for hotkey action %s", action.name)
             return
+        handler = handlers[0] if pressed else handlers[1]
+        if handler is not None:
+            handler()
+
+    def status(self) -> dict:
+        """Build the status document served on the status socket."""
+        counters = metrics.counters()
+
+        def ratio(hits: float, misses: float) -> float | None:
+            return hits / (hits + misses) if hits + misses else None
+
+        hits = counters.get("paste_strategy_hits_total", 0.0)
+        misses = counters.get("paste_strategy_misses_total", 0.0)
+        postprocessor = self._postprocessor
+
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "state": self._state.name.lower(),
+            "record_mode": self._record_mode,
+            "rss_bytes": metrics.rss_bytes(),
+            "model": {
+                "name": self._config.whisper_model,
+                "loaded": self._transcriber is not None and self._transcriber.loaded,
+            },
+            "queue": {
+                "outstanding": self._pipeline.outstanding if self._pipeline else 0,
+            },
+            "retranscribe": self._retranscribe_status(),
+            "audio": {"xruns": counters.get("audio_xruns_total", 0.0)},
+            "caches": {
+                "paste_strategy": {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": ratio(hits, misses),
+                },
+            },
+            "claude": {
+                "enabled": self._config.claude_enabled,
+                "available": postprocessor is not None and postprocessor.available,
+                "errors": counters.get("claude_errors_total", 0.0),
+                "last_error": getattr(postprocessor, "last_error", None),
+            },
+            "latency": {
+                name: {"count": h.count, "mean": h.total / h.count if h.count else None}
+                for name, h in metrics.histograms().items()
+            },
+        }
+
+    def _retranscribe_status(self) -> dict | None:
+        """Re-transcription model and jobs per state, if enabled."""
+        retranscriber = self._retranscriber
+        if retranscriber is None:
+            return None
+        store = retranscriber.store
+        return {
+            "model": self._config.retranscribe_model,
+            "jobs": store.counts() if store is not None else {},
+        }
+
+    def _busy(self) -> bool:
+        """Whether a recording is being made or processed."""
+        with self._state_lock:
+            return self._recording or bool(self._inflight)
+
+    def start_profiling(self) -> None:
+        """Profile the next few utterances (SIGUSR1 or the tray menu)."""
+        count = self._config.profile_utterances
+        session = self._profiler.arm(count)
+        if session is None:
+            notify("Profiling", "A profile is already being recorded.")
+            return
+        noun = "recording" if count == 1 else f"{count} recordings"
+        notify("Profiling", f"Profiling the next {noun}.")
 
-        if self._recorder is None:
-            self._set_state(AppState.IDLE)
+    def _start_status_server(self) -> None:
+        """Publish gauges and serve metrics and status on a Unix socket."""
+        from arch_whisper.status import StatusServer
+
+        transcriber, pipeline = self._transcriber, self._pipeline
+        metrics.gauge("whisper_model_loaded", lambda: bool(transcriber and transcriber.loaded))
+        metrics.gauge("pipeline_jobs_outstanding", lambda: pipeline.outstanding if pipeline else 0)
+        metrics.gauge("recording", lambda: self._recording)
+        try:
+            self._status_server = StatusServer(self.status)
+        except OSError as e:
+            logger.warning("Status socket unavailable: %s", e)
             return
+        if not self._status_server.start():
+            self._status_server = None
 
-        audio = self._recorder.stop()
+    def _load_components(self) -> None:
+        """Import and create the audio, transcription and paste components.
 
-        # Process in background thread to keep GTK responsive
-        thread = threading.Thread(
-            target=self._process_recording,
-            args=(audio,),
-            daemon=True,
+        Runs on a background thread so the tray and hotkey listener come up
+        without waiting for numpy, sounddevice and faster-whisper to import.
+        Hotkey presses in the meantime are ignored.
+        """
+        from arch_whisper.audio.recorder import AudioRecorder
+        from arch_whisper.audio.vad import SilenceTracker
+        from arch_whisper.paste.manager import PasteManager
+        from arch_whisper.transcription.whisper import WhisperTranscriber
+
+        self._recorder = AudioRecorder(max_seconds=self._config.max_record_seconds)
+        self._silence = SilenceTracker(
+            sample_rate=SAMPLE_RATE,
+            threshold=self._config.vad_threshold,
         )
-        thread.start()
+        if self._config.remote_transcriber:
+            from arch_whisper.transcription.remote import RemoteTranscriber
+
+            self._transcriber = self._remote = RemoteTranscriber(self._config)
+        else:
+            from arch_whisper.transcription.residency import ModelResidency
+
+            self._transcriber = WhisperTranscriber(self._config)
+            self._residency = ModelResidency(
+                self._transcriber,
+                idle_seconds=self._config.model_idle_unload,
+                preload=self._config.model_preload,
+            )
+            self._residency.start()
+        self._paste_manager = PasteManager(self._config)
+        if self._config.history_enabled:
+            from arch_whisper.history import HistoryStore
 
-    def run(self) -> None:
-        """Start the application."""
-        logger.info("Starting arch-whisper")
-
-        # Initialize components
-        self._recorder = AudioRecorder()
-        self._transcriber = WhisperTranscriber(self._config)
-        self._paste_manager = PasteManager()
+            try:
+                self._history = HistoryStore(
+                    max_entries=self._config.history_max_entries,
+                    max_days=self._config.history_max_days,
+                )
+            except Exception as e:
+                logger.warning("Transcript history unavailable: %s", e)
+        # So the first ding doesn't wait on importing the player
+        importlib.import_module("arch_whisper.audio.player")
 
         # Optional Claude postprocessor
         if self._config.claude_enabled:
@@ -174,24 +717,86 @@ class App:
             except Exception as e:
                 logger.warning("Claude postprocessor unavailable: %s", e)
 
-        # Initialize tray
-        self._tray = TrayIndicator(
-            on_quit=self.stop,
-            assets_dir=self._config.assets_dir,
+        self._build_pipeline()
+
+        if self._config.retranscribe_model:
+            from arch_whisper.retranscribe import Retranscriber
+
+            self._retranscriber = Retranscriber(
+                self._config, busy=self._busy, history=self._history
+            )
+            self._retranscriber.start()
+
+        if self._config.status_enabled:
+            self._start_status_server()
+
+        self._ready.set()
+        self._transcriber.prewarm()
+        logger.info("Components loaded")
+
+    def _build_pipeline(self) -> None:
+        """Start the transcribe -> cleanup -> paste workers."""
+        # Long-lived workers; consecutive recordings overlap across stages
+        self._pipeline = Pipeline(
+            [
+                Stage(
+                    "transcribe",
+                    self._profiler.wrap("transcribe", self._transcribe_stage),
+                    # One per model replica; the paste stage restores order
+                    workers=max(1, self._config.whisper_workers),
+                    queue_size=MAX_QUEUED_RECORDINGS,
+                ),
+                Stage(
+                    "cleanup",
+                    self._profiler.wrap("cleanup", self._cleanup_stage),
+                    workers=CLEANUP_WORKERS,
+                ),
+                Stage("paste", self._profiler.wrap("paste", self._paste_stage), ordered=True),
+            ],
+            on_complete=self._on_job_complete,
+            name="process",
         )
+        self._pipeline.start()
+
+    def _prewarm(self) -> None:
+        """Thread body: load components, reporting failures."""
+        try:
+            self._load_components()
+        except Exception as e:
+            logger.exception("Failed to load components: %s", e)
+            notify("Error", f"Failed to start: {e}")
+            # Don't leave hotkeys waiting; handlers skip missing components
+            self._ready.set()
+
+    def run(self) -> None:
+        """Start the application."""
+        logger.info("Starting arch-whisper")
+
+        # Shared event loop for Claude requests, IPC and clipboard restores
+        aio.get_loop_thread()
+
+        if not self._headless:
+            from arch_whisper.tray.indicator import TrayIndicator
+
+            self._tray = TrayIndicator(
+                on_quit=self.stop,
+                assets_dir=self._config.assets_dir,
+                on_profile=self.start_profiling,
+                on_history=self._on_history_press,
+            )
 
         # Initialize hotkey manager
         self._hotkey_manager = HotkeyManager(self._config)
-        self._hotkey_manager.start(
-            on_press=self._on_hotkey_press,
-            on_release=self._on_hotkey_release,
-        )
+        self._hotkey_manager.start(self._on_hotkey_event, self._on_hotkey_modifiers)
+
+        # Everything else loads in the background
+        threading.Thread(target=self._prewarm, name="prewarm", daemon=True).start()
 
         logger.info("Application ready. Press %s to record.", self._config.hotkey)
-        notify("Arch Whisper", f"Ready. Hold {self._config.hotkey} to record.")
+        verb = "Hold" if self._record_mode == "push_to_talk" else "Tap"
+        notify("Arch Whisper", f"Ready. {verb} {self._config.hotkey} to record.")
 
-        # Start GTK main loop
-        Gtk.main()
+        self._loop.run()
 
     def stop(self) -> None:
         """Stop the application gracefully."""
@@ -201,9 +806,31 @@ class App:
         if self._hotkey_manager is not None:
             self._hotkey_manager.stop()
 
-        # Stop any active recording
-        if self._recorder is not None and self._recorder.is_recording:
-            self._recorder.stop()
+        # Stop any active recording and abandon queued jobs
+        self._on_cancel_press()
+        if self._pipeline is not None:
+            self._pipeline.close(timeout=1.0)
+        self._profiler.cancel()
+
+        if self._remote is not None:
+            self._remote.close()
+
+        if self._retranscriber is not None:
+            self._retranscriber.stop()
+
+        if self._residency is not None:
+            self._residency.stop()
+
+        if self._history is not None:
+            self._history.close()
+
+        # Remove output sink sockets and FIFOs
+        if self._paste_manager is not None:
+            self._paste_manager.close()
+
+        if self._status_server is not None:
+            self._status_server.stop()
+
+        aio.shutdown()
 
-        # Quit GTK
-        GLib.idle_add(Gtk.main_quit)
+        self._loop.quit()
@@ -1 +1,3 @@
 """audio package."""
+
+SAMPLE_RATE = 16000  # Whisper requirement
@@ -0,0 +1,115 @@
+"""Audio file decoding for batch transcription.
+
+Files are read with soundfile a block at a time, downmixed to mono and
+resampled to 16 kHz as they stream in, so a long multichannel recording
+never sits in memory at its original rate. Resampling is a low-pass FIR
+(when downsampling) followed by linear interpolation, both carrying their
+state across blocks so block boundaries leave no seams.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+
+from arch_whisper.audio import SAMPLE_RATE
+
+BLOCK_FRAMES = 1 << 16  # Frames decoded per soundfile read
+
+# Anti-aliasing filter: taps, and cutoff as a fraction of the output Nyquist
+FILTER_TAPS = 101
+FILTER_CUTOFF = 0.9
+
+
+def lowpass_taps(cutoff: float, taps: int = FILTER_TAPS) -> np.ndarray:
+    """Hamming-windowed sinc low-pass filter.
+
+    Args:
+        cutoff: Cutoff in cycles per sample (0 to 0.5)
+        taps: Filter length (odd)
+
+    Returns:
+        Filter coefficients with unity gain at DC
+    """
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+class Resampler:
+    """Streaming resampler from one sample rate to another."""
+
+    def __init__(self, rate_in: int, rate_out: int = SAMPLE_RATE) -> None:
+        """Initialize the resampler.
+
+        Args:
+            rate_in: Sample rate of the input blocks
+            rate_out: Sample rate to produce
+        """
+        self._step = rate_in / rate_out  # Input samples per output sample
+        self._taps: np.ndarray | None = None
+        self._history = np.zeros(0, dtype=np.float32)  # Filter input carried over
+        if rate_in > rate_out:
+            self._taps = lowpass_taps(FILTER_CUTOFF * rate_out / rate_in / 2)
+            self._history = np.zeros(len(self._taps) - 1, dtype=np.float32)
+        self._tail = np.zeros(0, dtype=np.float32)  # Last input sample
+        self._pos = 0.0  # Next output position, relative to the tail
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample the next block.
+
+        Args:
+            block: Mono float32 samples at the input rate
+
+        Returns:
+            Samples at the output rate (may be empty for tiny blocks)
+        """
+        block = block.astype(np.float32, copy=False)
+        if self._step == 1:
+            return block
+
+        if self._taps is not None:
+            padded = np.concatenate([self._history, block])
+            self._history = padded[len(padded) - len(self._history):]
+            block = np.convolve(padded, self._taps, mode="valid").astype(np.float32)
+
+        x = np.concatenate([self._tail, block])
+        last = len(x) - 1
+        if last < 0:
+            return block
+        count = max(0, math.ceil((last - self._pos) / self._step))
+        positions = self._pos + self._step * np.arange(count)
+        out = np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+
+        self._pos += self._step * count - last
+        self._tail = x[last:]
+        return out
+
+
+def load_audio(path: str | Path, block_frames: int = BLOCK_FRAMES) -> np.ndarray:
+    """Decode an audio file to mono float32 at 16 kHz.
+
+    Args:
+        path: Any file libsndfile reads (WAV, FLAC, Ogg/Opus, MP3, ...)
+        block_frames: Frames decoded per read
+
+    Returns:
+        Samples ready for transcription
+
+    Raises:
+        soundfile.LibsndfileError: If the file can't be decoded
+    """
+    import soundfile
+
+    info = soundfile.info(str(path))
+    resampler = Resampler(info.samplerate)
+    chunks = []
+    for block in soundfile.blocks(
+        str(path), blocksize=block_frames, dtype="float32", always_2d=True
+    ):
+        chunks.append(resampler.process(block.mean(axis=1)))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks)
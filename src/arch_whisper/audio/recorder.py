@@ -4,30 +4,51 @@ from __future__ import annotations
 
 import logging
 import threading
+import time
+from collections import deque
+from typing import Callable
 
 import numpy as np
 import sounddevice as sd
 
+from arch_whisper import metrics
+from arch_whisper.audio import SAMPLE_RATE
+
 logger = logging.getLogger(__name__)
 
 
 class AudioRecorder:
     """Thread-safe audio recorder from the default microphone."""
 
-    SAMPLE_RATE = 16000  # Whisper requirement
+    SAMPLE_RATE = SAMPLE_RATE
     CHANNELS = 1  # Mono
+    MAX_SECONDS = 300.0
 
-    def __init__(self, sample_rate: int = SAMPLE_RATE) -> None:
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        max_seconds: float = MAX_SECONDS,
+    ) -> None:
         """Initialize the recorder.
 
         Args:
             sample_rate: Audio sample rate in Hz (default: 16000 for Whisper)
+            max_seconds: Longest recording; see start() for what happens
+                beyond it
         """
         self._sample_rate = sample_rate
-        self._buffer: list[np.ndarray] = []
+        self._max_samples = int(sample_rate * max_seconds)
+        self._buffer: deque[np.ndarray] = deque()
+        self._buffered = 0  # Samples in _buffer
         self._stream: sd.InputStream | None = None
         self._lock = threading.Lock()
         self._recording = False
+        self._on_block: Callable[[np.ndarray], None] | None = None
+        self._feed: Callable[[np.ndarray], None] | None = None  # Current segment's sink
+        self._on_limit: Callable[[], None] | None = None
+        self._rolling = False
+        self._limited = False  # Reached max_seconds and stopped capturing
+        self._first_block_at: float | None = None
 
     @property
     def is_recording(self) -> bool:
@@ -35,6 +56,18 @@ class AudioRecorder:
         with self._lock:
             return self._recording
 
+    @property
+    def buffered_seconds(self) -> float:
+        """Seconds of audio captured since start() or the last take()."""
+        with self._lock:
+            return self._buffered / self._sample_rate
+
+    @property
+    def first_block_at(self) -> float | None:
+        """perf_counter() time the first block of this recording arrived."""
+        with self._lock:
+            return self._first_block_at
+
     def _audio_callback(
         self,
         indata: np.ndarray,
@@ -44,20 +77,73 @@ class AudioRecorder:
     ) -> None:
         """Callback for audio stream - stores chunks in buffer."""
         if status:
+            # Input overflow/underflow: audio was lost between us and the device
+            metrics.inc("audio_xruns_total")
             logger.warning("Audio callback status: %s", status)
+        block = indata[:, 0].copy()
         with self._lock:
-            if self._recording:
-                self._buffer.append(indata.copy())
+            if not self._recording:
+                return
+            if self._first_block_at is None:
+                self._first_block_at = time.perf_counter()
+            on_limit = None
+            if not self._rolling and self._buffered + len(block) > self._max_samples:
+                if self._limited:
+                    return
+                # Keep what was said, drop what comes after, and say so once
+                self._limited = True
+                on_limit = self._on_limit
+                block = block[: max(0, self._max_samples - self._buffered)]
+            self._buffer.append(block)
+            self._buffered += len(block)
+            while self._buffered > self._max_samples and len(self._buffer) > 1:
+                self._buffered -= len(self._buffer.popleft())
+            # Under the lock, so take() can't split a block from its segment
+            if self._feed is not None and len(block):
+                self._feed(block)
+            on_block = self._on_block
+
+        if on_block is not None and len(block):
+            on_block(block)
+        if on_limit is not None:
+            seconds = self._max_samples / self._sample_rate
+            logger.warning("Recording reached the %.0fs limit, stopping", seconds)
+            on_limit()
+
+    def start(
+        self,
+        on_block: Callable[[np.ndarray], None] | None = None,
+        on_limit: Callable[[], None] | None = None,
+        rolling: bool = False,
+        feed: Callable[[np.ndarray], None] | None = None,
+    ) -> None:
+        """Start recording audio from the microphone.
 
-    def start(self) -> None:
-        """Start recording audio from the microphone."""
+        Args:
+            on_block: Called from the audio thread with each new block of
+                mono samples; must be quick
+            on_limit: Called once from the audio thread when the recording
+                reaches max_seconds; later audio is not captured
+            rolling: Drop the oldest audio beyond max_seconds instead of
+                stopping, for recordings that take() segments as they go
+            feed: Called with each block that goes into the buffer, under
+                the recorder's lock, so it sees exactly the audio stop() or
+                take() returns; must be quicker still (e.g. a queue put)
+        """
         with self._lock:
             if self._recording:
                 logger.warning("Already recording, ignoring start()")
                 return
 
-            self._buffer = []
+            self._buffer = deque()
+            self._buffered = 0
             self._recording = True
+            self._on_block = on_block
+            self._on_limit = on_limit
+            self._feed = feed
+            self._rolling = rolling
+            self._limited = False
+            self._first_block_at = None
 
         try:
             self._stream = sd.InputStream(
@@ -85,8 +171,12 @@ class AudioRecorder:
             if not self._recording:
                 return np.array([], dtype=np.float32)
             self._recording = False
-            buffer_copy = self._buffer.copy()
-            self._buffer = []
+            self._on_block = None
+            self._on_limit = None
+            self._feed = None
+            buffer_copy = list(self._buffer)
+            self._buffer = deque()
+            self._buffered = 0
 
         # Close stream outside lock
         if self._stream is not None:
@@ -101,5 +191,26 @@ class AudioRecorder:
         if not buffer_copy:
             return np.array([], dtype=np.float32)
 
-        audio = np.concatenate(buffer_copy, axis=0)
-        return audio.flatten()
+        return np.concatenate(buffer_copy)
+
+    def take(self, feed: Callable[[np.ndarray], None] | None = None) -> np.ndarray:
+        """Return the audio captured so far and keep recording.
+
+        Args:
+            feed: Replaces start()'s feed for the audio after this point; the
+                switch and the cut happen together, so every block goes to
+                the feed of the segment it ends up in
+
+        Returns:
+            Numpy array of audio samples (float32, mono)
+        """
+        with self._lock:
+            buffer_copy = list(self._buffer)
+            self._buffer = deque()
+            self._buffered = 0
+            self._feed = feed
+
+        if not buffer_copy:
+            return np.array([], dtype=np.float32)
+
+        return np.concatenate(buffer_copy)
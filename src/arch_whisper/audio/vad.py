@@ -0,0 +1,80 @@
+"""Energy-based voice activity detection for hands-free recording.
+
+Runs in the audio callback on every recorder block, so it sticks to one
+vectorized RMS pass per block: the block is split into short frames and a
+frame counts as speech when its RMS level is above a threshold.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+FRAME_SECONDS = 0.02
+SPEECH_THRESHOLD = 0.01  # RMS of float32 samples in [-1, 1]
+
+
+def frame_rms(block: np.ndarray, frame_length: int) -> np.ndarray:
+    """RMS level of each frame in a block.
+
+    A block shorter than one frame is treated as a single frame; a trailing
+    partial frame is dropped.
+
+    Args:
+        block: Mono float32 samples
+        frame_length: Samples per frame
+
+    Returns:
+        One RMS value per frame
+    """
+    count = len(block) // frame_length
+    if count == 0:
+        if len(block) == 0:
+            return np.empty(0, dtype=np.float32)
+        frames = block.reshape(1, -1)
+    else:
+        frames = block[: count * frame_length].reshape(count, frame_length)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frames.shape[1])
+
+
+class SilenceTracker:
+    """Tracks whether speech was heard and how long it has been quiet since."""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        threshold: float = SPEECH_THRESHOLD,
+        frame_seconds: float = FRAME_SECONDS,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            sample_rate: Audio sample rate in Hz
+            threshold: RMS level above which a frame counts as speech
+            frame_seconds: Frame length for the energy check
+        """
+        self._sample_rate = sample_rate
+        self._threshold = threshold
+        self._frame_length = max(1, int(sample_rate * frame_seconds))
+        self.heard_speech = False
+        self.trailing_silence = 0.0  # Seconds since the last speech frame
+
+    def feed(self, block: np.ndarray) -> None:
+        """Update state with the next block of audio.
+
+        Args:
+            block: Mono float32 samples
+        """
+        speech = frame_rms(block, self._frame_length) > self._threshold
+        if not speech.any():
+            self.trailing_silence += len(block) / self._sample_rate
+            return
+
+        last = len(speech) - 1 - int(np.argmax(speech[::-1]))
+        speech_end = min(len(block), (last + 1) * self._frame_length)
+        self.heard_speech = True
+        self.trailing_silence = (len(block) - speech_end) / self._sample_rate
+
+    def reset(self) -> None:
+        """Start over, as if nothing had been heard."""
+        self.heard_speech = False
+        self.trailing_silence = 0.0
@@ -0,0 +1,355 @@
+"""Batch transcription of audio files.
+
+`arch-whisper transcribe PATH...` runs voice memos and other recordings
+through the same Whisper model and Claude cleanup settings as the live
+hotkey. Files fan out across worker threads sharing one WhisperTranscriber
+whose model has a replica per worker (CTranslate2 num_workers), so the
+weights are loaded once; the cores are split between the replicas, since
+one with every core scales worse than several with a few each. Batch
+decodes run at background priority and leave a replica free for the
+hotkey when both share a transcriber.
+
+Outputs are written next to each file (or into --output-dir) and only
+once a file is finished, atomically, so an interrupted run resumes by
+skipping files whose outputs all exist. They are named after the file's
+stem; files that would share one (memo.flac and memo.ogg, or a/x.wav and
+b/x.wav with --output-dir) keep their suffix and, if that is not enough,
+the directories that tell them apart.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from arch_whisper.audio import SAMPLE_RATE
+
+if TYPE_CHECKING:
+    from arch_whisper.cancel import CancelToken
+    from arch_whisper.config import Config
+    from arch_whisper.postprocess.claude import ClaudePostProcessor
+    from arch_whisper.transcription.whisper import Segment, WhisperTranscriber
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("txt", "json", "srt")
+
+# Extensions picked up when a directory is given (what libsndfile decodes)
+AUDIO_SUFFIXES = frozenset(
+    {".wav", ".flac", ".ogg", ".oga", ".opus", ".mp3", ".aiff", ".aif", ".caf"}
+)
+
+# Threads per replica when the worker count isn't given; CTranslate2 gains
+# little per utterance beyond this
+THREADS_PER_WORKER = 4
+
+
+@dataclass
+class FileResult:
+    """Transcription of one file."""
+
+    path: str
+    duration: float  # Seconds of audio
+    segments: list[Segment]
+    text: str  # Joined segments, after cleanup if enabled
+    elapsed: float  # Seconds spent decoding, transcribing and cleaning up
+
+
+def cpu_count() -> int:
+    """Cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(cores: int) -> int:
+    """Workers (model replicas) to use when none are configured."""
+    return max(1, cores // THREADS_PER_WORKER)
+
+
+def worker_threads(workers: int, cores: int) -> int:
+    """Whisper threads per replica so the replicas share the cores."""
+    return max(1, cores // max(1, workers))
+
+
+def find_inputs(paths: list[str | Path]) -> list[Path]:
+    """Expand directories into the audio files under them.
+
+    Args:
+        paths: Files and directories from the command line
+
+    Returns:
+        Files in command-line order, each directory's files sorted
+    """
+    found: list[Path] = []
+    seen: set[Path] = set()
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files = sorted(
+                p for p in path.rglob("*")
+                if p.is_file() and p.suffix.lower() in AUDIO_SUFFIXES
+            )
+        else:
+            files = [path]
+        for file in files:
+            key = file.resolve()
+            if key not in seen:
+                seen.add(key)
+                found.append(file)
+    return found
+
+
+def output_bases(files: list[Path], output_dir: Path | None = None) -> dict[Path, Path]:
+    """Choose where each file's outputs go, without two files sharing one.
+
+    Args:
+        files: Inputs, as returned by find_inputs()
+        output_dir: Directory for outputs instead of next to each file
+
+    Returns:
+        Each file mapped to its output path minus the format extension
+
+    Raises:
+        ValueError: If two files would still write the same outputs
+    """
+    groups: defaultdict[Path, list[Path]] = defaultdict(list)
+    for path in files:
+        groups[(output_dir or path.parent) / path.stem].append(path)
+
+    bases: dict[Path, Path] = {}
+    for base, group in groups.items():
+        if len(group) == 1:
+            bases[group[0]] = base
+        elif len({path.name for path in group}) == len(group):
+            # memo.flac and memo.ogg
+            for path in group:
+                bases[path] = base.with_name(path.name)
+        else:
+            # a/x.wav and b/x.wav into one --output-dir: mirror what differs
+            assert output_dir is not None
+            parents = [path.resolve().parent for path in group]
+            common = Path(os.path.commonpath(parents))
+            for path, parent in zip(group, parents, strict=True):
+                bases[path] = output_dir / parent.relative_to(common) / path.name
+
+    owners: dict[Path, Path] = {}
+    for path, base in bases.items():
+        other = owners.setdefault(base, path)
+        if other != path:
+            raise ValueError(f"{other} and {path} would both be written to {base}.*")
+    return bases
+
+
+def output_path(base: Path, fmt: str) -> Path:
+    """Where a file's output in one format goes."""
+    return base.with_name(f"{base.name}.{fmt}")
+
+
+def is_done(base: Path, formats: tuple[str, ...]) -> bool:
+    """Whether every requested output of a file already exists."""
+    return all(output_path(base, fmt).exists() for fmt in formats)
+
+
+def format_timestamp(seconds: float) -> str:
+    """SRT timestamp, HH:MM:SS,mmm."""
+    millis = max(0, round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def format_srt(segments: list[Segment]) -> str:
+    """Subtitles with one cue per segment."""
+    cues = [
+        f"{i}\n{format_timestamp(seg.start)} --> {format_timestamp(seg.end)}\n{seg.text}\n"
+        for i, seg in enumerate(segments, 1)
+    ]
+    return "\n".join(cues)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(content)
+    tmp_path.replace(path)
+
+
+def write_outputs(result: FileResult, formats: tuple[str, ...], base: Path) -> None:
+    """Write a file's transcription in each requested format."""
+    base.parent.mkdir(parents=True, exist_ok=True)
+    for fmt in formats:
+        if fmt == "txt":
+            content = result.text + "\n"
+        elif fmt == "json":
+            document = {
+                "path": result.path,
+                "duration": round(result.duration, 3),
+                "text": result.text,
+                "segments": [asdict(seg) for seg in result.segments],
+            }
+            content = json.dumps(document, indent=2, ensure_ascii=False) + "\n"
+        else:
+            content = format_srt(result.segments)
+        _write_atomic(output_path(base, fmt), content)
+
+
+def transcribe_file(
+    path: str,
+    transcriber: WhisperTranscriber,
+    postprocessor: ClaudePostProcessor | None = None,
+    cancel: CancelToken | None = None,
+) -> FileResult:
+    """Decode and transcribe one file.
+
+    Args:
+        path: Audio file
+        transcriber: Shared transcriber; decodes at background priority
+        postprocessor: Claude cleanup, or None to skip it
+        cancel: Token that stops the transcription
+
+    Raises:
+        Cancelled: If the token is cancelled
+        Exception: If the file can't be decoded or the model fails
+    """
+    from arch_whisper.audio.decode import load_audio
+    from arch_whisper.transcription.pool import BACKGROUND
+
+    start = time.perf_counter()
+    audio = load_audio(path)
+    segments = transcriber.transcribe_segments(audio, cancel, priority=BACKGROUND)
+    text = " ".join(seg.text for seg in segments)
+    if postprocessor is not None and postprocessor.available:
+        text = postprocessor.process(text, cancel)
+    return FileResult(
+        path=path,
+        duration=audio.size / SAMPLE_RATE,
+        segments=segments,
+        text=text,
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def run(
+    paths: list[str | Path],
+    config: Config,
+    workers: int | None = None,
+    formats: tuple[str, ...] = FORMATS,
+    output_dir: Path | None = None,
+    cleanup: bool = True,
+    out: TextIO = sys.stdout,
+) -> int:
+    """Transcribe files, skipping those already done.
+
+    Args:
+        paths: Files and directories to transcribe
+        config: Model, language and cleanup settings
+        workers: Files transcribed at once, each on its own model replica;
+            one per THREADS_PER_WORKER cores if None
+        formats: Outputs to write per file
+        output_dir: Directory for outputs instead of next to each file
+        cleanup: Run transcripts through Claude if it is enabled
+        out: Where progress and the summary are printed
+
+    Returns:
+        Exit status: 0 on success, 1 if any file failed, 2 if two files
+        would overwrite each other's outputs, 130 if interrupted
+    """
+    files = find_inputs(paths)
+    try:
+        bases = output_bases(files, output_dir)
+    except ValueError as e:
+        print(f"Cannot transcribe: {e}", file=out)
+        return 2
+    pending = [p for p in files if not is_done(bases[p], formats)]
+    if len(pending) < len(files):
+        print(f"Skipping {len(files) - len(pending)} already transcribed", file=out)
+    if not pending:
+        return 0
+
+    cores = cpu_count()
+    workers = min(workers or default_workers(cores), len(pending))
+    config = replace(
+        config, whisper_workers=workers, whisper_threads=worker_threads(workers, cores)
+    )
+    print(
+        f"Transcribing {len(pending)} files with {workers} workers "
+        f"x {config.whisper_threads} threads",
+        file=out,
+    )
+
+    from arch_whisper.cancel import CancelToken
+    from arch_whisper.transcription.whisper import WhisperTranscriber
+
+    # Nothing interactive shares this transcriber, so every replica is usable
+    transcriber = WhisperTranscriber(config, reserve_interactive=False)
+    postprocessor = None
+    if cleanup and config.claude_enabled:
+        from arch_whisper.postprocess.claude import ClaudePostProcessor
+
+        postprocessor = ClaudePostProcessor(config)
+    cancel = CancelToken()
+
+    started = time.perf_counter()
+    audio_seconds = 0.0
+    failed = 0
+
+    def report(done: int, path: Path, result: FileResult | None, error: BaseException | None):
+        nonlocal audio_seconds, failed
+        prefix = f"[{done}/{len(pending)}] {path}"
+        if result is None:
+            failed += 1
+            print(f"{prefix}: failed: {error}", file=out)
+            return
+        try:
+            write_outputs(result, formats, bases[path])
+        except OSError as e:
+            # Disk full or a read-only directory: keep going with the rest
+            failed += 1
+            print(f"{prefix}: failed to write outputs: {e}", file=out)
+            return
+        audio_seconds += result.duration
+        speed = result.duration / result.elapsed if result.elapsed else 0.0
+        print(
+            f"{prefix}: {result.duration:.1f} s of audio in {result.elapsed:.1f} s "
+            f"({speed:.1f}x)",
+            file=out,
+        )
+
+    interrupted = False
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+    try:
+        futures = {
+            executor.submit(transcribe_file, str(p), transcriber, postprocessor, cancel): p
+            for p in pending
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            error = future.exception()
+            report(done, futures[future], future.result() if error is None else None, error)
+    except KeyboardInterrupt:
+        interrupted = True
+        # Stops the running decodes between segments
+        cancel.cancel()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    wall = time.perf_counter() - started
+    rate = audio_seconds / wall if wall else 0.0
+    print(
+        f"Transcribed {audio_seconds / 3600:.2f} h of audio in {wall / 3600:.2f} h: "
+        f"{rate:.1f} audio-hours per hour",
+        file=out,
+    )
+    if interrupted:
+        print("Interrupted; run again to resume", file=out)
+        return 130
+    return 1 if failed else 0
@@ -0,0 +1,83 @@
+"""Cooperative cancellation for in-flight jobs.
+
+Each recording gets a CancelToken that is passed down to the transcriber,
+the postprocessor and the paste manager. Long-running stages either check
+the token between steps or register a callback that interrupts blocking
+work (closing a connection, cancelling an asyncio task).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """Raised when a job's token is cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks."""
+
+    def __init__(self) -> None:
+        """Create a token that is not cancelled."""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], object]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the job and run registered callbacks once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug("Cancel callback failed: %s", e)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise Cancelled if the token was cancelled.
+
+        Raises:
+            Cancelled: If cancel() has been called
+        """
+        if self._event.is_set():
+            raise Cancelled()
+
+    def on_cancel(self, callback: Callable[[], object]) -> Callable[[], None]:
+        """Run callback when the token is cancelled.
+
+        Runs it right away if the token is already cancelled.
+
+        Args:
+            callback: Called from the thread that cancels
+
+        Returns:
+            Function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], object]) -> None:
+        """Unregister a callback."""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
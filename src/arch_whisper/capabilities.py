@@ -0,0 +1,268 @@
+"""System capability probe for arch_whisper.
+
+Startup needs to know which external tools are installed, whether the GTK
+and AppIndicator typelibs load, and whether evdev devices are readable.
+probe() checks all of these concurrently; get() returns the result cached
+in ~/.cache/arch-whisper/capabilities.json while nothing it depends on has
+changed, so a warm start does no probing at all. Components ask which()
+instead of calling shutil.which themselves.
+
+The cache is keyed by $PATH (and the mtime of every directory on it, which
+changes when a tool is installed or removed), the session type, the Python
+version, the versions of the packages the checks import, the mtimes of the
+GI typelib directories and the user's groups. The mtime of each tool found
+is stored too and checked on load, so an upgraded tool invalidates the
+cache as well. A cached count of zero readable evdev devices is never
+trusted: permissions can be granted without any of the above changing,
+and counting again is cheap.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from importlib import metadata
+from pathlib import Path
+
+from arch_whisper.config import CACHE_DIR
+from arch_whisper.utils import get_session_type
+
+logger = logging.getLogger(__name__)
+
+CAPABILITIES_PATH = CACHE_DIR / "capabilities.json"
+
+# External programs arch_whisper may run
+TOOLS = (
+    "xdotool",
+    "xclip",
+    "xprop",
+    "wl-copy",
+    "wl-paste",
+    "wtype",
+    "ydotool",
+    "hyprctl",
+    "swaymsg",
+    "claude",
+)
+
+# Distributions whose versions affect the GI and evdev checks
+PACKAGES = ("arch-whisper", "PyGObject", "evdev")
+
+INPUT_DIR = Path("/dev/input")
+
+# Where GI looks for typelibs besides $GI_TYPELIB_PATH; installing
+# AppIndicator or libnotify adds a file to one of these
+TYPELIB_DIRS = (
+    "/usr/lib/girepository-1.0",
+    "/usr/lib64/girepository-1.0",
+    "/usr/lib/x86_64-linux-gnu/girepository-1.0",
+)
+
+
+@dataclass
+class Capabilities:
+    """What the system provides, as found by probe()."""
+
+    session: str
+    tools: dict[str, str | None] = field(default_factory=dict)  # Name -> path
+    gui_probed: bool = False  # Whether the GI checks below ran
+    gtk_error: str | None = None  # Why GTK/Notify failed to load
+    appindicator: bool = False
+    evdev_devices: int | None = None  # Readable devices; None if not probed
+    tool_mtimes: dict[str, int] = field(default_factory=dict)  # Path -> st_mtime_ns
+
+    def has(self, tool: str) -> bool:
+        """Whether a tool was found."""
+        return self.tools.get(tool) is not None
+
+
+def _mtime(path: str | Path) -> int | None:
+    """mtime in nanoseconds, or None if the path is missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def cache_key(session: str) -> str:
+    """Digest of everything a cached probe result depends on."""
+    search_path = os.environ.get("PATH", "")
+    parts: list[object] = [sys.version, session, search_path]
+    parts.extend(_mtime(d) for d in search_path.split(os.pathsep) if d)
+    parts.extend(_package_version(name) for name in PACKAGES)
+    typelib_path = os.environ.get("GI_TYPELIB_PATH", "")
+    typelib_dirs = [d for d in typelib_path.split(os.pathsep) if d] + list(TYPELIB_DIRS)
+    parts.extend(_mtime(d) for d in typelib_dirs)
+    # Joining the input group changes which devices can be opened
+    parts.append(sorted(os.getgroups()))
+    if session == "wayland":
+        parts.append(_mtime(INPUT_DIR))
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def _check_gtk() -> tuple[str | None, bool]:
+    """Load the GI typelibs; returns (GTK error, AppIndicator available).
+
+    Both checks share one task since gi.require_version isn't meant to be
+    called from several threads at once.
+    """
+    gtk_error: str | None = None
+    try:
+        import gi
+
+        gi.require_version("Gtk", "3.0")
+        gi.require_version("Notify", "0.7")
+        from gi.repository import Gtk, Notify  # noqa: F401
+    except (ImportError, ValueError) as e:
+        gtk_error = str(e)
+
+    try:
+        import gi
+
+        gi.require_version("AyatanaAppIndicator3", "0.1")
+        from gi.repository import AyatanaAppIndicator3  # noqa: F401
+
+        appindicator = True
+    except (ImportError, ValueError):
+        appindicator = False
+    return gtk_error, appindicator
+
+
+def _count_evdev_devices() -> int:
+    """Number of input devices this user can open."""
+    try:
+        import evdev
+
+        return len(evdev.list_devices())
+    except Exception:
+        return 0
+
+
+def probe(session: str | None = None, gui: bool = True) -> Capabilities:
+    """Run every check concurrently.
+
+    Args:
+        session: Session type; detected if omitted
+        gui: Also check the GI typelibs (skipped headless, so GI is
+            never imported)
+
+    Returns:
+        Fresh capabilities
+    """
+    session = session or get_session_type()
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="probe") as pool:
+        gtk = pool.submit(_check_gtk) if gui else None
+        evdev_devices = pool.submit(_count_evdev_devices) if session == "wayland" else None
+        tools = {name: pool.submit(shutil.which, name) for name in TOOLS}
+
+        caps = Capabilities(session=session)
+        caps.tools = {name: future.result() for name, future in tools.items()}
+        if gtk is not None:
+            caps.gtk_error, caps.appindicator = gtk.result()
+            caps.gui_probed = True
+        if evdev_devices is not None:
+            caps.evdev_devices = evdev_devices.result()
+
+    for path in caps.tools.values():
+        if path is not None:
+            mtime = _mtime(path)
+            if mtime is not None:
+                caps.tool_mtimes[path] = mtime
+    return caps
+
+
+def load(key: str, path: Path | None = None) -> Capabilities | None:
+    """Read cached capabilities if they were saved under the same key."""
+    path = path or CAPABILITIES_PATH
+    try:
+        data = json.loads(path.read_text())
+        if data.get("key") != key:
+            return None
+        caps = Capabilities(**data["capabilities"])
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+    # A tool that was upgraded or removed in place invalidates the cache
+    for tool_path, mtime in caps.tool_mtimes.items():
+        if _mtime(tool_path) != mtime:
+            return None
+    return caps
+
+
+def save(caps: Capabilities, key: str, path: Path | None = None) -> None:
+    """Write capabilities to the cache atomically."""
+    path = path or CAPABILITIES_PATH
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"key": key, "capabilities": asdict(caps)}, indent=1))
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.warning("Failed to save capability cache: %s", e)
+
+
+_current: Capabilities | None = None
+_lock = threading.Lock()
+
+
+def get(refresh: bool = False, gui: bool = False) -> Capabilities:
+    """Capabilities for this process, from the cache when it is still valid.
+
+    Args:
+        refresh: Probe again even if a result is cached
+        gui: Require the GI checks; a cached result without them is
+            probed again
+
+    Returns:
+        The shared capabilities
+    """
+    global _current
+    with _lock:
+        if _current is not None and not refresh and (_current.gui_probed or not gui):
+            return _current
+
+        session = get_session_type()
+        key = cache_key(session)
+        caps = None if refresh else load(key)
+        if caps is not None and gui and not caps.gui_probed:
+            caps = None
+        if caps is None:
+            logger.debug("Probing system capabilities")
+            caps = probe(session, gui)
+            save(caps, key)
+        else:
+            logger.debug("Using cached capabilities")
+            if caps.evdev_devices == 0:
+                caps.evdev_devices = _count_evdev_devices()
+                if caps.evdev_devices:
+                    save(caps, key)
+        _current = caps
+        return caps
+
+
+def which(tool: str) -> str | None:
+    """Path of an external tool, like shutil.which but from the shared probe.
+
+    Tools the probe doesn't know about, or whose cached path has gone
+    missing, are looked up directly.
+    """
+    path = get().tools.get(tool)
+    if path is not None and os.access(path, os.X_OK):
+        return path
+    if tool in TOOLS and path is None:
+        return None
+    return shutil.which(tool)
@@ -1,7 +1,7 @@
 """Configuration dataclass for arch_whisper."""
 
 import sys
-from dataclasses import dataclass, fields
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
 if sys.version_info >= (3, 11):
@@ -10,6 +10,8 @@ else:
     import tomli as tomllib
 
 CONFIG_PATH = Path.home() / ".config" / "arch-whisper" / "config.toml"
+CACHE_DIR = Path.home() / ".cache" / "arch-whisper"
+DATA_DIR = Path.home() / ".local" / "share" / "arch-whisper"
 
 
 @dataclass
@@ -17,13 +19,34 @@ class Config:
     """Application configuration with sensible defaults."""
 
     hotkey: str = "ctrl+space"
+    hotkeys: dict[str, str] = field(default_factory=dict)  # Extra bindings: action -> combo
+    record_mode: str = "push_to_talk"  # push_to_talk, toggle or continuous
+    silence_timeout: float = 2.0  # Toggle mode: stop after this much silence (0 disables)
+    segment_silence: float = 0.8  # Continuous mode: pause that ends a segment
+    vad_threshold: float = 0.01  # RMS level counted as speech
+    max_record_seconds: float = 300.0  # Recording stops at this length
     whisper_model: str = "base"
-    whisper_threads: int = 4
+    whisper_threads: int = 4  # Per replica
+    whisper_workers: int = 1  # Model replicas decoding at once (weights are shared)
     whisper_language: str | None = "en"
+    model_idle_unload: float = 1800.0  # Seconds unused before the model is unloaded (0 never)
+    model_preload: bool = True  # Reload ahead of use: hotkey modifiers, usual hours
+    remote_transcriber: str = ""  # "host:port" or socket path of `arch-whisper serve`
+    retranscribe_model: str = ""  # Larger model re-transcribing utterances when idle
+    retranscribe_max_load: float = 0.25  # Idle below this CPU use by other processes
     claude_enabled: bool = True
     claude_model: str = "claude-haiku-4-5-20251001"
     anthropic_api_key: str | None = None  # Optional: use API key instead of Claude Code CLI
     ding_enabled: bool = True
+    paste_typing_max_chars: int = 40  # Type shorter outputs directly (0 disables)
+    clipboard_restore: bool = True  # Put back the previous clipboard after pasting
+    history_enabled: bool = True  # Keep transcripts for re-paste and search
+    history_max_entries: int = 10000  # Newest transcripts kept (0 keeps all)
+    history_max_days: float = 90.0  # Days a transcript is kept (0 keeps forever)
+    trace_enabled: bool = True  # Log per-utterance latency spans to traces.jsonl
+    status_enabled: bool = True  # Serve metrics and status on a Unix socket
+    profile_utterances: int = 3  # Utterances profiled per SIGUSR1 or tray request
+    output_sinks: dict[str, str] = field(default_factory=dict)  # App -> stdout/fifo/socket
     assets_dir: Path | None = None
 
 
@@ -34,7 +57,8 @@ def load_config() -> Config:
     try:
         with open(CONFIG_PATH, "rb") as f:
             data = tomllib.load(f)
-        return Config(**{k: v for k, v in data.items() if hasattr(Config, k)})
+        names = {f.name for f in fields(Config)}
+        return Config(**{k: v for k, v in data.items() if k in names})
     except Exception:
         return Config()
 
@@ -43,16 +67,22 @@ def save_config(config: Config) -> None:
     """Save config to file."""
     CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
     lines = []
-    for field in fields(config):
-        value = getattr(config, field.name)
+    tables = []
+    for f in fields(config):
+        value = getattr(config, f.name)
         if value is None:
             continue
-        if isinstance(value, str):
-            lines.append(f'{field.name} = "{value}"')
+        if isinstance(value, dict):
+            # Tables must come after all top-level keys
+            tables.append("")
+            tables.append(f"[{f.name}]")
+            tables.extend(f'"{k}" = "{v}"' for k, v in value.items())
+        elif isinstance(value, str):
+            lines.append(f'{f.name} = "{value}"')
         elif isinstance(value, bool):
-            lines.append(f'{field.name} = {str(value).lower()}')
+            lines.append(f'{f.name} = {str(value).lower()}')
         elif isinstance(value, Path):
-            lines.append(f'{field.name} = "{value}"')
+            lines.append(f'{f.name} = "{value}"')
         else:
-            lines.append(f'{field.name} = {value}')
-    CONFIG_PATH.write_text("\n".join(lines) + "\n")
+            lines.append(f'{f.name} = {value}')
+    CONFIG_PATH.write_text("\n".join(lines + tables) + "\n")
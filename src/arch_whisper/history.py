@@ -0,0 +1,264 @@
+"""Transcript history for arch_whisper.
+
+Every finished utterance is kept in a SQLite database under
+~/.local/share/arch-whisper: Whisper's raw text, the cleaned text that was
+pasted, the app it went to and how long each step took. An FTS5 index
+over the text makes searching instant, so the re-paste hotkey and the
+history picker never need to transcribe or call Claude again.
+
+Old entries are pruned by age (history_max_days) and count
+(history_max_entries) as new ones are added. With retranscribe_model set,
+an entry's raw text is later revised to the larger model's transcript.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from arch_whisper import metrics
+from arch_whisper.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = DATA_DIR / "history.db"
+
+# Prune by age once per this many additions rather than on every one
+PRUNE_EVERY = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    raw_text TEXT NOT NULL,  -- Whisper's transcript
+    text TEXT NOT NULL,  -- What was pasted, after cleanup
+    app TEXT,  -- Focused app it was pasted into
+    pasted INTEGER NOT NULL,  -- 0 if it was only copied to the clipboard
+    audio_seconds REAL,
+    timings TEXT  -- JSON: stage -> seconds
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    raw_text, text, app, content='transcripts', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_insert AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts (rowid, raw_text, text, app)
+    VALUES (new.id, new.raw_text, new.text, new.app);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_delete AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, raw_text, text, app)
+    VALUES ('delete', old.id, old.raw_text, old.text, old.app);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_update AFTER UPDATE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, raw_text, text, app)
+    VALUES ('delete', old.id, old.raw_text, old.text, old.app);
+    INSERT INTO transcripts_fts (rowid, raw_text, text, app)
+    VALUES (new.id, new.raw_text, new.text, new.app);
+END;
+"""
+
+COLUMNS = "id, created, raw_text, text, app, pasted, audio_seconds, timings"
+
+
+@dataclass
+class Entry:
+    """One transcript in the history."""
+
+    raw_text: str
+    text: str
+    app: str | None = None
+    pasted: bool = True
+    audio_seconds: float | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+    id: int | None = None
+
+
+def _entry(row: tuple) -> Entry:
+    return Entry(
+        id=row[0],
+        created=row[1],
+        raw_text=row[2],
+        text=row[3],
+        app=row[4],
+        pasted=bool(row[5]),
+        audio_seconds=row[6],
+        timings=json.loads(row[7]) if row[7] else {},
+    )
+
+
+def match_query(query: str) -> str:
+    """Turn what the user typed into an FTS5 query.
+
+    Each word must appear, as a prefix so results update while typing.
+    Words are quoted, so FTS5 syntax in the input is matched literally.
+    """
+    words = query.split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+class HistoryStore:
+    """SQLite transcript history with a full-text index."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_entries: int = 0,
+        max_days: float = 0,
+    ) -> None:
+        """Open (or create) the history.
+
+        Args:
+            path: Override for the database location
+            max_entries: Newest entries kept (0 keeps all)
+            max_days: Days an entry is kept (0 keeps them forever)
+        """
+        self._path = path or HISTORY_PATH
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._max_days = max_days
+        self._lock = threading.Lock()
+        self._added = 0
+        self._db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self.prune()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def add(self, entry: Entry) -> int:
+        """Store a transcript.
+
+        Returns:
+            The entry's id
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO transcripts "
+                "(created, raw_text, text, app, pasted, audio_seconds, timings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.created,
+                    entry.raw_text,
+                    entry.text,
+                    entry.app,
+                    int(entry.pasted),
+                    entry.audio_seconds,
+                    json.dumps(entry.timings) if entry.timings else None,
+                ),
+            )
+            entry.id = entry_id = cursor.lastrowid
+            assert entry_id is not None
+            if self._max_entries > 0:
+                # Ids only grow and pruning only takes the oldest, so the
+                # entries kept are the last max_entries ids
+                self._db.execute(
+                    "DELETE FROM transcripts WHERE id <= ?", (entry_id - self._max_entries,)
+                )
+            self._added += 1
+            prune = self._max_days > 0 and self._added % PRUNE_EVERY == 0
+        metrics.inc("history_entries_total")
+        if prune:
+            self._prune_old()
+        return entry_id
+
+    def revise(self, entry_id: int, raw_text: str) -> bool:
+        """Replace an entry's raw text with a better transcript.
+
+        Where no cleanup ran, the text that was pasted is the raw text, so
+        it is replaced too and re-pastes use the better transcript.
+
+        Returns:
+            Whether the entry still existed
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE transcripts SET "
+                "text = CASE WHEN text = raw_text THEN ? ELSE text END, raw_text = ? "
+                "WHERE id = ?",
+                (raw_text, raw_text, entry_id),
+            )
+        return cursor.rowcount > 0
+
+    def last(self) -> Entry | None:
+        """The most recent transcript."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {COLUMNS} FROM transcripts ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return _entry(row) if row else None
+
+    def get(self, entry_id: int) -> Entry | None:
+        """A transcript by id."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {COLUMNS} FROM transcripts WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return _entry(row) if row else None
+
+    def search(self, query: str = "", limit: int = 50) -> list[Entry]:
+        """Find transcripts, newest first.
+
+        Args:
+            query: Words to look for in the text or app name; empty lists
+                the most recent
+            limit: Most entries returned
+        """
+        match = match_query(query)
+        with self._lock:
+            if not match:
+                rows = self._db.execute(
+                    f"SELECT {COLUMNS} FROM transcripts ORDER BY id DESC LIMIT ?", (limit,)
+                )
+            else:
+                rows = self._db.execute(
+                    f"SELECT {COLUMNS} FROM transcripts WHERE id IN "
+                    "(SELECT rowid FROM transcripts_fts WHERE transcripts_fts MATCH ?) "
+                    "ORDER BY id DESC LIMIT ?",
+                    (match, limit),
+                )
+            return [_entry(row) for row in rows.fetchall()]
+
+    def _prune_old(self) -> int:
+        """Drop entries beyond the age limit.
+
+        Returns:
+            Entries removed
+        """
+        if self._max_days <= 0:
+            return 0
+        cutoff = time.time() - self._max_days * 86400
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM transcripts WHERE created < ?", (cutoff,)
+            ).rowcount
+        if removed:
+            logger.debug("Pruned %d old history entries", removed)
+        return removed
+
+    def prune(self) -> int:
+        """Drop entries beyond the age and count limits.
+
+        Returns:
+            Entries removed
+        """
+        removed = self._prune_old()
+        if self._max_entries > 0:
+            with self._lock:
+                excess = self._db.execute(
+                    "DELETE FROM transcripts WHERE id <= "
+                    "(SELECT id FROM transcripts ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self._max_entries,),
+                ).rowcount
+            if excess:
+                logger.debug("Pruned %d history entries over the limit", excess)
+            removed += excess
+        return removed
@@ -0,0 +1,248 @@
+"""Hotkey binding engine shared by the X11 and Wayland backends.
+
+Bindings like {RECORD: "ctrl+space", CANCEL: "escape"} are compiled once
+into a table keyed by (keycode << MASK_BITS) | modifier mask. Each key event
+then costs one dict lookup, however many bindings exist. Backends translate
+their native key names to keycodes through a resolver, so the table holds
+evdev codes or X keycodes directly.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+# Logical modifier bits
+MODIFIER_BITS = {
+    "ctrl": 1 << 0,
+    "shift": 1 << 1,
+    "alt": 1 << 2,
+    "super": 1 << 3,
+}
+MODIFIER_ALIASES = {
+    "control": "ctrl",
+    "meta": "super",
+    "win": "super",
+    "cmd": "super",
+}
+
+# Bits reserved for the modifier mask in a table key
+MASK_BITS = 4
+
+
+class Action(Enum):
+    """What a binding does."""
+
+    RECORD = auto()  # Hold to record
+    CANCEL = auto()  # Abort the current recording or job
+    REPASTE = auto()  # Paste the last transcript again
+    TOGGLE = auto()  # Tap to start/stop hands-free recording
+    HISTORY = auto()  # Open the transcript history picker
+
+
+def parse_combo(combo: str) -> tuple[int, str]:
+    """Parse a combo like "ctrl+shift+r" into (modifier mask, key name).
+
+    Raises:
+        ValueError: If the combo is empty or uses an unknown modifier
+    """
+    parts = [p.strip().lower() for p in combo.split("+") if p.strip()]
+    if not parts:
+        raise ValueError(f"Empty hotkey: {combo!r}")
+
+    mask = 0
+    for name in parts[:-1]:
+        name = MODIFIER_ALIASES.get(name, name)
+        if name not in MODIFIER_BITS:
+            raise ValueError(f"Unknown modifier {name!r} in hotkey {combo!r}")
+        mask |= MODIFIER_BITS[name]
+    return mask, parts[-1]
+
+
+@dataclass
+class BindingTable:
+    """Precomputed keycode/mask lookup table for a set of bindings."""
+
+    modifier_bits: dict[int, int] = field(default_factory=dict)  # keycode -> bit
+    triggers: dict[int, Action] = field(default_factory=dict)  # table key -> action
+    combos: list[tuple[int, int, Action]] = field(default_factory=list)  # keycode, mask, action
+    record_mask: int = 0  # Modifiers of the record binding
+
+    @classmethod
+    def build(
+        cls,
+        bindings: dict[Action, str],
+        resolve_key: Callable[[str], list[int]],
+    ) -> BindingTable:
+        """Compile bindings into a lookup table.
+
+        Args:
+            bindings: Combo string for each action
+            resolve_key: Maps a key name (e.g. "space", "ctrl") to the
+                backend's keycodes for it; empty if unknown
+
+        Raises:
+            ValueError: If a combo can't be parsed or resolved, or two
+                actions share a combo
+        """
+        table = cls()
+        for name, bit in MODIFIER_BITS.items():
+            for keycode in resolve_key(name):
+                table.modifier_bits[keycode] = bit
+
+        for action, combo in bindings.items():
+            mask, key = parse_combo(combo)
+            if action == Action.RECORD:
+                table.record_mask = mask
+            keycodes = resolve_key(key)
+            if not keycodes:
+                raise ValueError(f"Unknown key {key!r} in hotkey {combo!r}")
+            for keycode in keycodes:
+                slot = (keycode << MASK_BITS) | mask
+                if slot in table.triggers and table.triggers[slot] != action:
+                    raise ValueError(
+                        f"Hotkey {combo!r} bound to both "
+                        f"{table.triggers[slot].name} and {action.name}"
+                    )
+                table.triggers[slot] = action
+                table.combos.append((keycode, mask, action))
+        return table
+
+
+class BindingEngine:
+    """Turns key events into action press/release callbacks.
+
+    Backends that see every key (evdev) call feed() and let the engine track
+    modifiers, per device so one keyboard going away only forgets its own
+    keys. Backends that get the modifier state with each event (X11) call
+    press()/release() directly.
+    """
+
+    def __init__(
+        self,
+        table: BindingTable,
+        on_event: Callable[[Action, bool], None],
+        on_modifiers: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+            table: Compiled bindings
+            on_event: Called with (action, pressed) on press and release
+            on_modifiers: Called when the record binding's modifiers go
+                down, a likely sign it is about to be pressed (feed() only)
+        """
+        self._table = table
+        self._on_event = on_event
+        self._on_modifiers = on_modifiers
+        self._mask = 0
+        self._held_modifiers: dict[tuple[Hashable, int], int] = {}  # (device, keycode) -> bit
+        # Active bindings: (device, trigger keycode) -> (mask, action)
+        self._active: dict[tuple[Hashable, int], tuple[int, Action]] = {}
+
+    @property
+    def active(self) -> bool:
+        """Whether any binding is currently held."""
+        return bool(self._active)
+
+    def _held_mask(self) -> int:
+        """Modifier mask of the modifiers held on any device."""
+        mask = 0
+        for held in self._held_modifiers.values():
+            mask |= held
+        return mask
+
+    def feed(self, keycode: int, value: int, device: Hashable = None) -> None:
+        """Process one key event, tracking modifier state.
+
+        Args:
+            keycode: Backend keycode
+            value: 0=release, 1=press, 2=repeat
+            device: Device the event came from
+        """
+        bit = self._table.modifier_bits.get(keycode)
+        if bit is not None:
+            if value == 1:
+                self._held_modifiers[(device, keycode)] = bit
+            elif value == 0:
+                self._held_modifiers.pop((device, keycode), None)
+            mask = self._held_mask()
+            record_mask = self._table.record_mask
+            if (
+                value == 1
+                and self._on_modifiers is not None
+                and record_mask
+                and mask == record_mask
+                and self._mask != record_mask
+            ):
+                self._on_modifiers()
+            self._mask = mask
+
+        if value == 1:
+            self.press(keycode, self._mask, device)
+        elif value == 0:
+            self.release(keycode, device)
+
+    def press(self, keycode: int, mask: int, device: Hashable = None) -> None:
+        """Handle a key press with the given modifier mask."""
+        if (device, keycode) in self._active:
+            return  # Autorepeat
+        action = self._table.triggers.get((keycode << MASK_BITS) | mask)
+        if action is None:
+            return
+        self._active[(device, keycode)] = (mask, action)
+        logger.debug("Hotkey pressed: %s", action.name)
+        self._on_event(action, True)
+
+    def release(self, keycode: int, device: Hashable = None) -> None:
+        """Handle a key release.
+
+        Releasing either the trigger key or one of its required modifiers
+        ends a binding.
+        """
+        if not self._active:
+            return
+
+        active = self._active.pop((device, keycode), None)
+        if active is not None:
+            self._fire_release(active[1])
+            return
+
+        bit = self._table.modifier_bits.get(keycode)
+        if bit is None:
+            return
+        for trigger, (mask, action) in list(self._active.items()):
+            if mask & bit:
+                del self._active[trigger]
+                self._fire_release(action)
+
+    def reset(self) -> None:
+        """Forget all held keys, releasing any active bindings."""
+        self._held_modifiers.clear()
+        self._mask = 0
+        active, self._active = self._active, {}
+        for _, action in active.values():
+            self._fire_release(action)
+
+    def forget_device(self, device: Hashable) -> None:
+        """Forget the keys held on a device that went away.
+
+        Bindings triggered on it, or needing a modifier only it held, are
+        released. Keys held on other devices are kept.
+        """
+        for slot in [slot for slot in self._held_modifiers if slot[0] == device]:
+            del self._held_modifiers[slot]
+        self._mask = self._held_mask()
+        for slot, (mask, action) in list(self._active.items()):
+            if slot[0] == device or mask & ~self._mask:
+                del self._active[slot]
+                self._fire_release(action)
+
+    def _fire_release(self, action: Action) -> None:
+        """Notify that an action's binding was released."""
+        logger.debug("Hotkey released: %s", action.name)
+        self._on_event(action, False)
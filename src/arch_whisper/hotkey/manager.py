@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING, Callable, Protocol
 if TYPE_CHECKING:
     from arch_whisper.config import Config
 
+from arch_whisper.hotkey.bindings import Action
 from arch_whisper.utils import get_session_type
 
 logger = logging.getLogger(__name__)
@@ -18,13 +19,30 @@ class HotkeyBackend(Protocol):
 
     def start(
         self,
-        on_press: Callable[[], None],
-        on_release: Callable[[], None],
+        on_event: Callable[[Action, bool], None],
+        on_modifiers: Callable[[], None] | None = None,
     ) -> None: ...
 
     def stop(self) -> None: ...
 
 
+def build_bindings(config: Config) -> dict[Action, str]:
+    """Collect the combo for each action from the config.
+
+    The record binding comes from `hotkey`; the `hotkeys` table adds the
+    others by action name (cancel, repaste, toggle, history).
+    """
+    bindings = {Action.RECORD: config.hotkey}
+    for name, combo in config.hotkeys.items():
+        try:
+            action = Action[name.upper()]
+        except KeyError:
+            logger.warning("Unknown hotkey action: %s", name)
+            continue
+        bindings[action] = combo
+    return bindings
+
+
 class HotkeyManager:
     """Manages hotkey detection across X11 and Wayland."""
 
@@ -35,6 +53,7 @@ class HotkeyManager:
             config: Application configuration
         """
         self._config = config
+        self._bindings = build_bindings(config)
         self._backend: HotkeyBackend | None = None
 
         session = get_session_type()
@@ -54,7 +73,7 @@ class HotkeyManager:
         try:
             from arch_whisper.hotkey.x11 import X11HotkeyBackend
 
-            return X11HotkeyBackend(self._config.hotkey)
+            return X11HotkeyBackend(self._bindings)
         except Exception as e:
             logger.warning("X11 backend unavailable: %s", e)
             return None
@@ -64,9 +83,9 @@ class HotkeyManager:
         try:
             from arch_whisper.hotkey.wayland import WaylandHotkeyBackend
 
-            backend = WaylandHotkeyBackend(self._config.hotkey)
+            backend = WaylandHotkeyBackend(self._bindings)
             # Check if evdev is actually available
-            if not hasattr(backend, "_find_keyboard"):
+            if not hasattr(backend, "_find_keyboards"):
                 return None
             return backend
         except Exception as e:
@@ -75,20 +94,22 @@ class HotkeyManager:
 
     def start(
         self,
-        on_press: Callable[[], None],
-        on_release: Callable[[], None],
+        on_event: Callable[[Action, bool], None],
+        on_modifiers: Callable[[], None] | None = None,
     ) -> None:
         """Start listening for hotkeys.
 
         Args:
-            on_press: Called when hotkey is pressed
-            on_release: Called when hotkey is released
+            on_event: Called with (action, pressed) when a binding is
+                pressed or released
+            on_modifiers: Called when the record binding's modifiers go
+                down (Wayland only; X11 grabs don't see them)
         """
         if self._backend is None:
             logger.error("No hotkey backend, cannot start")
             return
 
-        self._backend.start(on_press, on_release)
+        self._backend.start(on_event, on_modifiers)
 
     def stop(self) -> None:
         """Stop listening for hotkeys."""
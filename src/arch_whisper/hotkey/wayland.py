@@ -2,10 +2,18 @@
 
 from __future__ import annotations
 
+import ctypes
+import ctypes.util
+import errno
 import logging
+import os
+import selectors
+import struct
 import threading
 from typing import Callable
 
+from arch_whisper.hotkey.bindings import Action, BindingEngine, BindingTable
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -16,141 +24,292 @@ try:
 except ImportError:
     EVDEV_AVAILABLE = False
 
+INPUT_DIR = "/dev/input"
+
+# inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# evdev names for the logical modifiers (left and right)
+EVDEV_MODIFIERS = {
+    "ctrl": ("KEY_LEFTCTRL", "KEY_RIGHTCTRL"),
+    "shift": ("KEY_LEFTSHIFT", "KEY_RIGHTSHIFT"),
+    "alt": ("KEY_LEFTALT", "KEY_RIGHTALT"),
+    "super": ("KEY_LEFTMETA", "KEY_RIGHTMETA"),
+}
+
+# Common key names that differ from the evdev KEY_* suffix
+EVDEV_ALIASES = {
+    "escape": "esc",
+    "return": "enter",
+    "del": "delete",
+    "pgup": "pageup",
+    "pgdn": "pagedown",
+    "ins": "insert",
+}
+
+
+def resolve_evdev_key(name: str) -> list[int]:
+    """Map a key name like "space" or "ctrl" to evdev key codes."""
+    names: tuple[str, ...] | None = EVDEV_MODIFIERS.get(name)
+    if names is None:
+        names = ("KEY_" + EVDEV_ALIASES.get(name, name).upper(),)
+    codes = [ecodes.ecodes.get(n) for n in names]
+    return [c for c in codes if isinstance(c, int)]
+
+
+class _Inotify:
+    """Minimal inotify watch on one directory via libc."""
+
+    def __init__(self, path: str, mask: int) -> None:
+        """Start watching path.
+
+        Raises:
+            OSError: If inotify is unavailable
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, path.encode(), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+
+    def read_names(self) -> list[str]:
+        """Read all pending events and return the file names they refer to."""
+        names: list[str] = []
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode()
+                offset += length
+                if name:
+                    names.append(name)
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self.fd)
+
 
 class WaylandHotkeyBackend:
     """Global hotkey listener for Wayland using evdev.
 
+    Watches every keyboard at once from a single selector loop, and picks up
+    keyboards plugged in later through inotify on /dev/input. The loop only
+    wakes for key events, hotplug, or stop().
+
     Requires user to be in 'input' group for /dev/input access.
     """
 
-    def __init__(self, hotkey: str = "ctrl+space") -> None:
+    def __init__(self, bindings: dict[Action, str] | None = None) -> None:
         """Initialize the backend.
 
         Args:
-            hotkey: Hotkey combination (currently only ctrl+space supported)
+            bindings: Combo for each action; defaults to ctrl+space to record
+
+        Raises:
+            ValueError: If a binding cannot be parsed
         """
-        self._hotkey = hotkey
-        self._device: evdev.InputDevice | None = None
+        self._bindings = bindings or {Action.RECORD: "ctrl+space"}
+        self._table = (
+            BindingTable.build(self._bindings, resolve_evdev_key)
+            if EVDEV_AVAILABLE
+            else BindingTable()
+        )
+        self._engine: BindingEngine | None = None
+        self._devices: dict[str, evdev.InputDevice] = {}
+        self._selector: selectors.BaseSelector | None = None
+        self._inotify: _Inotify | None = None
+        self._wakeup_r: int | None = None
+        self._wakeup_w: int | None = None
         self._running = False
         self._thread: threading.Thread | None = None
-        self._on_press: Callable[[], None] | None = None
-        self._on_release: Callable[[], None] | None = None
 
-        self._ctrl_pressed = False
-        self._space_pressed = False
-        self._combo_active = False
+    def _open_keyboard(self, path: str) -> evdev.InputDevice | None:
+        """Open a device if it is a keyboard (has KEY_SPACE)."""
+        try:
+            device = evdev.InputDevice(path)
+        except (PermissionError, OSError) as e:
+            logger.debug("Cannot access %s: %s", path, e)
+            return None
 
-    def _find_keyboard(self) -> evdev.InputDevice | None:
-        """Find a keyboard device that has KEY_SPACE."""
-        if not EVDEV_AVAILABLE:
+        keys = device.capabilities().get(ecodes.EV_KEY, [])
+        if ecodes.KEY_SPACE not in keys:
+            device.close()
             return None
 
+        logger.info("Found keyboard: %s (%s)", device.name, path)
+        return device
+
+    def _find_keyboards(self) -> list[evdev.InputDevice]:
+        """Find all keyboard devices."""
+        if not EVDEV_AVAILABLE:
+            return []
+
+        keyboards = []
         for path in evdev.list_devices():
-            try:
-                device = evdev.InputDevice(path)
-                capabilities = device.capabilities()
-                if ecodes.EV_KEY in capabilities:
-                    keys = capabilities[ecodes.EV_KEY]
-                    if ecodes.KEY_SPACE in keys:
-                        logger.info("Found keyboard: %s (%s)", device.name, path)
-                        return device
-            except (PermissionError, OSError) as e:
-                logger.debug("Cannot access %s: %s", path, e)
+            device = self._open_keyboard(path)
+            if device is not None:
+                keyboards.append(device)
+        return keyboards
+
+    def _add_device(self, device: evdev.InputDevice) -> None:
+        """Start watching a keyboard."""
+        assert self._selector is not None
+        self._devices[os.fsdecode(device.path)] = device
+        self._selector.register(device.fd, selectors.EVENT_READ, device)
+
+    def _remove_device(self, device: evdev.InputDevice) -> None:
+        """Stop watching a keyboard that went away."""
+        assert self._selector is not None
+        logger.info("Keyboard removed: %s (%s)", device.name, device.path)
+        self._devices.pop(os.fsdecode(device.path), None)
+        try:
+            self._selector.unregister(device.fd)
+        except (KeyError, ValueError):
+            pass
+        try:
+            device.close()
+        except OSError:
+            pass
+
+        # Keys held on the removed keyboard will never report release
+        if self._engine is not None:
+            self._engine.forget_device(device.path)
+
+    def _handle_hotplug(self) -> None:
+        """Open keyboards that appeared in /dev/input."""
+        assert self._inotify is not None
+        for name in set(self._inotify.read_names()):
+            if not name.startswith("event"):
                 continue
-
-        return None
+            path = os.path.join(INPUT_DIR, name)
+            if path in self._devices:
+                continue
+            # Permissions may be applied after creation; IN_ATTRIB retries then
+            device = self._open_keyboard(path)
+            if device is not None:
+                self._add_device(device)
+
+    def _read_device(self, device: evdev.InputDevice) -> None:
+        """Drain all pending events from a device in one batch."""
+        assert self._engine is not None
+        feed = self._engine.feed
+        path = device.path
+        try:
+            for event in device.read():
+                if event.type == ecodes.EV_KEY:
+                    feed(event.code, event.value, path)
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            if e.errno == errno.ENODEV:
+                self._remove_device(device)
+            else:
+                raise
 
     def _event_loop(self) -> None:
         """Main event loop running in separate thread."""
-        if self._device is None:
-            return
-
+        assert self._selector is not None
         try:
-            for event in self._device.read_loop():
-                if not self._running:
-                    break
-
-                if event.type != ecodes.EV_KEY:
-                    continue
-
-                # event.value: 0=release, 1=press, 2=repeat
-                is_press = event.value == 1
-                is_release = event.value == 0
-
-                # Track Ctrl (left or right)
-                if event.code in (ecodes.KEY_LEFTCTRL, ecodes.KEY_RIGHTCTRL):
-                    if is_press:
-                        self._ctrl_pressed = True
-                    elif is_release:
-                        self._ctrl_pressed = False
-
-                # Track Space
-                if event.code == ecodes.KEY_SPACE:
-                    if is_press and not self._space_pressed:
-                        self._space_pressed = True
-                    elif is_release:
-                        self._space_pressed = False
-
-                # Check combo state changes
-                combo_should_be_active = self._ctrl_pressed and self._space_pressed
-
-                if combo_should_be_active and not self._combo_active:
-                    self._combo_active = True
-                    logger.debug("Hotkey pressed: %s", self._hotkey)
-                    if self._on_press:
-                        self._on_press()
-
-                elif not combo_should_be_active and self._combo_active:
-                    self._combo_active = False
-                    logger.debug("Hotkey released: %s", self._hotkey)
-                    if self._on_release:
-                        self._on_release()
+            while self._running:
+                for key, _ in self._selector.select():
+                    if key.fd == self._wakeup_r:
+                        return
+                    if self._inotify is not None and key.fd == self._inotify.fd:
+                        self._handle_hotplug()
+                    else:
+                        self._read_device(key.data)
 
         except Exception as e:
             if self._running:
                 logger.error("Event loop error: %s", e)
+        finally:
+            self._close_all()
+
+    def _close_all(self) -> None:
+        """Release devices, inotify, selector and wakeup pipe."""
+        for device in list(self._devices.values()):
+            try:
+                device.close()
+            except OSError:
+                pass
+        self._devices.clear()
+
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        for fd in (self._wakeup_r, self._wakeup_w):
+            if fd is not None:
+                os.close(fd)
+        self._wakeup_r = self._wakeup_w = None
 
     def start(
         self,
-        on_press: Callable[[], None],
-        on_release: Callable[[], None],
+        on_event: Callable[[Action, bool], None],
+        on_modifiers: Callable[[], None] | None = None,
     ) -> None:
-        """Start listening for the hotkey.
+        """Start listening for the bindings.
 
         Args:
-            on_press: Called when hotkey combo is pressed
-            on_release: Called when hotkey combo is released
+            on_event: Called with (action, pressed) when a binding is
+                pressed or released
+            on_modifiers: Called when the record binding's modifiers go down
         """
         if not EVDEV_AVAILABLE:
             logger.error("evdev not available, Wayland hotkeys disabled")
             return
 
-        self._device = self._find_keyboard()
-        if self._device is None:
-            logger.error(
-                "No keyboard found. Ensure user is in 'input' group: "
+        keyboards = self._find_keyboards()
+        if not keyboards:
+            # Keep listening: one plugged in or made readable later is picked up
+            logger.warning(
+                "No keyboard found yet. Ensure user is in 'input' group: "
                 "sudo usermod -aG input $USER"
             )
-            return
 
-        self._on_press = on_press
-        self._on_release = on_release
-        self._running = True
+        self._engine = BindingEngine(self._table, on_event, on_modifiers)
+
+        self._selector = selectors.DefaultSelector()
+        for device in keyboards:
+            self._add_device(device)
+
+        self._wakeup_r, self._wakeup_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
 
+        try:
+            self._inotify = _Inotify(INPUT_DIR, IN_CREATE | IN_ATTRIB)
+            self._selector.register(self._inotify.fd, selectors.EVENT_READ)
+        except OSError as e:
+            logger.warning("Keyboard hotplug detection unavailable: %s", e)
+
+        self._running = True
         self._thread = threading.Thread(target=self._event_loop, daemon=True)
         self._thread.start()
-        logger.info("Wayland hotkey listener started")
+        logger.info("Wayland hotkey listener started (%d keyboards)", len(keyboards))
 
     def stop(self) -> None:
         """Stop the hotkey listener."""
         self._running = False
 
-        if self._device is not None:
+        if self._wakeup_w is not None:
             try:
-                self._device.close()
-            except Exception:
+                os.write(self._wakeup_w, b"\0")
+            except OSError:
                 pass
-            self._device = None
 
         if self._thread is not None:
             self._thread.join(timeout=1.0)
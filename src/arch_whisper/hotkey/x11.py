@@ -1,95 +1,332 @@
-"""X11 hotkey backend using pynput."""
+"""X11 hotkey backend using a passive key grab."""
 
 from __future__ import annotations
 
 import logging
+import os
+import select
+import threading
 from typing import Callable
 
-from pynput import keyboard
+from Xlib import XK, X, error
+from Xlib import display as xdisplay
+from Xlib.protocol import rq
+
+from arch_whisper.hotkey.bindings import (
+    MODIFIER_BITS,
+    Action,
+    BindingEngine,
+    BindingTable,
+    parse_combo,
+)
 
 logger = logging.getLogger(__name__)
 
+# X modifier mask for each logical modifier bit
+X_MODIFIER_MASKS = {
+    MODIFIER_BITS["ctrl"]: X.ControlMask,
+    MODIFIER_BITS["shift"]: X.ShiftMask,
+    MODIFIER_BITS["alt"]: X.Mod1Mask,
+    MODIFIER_BITS["super"]: X.Mod4Mask,
+}
+
+# Keysym names for the logical modifiers (left and right)
+X_MODIFIER_KEYSYMS = {
+    "ctrl": ("Control_L", "Control_R"),
+    "shift": ("Shift_L", "Shift_R"),
+    "alt": ("Alt_L", "Alt_R"),
+    "super": ("Super_L", "Super_R"),
+}
+
+# Common key names whose keysym is spelled differently
+X_ALIASES = {
+    "esc": "Escape",
+    "backspace": "BackSpace",
+    "enter": "Return",
+    "del": "Delete",
+    "pgup": "Prior",
+    "pgdn": "Next",
+    "pageup": "Prior",
+    "pagedown": "Next",
+    "ins": "Insert",
+}
+
+# Lock modifiers that must not stop the grab from matching
+NUMLOCK_MASK = X.Mod2Mask
+IGNORED_MASKS = (0, X.LockMask, NUMLOCK_MASK, X.LockMask | NUMLOCK_MASK)
+
+# Engine modifier mask for each value of the low byte of an event's state
+STATE_TO_MASK = [
+    sum(bit for bit, x_mask in X_MODIFIER_MASKS.items() if state & x_mask)
+    for state in range(256)
+]
+
+# XKB protocol constants
+XKB_USE_CORE_KBD = 0x0100
+XKB_PCF_DETECTABLE_AUTO_REPEAT = 1 << 0
+
+
+class _XkbUseExtension(rq.ReplyRequest):
+    """XkbUseExtension request (python-xlib has no XKB binding)."""
+
+    _request = rq.Struct(
+        rq.Card8("opcode"),
+        rq.Opcode(0),
+        rq.RequestLength(),
+        rq.Card16("wanted_major"),
+        rq.Card16("wanted_minor"),
+    )
+    _reply = rq.Struct(
+        rq.ReplyCode(),
+        rq.Bool("supported"),
+        rq.Card16("sequence_number"),
+        rq.Card32("length"),
+        rq.Card16("server_major"),
+        rq.Card16("server_minor"),
+        rq.Pad(20),
+    )
+
+
+class _XkbPerClientFlags(rq.ReplyRequest):
+    """XkbPerClientFlags request, used to enable detectable autorepeat."""
+
+    _request = rq.Struct(
+        rq.Card8("opcode"),
+        rq.Opcode(21),
+        rq.RequestLength(),
+        rq.Card16("device_spec"),
+        rq.Pad(2),
+        rq.Card32("change"),
+        rq.Card32("value"),
+        rq.Card32("ctrls_to_change"),
+        rq.Card32("auto_ctrls"),
+        rq.Card32("auto_ctrls_values"),
+    )
+    _reply = rq.Struct(
+        rq.ReplyCode(),
+        rq.Card8("device_id"),
+        rq.Card16("sequence_number"),
+        rq.Card32("length"),
+        rq.Card32("supported"),
+        rq.Card32("value"),
+        rq.Card32("auto_ctrls"),
+        rq.Card32("auto_ctrls_values"),
+        rq.Pad(8),
+    )
+
+
+def _set_detectable_autorepeat(display: xdisplay.Display) -> bool:
+    """Ask XKB to suppress the fake KeyRelease events of autorepeat.
+
+    Returns:
+        True if the server supports and enabled detectable autorepeat
+    """
+    info = display.query_extension("XKEYBOARD")
+    if info is None or not info.present:
+        return False
+    try:
+        reply = _XkbUseExtension(
+            display=display.display,
+            opcode=info.major_opcode,
+            wanted_major=1,
+            wanted_minor=0,
+        )
+        if not reply.supported:
+            return False
+        reply = _XkbPerClientFlags(
+            display=display.display,
+            opcode=info.major_opcode,
+            device_spec=XKB_USE_CORE_KBD,
+            change=XKB_PCF_DETECTABLE_AUTO_REPEAT,
+            value=XKB_PCF_DETECTABLE_AUTO_REPEAT,
+            ctrls_to_change=0,
+            auto_ctrls=0,
+            auto_ctrls_values=0,
+        )
+        return bool(reply.value & XKB_PCF_DETECTABLE_AUTO_REPEAT)
+    except Exception as e:
+        logger.debug("Detectable autorepeat unavailable: %s", e)
+        return False
+
+
+def resolve_keysyms(name: str) -> list[int]:
+    """Map a key name like "space", "f5" or "ctrl" to keysyms."""
+    names: tuple[str, ...] | None = X_MODIFIER_KEYSYMS.get(name)
+    if names is None:
+        alias = X_ALIASES.get(name, name)
+        # Keysym names are case-sensitive: "space", "Escape", "F5"
+        names = (alias, alias.capitalize(), alias.upper())
+    keysyms = []
+    for candidate in names:
+        keysym = XK.string_to_keysym(candidate)
+        if keysym != X.NoSymbol and keysym not in keysyms:
+            keysyms.append(keysym)
+            if name not in X_MODIFIER_KEYSYMS:
+                break
+    return keysyms
+
+
+def to_x_mask(mask: int) -> int:
+    """Convert an engine modifier mask to an X modifier mask."""
+    return sum(x_mask for bit, x_mask in X_MODIFIER_MASKS.items() if mask & bit)
+
 
 class X11HotkeyBackend:
-    """Global hotkey listener for X11 using pynput."""
+    """Global hotkey listener for X11 using XGrabKey.
+
+    The X server only delivers events for the grabbed combos, so ordinary
+    typing never wakes Python. Release is detected from KeyRelease, with XKB
+    detectable autorepeat so holding the key doesn't produce fake releases.
+    """
 
-    def __init__(self, hotkey: str = "ctrl+space") -> None:
+    def __init__(self, bindings: dict[Action, str] | None = None) -> None:
         """Initialize the backend.
 
         Args:
-            hotkey: Hotkey combination (currently only ctrl+space supported)
+            bindings: Combo for each action; defaults to ctrl+space to record
+
+        Raises:
+            ValueError: If a binding cannot be parsed
         """
-        self._hotkey = hotkey
-        self._listener: keyboard.Listener | None = None
-        self._on_press: Callable[[], None] | None = None
-        self._on_release: Callable[[], None] | None = None
-
-        # Track key states to detect combo and filter repeats
-        self._ctrl_pressed = False
-        self._space_pressed = False
-        self._combo_active = False
-
-    def _handle_press(self, key: keyboard.Key | keyboard.KeyCode) -> None:
-        """Handle key press events."""
-        # Track Ctrl
-        if key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r):
-            self._ctrl_pressed = True
-
-        # Track Space
-        if key == keyboard.Key.space:
-            if self._space_pressed:
-                # Key repeat - ignore
-                return
-            self._space_pressed = True
-
-        # Check if combo just became active
-        if self._ctrl_pressed and self._space_pressed and not self._combo_active:
-            self._combo_active = True
-            logger.debug("Hotkey pressed: %s", self._hotkey)
-            if self._on_press:
-                self._on_press()
-
-    def _handle_release(self, key: keyboard.Key | keyboard.KeyCode) -> None:
-        """Handle key release events."""
-        released_ctrl = key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r)
-        released_space = key == keyboard.Key.space
-
-        if released_ctrl:
-            self._ctrl_pressed = False
-        if released_space:
-            self._space_pressed = False
-
-        # Check if combo was active and now broken
-        if self._combo_active and (released_ctrl or released_space):
-            self._combo_active = False
-            logger.debug("Hotkey released: %s", self._hotkey)
-            if self._on_release:
-                self._on_release()
+        self._bindings = bindings or {Action.RECORD: "ctrl+space"}
+        for combo in self._bindings.values():
+            _, key = parse_combo(combo)
+            if not resolve_keysyms(key):
+                raise ValueError(f"Unknown key {key!r} in hotkey {combo!r}")
+
+        self._display: xdisplay.Display | None = None
+        self._thread: threading.Thread | None = None
+        self._wakeup_r: int | None = None
+        self._wakeup_w: int | None = None
+        self._engine: BindingEngine | None = None
+        self._detectable_autorepeat = False
+
+    def _build_table(self, display: xdisplay.Display) -> BindingTable:
+        """Compile the bindings against the server's keyboard mapping."""
+
+        def resolve_key(name: str) -> list[int]:
+            keycodes = []
+            for keysym in resolve_keysyms(name):
+                keycode = display.keysym_to_keycode(keysym)
+                if keycode and keycode not in keycodes:
+                    keycodes.append(keycode)
+            return keycodes
+
+        return BindingTable.build(self._bindings, resolve_key)
+
+    def _grab(self, display: xdisplay.Display, table: BindingTable) -> None:
+        """Grab every binding on the root window with all lock-key variants."""
+        root = display.screen().root
+        catch = error.CatchError(error.BadAccess)
+        for keycode, mask, _ in table.combos:
+            x_mask = to_x_mask(mask)
+            for extra in IGNORED_MASKS:
+                root.grab_key(
+                    keycode,
+                    x_mask | extra,
+                    True,
+                    X.GrabModeAsync,
+                    X.GrabModeAsync,
+                    onerror=catch,
+                )
+        display.sync()
+        if catch.get_error():
+            combos = ", ".join(self._bindings.values())
+            raise RuntimeError(f"Hotkey ({combos}) is already grabbed by another client")
+
+    def _handle_event(self, display: xdisplay.Display, event) -> None:
+        """Feed grab events to the binding engine."""
+        engine = self._engine
+        assert engine is not None
+
+        if event.type == X.KeyPress:
+            engine.press(event.detail, STATE_TO_MASK[event.state & 0xFF])
+
+        elif event.type == X.KeyRelease and engine.active:
+            # Without detectable autorepeat, a held key sends KeyRelease
+            # immediately followed by a KeyPress with the same timestamp
+            upcoming = None
+            if not self._detectable_autorepeat and display.pending_events():
+                upcoming = display.next_event()
+                if (
+                    upcoming.type == X.KeyPress
+                    and upcoming.detail == event.detail
+                    and upcoming.time == event.time
+                ):
+                    return
+
+            engine.release(event.detail)
+
+            if upcoming is not None:
+                self._handle_event(display, upcoming)
+
+    def _event_loop(self) -> None:
+        """Wait on the X connection and the wakeup pipe."""
+        display = self._display
+        assert display is not None
+        try:
+            while True:
+                while display.pending_events():
+                    self._handle_event(display, display.next_event())
+                readable, _, _ = select.select([display.fileno(), self._wakeup_r], [], [])
+                if self._wakeup_r in readable:
+                    return
+        except Exception as e:
+            logger.error("X11 hotkey loop error: %s", e)
+        finally:
+            try:
+                display.screen().root.ungrab_key(X.AnyKey, X.AnyModifier)
+                display.close()
+            except Exception:
+                pass
+            for fd in (self._wakeup_r, self._wakeup_w):
+                if fd is not None:
+                    os.close(fd)
+            self._wakeup_r = self._wakeup_w = None
+            self._display = None
 
     def start(
         self,
-        on_press: Callable[[], None],
-        on_release: Callable[[], None],
+        on_event: Callable[[Action, bool], None],
+        on_modifiers: Callable[[], None] | None = None,
     ) -> None:
-        """Start listening for the hotkey.
+        """Start listening for the bindings.
 
         Args:
-            on_press: Called when hotkey combo is pressed
-            on_release: Called when hotkey combo is released
+            on_event: Called with (action, pressed) when a binding is
+                pressed or released
+            on_modifiers: Unused; grabs only report the bindings themselves
         """
-        self._on_press = on_press
-        self._on_release = on_release
+        self._display = xdisplay.Display()
+        try:
+            table = self._build_table(self._display)
+            self._engine = BindingEngine(table, on_event)
+            self._detectable_autorepeat = _set_detectable_autorepeat(self._display)
+            self._grab(self._display, table)
+        except Exception:
+            self._display.close()
+            self._display = None
+            raise
 
-        self._listener = keyboard.Listener(
-            on_press=self._handle_press,
-            on_release=self._handle_release,
+        self._wakeup_r, self._wakeup_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        self._thread = threading.Thread(target=self._event_loop, daemon=True)
+        self._thread.start()
+        logger.info(
+            "X11 hotkeys grabbed: %s (detectable autorepeat: %s)",
+            ", ".join(self._bindings.values()),
+            self._detectable_autorepeat,
         )
-        self._listener.start()
-        logger.info("X11 hotkey listener started")
 
     def stop(self) -> None:
         """Stop the hotkey listener."""
-        if self._listener is not None:
-            self._listener.stop()
-            self._listener = None
-            logger.info("X11 hotkey listener stopped")
+        if self._thread is None:
+            return
+
+        if self._wakeup_w is not None:
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except OSError:
+                pass
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        logger.info("X11 hotkey listener stopped")
@@ -0,0 +1,85 @@
+"""Main-thread event loops for arch_whisper.
+
+The app hands work to the main thread (tray updates, stopping a hands-free
+recording from the audio thread) through call_soon(). With the tray that
+is GTK's main loop; headless it is a plain queue drained by the main
+thread, so no GI modules are imported at all.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+from typing import Any, Callable, Protocol
+
+logger = logging.getLogger(__name__)
+
+_QUIT = object()  # Tells MainLoop.run() to return
+
+
+class Loop(Protocol):
+    """What the app needs from a main loop."""
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None: ...
+
+    def run(self) -> None: ...
+
+    def quit(self) -> None: ...
+
+
+class MainLoop:
+    """Minimal main loop for headless mode."""
+
+    def __init__(self) -> None:
+        # SimpleQueue.put is safe to call from signal handlers
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Run a callback on the main loop thread; safe from any thread."""
+        self._queue.put((callback, args))
+
+    def run(self) -> None:
+        """Run callbacks until quit() is called."""
+        while True:
+            item = self._queue.get()
+            if item is _QUIT:
+                return
+            callback, args = item
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.exception("Main loop callback failed: %s", e)
+
+    def quit(self) -> None:
+        """Make run() return after the callbacks already queued."""
+        self._queue.put(_QUIT)
+
+
+class GtkMainLoop:
+    """GTK's main loop, for the tray build."""
+
+    def __init__(self) -> None:
+        import gi
+
+        gi.require_version("Gtk", "3.0")
+        from gi.repository import GLib, Gtk
+
+        self._glib = GLib
+        self._gtk = Gtk
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Run a callback on the GTK thread; safe from any thread."""
+
+        def once() -> bool:
+            callback(*args)
+            return False  # Don't repeat
+
+        self._glib.idle_add(once)
+
+    def run(self) -> None:
+        """Run GTK until quit() is called."""
+        self._gtk.main()
+
+    def quit(self) -> None:
+        """Quit GTK's main loop."""
+        self._glib.idle_add(self._gtk.main_quit)
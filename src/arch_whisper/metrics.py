@@ -0,0 +1,165 @@
+"""In-process metrics registry for arch_whisper.
+
+Counters and histograms are pushed by the code that measures them; gauges
+are read through callbacks when metrics are rendered. render_openmetrics()
+produces the OpenMetrics text served on the status socket.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, tuned for per-stage latencies
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Histogram:
+    """Cumulative histogram of observed values."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_histograms: dict[str, Histogram] = {}
+_gauges: dict[str, Callable[[], float]] = {}
+
+
+def inc(name: str, amount: float = 1.0) -> None:
+    """Increment a counter.
+
+    Args:
+        name: Metric name (snake_case, unit suffix like _total)
+        amount: Amount to add
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + amount
+
+
+def observe(name: str, value: float) -> None:
+    """Record an observation in a histogram.
+
+    Args:
+        name: Metric name (snake_case, unit suffix like _seconds)
+        value: Observed value
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(value)
+
+
+def gauge(name: str, read: Callable[[], float] | None) -> None:
+    """Register a gauge read when metrics are collected.
+
+    Args:
+        name: Metric name
+        read: Returns the current value; None unregisters the gauge
+    """
+    with _lock:
+        if read is None:
+            _gauges.pop(name, None)
+        else:
+            _gauges[name] = read
+
+
+def counters() -> dict[str, float]:
+    """Get a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def histograms() -> dict[str, Histogram]:
+    """Get a copy of all histograms."""
+    with _lock:
+        return {
+            name: Histogram(h.buckets, list(h.counts), h.total, h.count)
+            for name, h in _histograms.items()
+        }
+
+
+def gauges() -> dict[str, float]:
+    """Read all gauges, skipping any whose callback fails."""
+    with _lock:
+        readers = dict(_gauges)
+    values = {}
+    for name, read in readers.items():
+        try:
+            values[name] = float(read())
+        except Exception as e:
+            logger.debug("Gauge %s failed: %s", name, e)
+    return values
+
+
+def rss_bytes() -> int | None:
+    """Resident set size of this process, or None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value; integers without a trailing .0."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_openmetrics() -> str:
+    """Render all metrics in the OpenMetrics text format."""
+    lines: list[str] = []
+
+    rss = rss_bytes()
+    current_gauges = gauges()
+    if rss is not None:
+        current_gauges["process_resident_memory_bytes"] = rss
+    for name, value in sorted(current_gauges.items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(value)}")
+
+    for name, value in sorted(counters().items()):
+        family = name.removesuffix("_total")
+        lines.append(f"# TYPE {family} counter")
+        lines.append(f"{family}_total {_format_value(value)}")
+
+    for name, histogram in sorted(histograms().items()):
+        lines.append(f"# TYPE {name} histogram")
+        for bound, count in zip(histogram.buckets, histogram.counts, strict=True):
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum {_format_value(histogram.total)}")
+        lines.append(f"{name}_count {histogram.count}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clear all metrics (used by tests)."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
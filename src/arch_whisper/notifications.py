@@ -33,7 +33,9 @@ def init_notifications(app_name: str) -> bool:
 def notify(summary: str, body: str = "", urgency: str = "normal") -> None:
     """Show a desktop notification.
 
-    Thread-safe: schedules the GI call onto the GTK main loop.
+    Thread-safe: schedules the GI call onto the GTK main loop. Without
+    notifications (headless, or if they failed to initialize) the message
+    is logged instead.
 
     Args:
         summary: Notification title
@@ -41,7 +43,7 @@ def notify(summary: str, body: str = "", urgency: str = "normal") -> None:
         urgency: One of "low", "normal", "critical"
     """
     if not _initialized:
-        logger.debug("Notifications not initialized, skipping: %s", summary)
+        logger.info("%s%s", summary, f": {body}" if body else "")
         return
 
     try:
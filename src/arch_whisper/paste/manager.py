@@ -3,27 +3,69 @@
 from __future__ import annotations
 
 import logging
-from typing import Protocol
+import threading
+import time
+from typing import TYPE_CHECKING, Protocol
 
+if TYPE_CHECKING:
+    from arch_whisper.config import Config
+
+from arch_whisper import metrics, tracing
+from arch_whisper.cancel import Cancelled, CancelToken
 from arch_whisper.paste.clipboard import copy_to_clipboard
+from arch_whisper.paste.sinks import SinkRouter
+from arch_whisper.paste.snapshot import ClipboardKeeper, ClipboardSnapshot
+from arch_whisper.paste.strategy import StrategyCache
 from arch_whisper.utils import get_session_type
 
 logger = logging.getLogger(__name__)
 
+# Methods that overwrite the clipboard and restore it afterwards
+CLIPBOARD_PASTE_METHODS = ("ctrl_v", "ctrl_shift_v")
+
+# Smoothing factor for per-method latency estimates (exponential moving average)
+LATENCY_ALPHA = 0.3
+
 
 class PasteBackend(Protocol):
     """Protocol for paste backends."""
 
-    def paste(self, text: str) -> bool: ...
+    @property
+    def can_type(self) -> bool: ...
+
+    def active_app(self) -> str | None: ...
+
+    def default_method(self, app: str | None) -> str: ...
+
+    def paste(self, text: str, method: str | None = None) -> bool: ...
+
+    def type_text(self, text: str) -> bool: ...
+
+    def close(self) -> None: ...
 
 
 class PasteManager:
     """Manages pasting text across X11 and Wayland."""
 
-    def __init__(self) -> None:
-        """Initialize the paste manager."""
+    def __init__(self, config: Config) -> None:
+        """Initialize the paste manager.
+
+        Args:
+            config: Application configuration
+        """
+        self._config = config
         self._backend: PasteBackend | None = None
 
+        # Measured latency per method: seconds per paste, seconds per typed char
+        self._latency: dict[str, float] = {}
+        self._strategies = StrategyCache()
+        self._clipboard = ClipboardKeeper()
+        self._sinks = SinkRouter(config)
+        self.last_app: str | None = None  # Focused app at the last paste()
+        # Re-pastes run on their own thread; their keystrokes and clipboard
+        # writes mustn't interleave with the pipeline's paste
+        self._lock = threading.Lock()
+
         session = get_session_type()
 
         if session == "wayland":
@@ -57,21 +99,161 @@ class PasteManager:
             logger.warning("Wayland paste backend unavailable: %s", e)
             return None
 
-    def paste(self, text: str) -> bool:
+    def _record_latency(self, method: str, seconds: float) -> None:
+        """Fold a latency sample into the running estimate for a method."""
+        previous = self._latency.get(method)
+        if previous is None:
+            self._latency[method] = seconds
+        else:
+            self._latency[method] = previous + LATENCY_ALPHA * (seconds - previous)
+
+    def _can_type(self, text: str) -> bool:
+        """Check whether text may be typed directly.
+
+        Only short, single-line text is typed, since a typed newline would
+        submit forms and chat messages.
+        """
+        if self._backend is None or not self._backend.can_type:
+            return False
+        limit = self._config.paste_typing_max_chars
+        return 0 < len(text) <= limit and text.isprintable()
+
+    def _should_type(self, text: str) -> bool:
+        """Decide whether to type text directly instead of pasting it.
+
+        The prior is that typing and pasting break even at
+        paste_typing_max_chars characters; measured latencies replace it, so
+        typing is used only while it is expected to beat a paste.
+        """
+        if not self._can_type(text):
+            return False
+
+        per_char = self._latency.get("type")
+        paste = self._latency.get("paste")
+        limit = self._config.paste_typing_max_chars
+        if per_char is None and paste is not None:
+            per_char = paste / limit
+        elif paste is None and per_char is not None:
+            paste = per_char * limit
+        if per_char is None or paste is None:
+            return True
+        return per_char * len(text) <= paste
+
+    def _deliver(self, method: str, text: str) -> bool:
+        """Deliver text into the focused application with one method."""
+        assert self._backend is not None
+        if method == "type":
+            with tracing.span("inject"):
+                return self._backend.type_text(text)
+        return self._backend.paste(text, method)
+
+    def _candidate_methods(self, text: str, app: str | None) -> list[str]:
+        """List methods to try in order, starting with the cached best."""
+        assert self._backend is not None
+        candidates: list[str] = []
+        if app is not None:
+            best = self._strategies.best(
+                app, len(text), self._can_type(text), self._config.paste_typing_max_chars
+            )
+            if best is not None:
+                metrics.inc("paste_strategy_hits_total")
+                candidates.append(best)
+            else:
+                metrics.inc("paste_strategy_misses_total")
+        if self._should_type(text):
+            candidates.append("type")
+        candidates.append(self._backend.default_method(app))
+        return list(dict.fromkeys(candidates))
+
+    def paste(self, text: str, cancel: CancelToken | None = None) -> bool:
         """Paste text into the focused application.
 
-        Falls back to clipboard-only if paste simulation fails.
+        Apps routed to an output sink get the text directly. Otherwise uses
+        the fastest method that has worked for the focused app before;
+        otherwise short text is typed directly without touching the clipboard
+        and longer text goes through the clipboard. After a clipboard paste
+        the previous clipboard contents are restored in the background.
+        Falls back to clipboard-only if paste simulation fails; that is not
+        remembered for the app, so the real methods are tried again next time.
+        Pastes from different threads run one at a time.
 
         Args:
             text: Text to paste
+            cancel: Token checked before each delivery attempt, including
+                after waiting for another paste to finish
 
         Returns:
-            True if paste succeeded, False if only clipboard copy succeeded
+            True if the text was delivered, False if it was only copied to
+            the clipboard (or not even that)
+
+        Raises:
+            Cancelled: If the token is cancelled before the text is delivered
         """
-        if self._backend is not None:
-            if self._backend.paste(text):
+        with self._lock:
+            return self._paste(text, cancel)
+
+    def _paste(self, text: str, cancel: CancelToken | None) -> bool:
+        """Body of paste(), run with the paste lock held."""
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        app = self._backend.active_app() if self._backend is not None else None
+        self.last_app = app
+        snapshot: ClipboardSnapshot | None = None
+        saved = False
+
+        sink = self._sinks.route(app)
+        if sink is not None:
+            if sink.write(text, app):
+                logger.debug("Delivered %d chars to output sink", len(text))
                 return True
+            logger.warning("Output sink failed, pasting instead")
+
+        if self._backend is not None:
+            for method in self._candidate_methods(text, app):
+                if cancel is not None and cancel.cancelled:
+                    if snapshot is not None:
+                        snapshot.close()
+                    raise Cancelled()
+
+                # Save the user's clipboard before the first method that overwrites it
+                if method in CLIPBOARD_PASTE_METHODS and not saved:
+                    if self._config.clipboard_restore:
+                        snapshot = self._clipboard.save()
+                    saved = True
+
+                start = time.monotonic()
+                success = self._deliver(method, text)
+                elapsed = time.monotonic() - start
+                seconds = elapsed / len(text) if method == "type" else elapsed
+
+                if app is not None:
+                    self._strategies.record(app, method, success, seconds)
+
+                if success:
+                    self._record_latency("type" if method == "type" else "paste", seconds)
+                    logger.debug("Delivered %d chars via %s in %.3fs", len(text), method, elapsed)
+                    if snapshot is not None:
+                        if method in CLIPBOARD_PASTE_METHODS:
+                            self._clipboard.restore_later(snapshot, text)
+                        else:
+                            snapshot.close()
+                    return True
+
+                logger.warning("Paste via %s failed", method)
+
+        # Text stays on the clipboard for a manual paste, so nothing is restored
+        if snapshot is not None:
+            snapshot.close()
 
         # Fallback: just copy to clipboard
         logger.warning("Paste failed, copying to clipboard only")
-        return copy_to_clipboard(text)
+        if not copy_to_clipboard(text):
+            logger.error("Copying to the clipboard failed too")
+        return False
+
+    def close(self) -> None:
+        """Release output sinks and the backend, and save learnt strategies."""
+        self._sinks.close()
+        self._strategies.flush()
+        if self._backend is not None:
+            self._backend.close()
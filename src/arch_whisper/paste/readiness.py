@@ -0,0 +1,210 @@
+"""Clipboard readiness checks for arch_whisper.
+
+After copying, the new clipboard owner has to be serving the text before a
+paste shortcut is sent, or the target app pastes stale contents. Instead of
+sleeping a fixed time, these checks ask for the clipboard contents and return
+as soon as the new text comes back.
+"""
+
+from __future__ import annotations
+
+import logging
+import select
+import subprocess
+import threading
+import time
+from typing import Any
+
+from arch_whisper import metrics, tracing
+from arch_whisper.utils import get_session_type
+
+logger = logging.getLogger(__name__)
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+
+    XLIB_AVAILABLE = True
+except ImportError:
+    XLIB_AVAILABLE = False
+
+# Upper bound on how long to wait for the clipboard owner
+READY_TIMEOUT = 0.5
+
+# Fixed delay used when readiness cannot be checked
+FALLBACK_DELAY = 0.05
+
+# Delay between retries when the old owner still answers (doubles each time)
+RETRY_DELAY = 0.001
+MAX_RETRY_DELAY = 0.02
+
+
+class X11SelectionProbe:
+    """Asks the CLIPBOARD owner for its text via a SelectionNotify round trip."""
+
+    def __init__(self) -> None:
+        """Initialize the probe (connects lazily on first use)."""
+        self._display: xdisplay.Display | None = None
+        self._window: Any = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        """Open the display and a hidden window to receive the selection."""
+        display = xdisplay.Display()
+        try:
+            root = display.screen().root
+            self._window = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+            self._clipboard = display.intern_atom("CLIPBOARD")
+            self._utf8 = display.intern_atom("UTF8_STRING")
+            self._incr = display.intern_atom("INCR")
+            self._property = display.intern_atom("ARCH_WHISPER_PROBE")
+        except Exception:
+            display.close()
+            raise
+        self._display = display
+
+    def _close(self) -> None:
+        """Close the display after a failure; the next wait reconnects."""
+        display, self._display = self._display, None
+        if display is None:
+            return
+        try:
+            display.close()
+        except Exception as e:
+            logger.debug("Closing the probe display failed: %s", e)
+
+    def _request(self, deadline: float) -> bytes | None:
+        """Request the clipboard as UTF-8 and wait for SelectionNotify.
+
+        Returns:
+            Clipboard bytes, b"" for a large (INCR) transfer, or None if the
+            owner refused or did not answer before the deadline
+        """
+        assert self._display is not None
+        self._window.convert_selection(
+            self._clipboard, self._utf8, self._property, X.CurrentTime
+        )
+        self._display.flush()
+
+        while True:
+            while self._display.pending_events():
+                event = self._display.next_event()
+                if event.type != X.SelectionNotify:
+                    continue
+                if event.property == X.NONE:
+                    return None
+                prop = self._window.get_full_property(self._property, X.AnyPropertyType)
+                self._window.delete_property(self._property)
+                if prop is None:
+                    return None
+                if prop.property_type == self._incr:
+                    return b""  # Too large for one round trip; owner is serving
+                value = prop.value
+                return value if isinstance(value, bytes) else bytes(value)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            select.select([self._display.fileno()], [], [], remaining)
+
+    def wait(self, text: str, deadline: float) -> bool | None:
+        """Wait until the clipboard owner serves text.
+
+        Args:
+            text: Text that was just copied
+            deadline: time.monotonic() value to give up at
+
+        Returns:
+            True if ready, False on timeout, None if the probe is unusable
+        """
+        expected = text.encode("utf-8")
+        delay = RETRY_DELAY
+
+        with self._lock:
+            try:
+                if self._display is None:
+                    self._connect()
+                while True:
+                    value = self._request(deadline)
+                    if value == b"" or value == expected:
+                        return True
+                    if time.monotonic() + delay >= deadline:
+                        return False
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+            except Exception as e:
+                logger.debug("Selection probe failed: %s", e)
+                self._close()
+                return None
+
+
+_x11_probe = X11SelectionProbe()
+
+
+def _wait_wayland(text: str, deadline: float) -> bool | None:
+    """Wait until the compositor offers text from the new data source.
+
+    Returns:
+        True if ready, False on timeout, None if wl-paste is unusable
+    """
+    expected = text.encode("utf-8")
+    delay = RETRY_DELAY
+
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            result = subprocess.run(
+                ["wl-paste", "--no-newline"],
+                capture_output=True,
+                timeout=max(remaining, 0.01),
+            )
+        except subprocess.TimeoutExpired:
+            return False
+        except (FileNotFoundError, OSError):
+            return None
+
+        if result.returncode == 0 and result.stdout == expected:
+            return True
+        if result.returncode != 0 and b"No selection" not in result.stderr:
+            return None
+
+        if time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+def wait_for_clipboard(text: str, timeout: float = READY_TIMEOUT) -> bool:
+    """Block until the clipboard is serving text, up to timeout.
+
+    Falls back to a short fixed delay when readiness cannot be observed.
+    The time spent waiting is recorded as the clipboard_ready_seconds metric.
+
+    Args:
+        text: Text that was just copied
+        timeout: Maximum seconds to wait
+
+    Returns:
+        True if readiness was confirmed, False on timeout or fallback
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    ready: bool | None = None
+
+    with tracing.span("clipboard_ready"):
+        if get_session_type() == "wayland":
+            ready = _wait_wayland(text, deadline)
+        elif XLIB_AVAILABLE:
+            ready = _x11_probe.wait(text, deadline)
+
+        if ready is None:
+            time.sleep(FALLBACK_DELAY)
+
+    elapsed = time.monotonic() - start
+    metrics.observe("clipboard_ready_seconds", elapsed)
+    if ready is False:
+        metrics.inc("clipboard_ready_timeouts_total")
+        logger.warning("Clipboard not confirmed ready after %.3fs", elapsed)
+    else:
+        logger.debug("Clipboard wait took %.3fs", elapsed)
+    return bool(ready)
@@ -0,0 +1,281 @@
+"""Direct output sinks for arch_whisper.
+
+Sinks hand text straight to programs we control (editor plugins, shell
+tooling) instead of going through the clipboard and synthesized keys:
+
+- "stdout": one line per transcript on standard output
+- "fifo": one line per transcript written to a named pipe
+- "socket": newline-delimited JSON broadcast to every connected client of a
+  Unix domain socket
+
+Sinks are chosen per focused app with the output_sinks config table; the
+"*" entry applies to every app without its own entry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import json
+import logging
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from arch_whisper.config import Config
+
+from arch_whisper import aio
+from arch_whisper.utils import runtime_dir
+
+logger = logging.getLogger(__name__)
+
+FIFO_NAME = "output.fifo"
+SOCKET_NAME = "output.sock"
+SEND_TIMEOUT = 1.0  # Seconds before a subscriber that stopped reading is dropped
+
+
+class OutputSink(Protocol):
+    """Protocol for output sinks."""
+
+    def write(self, text: str, app: str | None) -> bool: ...
+
+    def close(self) -> None: ...
+
+
+class StdoutSink:
+    """Writes each transcript as a line on stdout."""
+
+    def write(self, text: str, app: str | None) -> bool:
+        """Write text to stdout.
+
+        Args:
+            text: Transcript text
+            app: Focused app (unused)
+
+        Returns:
+            True if the write succeeded
+        """
+        try:
+            sys.stdout.write(text + "\n")
+            sys.stdout.flush()
+            return True
+        except (OSError, ValueError) as e:
+            logger.error("stdout sink failed: %s", e)
+            return False
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class FifoSink:
+    """Writes each transcript as a line to a named pipe.
+
+    Writes never block: if no reader has the FIFO open, the write fails and
+    the caller falls back to pasting.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Create the FIFO if it doesn't exist.
+
+        Args:
+            path: Override for the FIFO location
+
+        Raises:
+            OSError: If the path exists and is not a FIFO of ours
+        """
+        self._path = path or runtime_dir() / FIFO_NAME
+        try:
+            st = os.lstat(self._path)
+        except FileNotFoundError:
+            os.mkfifo(self._path, 0o600)
+        else:
+            # lstat, so a symlink to someone else's FIFO is refused too
+            if not stat.S_ISFIFO(st.st_mode):
+                raise OSError(f"{self._path} exists and is not a FIFO")
+            if st.st_uid != os.getuid():
+                raise OSError(f"{self._path} is owned by another user")
+        logger.info("FIFO output sink: %s", self._path)
+
+    def write(self, text: str, app: str | None) -> bool:
+        """Write text to the FIFO.
+
+        Args:
+            text: Transcript text
+            app: Focused app (unused)
+
+        Returns:
+            True if a reader received the text
+        """
+        try:
+            fd = os.open(self._path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                logger.debug("No reader on %s", self._path)
+            else:
+                logger.error("FIFO sink failed: %s", e)
+            return False
+
+        try:
+            os.set_blocking(fd, True)
+            os.write(fd, (text + "\n").encode("utf-8"))
+            return True
+        except OSError as e:
+            logger.error("FIFO sink write failed: %s", e)
+            return False
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        """Remove the FIFO."""
+        try:
+            self._path.unlink()
+        except OSError:
+            pass
+
+
+class SocketSink:
+    """Broadcasts transcripts as newline-delimited JSON over a Unix socket.
+
+    Each message looks like {"text": "...", "app": "firefox", "time": 1.7e9}.
+    Clients only read; anything they send is ignored. The server runs on the
+    shared event loop, so subscribers cost no threads.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Start listening for subscribers.
+
+        Args:
+            path: Override for the socket location
+        """
+        self._path = path or runtime_dir() / SOCKET_NAME
+        self._clients: list[asyncio.StreamWriter] = []  # Touched only on the loop
+
+        if self._path.exists():
+            self._path.unlink()
+        self._server = aio.run(
+            asyncio.start_unix_server(self._serve_client, path=str(self._path))
+        )
+        os.chmod(self._path, 0o600)
+        logger.info("Socket output sink: %s", self._path)
+
+    async def _serve_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Track a subscriber until it disconnects."""
+        self._clients.append(writer)
+        logger.debug("Output socket subscriber connected")
+        try:
+            while await reader.read(4096):
+                pass  # Discard input; EOF means the client left
+        except OSError:
+            pass
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        """Forget a subscriber and close its connection."""
+        if writer in self._clients:
+            self._clients.remove(writer)
+            writer.close()
+
+    async def _broadcast(self, data: bytes) -> int:
+        """Send data to every subscriber; returns how many got it."""
+        delivered = 0
+        for writer in list(self._clients):
+            try:
+                writer.write(data)
+                # A stuck subscriber must not stall delivery
+                await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+                delivered += 1
+            except (OSError, asyncio.TimeoutError):
+                self._drop(writer)
+        return delivered
+
+    def write(self, text: str, app: str | None) -> bool:
+        """Send text to every subscriber.
+
+        Args:
+            text: Transcript text
+            app: Focused app, included in the message
+
+        Returns:
+            True if at least one subscriber received the text
+        """
+        message = json.dumps({"text": text, "app": app, "time": time.time()}) + "\n"
+        try:
+            return aio.run(self._broadcast(message.encode("utf-8"))) > 0
+        except Exception as e:
+            logger.error("Socket sink failed: %s", e)
+            return False
+
+    async def _close(self) -> None:
+        """Stop the server and disconnect subscribers."""
+        self._server.close()
+        for writer in list(self._clients):
+            self._drop(writer)
+
+    def close(self) -> None:
+        """Disconnect subscribers and remove the socket."""
+        try:
+            aio.run(self._close(), timeout=2.0)
+        except Exception as e:
+            logger.debug("Socket sink close failed: %s", e)
+        try:
+            self._path.unlink()
+        except OSError:
+            pass
+
+
+SINK_TYPES = {
+    "stdout": StdoutSink,
+    "fifo": FifoSink,
+    "socket": SocketSink,
+}
+
+
+class SinkRouter:
+    """Picks the output sink for the focused app."""
+
+    def __init__(self, config: Config) -> None:
+        """Create the sinks named in the config.
+
+        Args:
+            config: Application configuration
+        """
+        self._routes = {app.lower(): name for app, name in config.output_sinks.items()}
+        self._sinks: dict[str, OutputSink] = {}
+
+        for name in set(self._routes.values()):
+            sink_type = SINK_TYPES.get(name)
+            if sink_type is None:
+                logger.warning("Unknown output sink: %s", name)
+                continue
+            try:
+                self._sinks[name] = sink_type()
+            except Exception as e:
+                logger.warning("Output sink %s unavailable: %s", name, e)
+
+    def route(self, app: str | None) -> OutputSink | None:
+        """Get the sink for an app, if any.
+
+        Args:
+            app: Focused app identifier, or None if unknown
+        """
+        if not self._sinks:
+            return None
+        name = self._routes.get(app) if app else None
+        if name is None:
+            name = self._routes.get("*")
+        return self._sinks.get(name) if name else None
+
+    def close(self) -> None:
+        """Close all sinks."""
+        for sink in self._sinks.values():
+            sink.close()
+        self._sinks.clear()
@@ -0,0 +1,306 @@
+"""Clipboard save/restore around pastes for arch_whisper.
+
+Pasting replaces whatever the user had on the clipboard. A snapshot asks
+the clipboard tool for text first, which is one subprocess in the common
+case; only a clipboard without text (an image, say) has its types listed
+to pick another one. The contents stream straight from the tool into an
+unlinked temp file, so the payload never passes through Python memory, and
+restoring hands the same file descriptor to the copy tool. Contents larger
+than MAX_SNAPSHOT_BYTES are not saved, so a huge image on the clipboard
+can't hold up the paste.
+
+Snapshots and restores go through one ClipboardKeeper per paste manager.
+While a restore is pending the clipboard still holds pasted text, so a
+paste in that window takes the pending snapshot over instead of saving the
+transcript as if it were the user's, and the older restore is dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import IO
+
+from arch_whisper import aio
+from arch_whisper.utils import get_session_type
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait after the paste shortcut before restoring, so the target
+# app has fetched the pasted text first
+RESTORE_DELAY = 0.3
+
+# Longest a new paste waits for a restore that is already writing
+RESTORE_WAIT = 2.0
+
+# Largest clipboard contents saved; anything bigger is not restored
+MAX_SNAPSHOT_BYTES = 16 * 1024 * 1024
+
+# Seconds to wait for the clipboard tool to hand over the contents
+READ_TIMEOUT = 2.0
+
+# Preferred types to restore, best first; otherwise the first MIME type wins
+PREFERRED_TYPES = (
+    "text/plain;charset=utf-8",
+    "UTF8_STRING",
+    "text/plain",
+    "image/png",
+)
+
+
+@dataclass
+class ClipboardSnapshot:
+    """Saved clipboard contents."""
+
+    mime_type: str  # Type whose contents were saved
+    data: IO[bytes]  # Unlinked temp file holding the contents
+
+    def close(self) -> None:
+        """Release the saved contents."""
+        self.data.close()
+
+
+def _commands(session: str) -> dict[str, list[str]]:
+    """Clipboard tool commands for a session type."""
+    if session == "wayland":
+        return {
+            "types": ["wl-paste", "--list-types"],
+            "read": ["wl-paste", "--no-newline", "--type"],
+            "write": ["wl-copy", "--type"],
+            "text": ["wl-paste", "--no-newline"],
+        }
+    return {
+        "types": ["xclip", "-selection", "clipboard", "-o", "-t", "TARGETS"],
+        "read": ["xclip", "-selection", "clipboard", "-o", "-t"],
+        "write": ["xclip", "-selection", "clipboard", "-i", "-t"],
+        "text": ["xclip", "-selection", "clipboard", "-o"],
+    }
+
+
+def _text_types(session: str) -> tuple[str, str]:
+    """Type to read text as, and the type to restore it as."""
+    if session == "wayland":
+        # wl-paste picks whichever text type the owner offers
+        return "text", "text/plain;charset=utf-8"
+    return "UTF8_STRING", "UTF8_STRING"
+
+
+def _pick_type(types: list[str]) -> str | None:
+    """Pick the type to save from the offered types."""
+    for mime_type in PREFERRED_TYPES:
+        if mime_type in types:
+            return mime_type
+    # Skip X11 atoms like TARGETS or STRING that are not MIME types
+    for mime_type in types:
+        if "/" in mime_type:
+            return mime_type
+    return None
+
+
+def _read(commands: dict[str, list[str]], read_type: str) -> IO[bytes] | None:
+    """Stream one type of the clipboard into a temp file.
+
+    Returns:
+        The contents, or None if the tool failed or they are larger than
+        MAX_SNAPSHOT_BYTES
+
+    Raises:
+        subprocess.TimeoutExpired: If the tool doesn't finish in time
+    """
+    data = tempfile.TemporaryFile(prefix="arch-whisper-clip-")
+    try:
+        procs: list[subprocess.Popen[bytes]] = []
+        try:
+            reader = subprocess.Popen(
+                [*commands["read"], read_type],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            procs.append(reader)
+            # head stops copying one byte past the limit, so oversized
+            # contents cost no more than the limit to detect
+            procs.append(subprocess.Popen(
+                ["head", "-c", str(MAX_SNAPSHOT_BYTES + 1)],
+                stdin=reader.stdout,
+                stdout=data,
+                stderr=subprocess.DEVNULL,
+            ))
+            # Leave head the only read end, so the tool stops when head does
+            assert reader.stdout is not None
+            reader.stdout.close()
+            procs[1].wait(timeout=READ_TIMEOUT)
+            returncode = reader.wait(timeout=READ_TIMEOUT)
+        finally:
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                if proc.stdout is not None:
+                    proc.stdout.close()
+
+        if os.fstat(data.fileno()).st_size > MAX_SNAPSHOT_BYTES:
+            logger.info("Clipboard too large to save (over %d bytes)", MAX_SNAPSHOT_BYTES)
+        elif returncode == 0:
+            data.seek(0)
+            return data
+        data.close()
+        return None
+    except BaseException:
+        data.close()
+        raise
+
+
+def take_snapshot() -> ClipboardSnapshot | None:
+    """Save the current clipboard contents.
+
+    Returns:
+        Snapshot, or None if the clipboard is empty or cannot be read
+    """
+    session = get_session_type()
+    commands = _commands(session)
+
+    try:
+        read_type, mime_type = _text_types(session)
+        data = _read(commands, read_type)
+        if data is None:
+            # No text: list what is offered and save the best other type
+            result = subprocess.run(commands["types"], capture_output=True, timeout=1)
+            if result.returncode != 0:
+                return None
+            types = [t for t in result.stdout.decode(errors="replace").split() if t]
+            picked = _pick_type(types)
+            if picked is None:
+                return None
+            mime_type = picked
+            data = _read(commands, mime_type)
+            if data is None:
+                return None
+
+        logger.debug("Saved clipboard as %s", mime_type)
+        return ClipboardSnapshot(mime_type=mime_type, data=data)
+
+    except FileNotFoundError as e:
+        logger.debug("Clipboard tool missing, not saving clipboard: %s", e)
+        return None
+    except Exception as e:
+        logger.warning("Failed to save clipboard: %s", e)
+        return None
+
+
+async def _still_holds(text: str, commands: dict[str, list[str]]) -> bool:
+    """Check that the clipboard still holds the pasted text."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *commands["text"],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await asyncio.wait_for(proc.communicate(), 1)
+        expected = text.encode("utf-8").rstrip(b"\n")
+        return proc.returncode == 0 and stdout.rstrip(b"\n") == expected
+    except Exception:
+        return False
+
+
+async def _restore(snapshot: ClipboardSnapshot, pasted_text: str) -> None:
+    """Put the saved contents back unless the user copied something new."""
+    commands = _commands(get_session_type())
+    try:
+        if not await _still_holds(pasted_text, commands):
+            logger.debug("Clipboard changed since paste, not restoring")
+            return
+
+        proc = await asyncio.create_subprocess_exec(
+            *commands["write"],
+            snapshot.mime_type,
+            stdin=snapshot.data,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await asyncio.wait_for(proc.communicate(), 2)
+        if proc.returncode != 0:
+            logger.warning("Clipboard restore failed: %s", stderr.decode())
+        else:
+            logger.debug("Restored clipboard (%s)", snapshot.mime_type)
+    except Exception as e:
+        logger.warning("Clipboard restore failed: %s", e)
+    finally:
+        snapshot.close()
+
+
+class ClipboardKeeper:
+    """Serializes clipboard snapshots and restores across pastes."""
+
+    def __init__(self, delay: float = RESTORE_DELAY) -> None:
+        """Initialize the keeper.
+
+        Args:
+            delay: Seconds to wait after a paste before restoring
+        """
+        self._delay = delay
+        self._cond = threading.Condition()
+        self._generation = 0  # Bumped by every save()
+        self._pending: ClipboardSnapshot | None = None  # Awaiting its restore
+        self._restoring = False  # A restore is writing the clipboard
+
+    def save(self) -> ClipboardSnapshot | None:
+        """Save the user's clipboard before a paste overwrites it.
+
+        Waits for a restore that is already writing. If a restore is still
+        pending, its snapshot is handed over and that restore is dropped.
+
+        Returns:
+            Snapshot, or None if the clipboard is empty or cannot be read
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._restoring, RESTORE_WAIT):
+                logger.warning("Clipboard restore still running, saving anyway")
+            self._generation += 1
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            logger.debug("Keeping the clipboard saved before the previous paste")
+            return pending
+        return take_snapshot()
+
+    def restore_later(
+        self, snapshot: ClipboardSnapshot, pasted_text: str
+    ) -> concurrent.futures.Future[None]:
+        """Restore a snapshot in the background after the paste lands.
+
+        Runs on the shared event loop rather than a thread of its own.
+
+        Args:
+            snapshot: Snapshot from save(); closed once restored
+            pasted_text: Text that was pasted, to detect newer user copies
+
+        Returns:
+            Future that completes when the restore is done or dropped
+        """
+        with self._cond:
+            generation = self._generation
+            self._pending = snapshot
+        return aio.submit(self._restore_after_delay(snapshot, pasted_text, generation))
+
+    async def _restore_after_delay(
+        self, snapshot: ClipboardSnapshot, pasted_text: str, generation: int
+    ) -> None:
+        """Restore unless a newer paste has taken the snapshot over."""
+        await asyncio.sleep(self._delay)
+        with self._cond:
+            if self._generation != generation:
+                logger.debug("A newer paste took over the clipboard snapshot")
+                return
+            self._pending = None
+            self._restoring = True
+        try:
+            await _restore(snapshot, pasted_text)
+        finally:
+            with self._cond:
+                self._restoring = False
+                self._cond.notify_all()
@@ -0,0 +1,162 @@
+"""Per-application paste strategy cache for arch_whisper."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+
+from arch_whisper.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_PATH = CACHE_DIR / "paste_strategies.json"
+
+# Ways to deliver text into an application. Copying to the clipboard alone
+# is a fallback, not a strategy, so it is never cached.
+METHODS = ("ctrl_v", "ctrl_shift_v", "type")
+
+# Seconds to batch recorded outcomes before writing the file
+SAVE_DELAY = 5.0
+
+# Smoothing factor for per-app latency estimates (exponential moving average)
+LATENCY_ALPHA = 0.3
+
+# File layout:
+# {
+#   "firefox": {
+#     "ctrl_v": {"latency": 0.012, "failures": 0},
+#     "type": {"latency": 0.0004, "failures": 0}
+#   }
+# }
+#
+# "latency" is seconds per paste, or seconds per character for "type".
+# "failures" counts consecutive failures; a method that has failed since it
+# last worked is not picked again until probing succeeds with it.
+
+
+class StrategyCache:
+    """Remembers which paste method works fastest for each application."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Initialize the cache, loading any saved strategies.
+
+        Args:
+            path: Override for the strategy file location
+        """
+        self._path = path or STRATEGY_PATH
+        self._lock = threading.Lock()
+        self._apps: dict[str, dict[str, dict[str, float]]] = self._load()
+        self._save_timer: threading.Timer | None = None
+
+    def _load(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Load strategies from disk, ignoring a missing or corrupt file."""
+        if not self._path.exists():
+            return {}
+        try:
+            data = json.loads(self._path.read_text())
+            if isinstance(data, dict):
+                # Drop entries for methods that are no longer strategies
+                return {
+                    app: {m: stats for m, stats in methods.items() if m in METHODS}
+                    for app, methods in data.items()
+                }
+        except Exception as e:
+            logger.warning("Ignoring unreadable paste strategy cache: %s", e)
+        return {}
+
+    def flush(self) -> None:
+        """Write strategies to disk atomically, if a save is pending."""
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self._save_timer.cancel()
+            self._save_timer = None
+            data = json.dumps(self._apps, indent=1, sort_keys=True)
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(data)
+            tmp_path.replace(self._path)
+        except OSError as e:
+            logger.warning("Failed to save paste strategy cache: %s", e)
+
+    def _schedule_save(self) -> None:
+        """Save after SAVE_DELAY, batching outcomes off the paste path.
+
+        Called with the lock held.
+        """
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def best(
+        self,
+        app: str,
+        length: int,
+        can_type: bool = True,
+        typing_max_chars: int = 0,
+    ) -> str | None:
+        """Get the fastest known-good method for an application.
+
+        Until typing has been measured for the app, the prior is that it
+        beats a paste for text up to typing_max_chars characters.
+
+        Args:
+            app: Application identifier (WM_CLASS or Wayland app_id)
+            length: Length of the text about to be delivered
+            can_type: Whether typing is allowed for this text
+            typing_max_chars: Longest text typing is assumed to win for
+
+        Returns:
+            Method name, or None if nothing has worked for this app yet
+        """
+        with self._lock:
+            methods = self._apps.get(app, {})
+            best_method: str | None = None
+            best_cost = float("inf")
+            for method, stats in methods.items():
+                if stats.get("failures", 0) > 0:
+                    continue
+                if method == "type" and not can_type:
+                    continue
+                cost = stats["latency"] * (length if method == "type" else 1)
+                if cost < best_cost:
+                    best_method, best_cost = method, cost
+
+            # Only pasted into this app so far: the prior says typing wins
+            # up to typing_max_chars, so try it before settling on a paste
+            if can_type and best_method is not None and "type" not in methods:
+                if length <= typing_max_chars:
+                    best_method = "type"
+
+            return best_method
+
+    def record(self, app: str, method: str, success: bool, seconds: float) -> None:
+        """Record the outcome of delivering text with a method.
+
+        The file is written a few seconds later, or by flush().
+
+        Args:
+            app: Application identifier
+            method: One of METHODS
+            success: Whether the method worked
+            seconds: Time taken (per character for "type")
+        """
+        if method not in METHODS:
+            return
+        with self._lock:
+            stats = self._apps.setdefault(app, {}).get(method)
+            if success:
+                if stats is None or "latency" not in stats:
+                    latency = seconds
+                else:
+                    latency = stats["latency"] + LATENCY_ALPHA * (seconds - stats["latency"])
+                self._apps[app][method] = {"latency": latency, "failures": 0}
+            else:
+                stats = stats or {"latency": seconds}
+                stats["failures"] = stats.get("failures", 0) + 1
+                self._apps[app][method] = stats
+            self._schedule_save()
@@ -2,15 +2,39 @@
 
 from __future__ import annotations
 
+import json
 import logging
-import shutil
+import os
 import subprocess
-import time
 
+from arch_whisper import capabilities, tracing
 from arch_whisper.paste.clipboard import copy_to_clipboard
+from arch_whisper.paste.readiness import wait_for_clipboard
+from arch_whisper.paste.x11 import TERMINAL_KEYWORDS
 
 logger = logging.getLogger(__name__)
 
+# Key injection commands for each paste method
+WTYPE_KEYS = {
+    "ctrl_v": ["-M", "ctrl", "v", "-m", "ctrl"],
+    "ctrl_shift_v": ["-M", "ctrl", "-M", "shift", "v", "-m", "shift", "-m", "ctrl"],
+}
+YDOTOOL_KEYS = {
+    "ctrl_v": ["29:1", "47:1", "47:0", "29:0"],
+    "ctrl_shift_v": ["29:1", "42:1", "47:1", "47:0", "42:0", "29:0"],
+}
+
+
+def _find_focused_app_id(node: dict) -> str | None:
+    """Find the app_id of the focused window in a sway tree."""
+    if node.get("focused"):
+        return node.get("app_id") or (node.get("window_properties") or {}).get("class")
+    for child in node.get("nodes", []) + node.get("floating_nodes", []):
+        app_id = _find_focused_app_id(child)
+        if app_id:
+            return app_id
+    return None
+
 
 class WaylandPasteBackend:
     """Paste text on Wayland using wtype or ydotool."""
@@ -25,17 +49,100 @@ class WaylandPasteBackend:
 
     def _detect_paste_tool(self) -> str | None:
         """Detect available keystroke injection tool."""
-        if shutil.which("wtype"):
+        if capabilities.which("wtype"):
             return "wtype"
-        if shutil.which("ydotool"):
+        if capabilities.which("ydotool"):
             return "ydotool"
         return None
 
-    def paste(self, text: str) -> bool:
-        """Copy text to clipboard and simulate Ctrl+V.
+    def active_app(self) -> str | None:
+        """Get the app_id of the focused window, lowercased.
+
+        Only Hyprland and sway expose this; other compositors return None.
+        """
+        try:
+            if os.environ.get("HYPRLAND_INSTANCE_SIGNATURE"):
+                result = subprocess.run(
+                    ["hyprctl", "activewindow", "-j"],
+                    capture_output=True,
+                    timeout=2,
+                )
+                if result.returncode == 0:
+                    app_id = json.loads(result.stdout).get("class")
+                    return app_id.lower() if app_id else None
+
+            elif os.environ.get("SWAYSOCK"):
+                result = subprocess.run(
+                    ["swaymsg", "-t", "get_tree"],
+                    capture_output=True,
+                    timeout=2,
+                )
+                if result.returncode == 0:
+                    app_id = _find_focused_app_id(json.loads(result.stdout))
+                    return app_id.lower() if app_id else None
+        except Exception as e:
+            logger.debug("Could not get active app: %s", e)
+        return None
+
+    def default_method(self, app: str | None) -> str:
+        """Pick the paste method to try first for an app.
+
+        Args:
+            app: app_id from active_app(), or None if unknown
+        """
+        if app and any(keyword in app for keyword in TERMINAL_KEYWORDS):
+            return "ctrl_shift_v"
+        return "ctrl_v"
+
+    @property
+    def can_type(self) -> bool:
+        """Check if direct typing is supported."""
+        return self._paste_tool is not None
+
+    def type_text(self, text: str) -> bool:
+        """Type text directly, leaving the clipboard untouched.
+
+        wtype builds one keymap covering the whole string; ydotool sends
+        through its persistent ydotoold daemon.
+
+        Args:
+            text: Printable text to type
+
+        Returns:
+            True if typing succeeded, False otherwise
+        """
+        if self._paste_tool is None:
+            return False
+
+        if self._paste_tool == "wtype":
+            cmd = ["wtype", "-"]
+        else:  # ydotool
+            cmd = ["ydotool", "type", "--key-delay", "0", "--file", "-"]
+
+        try:
+            result = subprocess.run(
+                cmd,
+                input=text.encode("utf-8"),
+                capture_output=True,
+                timeout=5,
+            )
+            if result.returncode != 0:
+                logger.error("%s type failed: %s", self._paste_tool, result.stderr.decode())
+                return False
+            return True
+        except FileNotFoundError:
+            logger.error("%s not found", self._paste_tool)
+            return False
+        except Exception as e:
+            logger.error("Wayland typing failed: %s", e)
+            return False
+
+    def paste(self, text: str, method: str | None = None) -> bool:
+        """Copy text to clipboard and simulate the paste shortcut.
 
         Args:
             text: Text to paste
+            method: "ctrl_v" or "ctrl_shift_v"; defaults to "ctrl_v"
 
         Returns:
             True if paste succeeded, False otherwise
@@ -48,22 +155,19 @@ class WaylandPasteBackend:
             logger.warning("No paste tool available, text copied to clipboard only")
             return False
 
-        # Small delay to ensure clipboard is ready
-        time.sleep(0.05)
+        # Wait for the new clipboard owner instead of a fixed sleep
+        wait_for_clipboard(text)
+
+        method = method or self.default_method(None)
+
+        if self._paste_tool == "wtype":
+            cmd = ["wtype", *WTYPE_KEYS[method]]
+        else:  # ydotool
+            cmd = ["ydotool", "key", *YDOTOOL_KEYS[method]]
 
         try:
-            if self._paste_tool == "wtype":
-                result = subprocess.run(
-                    ["wtype", "-M", "ctrl", "v", "-m", "ctrl"],
-                    capture_output=True,
-                    timeout=5,
-                )
-            else:  # ydotool
-                result = subprocess.run(
-                    ["ydotool", "key", "29:1", "47:1", "47:0", "29:0"],  # Ctrl+V
-                    capture_output=True,
-                    timeout=5,
-                )
+            with tracing.span("inject"):
+                result = subprocess.run(cmd, capture_output=True, timeout=5)
 
             if result.returncode != 0:
                 logger.error("%s failed: %s", self._paste_tool, result.stderr.decode())
@@ -76,3 +180,6 @@ class WaylandPasteBackend:
         except Exception as e:
             logger.error("Wayland paste failed: %s", e)
             return False
+
+    def close(self) -> None:
+        """Nothing to release; wtype and ydotool run per call."""
@@ -4,12 +4,30 @@ from __future__ import annotations
 
 import logging
 import subprocess
+import threading
 import time
 
+from arch_whisper import tracing
 from arch_whisper.paste.clipboard import copy_to_clipboard
+from arch_whisper.paste.readiness import wait_for_clipboard
 
 logger = logging.getLogger(__name__)
 
+# Seconds spare keycodes stay bound after the last typed key
+RELEASE_DELAY = 1.0
+
+# Seconds between typing with a spare keycode and binding it to another character
+REMAP_DELAY = 0.05
+
+try:
+    from Xlib import XK, X
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+
+    XLIB_AVAILABLE = True
+except ImportError:
+    XLIB_AVAILABLE = False
+
 # Terminal keywords to match in WM_CLASS (case-insensitive)
 # These are substrings that indicate a terminal emulator
 TERMINAL_KEYWORDS = {
@@ -63,9 +81,14 @@ def _get_active_window_class() -> str | None:
     return None
 
 
-def _is_terminal_window() -> bool:
-    """Check if the active window is a terminal emulator."""
-    wm_class = _get_active_window_class()
+def _is_terminal_window(wm_class: str | None = None) -> bool:
+    """Check if the active window is a terminal emulator.
+
+    Args:
+        wm_class: Known WM_CLASS of the active window; probed via xprop if None
+    """
+    if wm_class is None:
+        wm_class = _get_active_window_class()
     if wm_class:
         # Check if any terminal keyword appears in the WM_CLASS string
         for keyword in TERMINAL_KEYWORDS:
@@ -75,16 +98,264 @@ def _is_terminal_window() -> bool:
     return False
 
 
+def _char_to_keysym(char: str) -> int:
+    """Map a printable character to its X keysym."""
+    code = ord(char)
+    if 0x20 <= code <= 0x7E or 0xA0 <= code <= 0xFF:
+        return code  # Latin-1 keysyms equal their code point
+    return 0x01000000 | code
+
+
+class XTestTyper:
+    """Types text through a persistent XTest connection.
+
+    Keeps one display connection open so typing does not spawn a process per
+    utterance. Characters missing from the keyboard map are bound to spare
+    keycodes, which stay bound for RELEASE_DELAY after the last keystroke:
+    the focused app may read a key event only after a later mapping change,
+    and would then resolve the keycode to the wrong keysym (the xdotool
+    race). Bindings are reused for characters that repeat. When the spares
+    run out mid-text, the least recently used one is rebound after waiting
+    REMAP_DELAY.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the typer (connects lazily on first use)."""
+        self._display: xdisplay.Display | None = None
+        self._lock = threading.Lock()
+        self._spare: list[int] = []  # Keycodes with nothing bound at connect time
+        self._bound: dict[int, int] = {}  # Keysym -> spare keycode, least recent first
+        self._release_timer: threading.Timer | None = None
+
+    @property
+    def available(self) -> bool:
+        """Check if XTest typing can be used."""
+        return XLIB_AVAILABLE
+
+    def type_text(self, text: str) -> bool:
+        """Type text into the focused window.
+
+        Args:
+            text: Printable text to type
+
+        Returns:
+            True if all keystrokes were sent, False otherwise
+        """
+        if not XLIB_AVAILABLE:
+            return False
+
+        with self._lock:
+            if self._release_timer is not None:
+                self._release_timer.cancel()
+                self._release_timer = None
+            try:
+                if self._display is None:
+                    self._display = xdisplay.Display()
+                    self._spare = self._spare_keycodes(self._display)
+                    self._bound = {}
+                self._type(self._display, text)
+            except Exception as e:
+                logger.error("XTest typing failed: %s", e)
+                # Drop the connection so the next call reconnects
+                self._display = None
+                self._bound = {}
+                return False
+            if self._bound:
+                timer = threading.Timer(RELEASE_DELAY, lambda: self._release(timer))
+                timer.daemon = True
+                self._release_timer = timer
+                timer.start()
+            return True
+
+    def release(self) -> None:
+        """Unbind the spare keycodes now, e.g. on shutdown."""
+        self._release(None)
+
+    def _release(self, timer: threading.Timer | None) -> None:
+        """Reset every spare keycode bound while typing to NoSymbol.
+
+        Args:
+            timer: The release timer that fired, or None to release now; a
+                timer replaced by a later type_text() does nothing
+        """
+        with self._lock:
+            if timer is not None and timer is not self._release_timer:
+                return
+            if self._release_timer is not None:
+                self._release_timer.cancel()
+                self._release_timer = None
+            display, bound, self._bound = self._display, self._bound, {}
+            if display is None or not bound:
+                return
+            try:
+                for keycode in bound.values():
+                    display.change_keyboard_mapping(keycode, [(X.NoSymbol, X.NoSymbol)])
+                display.sync()
+            except Exception as e:
+                logger.debug("Could not unbind spare keycodes: %s", e)
+                self._display = None
+
+    def _lookup(self, display: xdisplay.Display, keysym: int) -> tuple[int, bool] | None:
+        """Find a keycode producing keysym, and whether it needs Shift."""
+        for keycode, index in display.keysym_to_keycodes(keysym):
+            if index in (0, 1):
+                return keycode, index == 1
+        return None
+
+    def _spare_keycodes(self, display: xdisplay.Display) -> list[int]:
+        """Find keycodes with no keysyms bound."""
+        first = display.display.info.min_keycode
+        count = display.display.info.max_keycode - first + 1
+        mapping = display.get_keyboard_mapping(first, count)
+        return [first + i for i, syms in enumerate(mapping) if not any(syms)]
+
+    def _free_keycode(self, in_use: set[int]) -> tuple[int, bool] | None:
+        """Pick a spare keycode for a new binding.
+
+        Args:
+            in_use: Keysyms the batch being planned already relies on
+
+        Returns:
+            (keycode, whether it was taken from an earlier binding), or None
+            if every spare keycode is needed by this batch
+        """
+        taken = set(self._bound.values())
+        for keycode in self._spare:
+            if keycode not in taken:
+                return keycode, False
+        for keysym, keycode in self._bound.items():
+            if keysym not in in_use:
+                del self._bound[keysym]
+                return keycode, True
+        return None
+
+    def _type(self, display: xdisplay.Display, text: str) -> None:
+        """Send key events for text, one round trip per batch."""
+        shift = display.keysym_to_keycode(XK.XK_Shift_L)
+        keysyms = [_char_to_keysym(c) for c in text]
+
+        pos = 0
+        while pos < len(keysyms):
+            # Plan the longest run whose unmapped keysyms fit in spare keycodes
+            in_use: set[int] = set()
+            new: dict[int, int] = {}
+            rebound = False
+            plan: list[tuple[int, bool]] = []
+            while pos < len(keysyms):
+                keysym = keysyms[pos]
+                keycode = self._bound.get(keysym)
+                if keycode is not None:
+                    # Most recently used last, so it is rebound last
+                    self._bound[keysym] = self._bound.pop(keysym)
+                    hit: tuple[int, bool] | None = (keycode, False)
+                else:
+                    hit = self._lookup(display, keysym)
+                if hit is None:
+                    free = self._free_keycode(in_use)
+                    if free is None:
+                        break
+                    keycode, taken = free
+                    rebound = rebound or taken
+                    self._bound[keysym] = new[keysym] = keycode
+                    hit = (keycode, False)
+                if keysym in self._bound:
+                    in_use.add(keysym)
+                plan.append(hit)
+                pos += 1
+
+            if not plan:
+                raise RuntimeError("No spare keycodes for unmapped characters")
+
+            if rebound:
+                # Let the app read the keys typed with the old binding first
+                time.sleep(REMAP_DELAY)
+            for keysym, keycode in new.items():
+                display.change_keyboard_mapping(keycode, [(keysym, keysym)])
+            if new:
+                display.sync()
+
+            for keycode, shifted in plan:
+                if shifted:
+                    xtest.fake_input(display, X.KeyPress, shift)
+                xtest.fake_input(display, X.KeyPress, keycode)
+                xtest.fake_input(display, X.KeyRelease, keycode)
+                if shifted:
+                    xtest.fake_input(display, X.KeyRelease, shift)
+            display.sync()
+
+
+# Paste shortcut sent by xdotool for each paste method
+PASTE_KEYS = {
+    "ctrl_v": "ctrl+v",
+    "ctrl_shift_v": "ctrl+shift+v",
+}
+
+
 class X11PasteBackend:
     """Paste text using xdotool on X11."""
 
-    def paste(self, text: str) -> bool:
-        """Copy text to clipboard and simulate paste shortcut.
+    def __init__(self) -> None:
+        """Initialize the backend."""
+        self._typer = XTestTyper()
+        self._display: xdisplay.Display | None = None
+
+    def active_app(self) -> str | None:
+        """Get the WM_CLASS class of the focused window, lowercased.
+
+        Reads _NET_ACTIVE_WINDOW over a persistent connection instead of
+        spawning xdotool and xprop.
+        """
+        if not XLIB_AVAILABLE:
+            return None
+        try:
+            if self._display is None:
+                self._display = xdisplay.Display()
+            root = self._display.screen().root
+            atom = self._display.intern_atom("_NET_ACTIVE_WINDOW")
+            prop = root.get_full_property(atom, X.AnyPropertyType)
+            if not prop or not prop.value or not prop.value[0]:
+                return None
+            window = self._display.create_resource_object("window", prop.value[0])
+            wm_class = window.get_wm_class()
+            if wm_class:
+                return wm_class[1].lower()
+        except Exception as e:
+            logger.debug("Could not get active app: %s", e)
+            self._display = None
+        return None
+
+    def default_method(self, app: str | None) -> str:
+        """Pick the paste method to try first for an app.
 
         Uses Ctrl+Shift+V for terminals, Ctrl+V for other apps.
 
+        Args:
+            app: WM_CLASS from active_app(), or None if unknown
+        """
+        return "ctrl_shift_v" if _is_terminal_window(app) else "ctrl_v"
+
+    @property
+    def can_type(self) -> bool:
+        """Check if direct typing is supported."""
+        return self._typer.available
+
+    def type_text(self, text: str) -> bool:
+        """Type text directly, leaving the clipboard untouched.
+
+        Args:
+            text: Printable text to type
+
+        Returns:
+            True if typing succeeded, False otherwise
+        """
+        return self._typer.type_text(text)
+
+    def paste(self, text: str, method: str | None = None) -> bool:
+        """Copy text to clipboard and simulate paste shortcut.
+
         Args:
             text: Text to paste
+            method: "ctrl_v" or "ctrl_shift_v"; detected from the window if None
 
         Returns:
             True if paste succeeded, False otherwise
@@ -93,21 +364,20 @@ class X11PasteBackend:
             logger.error("Failed to copy to clipboard")
             return False
 
-        # Small delay to ensure clipboard is ready
-        time.sleep(0.05)
+        # Wait for the new clipboard owner instead of a fixed sleep
+        wait_for_clipboard(text)
 
-        # Use Ctrl+Shift+V for terminals, Ctrl+V for other apps
-        if _is_terminal_window():
-            paste_keys = "ctrl+shift+v"
-        else:
-            paste_keys = "ctrl+v"
+        if method is None:
+            method = self.default_method(None)
+        paste_keys = PASTE_KEYS[method]
 
         try:
-            result = subprocess.run(
-                ["xdotool", "key", paste_keys],
-                capture_output=True,
-                timeout=5,
-            )
+            with tracing.span("inject"):
+                result = subprocess.run(
+                    ["xdotool", "key", paste_keys],
+                    capture_output=True,
+                    timeout=5,
+                )
             if result.returncode != 0:
                 logger.error("xdotool failed: %s", result.stderr.decode())
                 return False
@@ -119,3 +389,7 @@ class X11PasteBackend:
         except Exception as e:
             logger.error("X11 paste failed: %s", e)
             return False
+
+    def close(self) -> None:
+        """Unbind any spare keycodes still bound for typed characters."""
+        self._typer.release()
@@ -0,0 +1,270 @@
+"""Staged worker pipeline for arch_whisper.
+
+A pipeline is a chain of stages (transcribe -> cleanup -> paste), each
+served by long-lived worker threads and fed by a bounded queue. Consecutive
+jobs overlap: while one utterance is being cleaned up, the next can already
+be transcribing. A full queue blocks the stage before it, so a slow stage
+pushes back on submit() instead of letting work pile up in memory.
+
+Stages can ask for their input in submission order, and completion
+callbacks always run in submission order, so a stage with several workers
+never reorders what gets pasted.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from arch_whisper import metrics, tracing
+from arch_whisper.cancel import Cancelled, CancelToken
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Tells a worker to exit
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline.
+
+    func receives the previous stage's result and the job's cancel token.
+    Returning None ends the job early (e.g. nothing was said); raising
+    records the error on the job and skips the remaining stages.
+    """
+
+    name: str
+    func: Callable[[Any, CancelToken], Any]
+    workers: int = 1
+    queue_size: int = 4
+    ordered: bool = False  # Feed jobs to this stage in submission order
+
+
+@dataclass
+class Job:
+    """A unit of work flowing through a pipeline."""
+
+    seq: int
+    value: Any
+    cancel: CancelToken
+    error: Exception | None = None
+    failed_stage: str | None = None
+    skipped: bool = False  # A stage returned None
+    timings: dict[str, float] = field(default_factory=dict)  # Stage -> seconds
+    trace: tracing.Trace | None = None  # Current on the worker thread during each stage
+    done: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the job's token was cancelled."""
+        return self.cancel.cancelled
+
+    @property
+    def active(self) -> bool:
+        """Whether remaining stages should still run."""
+        return self.error is None and not self.skipped and not self.cancel.cancelled
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the job to complete.
+
+        Returns:
+            True if the job completed within the timeout
+        """
+        return self.done.wait(timeout)
+
+
+class _Gate:
+    """Hands jobs to the next step, optionally restoring submission order."""
+
+    def __init__(self, deliver: Callable[[Job], None], ordered: bool) -> None:
+        self._deliver = deliver
+        self._ordered = ordered
+        self._lock = threading.Lock()
+        self._pending: dict[int, Job] = {}
+        self._next = 0
+
+    def put(self, job: Job) -> None:
+        """Pass a job on, holding it back until earlier jobs have passed."""
+        if not self._ordered:
+            self._deliver(job)
+            return
+        # Delivering under the lock keeps order; a full queue blocks here,
+        # which is the backpressure we want
+        with self._lock:
+            self._pending[job.seq] = job
+            while self._next in self._pending:
+                self._deliver(self._pending.pop(self._next))
+                self._next += 1
+
+
+class Pipeline:
+    """Long-lived stage workers connected by bounded queues."""
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        on_complete: Callable[[Job], None] | None = None,
+        name: str = "pipeline",
+    ) -> None:
+        """Build the pipeline; call start() to launch the workers.
+
+        Args:
+            stages: Steps in order
+            on_complete: Called with each finished job, in submission order,
+                whether it succeeded, failed, was skipped or was cancelled
+            name: Prefix for worker thread names
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self._stages = stages
+        self._on_complete = on_complete
+        self._name = name
+
+        self._queues: list[queue.Queue] = [queue.Queue(maxsize=s.queue_size) for s in stages]
+        # Gate i hands jobs from stage i to stage i + 1; the last one completes them
+        self._gates = [
+            _Gate(q.put, s.ordered) for q, s in zip(self._queues[1:], stages[1:], strict=True)
+        ]
+        self._gates.append(_Gate(self._complete, ordered=True))
+
+        self._threads: list[threading.Thread] = []
+        self._submit_lock = threading.Lock()
+        self._next_seq = 0
+        self._outstanding = 0
+        self._idle = threading.Condition()
+
+    @property
+    def outstanding(self) -> int:
+        """Jobs submitted but not yet completed."""
+        with self._idle:
+            return self._outstanding
+
+    def start(self) -> None:
+        """Launch the stage workers."""
+        for index, stage in enumerate(self._stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"{self._name}-{stage.name}-{n}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(
+        self,
+        value: Any,
+        cancel: CancelToken | None = None,
+        block: bool = True,
+        timeout: float | None = None,
+        trace: tracing.Trace | None = None,
+    ) -> Job:
+        """Queue a value for the first stage.
+
+        Args:
+            value: Input for the first stage
+            cancel: Token for the job; a new one if omitted
+            block: Wait for room in the first queue
+            timeout: Longest wait when blocking
+            trace: Trace that records a span per stage
+
+        Returns:
+            The queued job
+
+        Raises:
+            queue.Full: If there is no room and block is False or the
+                timeout expired
+        """
+        with self._submit_lock:
+            job = Job(
+                seq=self._next_seq,
+                value=value,
+                cancel=cancel or CancelToken(),
+                trace=trace,
+            )
+            with self._idle:
+                self._outstanding += 1
+            try:
+                self._queues[0].put(job, block=block, timeout=timeout)
+            except queue.Full:
+                with self._idle:
+                    self._outstanding -= 1
+                raise
+            self._next_seq += 1
+        return job
+
+    def _work(self, index: int) -> None:
+        """Worker loop for one stage."""
+        stage = self._stages[index]
+        inbox = self._queues[index]
+        forward = self._gates[index].put
+
+        while True:
+            job = inbox.get()
+            if job is _STOP:
+                return
+
+            if job.active:
+                start = time.perf_counter()
+                try:
+                    with tracing.activate(job.trace):
+                        result = stage.func(job.value, job.cancel)
+                    if result is None:
+                        job.skipped = True
+                    else:
+                        job.value = result
+                except Cancelled:
+                    logger.debug("Job %d cancelled in %s", job.seq, stage.name)
+                except Exception as e:
+                    logger.error("%s failed: %s", stage.name, e)
+                    job.error = e
+                    job.failed_stage = stage.name
+                end = time.perf_counter()
+                job.timings[stage.name] = end - start
+                metrics.observe(f"stage_{stage.name}_seconds", end - start)
+                if job.trace is not None:
+                    job.trace.add_span(stage.name, start, end)
+
+            forward(job)
+
+    def _complete(self, job: Job) -> None:
+        """Finish a job and notify the caller."""
+        job.done.set()
+        try:
+            if self._on_complete is not None:
+                self._on_complete(job)
+        except Exception as e:
+            logger.error("Pipeline completion callback failed: %s", e)
+        finally:
+            with self._idle:
+                self._outstanding -= 1
+                self._idle.notify_all()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted job has completed.
+
+        Returns:
+            True if the pipeline drained within the timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Let queued jobs finish, then stop the workers.
+
+        Args:
+            timeout: Longest wait for queued jobs to drain
+        """
+        if not self.join(timeout):
+            logger.warning("%s: %d jobs still running at close", self._name, self.outstanding)
+        for index, stage in enumerate(self._stages):
+            for _ in range(stage.workers):
+                self._queues[index].put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads.clear()
@@ -2,15 +2,17 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
-import shutil
+import time
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from arch_whisper.config import Config
 
+from arch_whisper import aio, capabilities, metrics, tracing
+from arch_whisper.cancel import Cancelled, CancelToken
+
 logger = logging.getLogger(__name__)
 
 # Cleanup prompt for transcription post-processing
@@ -32,7 +34,7 @@ SYSTEM_PROMPT = "You are a transcription cleanup assistant. Output only the clea
 
 def _claude_cli_available() -> bool:
     """Check if Claude CLI is available."""
-    return shutil.which("claude") is not None
+    return capabilities.which("claude") is not None
 
 
 class ClaudePostProcessor:
@@ -49,6 +51,7 @@ class ClaudePostProcessor:
         # Check for API key (config or environment variable)
         self._api_key = config.anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
         self._cli_available = _claude_cli_available()
+        self.last_error: str | None = None  # Most recent failure, for the status endpoint
 
         if self._api_key:
             logger.info("Using Anthropic API key for post-processing")
@@ -62,14 +65,18 @@ class ClaudePostProcessor:
         """Check if Claude processing is available."""
         return bool(self._api_key) or self._cli_available
 
-    def process(self, raw_text: str) -> str:
+    def process(self, raw_text: str, cancel: CancelToken | None = None) -> str:
         """Process transcribed text with Claude.
 
         Args:
             raw_text: Raw transcription text
+            cancel: Token that aborts the request in flight
 
         Returns:
             Cleaned text, or raw_text if processing fails
+
+        Raises:
+            Cancelled: If the token is cancelled
         """
         if not raw_text.strip():
             return raw_text
@@ -78,29 +85,41 @@ class ClaudePostProcessor:
             return raw_text
 
         try:
-            # Prefer API key if available (faster, no CLI overhead)
-            if self._api_key:
-                return self._process_with_api(raw_text)
-            else:
-                return asyncio.run(self._process_with_cli(raw_text))
+            # Prefer API key if available (faster, no CLI overhead).
+            # Both run on the shared event loop, where cancelling the task
+            # aborts the HTTP request or terminates the CLI process.
+            with tracing.span("claude"):
+                if self._api_key:
+                    return aio.run(self._process_with_api(raw_text), cancel)
+                else:
+                    # The loop thread has no current trace, so pass it along
+                    trace = tracing.current()
+                    return aio.run(self._process_with_cli(raw_text, trace), cancel)
+        except Cancelled:
+            logger.info("Claude processing cancelled")
+            raise
         except Exception as e:
+            metrics.inc("claude_errors_total")
+            self.last_error = str(e)
             logger.error("Claude processing failed: %s", e)
             return raw_text
 
-    def _process_with_api(self, raw_text: str) -> str:
+    async def _process_with_api(self, raw_text: str) -> str:
         """Process using Anthropic API directly."""
         import anthropic
 
-        client = anthropic.Anthropic(api_key=self._api_key)
-
-        response = client.messages.create(
-            model=self._config.claude_model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": CLEANUP_PROMPT.format(text=raw_text)}
-            ],
-        )
+        client = anthropic.AsyncAnthropic(api_key=self._api_key)
+        try:
+            response = await client.messages.create(
+                model=self._config.claude_model,
+                max_tokens=1024,
+                system=SYSTEM_PROMPT,
+                messages=[
+                    {"role": "user", "content": CLEANUP_PROMPT.format(text=raw_text)}
+                ],
+            )
+        finally:
+            await client.close()
 
         if response.content and len(response.content) > 0:
             content_block = response.content[0]
@@ -117,9 +136,21 @@ class ClaudePostProcessor:
         logger.warning("Empty response from Claude API, using raw text")
         return raw_text
 
-    async def _process_with_cli(self, raw_text: str) -> str:
-        """Process using Claude Code CLI (Agent SDK)."""
-        from claude_agent_sdk import query, ClaudeAgentOptions, AssistantMessage, TextBlock
+    async def _process_with_cli(
+        self, raw_text: str, trace: tracing.Trace | None = None
+    ) -> str:
+        """Process using Claude Code CLI (Agent SDK).
+
+        Args:
+            raw_text: Raw transcription text
+            trace: Trace to record time to first message in
+        """
+        from claude_agent_sdk import (
+            AssistantMessage,
+            ClaudeAgentOptions,
+            TextBlock,
+            query,
+        )
 
         options = ClaudeAgentOptions(
             system_prompt=SYSTEM_PROMPT,
@@ -130,9 +161,14 @@ class ClaudePostProcessor:
 
         prompt = CLEANUP_PROMPT.format(text=raw_text)
         response_text = ""
+        start = time.perf_counter()
+        first = True
 
         async for message in query(prompt=prompt, options=options):
             if isinstance(message, AssistantMessage):
+                if first and trace is not None:
+                    trace.add_span("claude_ttfb", start, time.perf_counter())
+                first = False
                 for block in message.content:
                     if isinstance(block, TextBlock):
                         response_text += block.text
@@ -3,79 +3,64 @@
 from __future__ import annotations
 
 import logging
-import shutil
 
-from arch_whisper.utils import get_session_type
+from arch_whisper import capabilities
+from arch_whisper.capabilities import Capabilities
 
 logger = logging.getLogger(__name__)
 
 
-def check_dependencies() -> list[str]:
+def check_dependencies(caps: Capabilities | None = None, gui: bool = True) -> list[str]:
     """Check for required system dependencies.
 
+    Args:
+        caps: Probe result to check; the shared (cached) one if omitted
+        gui: Whether GTK and the tray are needed (False when headless)
+
     Returns:
         List of missing dependency descriptions
     """
+    caps = caps or capabilities.get(gui=gui)
     missing: list[str] = []
-    session = get_session_type()
-
-    # Check GTK/GI
-    try:
-        import gi
 
-        gi.require_version("Gtk", "3.0")
-        gi.require_version("Notify", "0.7")
-        from gi.repository import Gtk, Notify  # noqa: F401
-    except (ImportError, ValueError) as e:
-        missing.append(f"PyGObject/GTK ({e})")
+    if gui and caps.gtk_error is not None:
+        missing.append(f"PyGObject/GTK ({caps.gtk_error})")
 
-    # Check AppIndicator
-    try:
-        import gi
-
-        gi.require_version("AyatanaAppIndicator3", "0.1")
-        from gi.repository import AyatanaAppIndicator3  # noqa: F401
-    except (ImportError, ValueError):
+    if gui and not caps.appindicator:
         missing.append("gir1.2-ayatanaappindicator3-0.1")
 
     # Session-specific checks
-    if session == "x11":
-        if not shutil.which("xdotool"):
+    if caps.session == "x11":
+        if not caps.has("xdotool"):
             missing.append("xdotool (sudo apt install xdotool)")
 
-    elif session == "wayland":
-        if not shutil.which("wl-copy"):
+    elif caps.session == "wayland":
+        if not caps.has("wl-copy"):
             missing.append("wl-clipboard (sudo apt install wl-clipboard)")
 
-        has_paste_tool = (
-            shutil.which("wtype") is not None or shutil.which("ydotool") is not None
-        )
-        if not has_paste_tool:
+        if not (caps.has("wtype") or caps.has("ydotool")):
             missing.append("wtype or ydotool (for paste simulation)")
 
     return missing
 
 
-def check_optional_dependencies() -> dict[str, bool]:
+def check_optional_dependencies(caps: Capabilities | None = None) -> dict[str, bool]:
     """Check optional dependencies and their availability.
 
+    Args:
+        caps: Probe result to check; the shared (cached) one if omitted
+
     Returns:
         Dict mapping feature names to availability
     """
+    caps = caps or capabilities.get()
     features: dict[str, bool] = {}
 
     # Claude CLI (used via Agent SDK for post-processing)
-    features["claude_cli"] = shutil.which("claude") is not None
+    features["claude_cli"] = caps.has("claude")
 
     # Wayland evdev access
-    session = get_session_type()
-    if session == "wayland":
-        try:
-            import evdev
-
-            devices = list(evdev.list_devices())
-            features["evdev_access"] = len(devices) > 0
-        except Exception:
-            features["evdev_access"] = False
+    if caps.evdev_devices is not None:
+        features["evdev_access"] = caps.evdev_devices > 0
 
     return features
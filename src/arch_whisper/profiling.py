@@ -0,0 +1,306 @@
+"""On-demand profiling for arch_whisper.
+
+Profiling is armed in a running process (SIGUSR1 or the tray menu) and
+covers the next few utterances. Each session gets a directory under
+~/.cache/arch-whisper/profiles/ holding:
+
+    stacks.txt          every thread's stack when profiling was armed
+    samples.folded      sampled stacks of all threads while the session ran
+                        (folded format, for flamegraph.pl or speedscope)
+    NN-<trace id>/      one directory per utterance:
+        audio.wav       the recorded audio
+        trace.json      its latency trace
+        <stage>.prof    cProfile stats for each pipeline stage (pstats)
+        <stage>.txt     the top functions by cumulative time
+
+so a slow run can be replayed and inspected offline.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import traceback
+import wave
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from arch_whisper import tracing
+from arch_whisper.cancel import CancelToken
+from arch_whisper.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = CACHE_DIR / "profiles"
+
+# Sampling interval for the all-threads stack sampler
+SAMPLE_INTERVAL = 0.01
+
+# Functions listed in each stage's text summary
+TOP_FUNCTIONS = 40
+
+# Python 3.12+ allows one active cProfile per process, and stages overlap
+# across worker threads, so stages take turns at it
+_cprofile_lock = threading.Lock()
+
+
+def format_thread_stacks() -> str:
+    """Render the current stack of every thread."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    parts = []
+    for ident, frame in sys._current_frames().items():
+        parts.append(f"Thread {names.get(ident, '?')} ({ident}):\n")
+        parts.extend(traceback.format_stack(frame))
+        parts.append("\n")
+    return "".join(parts)
+
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int) -> None:
+    """Write float32 mono samples as a 16-bit WAV file."""
+    import numpy as np
+
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+class _Sampler:
+    """Samples the stacks of all threads from a background thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.samples: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, top in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                frame: FrameType | None = top
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Profiler:
+    """Profiles the next N utterances on request.
+
+    The app calls claim() when it submits a recording, wraps its pipeline
+    stage functions with wrap(), and calls complete() when a job finishes.
+    Utterances are identified by their latency trace, which the pipeline
+    makes current while a stage runs.
+    """
+
+    def __init__(self, sample_rate: int, root: Path | None = None) -> None:
+        """Initialize an idle profiler.
+
+        Args:
+            sample_rate: Sample rate of recorded audio
+            root: Directory for profile sessions
+        """
+        self._sample_rate = sample_rate
+        self._root = root or PROFILE_DIR
+        self._lock = threading.Lock()
+        self._session: Path | None = None
+        self._remaining = 0  # Utterances still to claim
+        self._active: dict[str, Path] = {}  # Trace id -> utterance directory
+        self._claimed = 0
+        self._sampler: _Sampler | None = None
+
+    @property
+    def armed(self) -> bool:
+        """Whether upcoming utterances will be profiled."""
+        with self._lock:
+            return self._remaining > 0
+
+    @property
+    def session(self) -> Path | None:
+        """Directory of the running session, if any."""
+        with self._lock:
+            return self._session
+
+    def arm(self, utterances: int) -> Path | None:
+        """Profile the next utterances; ignored while a session is running.
+
+        Args:
+            utterances: How many utterances to profile
+
+        Returns:
+            The session directory, or None if a session is already running
+        """
+        with self._lock:
+            if self._session is not None or utterances <= 0:
+                return None
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            session = self._root / stamp
+            session.mkdir(parents=True, exist_ok=True)
+            self._session = session
+            self._remaining = utterances
+            self._claimed = 0
+            self._sampler = _Sampler()
+            self._sampler.start()
+
+        (session / "stacks.txt").write_text(format_thread_stacks())
+        logger.info("Profiling the next %d utterances into %s", utterances, session)
+        return session
+
+    def claim(self, trace: tracing.Trace | None, audio: np.ndarray) -> bool:
+        """Select a submitted utterance for profiling if the profiler is armed.
+
+        Args:
+            trace: The utterance's latency trace
+            audio: Its recorded audio, saved alongside the profile
+
+        Returns:
+            True if the utterance will be profiled
+        """
+        if trace is None:
+            return False
+        with self._lock:
+            if self._remaining <= 0 or self._session is None:
+                return False
+            self._remaining -= 1
+            self._claimed += 1
+            directory = self._session / f"{self._claimed:02d}-{trace.id}"
+            self._active[trace.id] = directory
+
+        directory.mkdir(parents=True, exist_ok=True)
+        try:
+            write_wav(directory / "audio.wav", audio, self._sample_rate)
+        except Exception as e:
+            logger.warning("Failed to save profiled audio: %s", e)
+        return True
+
+    def _directory(self) -> Path | None:
+        """Directory of the utterance whose trace is current, if profiled."""
+        trace = tracing.current()
+        if trace is None:
+            return None
+        with self._lock:
+            return self._active.get(trace.id)
+
+    def wrap(
+        self, name: str, func: Callable[[Any, CancelToken], Any]
+    ) -> Callable[[Any, CancelToken], Any]:
+        """Wrap a pipeline stage function to run under cProfile when profiled.
+
+        Args:
+            name: Stage name, used for the output files
+            func: Stage function
+        """
+
+        def stage(value: Any, cancel: CancelToken) -> Any:
+            directory = self._directory()
+            if directory is None:
+                return func(value, cancel)
+            if not _cprofile_lock.acquire(blocking=False):
+                # Another stage is being profiled; the sampler still sees this one
+                logger.debug("Profiler busy, running %s unprofiled", name)
+                return func(value, cancel)
+
+            try:
+                # cProfile only sees the calling thread, i.e. this stage's worker
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    logger.debug("Cannot profile %s: %s", name, e)
+                    return func(value, cancel)
+                try:
+                    return func(value, cancel)
+                finally:
+                    profile.disable()
+                    self._dump(profile, directory, name)
+            finally:
+                _cprofile_lock.release()
+
+        return stage
+
+    def _dump(self, profile: cProfile.Profile, directory: Path, name: str) -> None:
+        """Write a stage's profile as pstats data and a text summary."""
+        try:
+            profile.dump_stats(directory / f"{name}.prof")
+            out = io.StringIO()
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            (directory / f"{name}.txt").write_text(out.getvalue())
+        except Exception as e:
+            logger.warning("Failed to write %s profile: %s", name, e)
+
+    def complete(self, trace: tracing.Trace | None) -> Path | None:
+        """Record a finished utterance; ends the session after the last one.
+
+        Args:
+            trace: The finished utterance's trace
+
+        Returns:
+            The session directory if this completed the session
+        """
+        if trace is None:
+            return None
+        with self._lock:
+            directory = self._active.pop(trace.id, None)
+            if directory is None:
+                return None
+            finished = self._remaining == 0 and not self._active
+            session, sampler = self._session, self._sampler
+            if finished:
+                self._session = None
+                self._sampler = None
+
+        (directory / "trace.json").write_text(json.dumps(trace.to_dict(), indent=1))
+        if not finished or session is None:
+            return None
+
+        if sampler is not None:
+            sampler.stop()
+            (session / "samples.folded").write_text(sampler.folded())
+        logger.info("Profile written to %s", session)
+        return session
+
+    def cancel(self) -> None:
+        """Stop the running session without profiling more utterances."""
+        with self._lock:
+            self._remaining = 0
+            self._active.clear()
+            session, sampler = self._session, self._sampler
+            self._session = None
+            self._sampler = None
+        if sampler is not None:
+            sampler.stop()
+            if session is not None:
+                (session / "samples.folded").write_text(sampler.folded())
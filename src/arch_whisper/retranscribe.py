@@ -0,0 +1,516 @@
+"""Idle-time re-transcription with a larger Whisper model.
+
+Dictation uses a small model for latency. With retranscribe_model set,
+each utterance's audio (FLAC) and first transcript also go into a SQLite
+job store under ~/.local/share/arch-whisper, and a low-priority worker
+re-transcribes them with the larger model while the machine is idle: no
+dictation in progress, on AC power, and little CPU use by other processes.
+The audio is dropped once a job is done or given up on; the better
+transcript stays, and replaces the raw text of the utterance's history
+entry. Jobs are pruned by the history's age and count limits, on the same
+schedule as the history.
+
+The store is the queue. A job is claimed by marking it running in the same
+transaction that reads it, so a crash leaves it marked running, and the
+next start puts it back in the queue. Jobs that keep failing (or keep
+crashing the app) are given up on after MAX_ATTEMPTS.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from arch_whisper import metrics
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.config import DATA_DIR
+from arch_whisper.history import PRUNE_EVERY
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from arch_whisper.config import Config
+    from arch_whisper.history import HistoryStore
+    from arch_whisper.transcription.whisper import WhisperTranscriber
+
+logger = logging.getLogger(__name__)
+
+JOBS_PATH = DATA_DIR / "jobs.db"
+POWER_SUPPLY_DIR = Path("/sys/class/power_supply")
+PROC_STAT = Path("/proc/stat")
+
+CHECK_INTERVAL = 30.0  # Seconds between idle checks while there is work
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    audio BLOB,  -- FLAC, NULL once done
+    seconds REAL NOT NULL,
+    model TEXT NOT NULL,  -- Model of the first transcript
+    text TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    final_model TEXT,
+    final_text TEXT,
+    finished REAL,
+    error TEXT,
+    history_id INTEGER  -- Entry in the transcript history, if it was kept
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+
+
+@dataclass
+class Job:
+    """A claimed re-transcription job."""
+
+    id: int
+    audio: np.ndarray
+    text: str  # First transcript
+    history_id: int | None = None
+
+
+class JobStore:
+    """Crash-safe queue of utterances awaiting re-transcription."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_entries: int = 0,
+        max_days: float = 0,
+    ) -> None:
+        """Open (or create) the store and recover jobs left running.
+
+        Args:
+            path: Override for the database location
+            max_entries: Newest jobs kept (0 keeps all)
+            max_days: Days a job is kept (0 keeps them forever)
+        """
+        self._path = path or JOBS_PATH
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._max_days = max_days
+        self._lock = threading.Lock()
+        self._added = 0
+        self._db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        # WAL keeps commits cheap; a crash loses at most the last few
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "history_id" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN history_id INTEGER")
+        recovered = self.recover()
+        if recovered:
+            logger.info("Recovered %d interrupted re-transcription jobs", recovered)
+        self.prune()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def recover(self) -> int:
+        """Put jobs left running by a crash back in the queue.
+
+        Returns:
+            Jobs recovered
+        """
+        with self._lock:
+            # A job that crashed the app every time is given up on
+            cursor = self._db.execute(
+                "UPDATE jobs SET "
+                "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE state = 'running'",
+                (MAX_ATTEMPTS,),
+            )
+            self._db.execute("UPDATE jobs SET audio = NULL WHERE state = 'failed'")
+            return cursor.rowcount
+
+    def add(
+        self, audio: np.ndarray, text: str, model: str, history_id: int | None = None
+    ) -> int:
+        """Store an utterance for re-transcription.
+
+        Args:
+            audio: Float32 samples at 16 kHz
+            text: Transcript from the dictation model
+            model: Name of the dictation model
+            history_id: The utterance's history entry, revised once done
+
+        Returns:
+            The job's id
+        """
+        from arch_whisper.audio import SAMPLE_RATE
+        from arch_whisper.transcription.protocol import encode_audio
+
+        data = encode_audio(audio, "flac")
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (created, audio, seconds, model, text, history_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), data, audio.size / SAMPLE_RATE, model, text, history_id),
+            )
+            self._added += 1
+            prune = self._added % PRUNE_EVERY == 0
+        metrics.inc("retranscribe_audio_bytes_total", len(data))
+        if prune:
+            self.prune()
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def claim(self) -> Job | None:
+        """Mark the oldest pending job running and return it.
+
+        Returns:
+            The job, or None if the queue is empty
+        """
+        from arch_whisper.transcription.protocol import decode_audio
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, audio, text, history_id FROM jobs WHERE state = 'pending' "
+                    "ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'running', attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (row[0],),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(
+            id=row[0], audio=decode_audio(row[1], "flac"), text=row[2], history_id=row[3]
+        )
+
+    def complete(self, job_id: int, text: str, model: str) -> None:
+        """Record the re-transcription and drop the audio."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = 'done', final_text = ?, final_model = ?, "
+                "finished = ?, audio = NULL WHERE id = ?",
+                (text, model, time.time(), job_id),
+            )
+
+    def release(self, job_id: int, error: str | None = None) -> None:
+        """Return a job to the queue, or give up on it after MAX_ATTEMPTS.
+
+        Args:
+            job_id: The job
+            error: Why it failed, or None if it was only interrupted
+        """
+        with self._lock:
+            if error is None:
+                # Interrupted by dictation, which doesn't count as an attempt
+                self._db.execute(
+                    "UPDATE jobs SET state = 'pending', attempts = attempts - 1 WHERE id = ?",
+                    (job_id,),
+                )
+                return
+            # A job given up on won't be retried, so its audio goes too
+            self._db.execute(
+                "UPDATE jobs SET error = ?, "
+                "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "audio = CASE WHEN attempts >= ? THEN NULL ELSE audio END "
+                "WHERE id = ?",
+                (error, MAX_ATTEMPTS, MAX_ATTEMPTS, job_id),
+            )
+
+    def prune(self) -> int:
+        """Drop jobs beyond the age and count limits, finished or not.
+
+        A job that old has outlived its history entry, so re-transcribing
+        it would only cost CPU.
+
+        Returns:
+            Jobs removed
+        """
+        removed = 0
+        with self._lock:
+            if self._max_days > 0:
+                cutoff = time.time() - self._max_days * 86400
+                removed += self._db.execute(
+                    "DELETE FROM jobs WHERE created < ? AND state != 'running'", (cutoff,)
+                ).rowcount
+            if self._max_entries > 0:
+                removed += self._db.execute(
+                    "DELETE FROM jobs WHERE state != 'running' AND id <= "
+                    "(SELECT id FROM jobs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self._max_entries,),
+                ).rowcount
+        if removed:
+            logger.debug("Pruned %d re-transcription jobs", removed)
+        return removed
+
+    def counts(self) -> dict[str, int]:
+        """Jobs per state."""
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+            return dict(rows.fetchall())
+
+    def final_text(self, job_id: int) -> str | None:
+        """The re-transcribed text of a job, if it is done."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT final_text FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+
+def on_ac_power(power_dir: Path | None = None) -> bool:
+    """Whether the machine is on mains power.
+
+    Machines without a battery count as on mains power.
+    """
+    power_dir = power_dir or POWER_SUPPLY_DIR
+    has_mains = False
+    try:
+        supplies = list(power_dir.iterdir())
+    except OSError:
+        return True
+    for supply in supplies:
+        try:
+            kind = (supply / "type").read_text().strip()
+            if kind == "Mains":
+                has_mains = True
+                if (supply / "online").read_text().strip() == "1":
+                    return True
+        except OSError:
+            continue
+    return not has_mains
+
+
+class LoadMonitor:
+    """CPU use by other processes, as a fraction of all cores.
+
+    Re-transcription itself keeps the cores busy, so the system load
+    average would stop it after each job; this subtracts this process's
+    own CPU time from /proc/stat's.
+    """
+
+    def __init__(self, stat_path: Path | None = None) -> None:
+        """Take the first sample.
+
+        Args:
+            stat_path: Override for /proc/stat
+        """
+        self._stat_path = stat_path or PROC_STAT
+        self._cores = os.cpu_count() or 1
+        self._tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._last = self._sample()
+
+    def _sample(self) -> tuple[float, float, float] | None:
+        try:
+            fields = self._stat_path.read_text().split("\n", 1)[0].split()[1:]
+        except OSError:
+            return None
+        # user nice system idle iowait irq softirq steal
+        values = [int(v) for v in fields[:8]]
+        busy = (sum(values) - values[3] - values[4]) / self._tick
+        own = os.times()
+        return time.monotonic(), busy, own.user + own.system
+
+    def other_load(self) -> float:
+        """Fraction of the cores used by other processes since the last call."""
+        sample = self._sample()
+        last, self._last = self._last, sample
+        if sample is None or last is None or sample[0] <= last[0]:
+            # No /proc/stat: the load average, including this process
+            return os.getloadavg()[0] / self._cores
+        wall = sample[0] - last[0]
+        others = (sample[1] - last[1]) - (sample[2] - last[2])
+        return max(0.0, others / (wall * self._cores))
+
+
+class Retranscriber:
+    """Background worker re-transcribing stored utterances when idle."""
+
+    def __init__(
+        self,
+        config: Config,
+        store: JobStore | None = None,
+        busy: Callable[[], bool] | None = None,
+        interval: float = CHECK_INTERVAL,
+        history: HistoryStore | None = None,
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            config: Application configuration; retranscribe_model is the
+                larger model and retranscribe_max_load the idle threshold
+            store: Job store, opened at the default location if None
+            busy: Returns True while dictation is in progress
+            interval: Seconds between idle checks
+            history: Transcript history whose entries get the better text
+        """
+        self._config = config
+        self._model_name = config.retranscribe_model
+        self._store = store
+        self._busy = busy or (lambda: False)
+        self._interval = interval
+        self._history = history
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._current: CancelToken | None = None
+        self._transcriber: WhisperTranscriber | None = None
+        self._load: LoadMonitor | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def store(self) -> JobStore | None:
+        """The job store, once the worker has opened it."""
+        return self._store
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread = threading.Thread(target=self._run, name="retranscribe", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker; a job in progress is returned to the queue."""
+        self._stopped.set()
+        self.interrupt()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def add(self, audio: np.ndarray, text: str, history_id: int | None = None) -> None:
+        """Queue a dictated utterance; cheap enough for the main loop.
+
+        Args:
+            audio: Float32 samples at 16 kHz
+            text: Transcript from the dictation model
+            history_id: The utterance's history entry, if it was kept
+        """
+        self._inbox.put((audio, text, history_id))
+        self._wake.set()
+
+    def interrupt(self) -> None:
+        """Abandon the job in progress, e.g. because dictation started."""
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+    def idle(self) -> bool:
+        """Whether the machine is idle enough for a re-transcription."""
+        if self._busy() or not on_ac_power():
+            return False
+        if self._load is None:
+            self._load = LoadMonitor()
+            return False  # Nothing to compare against yet
+        return self._load.other_load() < self._config.retranscribe_max_load
+
+    def _drain_inbox(self) -> None:
+        assert self._store is not None
+        while True:
+            try:
+                audio, text, history_id = self._inbox.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._store.add(audio, text, self._config.whisper_model, history_id)
+            except Exception as e:
+                logger.error("Failed to store utterance for re-transcription: %s", e)
+
+    def _ensure_transcriber(self) -> WhisperTranscriber:
+        if self._transcriber is None:
+            from arch_whisper.transcription.whisper import WhisperTranscriber
+
+            config = replace(self._config, whisper_model=self._model_name, whisper_workers=1)
+            self._transcriber = WhisperTranscriber(config, reserve_interactive=False)
+        return self._transcriber
+
+    def run_once(self) -> bool:
+        """Store queued utterances and re-transcribe one job if idle.
+
+        Returns:
+            Whether a job was processed
+        """
+        assert self._store is not None
+        self._drain_inbox()
+        if not self.idle():
+            return False
+        job = self._store.claim()
+        if job is None:
+            # Free the larger model until there is work again
+            if self._transcriber is not None:
+                self._transcriber.unload()
+                self._transcriber = None
+            return False
+
+        from arch_whisper.transcription.pool import BACKGROUND
+
+        self._current = cancel = CancelToken()
+        started = time.perf_counter()
+        try:
+            segments = self._ensure_transcriber().transcribe_segments(
+                job.audio, cancel, priority=BACKGROUND
+            )
+        except Cancelled:
+            self._store.release(job.id)
+            metrics.inc("retranscribe_interrupted_total")
+            return False
+        except Exception as e:
+            logger.warning("Re-transcription of job %d failed: %s", job.id, e)
+            self._store.release(job.id, str(e))
+            metrics.inc("retranscribe_errors_total")
+            return False
+        finally:
+            self._current = None
+
+        text = " ".join(seg.text for seg in segments)
+        self._store.complete(job.id, text, self._model_name)
+        if self._history is not None and job.history_id is not None and text:
+            try:
+                self._history.revise(job.history_id, text)
+            except Exception as e:
+                logger.warning("Failed to update history entry %d: %s", job.history_id, e)
+        metrics.inc("retranscribe_jobs_total")
+        metrics.observe("retranscribe_seconds", time.perf_counter() - started)
+        logger.debug("Re-transcribed job %d with %s", job.id, self._model_name)
+        return True
+
+    def _run(self) -> None:
+        """Thread body: wait for idle time and work through the queue."""
+        try:
+            # Threads (and the model's, created from this one) run at low priority
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        try:
+            if self._store is None:
+                self._store = JobStore(
+                    max_entries=self._config.history_max_entries,
+                    max_days=self._config.history_max_days,
+                )
+        except Exception as e:
+            logger.error("Re-transcription disabled, job store unavailable: %s", e)
+            return
+
+        while not self._stopped.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                logger.exception("Re-transcription worker error: %s", e)
+                worked = False
+            if not worked:
+                self._wake.wait(self._interval)
+                self._wake.clear()
+        self._drain_inbox()
@@ -0,0 +1,458 @@
+"""Shared transcription server.
+
+`arch-whisper serve` loads one Whisper model and transcribes for any
+number of arch-whisper clients (configured with remote_transcriber), so
+shared hosts and thin clients don't each keep an idle copy of the model.
+
+Requests arriving within BATCH_WINDOW of each other are decoded together
+in one batched pass. Batches are filled round-robin across clients, so one
+client with a backlog can't starve the others, and each client may only
+have a few requests queued; beyond that, or when the server as a whole is
+full, requests are refused with a "busy" error and the client transcribes
+locally instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from arch_whisper import metrics
+from arch_whisper.audio import SAMPLE_RATE
+from arch_whisper.transcription import protocol
+from arch_whisper.transcription.protocol import ProtocolError
+from arch_whisper.utils import runtime_dir
+
+if TYPE_CHECKING:
+    from arch_whisper.config import Config
+    from arch_whisper.transcription.whisper import Segment
+
+logger = logging.getLogger(__name__)
+
+SOCKET_NAME = "transcribe.sock"
+
+BATCH_WINDOW = 0.01  # Seconds to wait for more requests after the first
+MAX_BATCH = 8  # Utterances per batched decode
+MAX_QUEUED = 32  # Requests waiting across all clients
+MAX_QUEUED_PER_CLIENT = 4
+RESUME_TTL = 60.0  # Seconds a dropped upload waits for its client to reconnect
+
+DecodeBatch = Callable[[list[np.ndarray]], list[list["Segment"]]]
+
+
+@dataclass
+class _Request:
+    audio: np.ndarray
+    future: Future
+    queued: float  # perf_counter() when submitted
+
+
+class Batcher:
+    """Collects concurrent requests into batched decodes on one thread."""
+
+    def __init__(
+        self,
+        decode: DecodeBatch,
+        window: float = BATCH_WINDOW,
+        max_batch: int = MAX_BATCH,
+        max_queued: int = MAX_QUEUED,
+        max_per_client: int = MAX_QUEUED_PER_CLIENT,
+    ) -> None:
+        """Initialize the batcher; call start() to begin decoding.
+
+        Args:
+            decode: Transcribes a list of utterances in one pass
+            window: Seconds to wait for more requests after the first
+            max_batch: Utterances per decode
+            max_queued: Requests allowed to wait in total
+            max_per_client: Requests allowed to wait per client
+        """
+        self._decode = decode
+        self._window = window
+        self._max_batch = max_batch
+        self._max_queued = max_queued
+        self._max_per_client = max_per_client
+        # Client -> waiting requests; served clients move to the end
+        self._queues: OrderedDict[str, deque[_Request]] = OrderedDict()
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting to be decoded."""
+        return self._queued
+
+    def start(self) -> None:
+        """Start the decode thread."""
+        self._thread = threading.Thread(target=self._run, name="batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop decoding and fail the requests still waiting."""
+        with self._cond:
+            self._stopped = True
+            waiting = [r for q in self._queues.values() for r in q]
+            self._queues.clear()
+            self._queued = 0
+            self._cond.notify_all()
+        for request in waiting:
+            request.future.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def submit(self, client: str, audio: np.ndarray) -> Future:
+        """Queue an utterance for the next batch.
+
+        Args:
+            client: Identifies the sender, for fairness and limits
+            audio: Float32 samples at 16 kHz
+
+        Returns:
+            Future resolving to the utterance's segments; cancel() it to
+            drop the request if it hasn't been decoded yet
+
+        Raises:
+            queue.Full: If the client or the server has too much queued
+        """
+        request = _Request(audio, Future(), time.perf_counter())
+        with self._cond:
+            if self._stopped:
+                raise queue.Full("Server is stopping")
+            pending = self._queues.setdefault(client, deque())
+            if len(pending) >= self._max_per_client or self._queued >= self._max_queued:
+                if not pending:
+                    del self._queues[client]
+                metrics.inc("server_rejected_total")
+                raise queue.Full("Too many queued requests")
+            pending.append(request)
+            self._queued += 1
+            self._cond.notify()
+        return request.future
+
+    def _take_batch(self) -> list[_Request]:
+        """Take up to max_batch requests, one per client per round."""
+        batch: list[_Request] = []
+        while self._queues and len(batch) < self._max_batch:
+            for client in list(self._queues):
+                pending = self._queues[client]
+                batch.append(pending.popleft())
+                self._queued -= 1
+                if pending:
+                    self._queues.move_to_end(client)
+                else:
+                    del self._queues[client]
+                if len(batch) == self._max_batch:
+                    break
+        return batch
+
+    def _run(self) -> None:
+        """Thread body: wait for requests, batch them, decode."""
+        while True:
+            with self._cond:
+                while not self._queued and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # Give concurrent requests a moment to join the batch
+                deadline = time.monotonic() + self._window
+                while self._queued < self._max_batch and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [r for r in self._take_batch() if r.future.set_running_or_notify_cancel()]
+            if batch:
+                self._decode_batch(batch)
+
+    def _decode_batch(self, batch: list[_Request]) -> None:
+        start = time.perf_counter()
+        for request in batch:
+            metrics.observe("server_queue_seconds", start - request.queued)
+        # Mean batch size is the ratio of these two
+        metrics.inc("server_batches_total")
+        metrics.inc("server_batched_requests_total", len(batch))
+        try:
+            results = self._decode([r.audio for r in batch])
+        except Exception as e:
+            logger.error("Batched decode failed: %s", e)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        metrics.observe("server_decode_seconds", time.perf_counter() - start)
+        for request, segments in zip(batch, results, strict=True):
+            request.future.set_result(segments)
+
+
+@dataclass
+class _Upload:
+    """Audio received so far for one request."""
+
+    encoding: str
+    chunks: list[np.ndarray] = field(default_factory=list)
+    samples: int = 0
+    next_seq: int = 0  # Sequence number of the next frame expected
+    dropped: float = 0.0  # monotonic() when its connection dropped
+
+
+class _Uploads:
+    """Unfinished uploads whose connection dropped, kept for a resume."""
+
+    def __init__(self) -> None:
+        self._uploads: dict[tuple[str, str], _Upload] = {}
+        self._lock = threading.Lock()
+
+    def keep(self, key: tuple[str, str], upload: _Upload) -> None:
+        upload.dropped = time.monotonic()
+        with self._lock:
+            self._uploads[key] = upload
+
+    def take(self, key: tuple[str, str]) -> _Upload | None:
+        """Claim a kept upload, forgetting any that have expired."""
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, u in self._uploads.items() if now - u.dropped > RESUME_TTL]:
+                del self._uploads[stale]
+            return self._uploads.pop(key, None)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves one client connection, a request at a time."""
+
+    server: _UnixServer | _TCPServer
+
+    def handle(self) -> None:
+        sock = self.request
+        # Unix socket peers have no address
+        address = self.client_address
+        peer = address[0] if isinstance(address, tuple) else "unix"
+        try:
+            while True:
+                try:
+                    kind, payload = protocol.recv_frame(sock)
+                except EOFError:
+                    return
+                if kind != protocol.REQUEST:
+                    raise ProtocolError(f"Expected a request, got frame type {kind}")
+                header = protocol.decode_json(payload)
+                client = str(header.get("client") or peer)
+                audio = self._receive(sock, header, client)
+                if audio is None:
+                    return
+                self._answer(sock, header, client, audio)
+        except ProtocolError as e:
+            logger.warning("Dropping client %s: %s", peer, e)
+        except OSError as e:
+            logger.debug("Client %s disconnected: %s", peer, e)
+
+    def _receive(self, sock, header: dict, client: str) -> np.ndarray | None:
+        """Read a request's audio frames up to END.
+
+        Returns:
+            The audio, or None if the connection dropped first (the upload
+            is then kept for the client to resume)
+        """
+        key = (client, str(header.get("id")))
+        encoding = header.get("encoding", "f32")
+        if encoding not in protocol.ENCODINGS:
+            raise ProtocolError(f"Unknown audio encoding {encoding!r}")
+        upload = None
+        if header.get("resume"):
+            upload = self.server.uploads.take(key)
+            if upload is not None:
+                metrics.inc("server_resumes_total")
+        upload = upload or _Upload(encoding)
+        if header.get("resume"):
+            ack = {"id": header.get("id"), "next_seq": upload.next_seq}
+            protocol.send_json(sock, protocol.ACK, ack)
+
+        while True:
+            try:
+                kind, payload = protocol.recv_frame(sock)
+            except (EOFError, OSError):
+                if upload.next_seq:
+                    self.server.uploads.keep(key, upload)
+                return None
+            if kind == protocol.END:
+                break
+            if kind != protocol.AUDIO:
+                raise ProtocolError(f"Expected audio, got frame type {kind}")
+            seq, data = protocol.split_audio(payload)
+            if seq < upload.next_seq:
+                continue  # Resent after a reconnect
+            if seq > upload.next_seq:
+                raise ProtocolError(f"Audio frame {seq} arrived before {upload.next_seq}")
+            chunk = protocol.decode_audio(data, upload.encoding)
+            upload.samples += chunk.size
+            if upload.samples > self.server.max_samples:
+                raise ProtocolError("Audio exceeds the length limit")
+            upload.chunks.append(chunk)
+            upload.next_seq += 1
+            metrics.inc("server_audio_bytes_total", len(data))
+
+        if not upload.chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(upload.chunks).astype(np.float32, copy=False)
+
+    def _answer(self, sock, header: dict, client: str, audio: np.ndarray) -> None:
+        """Transcribe one request and send its result."""
+        request_id = header.get("id")
+        if audio.size == 0:
+            empty: dict[str, object] = {"id": request_id, "text": "", "segments": []}
+            protocol.send_json(sock, protocol.RESULT, empty)
+            return
+        try:
+            future = self.server.batcher.submit(client, audio)
+        except queue.Full as e:
+            protocol.send_json(sock, protocol.ERROR, {"id": request_id, "error": "busy"})
+            logger.info("Refused request from %s: %s", client, e)
+            return
+        try:
+            segments = future.result()
+        except Exception as e:
+            protocol.send_json(sock, protocol.ERROR, {"id": request_id, "error": str(e)})
+            return
+        protocol.send_json(sock, protocol.RESULT, {
+            "id": request_id,
+            "text": " ".join(seg.text for seg in segments),
+            "segments": [asdict(seg) for seg in segments],
+        })
+        metrics.inc("server_requests_total")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, batcher: Batcher, max_samples: int) -> None:
+        self.batcher = batcher
+        self.max_samples = max_samples
+        self.uploads = _Uploads()
+        super().__init__(path, _Handler)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], batcher: Batcher, max_samples: int) -> None:
+        self.batcher = batcher
+        self.max_samples = max_samples
+        self.uploads = _Uploads()
+        super().__init__(address, _Handler)
+
+
+class TranscriptionServer:
+    """Listens for clients and feeds their audio to a Batcher."""
+
+    def __init__(
+        self,
+        decode: DecodeBatch,
+        address: str | None = None,
+        max_seconds: float = 300.0,
+    ) -> None:
+        """Initialize the server; call start() to listen.
+
+        Args:
+            decode: Transcribes a list of utterances in one pass
+            address: "host:port" or a socket path; defaults to a socket
+                in the runtime directory
+            max_seconds: Longest utterance accepted
+        """
+        self.batcher = Batcher(decode)
+        self._address = address or str(runtime_dir() / SOCKET_NAME)
+        self._max_samples = int(max_seconds * SAMPLE_RATE)
+        self._server: _UnixServer | _TCPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        """Address clients connect to."""
+        if isinstance(self._server, _TCPServer):
+            host, port = self._server.socket.getsockname()[:2]
+            return f"{host}:{port}"
+        return self._address
+
+    def start(self) -> None:
+        """Bind and start serving.
+
+        Raises:
+            OSError: If the address can't be bound
+        """
+        target = protocol.parse_address(self._address)
+        if isinstance(target, str):
+            path = Path(target)
+            if path.exists():
+                path.unlink()
+            self._server = _UnixServer(target, self.batcher, self._max_samples)
+            if path.parent == runtime_dir():
+                os.chmod(path, 0o600)
+        else:
+            self._server = _TCPServer(target, self.batcher, self._max_samples)
+
+        metrics.gauge("server_queued_requests", lambda: self.batcher.queued)
+        self.batcher.start()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="transcription-server",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("Transcription server on %s", self.address)
+
+    def stop(self) -> None:
+        """Stop serving, fail queued requests and remove the socket."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self.batcher.stop()
+        if isinstance(self._server, _UnixServer):
+            try:
+                Path(self._address).unlink()
+            except FileNotFoundError:
+                pass
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+def serve(config: Config, address: str | None = None) -> None:
+    """Run a transcription server until interrupted.
+
+    Args:
+        config: Model, threads and language to serve with
+        address: Where to listen; see TranscriptionServer
+    """
+    from arch_whisper.transcription.whisper import WhisperTranscriber
+
+    transcriber = WhisperTranscriber(config)
+    server = TranscriptionServer(
+        transcriber.transcribe_batch, address, max_seconds=config.max_record_seconds
+    )
+    # Load the model before accepting requests
+    transcriber.load()
+    server.start()
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: stopped.set())
+    try:
+        stopped.wait()
+    finally:
+        logger.info("Stopping transcription server")
+        server.stop()
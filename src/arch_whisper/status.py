@@ -0,0 +1,134 @@
+"""Local status endpoint for arch_whisper.
+
+Serves HTTP over a Unix socket in the runtime directory:
+
+    GET /metrics  OpenMetrics text (counters, gauges, latency histograms)
+    GET /status   JSON status document
+
+For example: curl --unix-socket $XDG_RUNTIME_DIR/arch-whisper/status.sock
+http://localhost/metrics
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Callable
+
+from arch_whisper import metrics
+from arch_whisper.utils import runtime_dir
+
+logger = logging.getLogger(__name__)
+
+SOCKET_NAME = "status.sock"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes GET requests to the metrics text or the status document."""
+
+    server: _Server
+
+    def do_GET(self) -> None:
+        """Serve /metrics or /status."""
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(200, OPENMETRICS_TYPE, metrics.render_openmetrics())
+        elif path == "/status":
+            try:
+                body = json.dumps(self.server.status(), indent=1, default=str)
+            except Exception as e:
+                logger.warning("Status document failed: %s", e)
+                self._send(500, "text/plain; charset=utf-8", f"{e}\n")
+                return
+            self._send(200, "application/json", body + "\n")
+        else:
+            self._send(404, "text/plain; charset=utf-8", "Try /metrics or /status\n")
+
+    def _send(self, code: int, content_type: str, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no host/port
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("status: " + format, *args)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, status: Callable[[], dict]) -> None:
+        self.status = status
+        super().__init__(path, _Handler)
+
+
+class StatusServer:
+    """Serves metrics and status on a Unix socket from a daemon thread."""
+
+    def __init__(self, status: Callable[[], dict], path: Path | None = None) -> None:
+        """Initialize the server; call start() to listen.
+
+        Args:
+            status: Builds the JSON status document
+            path: Socket path; defaults to the runtime directory
+        """
+        self._status = status
+        self._path = path or runtime_dir() / SOCKET_NAME
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        """Socket path."""
+        return self._path
+
+    def start(self) -> bool:
+        """Create the socket and start serving.
+
+        Returns:
+            True if the server is listening
+        """
+        try:
+            if self._path.exists():
+                self._path.unlink()
+            self._server = _Server(str(self._path), self._status)
+            os.chmod(self._path, 0o600)
+        except OSError as e:
+            logger.warning("Status socket unavailable: %s", e)
+            return False
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="status-server",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("Status endpoint on %s", self._path)
+        return True
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        try:
+            self._path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,236 @@
+"""Per-utterance latency tracing for arch_whisper.
+
+Every recording gets a Trace with an id and a list of timed spans (stream
+start, first audio block, decode, Claude, clipboard ready, key injection,
+...). When the utterance is done the trace is written as one JSON line to
+~/.cache/arch-whisper/traces.jsonl, rotated by size. `arch-whisper stats`
+reads the log back and prints p50/p95/p99 per span.
+
+Code deep in a stage doesn't need the trace passed in: the pipeline makes
+the job's trace current for the worker thread, and tracing.span() records
+into whatever trace is current (or does nothing).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+from arch_whisper.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+TRACE_PATH = CACHE_DIR / "traces.jsonl"
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+
+PERCENTILES = (50, 95, 99)
+
+
+class Trace:
+    """Timed spans for one utterance."""
+
+    def __init__(self) -> None:
+        """Start a trace now."""
+        self.id = uuid.uuid4().hex[:16]
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.attrs: dict[str, object] = {}
+        self._spans: list[tuple[str, float, float]] = []
+        self._open: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        """Record a span from perf_counter() timestamps."""
+        with self._lock:
+            self._spans.append((name, start, end))
+
+    def begin(self, name: str) -> None:
+        """Open a span to be closed later by end(), possibly on another thread."""
+        with self._lock:
+            self._open[name] = time.perf_counter()
+
+    def end(self, name: str) -> None:
+        """Close a span opened with begin()."""
+        now = time.perf_counter()
+        with self._lock:
+            start = self._open.pop(name, None)
+            if start is not None:
+                self._spans.append((name, start, now))
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the body of a with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter())
+
+    def to_dict(self) -> dict:
+        """Trace as a JSON-ready dict; span starts are relative to the trace."""
+        with self._lock:
+            spans = [
+                {
+                    "name": name,
+                    "start": round(start - self.t0, 6),
+                    "duration": round(end - start, 6),
+                }
+                for name, start, end in sorted(self._spans, key=lambda s: s[1])
+            ]
+        return {"id": self.id, "time": self.started, "spans": spans, **self.attrs}
+
+    def finish(self, **attrs: object) -> None:
+        """Write the trace to the trace log (once).
+
+        Args:
+            **attrs: Extra fields for the record, e.g. status="ok"
+        """
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        self.attrs.update(attrs)
+        _write(self.to_dict())
+
+
+_local = threading.local()
+_writer: logging.Logger | None = None
+_writer_lock = threading.Lock()
+
+
+def current() -> Trace | None:
+    """The trace active on this thread, if any."""
+    return getattr(_local, "trace", None)
+
+
+@contextlib.contextmanager
+def activate(trace: Trace | None) -> Iterator[None]:
+    """Make a trace current on this thread for the body of a with block."""
+    previous = current()
+    _local.trace = trace
+    try:
+        yield
+    finally:
+        _local.trace = previous
+
+
+def span(name: str) -> contextlib.AbstractContextManager[None]:
+    """Time a block into the current trace; a no-op without one."""
+    trace = current()
+    if trace is None:
+        return contextlib.nullcontext()
+    return trace.span(name)
+
+
+def _trace_writer() -> logging.Logger:
+    """Logger that appends JSON lines to the rotating trace file."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            TRACE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                TRACE_PATH,
+                maxBytes=TRACE_MAX_BYTES,
+                backupCount=TRACE_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            writer = logging.getLogger("arch_whisper.trace_log")
+            writer.propagate = False
+            writer.setLevel(logging.INFO)
+            writer.addHandler(handler)
+            _writer = writer
+        return _writer
+
+
+def _write(record: dict) -> None:
+    """Append one trace record to the log."""
+    try:
+        _trace_writer().info(json.dumps(record, separators=(",", ":")))
+    except Exception as e:
+        logger.debug("Failed to write trace: %s", e)
+
+
+def load_traces(path: Path | None = None, last: int | None = None) -> list[dict]:
+    """Read traces from the log and its rotated backups, oldest first.
+
+    Args:
+        path: Trace log location
+        last: Only return the most recent N traces
+
+    Returns:
+        Trace records; unreadable lines are skipped
+    """
+    path = path or TRACE_PATH
+    files = [path.with_name(f"{path.name}.{n}") for n in range(TRACE_BACKUPS, 0, -1)]
+    files.append(path)
+
+    traces: list[dict] = []
+    for file in files:
+        try:
+            lines = file.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                traces.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return traces[-last:] if last else traces
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(traces: list[dict]) -> dict[str, dict[str, float]]:
+    """Per-span latency percentiles.
+
+    Spans that occur several times in one trace (e.g. retries) are summed.
+
+    Returns:
+        Span name -> {"count", "p50", "p95", "p99"}, in first-seen order
+    """
+    durations: dict[str, list[float]] = {}
+    for trace in traces:
+        per_trace: dict[str, float] = {}
+        for s in trace.get("spans", []):
+            per_trace[s["name"]] = per_trace.get(s["name"], 0.0) + s["duration"]
+        for name, duration in per_trace.items():
+            durations.setdefault(name, []).append(duration)
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        row: dict[str, float] = {"count": len(values)}
+        for pct in PERCENTILES:
+            row[f"p{pct}"] = percentile(values, pct)
+        summary[name] = row
+    return summary
+
+
+def format_summary(summary: dict[str, dict[str, float]]) -> str:
+    """Render a summary as a text table with milliseconds."""
+    if not summary:
+        return "No traces recorded yet."
+    width = max(len("stage"), *(len(name) for name in summary))
+    header = f"{'stage':<{width}}  {'count':>6}" + "".join(
+        f"  {'p' + str(p):>9}" for p in PERCENTILES
+    )
+    lines = [header, "-" * len(header)]
+    for name, row in summary.items():
+        line = f"{name:<{width}}  {int(row['count']):>6}"
+        line += "".join(f"  {row[f'p{p}'] * 1000:>7.1f}ms" for p in PERCENTILES)
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,121 @@
+"""Scheduling utterances across Whisper model replicas.
+
+With whisper_workers > 1, the WhisperModel is created with CTranslate2's
+num_workers: that many replicas sharing one copy of the weights, each
+decoding on its own threads when called from different Python threads.
+The Scheduler decides which waiting caller gets a free replica.
+
+Interactive dictation always goes first, and background work (batch
+files, re-transcription) may not take the last free replica, so a
+dictated utterance never waits for a batch decode to finish. Among
+equals, callers are served in arrival order.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from arch_whisper import metrics
+from arch_whisper.cancel import Cancelled, CancelToken
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class Scheduler:
+    """Hands out model replicas by priority."""
+
+    def __init__(self, replicas: int = 1, reserved: int = 0) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            replicas: Utterances that can decode at once
+            reserved: Replicas background work may not use (capped so
+                background work can always run on at least one)
+        """
+        self._replicas = max(1, replicas)
+        self._background_limit = max(1, self._replicas - reserved)
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []  # Heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._running = 0
+        self._running_background = 0
+
+    @property
+    def replicas(self) -> int:
+        """Utterances that can decode at once."""
+        return self._replicas
+
+    @property
+    def waiting(self) -> int:
+        """Callers waiting for a replica."""
+        return len(self._waiting)
+
+    @property
+    def busy(self) -> bool:
+        """Whether any replica is in use or wanted."""
+        with self._cond:
+            return self._running > 0 or bool(self._waiting)
+
+    def _can_run(self, ticket: tuple[int, int]) -> bool:
+        if self._waiting[0] != ticket or self._running >= self._replicas:
+            return False
+        return ticket[0] == INTERACTIVE or self._running_background < self._background_limit
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(
+        self, priority: int = INTERACTIVE, cancel: CancelToken | None = None
+    ) -> Iterator[None]:
+        """Hold a replica for the duration of the block.
+
+        Args:
+            priority: INTERACTIVE or BACKGROUND
+            cancel: Token that stops the wait
+
+        Raises:
+            Cancelled: If the token is cancelled before a replica is free
+        """
+        queued = time.perf_counter()
+        unregister = cancel.on_cancel(self._wake) if cancel is not None else None
+        try:
+            with self._cond:
+                ticket = (priority, next(self._arrivals))
+                heapq.heappush(self._waiting, ticket)
+                try:
+                    while not self._can_run(ticket):
+                        if cancel is not None and cancel.cancelled:
+                            raise Cancelled()
+                        self._cond.wait()
+                finally:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    # The next in line may be able to run too
+                    self._cond.notify_all()
+                self._running += 1
+                if priority != INTERACTIVE:
+                    self._running_background += 1
+        finally:
+            if unregister is not None:
+                unregister()
+
+        name = PRIORITY_NAMES.get(priority, "background")
+        metrics.observe(f"whisper_{name}_wait_seconds", time.perf_counter() - queued)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                if priority != INTERACTIVE:
+                    self._running_background -= 1
+                self._cond.notify_all()
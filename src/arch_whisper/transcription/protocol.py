@@ -0,0 +1,207 @@
+"""Wire protocol between arch-whisper clients and the transcription server.
+
+Messages are frames on a stream socket (TCP or Unix): a 1-byte type and a
+4-byte big-endian payload length, then the payload. One connection carries
+one request at a time:
+
+    client: REQUEST {"id": ..., "client": ..., "encoding": ...}
+    client: AUDIO <4-byte sequence number><encoded samples>   (any number)
+    client: END
+    server: RESULT {"id": ..., "text": ..., "segments": [...]}
+         or ERROR  {"id": ..., "error": ...}
+
+Audio is streamed while it is recorded, in frames of a few hundred ms
+encoded as FLAC (or int16 + zlib, or raw float32), so little is left to
+send when recording stops. If the connection drops mid-upload the client
+reconnects and sends REQUEST again with "resume": true; the server answers
+ACK {"id": ..., "next_seq": n} with the first frame it is missing, and the
+client resends from there. Frames the server already has are ignored.
+
+The server reads the next request only after answering, which is the
+per-connection backpressure.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import socket
+import struct
+import zlib
+from typing import Any
+
+import numpy as np
+
+from arch_whisper.audio import SAMPLE_RATE
+
+REQUEST = 1
+AUDIO = 2
+END = 3
+RESULT = 4
+ERROR = 5
+ACK = 6
+
+# Audio encodings: FLAC frames, int16 + zlib, or raw float32 (16 kHz mono)
+ENCODINGS = ("flac", "s16z", "f32")
+
+HEADER = struct.Struct("!BI")
+SEQ = struct.Struct("!I")
+MAX_PAYLOAD = 16 * 1024 * 1024  # Larger frames are a protocol error
+
+DEFAULT_PORT = 47800
+
+
+class ProtocolError(Exception):
+    """Raised on a malformed or unexpected frame."""
+
+
+def parse_address(address: str) -> str | tuple[str, int]:
+    """Turn "host:port", ":port" or a socket path into a socket address.
+
+    Args:
+        address: Server address from the config or command line
+
+    Returns:
+        A path for Unix sockets or (host, port) for TCP
+    """
+    if "/" in address:
+        return address
+    host, _, port = address.rpartition(":")
+    if not host and not port.isdigit():
+        return (port, DEFAULT_PORT)  # Bare host name
+    return (host or "127.0.0.1", int(port))
+
+
+def connect(address: str, timeout: float | None = None) -> socket.socket:
+    """Open a connection to a server address.
+
+    Raises:
+        OSError: If the server can't be reached
+    """
+    target = parse_address(address)
+    if isinstance(target, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    sock = socket.create_connection(target, timeout=timeout)
+    # Frames are small and latency-bound
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes = b"") -> None:
+    """Write one frame."""
+    sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def send_json(sock: socket.socket, kind: int, message: dict[str, Any]) -> None:
+    """Write one frame with a JSON payload."""
+    send_frame(sock, kind, json.dumps(message).encode("utf-8"))
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 16))
+        if not chunk:
+            raise EOFError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> tuple[int, bytes]:
+    """Read one frame.
+
+    Returns:
+        (type, payload)
+
+    Raises:
+        EOFError: If the peer closed the connection
+        ProtocolError: If the frame is too large
+    """
+    kind, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the limit")
+    return kind, _recv_exact(sock, length) if length else b""
+
+
+def decode_json(payload: bytes) -> dict[str, Any]:
+    """Parse a JSON frame payload.
+
+    Raises:
+        ProtocolError: If it isn't a JSON object
+    """
+    try:
+        message = json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"Bad JSON payload: {e}") from e
+    if not isinstance(message, dict):
+        raise ProtocolError("JSON payload is not an object")
+    return message
+
+
+def encode_audio(samples: np.ndarray, encoding: str) -> bytes:
+    """Encode float32 samples for an AUDIO frame.
+
+    Args:
+        samples: Mono float32 samples at 16 kHz
+        encoding: One of ENCODINGS
+
+    Returns:
+        Encoded bytes
+    """
+    if encoding == "f32":
+        return samples.astype("<f4", copy=False).tobytes()
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    if encoding == "s16z":
+        return zlib.compress(pcm.tobytes(), 1)
+    if encoding == "flac":
+        import soundfile
+
+        buffer = io.BytesIO()
+        soundfile.write(buffer, pcm, SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+        return buffer.getvalue()
+    raise ValueError(f"Unknown audio encoding {encoding!r}")
+
+
+def decode_audio(data: bytes, encoding: str) -> np.ndarray:
+    """Decode an AUDIO frame's samples to float32.
+
+    Raises:
+        ProtocolError: If the encoding is unknown or the data is corrupt
+    """
+    try:
+        if encoding == "f32":
+            return np.frombuffer(data, dtype="<f4")
+        if encoding == "s16z":
+            pcm = np.frombuffer(zlib.decompress(data), dtype="<i2")
+            return pcm.astype(np.float32) / 32768
+        if encoding == "flac":
+            import soundfile
+
+            samples, _ = soundfile.read(io.BytesIO(data), dtype="float32")
+            return samples
+    except (ValueError, RuntimeError, zlib.error) as e:
+        raise ProtocolError(f"Bad {encoding} audio: {e}") from e
+    raise ProtocolError(f"Unknown audio encoding {encoding!r}")
+
+
+def send_audio(sock: socket.socket, seq: int, data: bytes) -> None:
+    """Write an AUDIO frame with its sequence number."""
+    send_frame(sock, AUDIO, SEQ.pack(seq) + data)
+
+
+def split_audio(payload: bytes) -> tuple[int, bytes]:
+    """Split an AUDIO frame into its sequence number and encoded samples.
+
+    Raises:
+        ProtocolError: If the frame is too short
+    """
+    if len(payload) < SEQ.size:
+        raise ProtocolError("Audio frame without a sequence number")
+    return SEQ.unpack_from(payload)[0], payload[SEQ.size:]
@@ -0,0 +1,428 @@
+"""Transcription on a shared arch-whisper server.
+
+RemoteTranscriber stands in for WhisperTranscriber when remote_transcriber
+is configured: audio goes to `arch-whisper serve` and the text comes back.
+If the server can't be reached or is busy, it transcribes locally instead,
+loading the local model only if that ever happens.
+
+The app streams each recording while it is made: upload() returns an
+Upload fed from the audio thread, whose sender thread encodes frames
+(FLAC by default, about a third of raw float32) and sends them as they
+fill. When the key is released only the last partial frame is left to
+send, and transcribe() claims the finished upload instead of sending the
+audio again. A dropped connection is resumed from the first frame the
+server is missing.
+
+Once the server has failed, it isn't tried again for RETRY_AFTER seconds:
+without that every utterance would wait out the connect timeout and the
+reconnect attempts before falling back.
+"""
+
+from __future__ import annotations
+
+import getpass
+import logging
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from arch_whisper import metrics, tracing
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.transcription import protocol
+from arch_whisper.transcription.whisper import Segment, WhisperTranscriber
+
+if TYPE_CHECKING:
+    from arch_whisper.config import Config
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 2.0
+FRAME_SAMPLES = 4000  # 250 ms per AUDIO frame
+ENCODING = "flac"
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 0.1  # Seconds, doubled per attempt
+RETRY_AFTER = 30.0  # Seconds spent transcribing locally after the server failed
+
+_END = object()  # Queued by Upload.end()
+_ABORT = object()  # Queued by Upload.abort()
+
+
+class RemoteUnavailable(Exception):
+    """Raised when the server can't take a request."""
+
+
+class Upload:
+    """One utterance streamed to the server as it is recorded."""
+
+    def __init__(self, address: str, client: str, encoding: str = ENCODING) -> None:
+        """Start the sender thread, which connects right away.
+
+        Args:
+            address: Server address
+            client: Identifies this client to the server
+            encoding: Audio encoding, one of protocol.ENCODINGS
+        """
+        self.id = uuid.uuid4().hex
+        self._address = address
+        self._client = client
+        self._encoding = encoding
+        self._blocks: queue.SimpleQueue = queue.SimpleQueue()
+        self._frames: list[bytes] = []  # Encoded, kept for resending
+        self._samples = 0  # Fed so far
+        self._ended = False
+        self._aborted = False
+        self._end_sent = False
+        self._sent = threading.Event()  # END sent, or the upload failed
+        self._error: Exception | None = None
+        self._sock: socket.socket | None = None
+        self._thread = threading.Thread(target=self._run, name="upload", daemon=True)
+        self._thread.start()
+
+    @property
+    def samples(self) -> int:
+        """Samples fed so far."""
+        return self._samples
+
+    @property
+    def ended(self) -> bool:
+        """Whether end() has been called."""
+        return self._ended
+
+    @property
+    def aborted(self) -> bool:
+        """Whether abort() has been called."""
+        return self._aborted
+
+    def feed(self, block: np.ndarray) -> None:
+        """Queue recorded samples; cheap enough for the audio thread."""
+        if self._ended or self._aborted:
+            return
+        self._samples += len(block)
+        self._blocks.put(block)
+
+    def end(self) -> None:
+        """Mark the recording finished; the rest is sent right away."""
+        if not self._ended:
+            self._ended = True
+            self._blocks.put(_END)
+
+    def abort(self) -> None:
+        """Give up on the upload and close its connection."""
+        self._aborted = True
+        self._blocks.put(_ABORT)
+        self._close()
+
+    def wait_sent(self, timeout: float | None = None) -> bool:
+        """Wait until everything is sent (or the upload failed)."""
+        return self._sent.wait(timeout)
+
+    def _close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                # Wakes a recv() blocked in another thread, which close() doesn't
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _connect(self) -> None:
+        """Open a connection and send everything the server is missing.
+
+        Raises:
+            OSError, EOFError, protocol.ProtocolError: On connection failure
+        """
+        resume = bool(self._frames) or self._end_sent
+        sock = protocol.connect(self._address, timeout=CONNECT_TIMEOUT)
+        try:
+            header = {
+                "id": self.id,
+                "client": self._client,
+                "encoding": self._encoding,
+                "resume": resume,
+            }
+            protocol.send_json(sock, protocol.REQUEST, header)
+            if resume:
+                kind, payload = protocol.recv_frame(sock)
+                if kind != protocol.ACK:
+                    raise protocol.ProtocolError(f"Expected an ack, got frame type {kind}")
+                next_seq = int(protocol.decode_json(payload).get("next_seq", 0))
+                for seq in range(next_seq, len(self._frames)):
+                    protocol.send_audio(sock, seq, self._frames[seq])
+                if self._end_sent:
+                    protocol.send_frame(sock, protocol.END)
+                metrics.inc("remote_reconnects_total")
+            sock.settimeout(None)
+        except BaseException:
+            sock.close()
+            raise
+        self._sock = sock
+        if self._aborted:
+            self._close()
+            raise OSError("Upload aborted")
+
+    def _with_connection(self, send: Callable[[socket.socket], None]) -> None:
+        """Run send(sock), reconnecting and resuming if the connection drops.
+
+        A reconnect resends every frame the server is missing, and END if it
+        was sent, so send() is skipped when the connection is new.
+
+        Raises:
+            RemoteUnavailable: If every attempt failed
+        """
+        delay = RECONNECT_DELAY
+        for attempt in range(RECONNECT_ATTEMPTS + 1):
+            if self._aborted:
+                raise RemoteUnavailable("Upload aborted")
+            try:
+                sock = self._sock
+                if sock is None:
+                    self._connect()
+                else:
+                    send(sock)
+                return
+            except (OSError, EOFError, protocol.ProtocolError) as e:
+                self._close()
+                if attempt == RECONNECT_ATTEMPTS or self._aborted:
+                    raise RemoteUnavailable(str(e)) from e
+                logger.debug("Upload connection lost (%s), reconnecting", e)
+                time.sleep(delay)
+                delay *= 2
+
+    def _send_frame(self, samples: np.ndarray) -> None:
+        seq = len(self._frames)
+        data = protocol.encode_audio(samples, self._encoding)
+        self._frames.append(data)
+        metrics.inc("remote_audio_bytes_total", len(data))
+        self._with_connection(lambda sock: protocol.send_audio(sock, seq, data))
+
+    def _run(self) -> None:
+        """Thread body: encode and send frames as the recording fills them."""
+        pending: list[np.ndarray] = []
+        count = 0
+        try:
+            self._with_connection(lambda sock: None)
+            while True:
+                item = self._blocks.get()
+                if item is _ABORT:
+                    return
+                if item is not _END:
+                    pending.append(item)
+                    count += len(item)
+                if count >= FRAME_SAMPLES or (item is _END and count):
+                    samples = np.concatenate(pending)
+                    for start in range(0, len(samples), FRAME_SAMPLES):
+                        self._send_frame(samples[start:start + FRAME_SAMPLES])
+                    pending, count = [], 0
+                if item is _END:
+                    self._end_sent = True
+                    self._with_connection(lambda sock: protocol.send_frame(sock, protocol.END))
+                    return
+        except Exception as e:
+            if not isinstance(e, RemoteUnavailable):
+                logger.error("Upload failed: %s", e)
+            self._error = e
+        finally:
+            self._sent.set()
+
+    def result(self, cancel: CancelToken | None = None) -> list[Segment]:
+        """Wait for the server's transcription of the upload.
+
+        Ends the upload if that hasn't happened yet.
+
+        Raises:
+            Cancelled: If the token is cancelled while waiting
+            RemoteUnavailable: If the server is unreachable or refused
+        """
+        self.end()
+        replies: list[tuple[int, dict]] = []
+
+        def receive(sock: socket.socket) -> None:
+            kind, payload = protocol.recv_frame(sock)
+            replies.append((kind, protocol.decode_json(payload)))
+
+        unregister = cancel.on_cancel(self.abort) if cancel is not None else None
+        try:
+            self._sent.wait()
+            if self._error is not None:
+                raise RemoteUnavailable(str(self._error))
+            # A reconnect only resends, so the reply may take a second call
+            self._with_connection(receive)
+            if not replies:
+                self._with_connection(receive)
+        except RemoteUnavailable:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            self._close()
+
+        kind, message = replies[0]
+        if kind == protocol.ERROR:
+            raise RemoteUnavailable(message.get("error", "unknown error"))
+        if kind != protocol.RESULT or message.get("id") != self.id:
+            raise RemoteUnavailable(f"Unexpected reply (frame type {kind})")
+        return [Segment(**seg) for seg in message.get("segments", [])]
+
+
+class RemoteTranscriber:
+    """Sends audio to a transcription server, falling back to a local model."""
+
+    def __init__(self, config: Config) -> None:
+        """Initialize the transcriber.
+
+        Args:
+            config: Application configuration; remote_transcriber is the
+                server address
+        """
+        self._config = config
+        self._address = config.remote_transcriber
+        self._client = f"{getpass.getuser()}@{socket.gethostname()}"
+        self._local = WhisperTranscriber(config)
+        self._lock = threading.Lock()
+        self._uploads: deque[Upload] = deque()  # Oldest first
+        self._reachable = False
+        self._retry_at = 0.0  # time.monotonic() before which the server is skipped
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the server was reachable last time or the local model is loaded."""
+        return self._reachable or self._local.loaded
+
+    @property
+    def backing_off(self) -> bool:
+        """Whether the server failed recently and is being skipped."""
+        return time.monotonic() < self._retry_at
+
+    def _failed(self) -> None:
+        """Skip the server for a while after it failed."""
+        self._reachable = False
+        self._retry_at = time.monotonic() + RETRY_AFTER
+
+    def prewarm(self) -> None:
+        """Check the server is reachable ahead of the first transcription."""
+        try:
+            protocol.connect(self._address, timeout=CONNECT_TIMEOUT).close()
+            self._reachable = True
+        except OSError as e:
+            self._failed()
+            logger.warning("Transcription server %s unreachable: %s", self._address, e)
+
+    def close(self) -> None:
+        """Abort uploads that were never transcribed."""
+        with self._lock:
+            uploads, self._uploads = list(self._uploads), deque()
+        for upload in uploads:
+            upload.abort()
+
+    def upload(self) -> Upload | None:
+        """Start streaming a recording; feed() it, then end() it.
+
+        transcribe() of the same audio then waits for this upload's result
+        instead of sending the audio again.
+
+        Returns:
+            The upload, or None while the server is being skipped
+        """
+        if self.backing_off:
+            return None
+        upload = Upload(self._address, self._client)
+        with self._lock:
+            self._uploads.append(upload)
+        return upload
+
+    def _claim(self, audio: np.ndarray) -> Upload | None:
+        """Find the finished upload carrying this audio.
+
+        Uploads ahead of it were never transcribed and are aborted.
+        """
+        with self._lock:
+            index = next(
+                (
+                    i
+                    for i, upload in enumerate(self._uploads)
+                    if upload.ended and not upload.aborted and upload.samples == audio.size
+                ),
+                None,
+            )
+            if index is None:
+                return None
+            skipped = [self._uploads.popleft() for _ in range(index)]
+            upload = self._uploads.popleft()
+        for stale in skipped:
+            stale.abort()
+        return upload
+
+    def transcribe_segments(
+        self, audio: np.ndarray, cancel: CancelToken | None = None
+    ) -> list[Segment]:
+        """Transcribe audio to timed segments on the server, or locally.
+
+        Args:
+            audio: Audio samples as float32 numpy array at 16 kHz
+            cancel: Token that abandons the request
+
+        Returns:
+            Non-empty segments in order
+
+        Raises:
+            Cancelled: If the token is cancelled
+            Exception: If the local fallback fails
+        """
+        if audio.size == 0:
+            return []
+        upload = self._claim(audio)
+        if self.backing_off:
+            if upload is not None:
+                upload.abort()
+            metrics.inc("remote_skipped_total")
+            return self._local.transcribe_segments(audio, cancel)
+        if upload is None:
+            # Not streamed while recording (or it didn't line up), send it now
+            upload = Upload(self._address, self._client)
+            upload.feed(audio)
+        try:
+            with tracing.span("remote"):
+                segments = upload.result(cancel)
+            self._reachable = True
+            return segments
+        except RemoteUnavailable as e:
+            self._failed()
+            metrics.inc("remote_fallbacks_total")
+            logger.warning(
+                "Transcription server unavailable (%s), transcribing locally for %.0f s",
+                e,
+                RETRY_AFTER,
+            )
+        return self._local.transcribe_segments(audio, cancel)
+
+    def transcribe(self, audio: np.ndarray, cancel: CancelToken | None = None) -> str:
+        """Transcribe audio to text.
+
+        Args:
+            audio: Audio samples as float32 numpy array
+            cancel: Token that abandons the request
+
+        Returns:
+            Transcribed text, or empty string if no speech detected
+
+        Raises:
+            Cancelled: If the token is cancelled
+        """
+        try:
+            segments = self.transcribe_segments(audio, cancel)
+        except Cancelled:
+            logger.info("Transcription cancelled")
+            raise
+        except Exception as e:
+            logger.error("Transcription failed: %s", e)
+            return ""
+        return " ".join(seg.text for seg in segments)
@@ -0,0 +1,210 @@
+"""Keeping the Whisper model loaded only while it is likely to be used.
+
+A loaded model costs hundreds of MB (base) to GBs (medium). After
+model_idle_unload seconds without a transcription it is dropped and the
+memory handed back to the OS. To keep the reload from landing on the
+user's next utterance, it starts ahead of time:
+
+- when the record binding's modifiers go down (Wayland), just before the
+  hotkey itself;
+- on the hotkey press, so loading overlaps with speaking;
+- at the hours of the week the user usually dictates, learnt from a
+  usage histogram, during which the model isn't unloaded either.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from arch_whisper import metrics
+from arch_whisper.config import CACHE_DIR
+
+if TYPE_CHECKING:
+    from arch_whisper.transcription.whisper import WhisperTranscriber
+
+logger = logging.getLogger(__name__)
+
+USAGE_PATH = CACHE_DIR / "usage.json"
+
+HOURS_PER_WEEK = 7 * 24
+CHECK_INTERVAL = 60.0  # Seconds between policy checks
+PRELOAD_LEAD = 300.0  # Seconds ahead of a usual hour to load the model
+ACTIVE_USES = 2.0  # Decayed uses that make an hour of the week usual
+DAILY_DECAY = 0.97  # Old habits fade, with a half-life of about three weeks
+
+
+def hour_of_week(t: float) -> int:
+    """Local hour of the week, 0 for Monday 00:00-01:00."""
+    local = time.localtime(t)
+    return local.tm_wday * 24 + local.tm_hour
+
+
+class UsageHistogram:
+    """Decaying counts of recordings per hour of the week."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Load the histogram, starting empty if it is missing or corrupt.
+
+        Args:
+            path: Override for the histogram file location
+        """
+        self._path = path or USAGE_PATH
+        self._lock = threading.Lock()
+        self._hours = [0.0] * HOURS_PER_WEEK
+        self._day = date.today().toordinal()
+        self._dirty = False
+        try:
+            data = json.loads(self._path.read_text())
+            hours = data["hours"]
+            if len(hours) == HOURS_PER_WEEK:
+                self._hours = [float(h) for h in hours]
+                self._day = int(data["day"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Ignoring unreadable usage histogram: %s", e)
+
+    def record(self, t: float | None = None) -> None:
+        """Count a recording at time t (now if None)."""
+        t = time.time() if t is None else t
+        with self._lock:
+            today = date.fromtimestamp(t).toordinal()
+            if today > self._day:
+                factor = DAILY_DECAY ** (today - self._day)
+                self._hours = [h * factor for h in self._hours]
+                self._day = today
+            self._hours[hour_of_week(t)] += 1.0
+            self._dirty = True
+
+    def likely(self, t: float) -> bool:
+        """Whether the user usually dictates in the hour containing t."""
+        # Decay to t's day, so a habit fades even without new recordings
+        days = max(0, date.fromtimestamp(t).toordinal() - self._day)
+        return self._hours[hour_of_week(t)] * DAILY_DECAY ** days >= ACTIVE_USES
+
+    def save(self) -> None:
+        """Write the histogram to disk atomically, if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"day": self._day, "hours": [round(h, 3) for h in self._hours]}
+            self._dirty = False
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data))
+            tmp_path.replace(self._path)
+        except OSError as e:
+            logger.warning("Failed to save usage histogram: %s", e)
+
+
+class ModelResidency:
+    """Unloads an idle model and reloads it before it is needed."""
+
+    def __init__(
+        self,
+        transcriber: WhisperTranscriber,
+        idle_seconds: float,
+        usage: UsageHistogram | None = None,
+        preload: bool = True,
+        interval: float = CHECK_INTERVAL,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            transcriber: Transcriber whose model is managed
+            idle_seconds: Idle time before unloading (0 never unloads)
+            usage: Usage histogram, loaded from the default location if None
+            preload: Load ahead of use (modifiers, usual hours)
+            interval: Seconds between policy checks
+        """
+        self._transcriber = transcriber
+        self._idle_seconds = idle_seconds
+        self._usage = usage or UsageHistogram()
+        self._preload = preload
+        self._interval = interval
+        self._loading = threading.Lock()  # Held while a warm() load runs
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the policy thread."""
+        self._thread = threading.Thread(target=self._run, name="residency", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the policy thread and save the usage histogram."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._usage.save()
+
+    def touch(self) -> None:
+        """A recording started: count it, and load the model if needed."""
+        self._usage.record()
+        self.warm("hotkey")
+
+    def prime(self) -> None:
+        """The hotkey looks about to be pressed; load the model if needed."""
+        if self._preload:
+            self.warm("modifier")
+
+    def warm(self, reason: str) -> None:
+        """Load the model in the background unless it is loaded or loading."""
+        if self._transcriber.loaded or not self._loading.acquire(blocking=False):
+            return
+
+        def load() -> None:
+            try:
+                started = time.perf_counter()
+                self._transcriber.load()
+                metrics.inc(f"whisper_preloads_{reason}_total")
+                logger.info(
+                    "Whisper model reloaded (%s) in %.1fs", reason, time.perf_counter() - started
+                )
+            except Exception as e:
+                logger.warning("Preloading the Whisper model failed: %s", e)
+            finally:
+                self._loading.release()
+
+        threading.Thread(target=load, name="model-load", daemon=True).start()
+
+    def _likely_soon(self, now: float) -> bool:
+        return self._usage.likely(now) or self._usage.likely(now + PRELOAD_LEAD)
+
+    def check(self, now: float | None = None) -> str | None:
+        """Apply the policy once.
+
+        Returns:
+            "unload" or "preload" if it acted, else None
+        """
+        now = time.time() if now is None else now
+        if self._transcriber.loaded:
+            if self._idle_seconds <= 0 or self._transcriber.idle_seconds < self._idle_seconds:
+                return None
+            if self._preload and self._likely_soon(now):
+                return None  # In or near a usual hour: stay loaded
+            if self._loading.locked():
+                return None
+            return "unload" if self._transcriber.unload() else None
+
+        if self._preload and self._likely_soon(now):
+            # Loaded just before a usual hour, it stays until the hour is over
+            self.warm("schedule")
+            return "preload"
+        return None
+
+    def _run(self) -> None:
+        """Thread body: apply the policy every interval."""
+        while not self._stopped.wait(self._interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.exception("Model residency check failed: %s", e)
+            self._usage.save()
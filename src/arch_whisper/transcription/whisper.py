@@ -3,83 +3,287 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import numpy as np
-from faster_whisper import WhisperModel
 
 if TYPE_CHECKING:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+
     from arch_whisper.config import Config
 
+from arch_whisper import metrics, tracing
+from arch_whisper.audio import SAMPLE_RATE
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.transcription.pool import INTERACTIVE, Scheduler
+from arch_whisper.utils import trim_memory
+
 logger = logging.getLogger(__name__)
 
+# Longest speech chunk in a batched decode (Whisper's window)
+CHUNK_SECONDS = 30
+
+
+@dataclass
+class Segment:
+    """A span of transcribed speech, in seconds from the start of the audio."""
+
+    start: float
+    end: float
+    text: str
+
 
 class WhisperTranscriber:
     """Transcribes audio using faster-whisper with lazy model loading."""
 
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, reserve_interactive: bool = True) -> None:
         """Initialize the transcriber.
 
         Args:
-            config: Application configuration
+            config: Application configuration; whisper_workers replicas
+                of the model decode concurrently
+            reserve_interactive: Keep one replica free of background work
+                for dictation (off for batch-only use)
         """
         self._config = config
         self._model: WhisperModel | None = None
+        self._batched: BatchedInferencePipeline | None = None
+        self._load_lock = threading.Lock()
+        self._last_used = time.monotonic()
+        replicas = max(1, config.whisper_workers)
+        self._scheduler = Scheduler(replicas, reserved=1 if reserve_interactive else 0)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the model is loaded."""
+        return self._model is not None
+
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the model was last loaded or used."""
+        if self._scheduler.busy:
+            return 0.0
+        return time.monotonic() - self._last_used
+
+    @property
+    def scheduler(self) -> Scheduler:
+        """Scheduler handing out the model's replicas."""
+        return self._scheduler
+
+    def prewarm(self) -> None:
+        """Import faster-whisper ahead of the first transcription.
+
+        The import alone takes about a second; the model itself still loads
+        on first use.
+        """
+        try:
+            import faster_whisper  # noqa: F401
+        except Exception as e:
+            logger.warning("faster-whisper failed to import: %s", e)
+
+    def load(self) -> None:
+        """Load the model now rather than on first use."""
+        self._ensure_model()
+
+    def unload(self) -> bool:
+        """Drop the model and return its memory; it loads again on next use.
+
+        Returns:
+            False if it wasn't loaded or a transcription is using it
+        """
+        with self._load_lock:
+            if self._model is None or self._scheduler.busy:
+                return False
+            self._model = self._batched = None
+        trim_memory()
+        metrics.inc("whisper_unloads_total")
+        logger.info("Whisper model unloaded")
+        return True
 
     def _ensure_model(self) -> WhisperModel:
         """Lazy-load the Whisper model on first use."""
-        if self._model is None:
-            logger.info(
-                "Loading Whisper model: %s (threads=%d)",
-                self._config.whisper_model,
-                self._config.whisper_threads,
-            )
-            self._model = WhisperModel(
-                self._config.whisper_model,
-                device="cpu",
-                compute_type="int8",
-                cpu_threads=self._config.whisper_threads,
-            )
-            logger.info("Whisper model loaded")
-        return self._model
-
-    def transcribe(self, audio: np.ndarray) -> str:
-        """Transcribe audio to text.
+        with self._load_lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                logger.info(
+                    "Loading Whisper model: %s (replicas=%d, threads=%d)",
+                    self._config.whisper_model,
+                    self._scheduler.replicas,
+                    self._config.whisper_threads,
+                )
+                # Replicas share the weights; each decodes on its own threads
+                self._model = WhisperModel(
+                    self._config.whisper_model,
+                    device="cpu",
+                    compute_type="int8",
+                    cpu_threads=self._config.whisper_threads,
+                    num_workers=self._scheduler.replicas,
+                )
+                logger.info("Whisper model loaded")
+                metrics.inc("whisper_loads_total")
+                self._last_used = time.monotonic()
+            return self._model
+
+    def transcribe_segments(
+        self,
+        audio: np.ndarray,
+        cancel: CancelToken | None = None,
+        priority: int = INTERACTIVE,
+    ) -> list[Segment]:
+        """Transcribe audio to timed segments.
 
         Args:
-            audio: Audio samples as float32 numpy array
+            audio: Audio samples as float32 numpy array at 16 kHz
+            cancel: Token checked while waiting and between decoded segments
+            priority: pool.INTERACTIVE or pool.BACKGROUND
 
         Returns:
-            Transcribed text, or empty string if no speech detected
+            Non-empty segments in order
+
+        Raises:
+            Cancelled: If the token is cancelled mid-decode
+            Exception: If the model fails
         """
         if audio.size == 0:
-            logger.debug("Empty audio input, returning empty string")
-            return ""
+            return []
 
         # Ensure audio is float32
         if audio.dtype != np.float32:
             audio = audio.astype(np.float32)
 
         model = self._ensure_model()
+        if cancel is not None:
+            cancel.raise_if_cancelled()
 
-        try:
-            segments, info = model.transcribe(
-                audio,
-                vad_filter=True,
-                language=self._config.whisper_language,
-            )
+        with self._scheduler.slot(priority, cancel):
+            try:
+                # transcribe() runs VAD and feature extraction up front
+                with tracing.span("vad"):
+                    segments, info = model.transcribe(
+                        audio,
+                        vad_filter=True,
+                        language=self._config.whisper_language,
+                    )
+
+                # Segments decode lazily, so stopping here skips the rest
+                result = []
+                with tracing.span("decode"):
+                    for seg in segments:
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        text = seg.text.strip()
+                        if text:
+                            result.append(Segment(seg.start, seg.end, text))
+            finally:
+                self._last_used = time.monotonic()
+        return result
+
+    def transcribe_batch(
+        self, audios: list[np.ndarray], priority: int = INTERACTIVE
+    ) -> list[list[Segment]]:
+        """Transcribe several utterances in one batched decode.
+
+        Speech chunks from every utterance are laid end to end and decoded
+        together by faster-whisper's batched pipeline, one chunk per batch
+        row, then mapped back to the utterance they came from.
+
+        Args:
+            audios: Float32 audio at 16 kHz, one array per utterance
+            priority: pool.INTERACTIVE or pool.BACKGROUND; the decode holds
+                one replica, like a single utterance
+
+        Returns:
+            Segments for each utterance, in the same order
+
+        Raises:
+            Exception: If the model fails
+        """
+        from faster_whisper import BatchedInferencePipeline
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
 
-            # Concatenate all segment texts
-            text = " ".join(seg.text.strip() for seg in segments)
-            text = text.strip()
+        model = self._ensure_model()
+        batched = self._batched
+        if batched is None:
+            batched = self._batched = BatchedInferencePipeline(model)
 
-            if text:
-                logger.debug("Transcribed %d chars", len(text))
-            else:
-                logger.debug("No speech detected in audio")
+        vad = VadOptions(max_speech_duration_s=CHUNK_SECONDS, min_silence_duration_ms=160)
+        pieces: list[np.ndarray] = []
+        clips: list[dict[str, float]] = []
+        owners: list[tuple[int, float]] = []  # (utterance, shift back to its own time)
+        offset = 0
+        for index, audio in enumerate(audios):
+            audio = audio.astype(np.float32, copy=False)
+            for chunk in get_speech_timestamps(audio, vad):
+                piece = audio[chunk["start"]:chunk["end"]]
+                pieces.append(piece)
+                clips.append({
+                    "start": offset / SAMPLE_RATE,
+                    "end": (offset + len(piece)) / SAMPLE_RATE,
+                })
+                owners.append((index, (chunk["start"] - offset) / SAMPLE_RATE))
+                offset += len(piece)
 
-            return text
+        results: list[list[Segment]] = [[] for _ in audios]
+        if not pieces:
+            return results
+
+        with self._scheduler.slot(priority), tracing.span("decode"):
+            try:
+                segments, _ = batched.transcribe(
+                    np.concatenate(pieces),
+                    language=self._config.whisper_language,
+                    clip_timestamps=clips,
+                    vad_filter=False,
+                    batch_size=len(clips),
+                )
+                starts = [clip["start"] for clip in clips]
+                for seg in segments:
+                    # Timestamps are rounded, so allow a little slack
+                    index, shift = owners[max(0, bisect_right(starts, seg.start + 0.01) - 1)]
+                    text = seg.text.strip()
+                    if text:
+                        results[index].append(Segment(seg.start + shift, seg.end + shift, text))
+            finally:
+                self._last_used = time.monotonic()
+        return results
+
+    def transcribe(self, audio: np.ndarray, cancel: CancelToken | None = None) -> str:
+        """Transcribe audio to text.
 
+        Args:
+            audio: Audio samples as float32 numpy array
+            cancel: Token checked between decoded segments
+
+        Returns:
+            Transcribed text, or empty string if no speech detected
+
+        Raises:
+            Cancelled: If the token is cancelled mid-decode
+            Exception: If the model fails to load
+        """
+        if audio.size == 0:
+            logger.debug("Empty audio input, returning empty string")
+            return ""
+
+        # A model that can't load is reported, not mistaken for silence
+        self._ensure_model()
+        try:
+            segments = self.transcribe_segments(audio, cancel)
+        except Cancelled:
+            logger.info("Transcription cancelled")
+            raise
         except Exception as e:
             logger.error("Transcription failed: %s", e)
             return ""
+
+        text = " ".join(seg.text for seg in segments)
+        if text:
+            logger.debug("Transcribed %d chars", len(text))
+        else:
+            logger.debug("No speech detected in audio")
+        return text
@@ -43,14 +43,20 @@ class TrayIndicator:
         self,
         on_quit: Callable[[], None],
         assets_dir: Path | None = None,
+        on_profile: Callable[[], None] | None = None,
+        on_history: Callable[[], None] | None = None,
     ) -> None:
         """Initialize the tray indicator.
 
         Args:
             on_quit: Callback when user selects Quit from menu
             assets_dir: Optional override for asset directory
+            on_profile: Callback for the "Profile next recordings" item
+            on_history: Callback for the "History" item
         """
         self._on_quit = on_quit
+        self._on_profile = on_profile
+        self._on_history = on_history
         self._assets_dir = assets_dir
         self._indicator = None
 
@@ -73,6 +79,17 @@ class TrayIndicator:
         """Build the right-click context menu."""
         menu = Gtk.Menu()
 
+        if self._on_history is not None:
+            history_item = Gtk.MenuItem(label="History…")
+            history_item.connect("activate", lambda _: self._on_history())
+            menu.append(history_item)
+
+        if self._on_profile is not None:
+            profile_item = Gtk.MenuItem(label="Profile next recordings")
+            profile_item.connect("activate", lambda _: self._on_profile())
+            menu.append(profile_item)
+            menu.append(Gtk.SeparatorMenuItem())
+
         quit_item = Gtk.MenuItem(label="Quit")
         quit_item.connect("activate", lambda _: self._on_quit())
         menu.append(quit_item)
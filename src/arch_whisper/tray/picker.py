@@ -0,0 +1,134 @@
+"""Searchable transcript history window for arch_whisper."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Callable
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+gi.require_version("Gdk", "3.0")
+
+from gi.repository import Gdk, GLib, Gtk
+
+if TYPE_CHECKING:
+    from arch_whisper.history import Entry, HistoryStore
+
+logger = logging.getLogger(__name__)
+
+# Entries listed per search
+RESULT_LIMIT = 50
+
+# Delay before pasting, so focus is back in the previous window
+PASTE_DELAY_MS = 150
+
+
+def _describe(entry: Entry) -> str:
+    """Second line of a row: when and where it was pasted."""
+    when = time.strftime("%a %d %b %H:%M", time.localtime(entry.created))
+    return f"{when} · {entry.app}" if entry.app else when
+
+
+class HistoryPicker:
+    """A search box over the history; Enter pastes the selected transcript."""
+
+    def __init__(self, store: HistoryStore, on_pick: Callable[[str], None]) -> None:
+        """Build the window.
+
+        Args:
+            store: Transcript history to search
+            on_pick: Called with the chosen transcript's text
+        """
+        self._store = store
+        self._on_pick = on_pick
+        self._entries: list[Entry] = []
+
+        self._window = Gtk.Window(title="Transcript history")
+        self._window.set_default_size(560, 420)
+        self._window.set_position(Gtk.WindowPosition.CENTER)
+        self._window.set_keep_above(True)
+        self._window.connect("key-press-event", self._on_key)
+
+        self._search = Gtk.SearchEntry()
+        self._search.connect("search-changed", lambda _: self._refresh())
+        self._search.connect("activate", lambda _: self._pick_selected())
+
+        self._list = Gtk.ListBox()
+        self._list.connect("row-activated", lambda _, row: self._pick(row.get_index()))
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.add(self._list)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.set_border_width(6)
+        box.pack_start(self._search, False, False, 0)
+        box.pack_start(scrolled, True, True, 0)
+        self._window.add(box)
+        self._refresh()
+
+    def show(self) -> None:
+        """Show the window with the search box focused."""
+        self._window.show_all()
+        self._window.present()
+        self._search.grab_focus()
+
+    def _refresh(self) -> None:
+        """List the entries matching the search text."""
+        try:
+            self._entries = self._store.search(self._search.get_text(), RESULT_LIMIT)
+        except Exception as e:
+            logger.warning("History search failed: %s", e)
+            self._entries = []
+        for row in self._list.get_children():
+            self._list.remove(row)
+        for entry in self._entries:
+            text = Gtk.Label(label=entry.text, xalign=0)
+            text.set_line_wrap(True)
+            text.set_max_width_chars(70)
+            detail = Gtk.Label(label=_describe(entry), xalign=0)
+            detail.get_style_context().add_class("dim-label")
+            row_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+            row_box.set_border_width(4)
+            row_box.pack_start(text, False, False, 0)
+            row_box.pack_start(detail, False, False, 0)
+            self._list.add(row_box)
+        self._list.show_all()
+        first = self._list.get_row_at_index(0)
+        if first is not None:
+            self._list.select_row(first)
+
+    def _on_key(self, _window: Gtk.Window, event: Gdk.EventKey) -> bool:
+        """Escape closes; the arrow keys move the selection from the search box."""
+        if event.keyval == Gdk.KEY_Escape:
+            self._window.destroy()
+            return True
+        if event.keyval in (Gdk.KEY_Down, Gdk.KEY_Up):
+            row = self._list.get_selected_row()
+            index = row.get_index() if row is not None else -1
+            index += 1 if event.keyval == Gdk.KEY_Down else -1
+            target = self._list.get_row_at_index(max(0, index))
+            if target is not None:
+                self._list.select_row(target)
+            return True
+        return False
+
+    def _pick_selected(self) -> None:
+        row = self._list.get_selected_row()
+        if row is not None:
+            self._pick(row.get_index())
+
+    def _pick(self, index: int) -> None:
+        """Close the window and paste an entry once focus has moved back."""
+        if not 0 <= index < len(self._entries):
+            return
+        text = self._entries[index].text
+        self._window.destroy()
+
+        def paste() -> bool:
+            self._on_pick(text)
+            return False
+
+        GLib.timeout_add(PASTE_DELAY_MS, paste)
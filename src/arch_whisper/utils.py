@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import ctypes
+import ctypes.util
+import gc
+import logging
 import os
+import stat
+import tempfile
 from contextlib import contextmanager
 from importlib.resources import as_file, files
 from pathlib import Path
 from typing import Iterator, Literal
 
+logger = logging.getLogger(__name__)
+
 
 def get_session_type() -> Literal["x11", "wayland", "unknown"]:
     """Detect the current display session type."""
@@ -17,6 +25,34 @@ def get_session_type() -> Literal["x11", "wayland", "unknown"]:
     return "unknown"
 
 
+def runtime_dir() -> Path:
+    """Get the per-user directory for sockets and FIFOs, creating it if needed.
+
+    Uses $XDG_RUNTIME_DIR/arch-whisper, falling back to a per-user directory
+    under the temp directory.
+
+    Raises:
+        OSError: If the directory can't be created, or is a symlink, owned by
+            another user or readable by others (anyone can pre-create a name
+            under /tmp)
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = Path(base) / "arch-whisper"
+    else:
+        path = Path(tempfile.gettempdir()) / f"arch-whisper-{os.getuid()}"
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError(f"{path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise OSError(f"{path} is owned by another user")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        raise OSError(f"{path} has mode {stat.S_IMODE(st.st_mode):o}, expected 700")
+    return path
+
+
 @contextmanager
 def asset_path(name: str, assets_dir: Path | None = None) -> Iterator[Path]:
     """Yield a usable filesystem path to a bundled asset.
@@ -42,3 +78,21 @@ def asset_path(name: str, assets_dir: Path | None = None) -> Iterator[Path]:
         if not p.exists():
             raise FileNotFoundError(f"Asset not found: {name}")
         yield p
+
+
+def trim_memory() -> bool:
+    """Collect garbage and hand freed heap memory back to the OS.
+
+    glibc keeps freed memory in its arenas, so dropping a model shrinks
+    RSS only after malloc_trim().
+
+    Returns:
+        True if memory was released (glibc only)
+    """
+    gc.collect()
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError) as e:
+        logger.debug("malloc_trim unavailable: %s", e)
+        return False
@@ -0,0 +1,91 @@
+"""Tests for the shared asyncio loop thread."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from arch_whisper.aio import LoopThread
+from arch_whisper.cancel import Cancelled, CancelToken
+
+
+class TestLoopThread(unittest.TestCase):
+    """Tests for running coroutines from blocking code."""
+
+    def setUp(self):
+        """Start a private loop thread."""
+        self.loop_thread = LoopThread(name="test-asyncio")
+        self.loop_thread.start()
+        self.addCleanup(self.loop_thread.stop)
+
+    def test_run_returns_result(self):
+        """run() should return the coroutine's result."""
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertEqual(self.loop_thread.run(add(2, 3)), 5)
+
+    def test_runs_on_one_thread(self):
+        """Every coroutine should run on the same loop thread."""
+        async def thread_name():
+            return threading.current_thread().name
+
+        names = {self.loop_thread.run(thread_name()) for _ in range(3)}
+        self.assertEqual(names, {"test-asyncio"})
+
+    def test_exception_propagates(self):
+        """Errors inside the coroutine should reach the caller."""
+        async def fail():
+            raise ValueError("bad")
+
+        with self.assertRaises(ValueError):
+            self.loop_thread.run(fail())
+
+    def test_cancel_token_cancels_task(self):
+        """Cancelling the token should cancel the awaiting task promptly."""
+        token = CancelToken()
+        cleaned_up = threading.Event()
+
+        async def wait_forever():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned_up.set()
+
+        threading.Timer(0.05, token.cancel).start()
+        start = time.monotonic()
+        with self.assertRaises(Cancelled):
+            self.loop_thread.run(wait_forever(), token)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(cleaned_up.wait(1))
+
+    def test_already_cancelled(self):
+        """A cancelled token should not start the coroutine at all."""
+        token = CancelToken()
+        token.cancel()
+        started = []
+
+        async def work():
+            started.append(True)
+
+        with self.assertRaises(Cancelled):
+            self.loop_thread.run(work(), token)
+        self.assertEqual(started, [])
+
+    def test_timeout(self):
+        """A timeout should cancel the task and raise TimeoutError."""
+        async def slow():
+            await asyncio.sleep(10)
+
+        with self.assertRaises(TimeoutError):
+            self.loop_thread.run(slow(), timeout=0.05)
+
+    def test_stop(self):
+        """stop() should end the thread."""
+        self.loop_thread.stop()
+        self.assertFalse(self.loop_thread.running)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,204 @@
+"""Tests for file decoding and batch transcription."""
+
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile
+
+from arch_whisper import batch
+from arch_whisper.audio.decode import Resampler, load_audio
+from arch_whisper.cancel import CancelToken
+from arch_whisper.config import Config
+from arch_whisper.transcription.whisper import Segment, WhisperTranscriber
+
+
+def tone(freq, rate, seconds, channels=1):
+    """A sine tone, duplicated across channels."""
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.repeat(samples[:, None], channels, axis=1) if channels > 1 else samples
+
+
+class TestResampler(unittest.TestCase):
+    """Tests for streaming resampling to 16 kHz."""
+
+    def test_blocks_match_one_shot(self):
+        """Resampling in odd-sized blocks should leave no seams."""
+        samples = tone(440, 48000, 1.0)
+        whole = Resampler(48000).process(samples)
+
+        resampler = Resampler(48000)
+        blocks = [resampler.process(samples[i:i + 777]) for i in range(0, len(samples), 777)]
+        np.testing.assert_allclose(np.concatenate(blocks), whole, atol=1e-6)
+        self.assertEqual(len(whole), 16000)
+
+    def test_keeps_frequency(self):
+        """A tone should come out at the same pitch."""
+        out = Resampler(44100).process(tone(440, 44100, 1.0))
+        peak = np.argmax(np.abs(np.fft.rfft(out))) * 16000 / len(out)
+        self.assertAlmostEqual(peak, 440, delta=2)
+
+    def test_filters_above_nyquist(self):
+        """Content above 8 kHz should not alias into the output."""
+        out = Resampler(48000).process(tone(12000, 48000, 1.0))
+        self.assertLess(np.abs(out[100:]).max(), 0.01)
+
+
+class TestLoadAudio(unittest.TestCase):
+    """Tests for decoding files."""
+
+    def test_stereo_file_to_mono_16k(self):
+        """A 44.1 kHz stereo file should decode to 16 kHz mono."""
+        path = Path(tempfile.mkdtemp()) / "memo.flac"
+        soundfile.write(path, tone(440, 44100, 2.0, channels=2), 44100)
+
+        audio = load_audio(path, block_frames=4096)
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(audio.ndim, 1)
+        self.assertAlmostEqual(len(audio), 32000, delta=2)
+
+
+class TestOutputs(unittest.TestCase):
+    """Tests for output formatting."""
+
+    def test_srt(self):
+        """Segments should become numbered SRT cues."""
+        srt = batch.format_srt([Segment(0.0, 1.5, "One."), Segment(3661.25, 3662.0, "Two.")])
+        self.assertEqual(
+            srt,
+            "1\n00:00:00,000 --> 00:00:01,500\nOne.\n\n"
+            "2\n01:01:01,250 --> 01:01:02,000\nTwo.\n",
+        )
+
+    def test_threads_share_cores(self):
+        """Workers should split the cores between them."""
+        self.assertEqual(batch.worker_threads(3, 16), 5)
+        self.assertEqual(batch.worker_threads(32, 16), 1)
+        self.assertEqual(batch.default_workers(2), 1)
+
+
+class TestOutputBases(unittest.TestCase):
+    """Tests for naming outputs without collisions."""
+
+    def test_named_after_stem(self):
+        """Files with distinct stems should keep the plain names."""
+        bases = batch.output_bases([Path("a/memo.wav"), Path("b/talk.flac")])
+        self.assertEqual(bases[Path("a/memo.wav")], Path("a/memo"))
+        self.assertEqual(bases[Path("b/talk.flac")], Path("b/talk"))
+
+    def test_same_stem_keeps_suffix(self):
+        """memo.flac and memo.ogg should not overwrite each other."""
+        bases = batch.output_bases([Path("memo.flac"), Path("memo.ogg")])
+        self.assertEqual(batch.output_path(bases[Path("memo.flac")], "txt"), Path("memo.flac.txt"))
+        self.assertEqual(batch.output_path(bases[Path("memo.ogg")], "txt"), Path("memo.ogg.txt"))
+
+    def test_same_name_in_output_dir_mirrors_directories(self):
+        """a/x.wav and b/x.wav into one directory should keep a and b apart."""
+        root = Path(tempfile.mkdtemp())
+        first, second = root / "a" / "x.wav", root / "b" / "x.wav"
+        bases = batch.output_bases([first, second], Path("out"))
+        self.assertEqual(bases[first], Path("out/a/x.wav"))
+        self.assertEqual(bases[second], Path("out/b/x.wav"))
+
+    def test_unresolvable_collision_refused(self):
+        """Names that still clash should be refused rather than overwritten."""
+        with self.assertRaises(ValueError):
+            batch.output_bases([Path("x.wav"), Path("x.mp3"), Path("x.wav.mp3")])
+
+
+class TestRun(unittest.TestCase):
+    """Tests for running a batch and resuming it."""
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        for name in ("a.wav", "b.flac"):
+            soundfile.write(self.dir / name, tone(440, 22050, 1.0), 22050)
+        (self.dir / "notes.txt").write_text("not audio")
+
+    def run_batch(self):
+        out = io.StringIO()
+        segments = [Segment(0.0, 0.8, "Hello there.")]
+        with patch.object(
+            WhisperTranscriber, "transcribe_segments", return_value=segments
+        ) as transcribe:
+            status = batch.run([self.dir], Config(claude_enabled=False), workers=1, out=out)
+        return status, transcribe.call_count, out.getvalue()
+
+    def test_writes_outputs_and_resumes(self):
+        """Finished files should be skipped on the next run."""
+        status, calls, output = self.run_batch()
+        self.assertEqual(status, 0)
+        self.assertEqual(calls, 2)
+        self.assertIn("audio-hours per hour", output)
+
+        self.assertEqual((self.dir / "a.txt").read_text(), "Hello there.\n")
+        document = json.loads((self.dir / "b.json").read_text())
+        self.assertAlmostEqual(document["duration"], 1.0, places=2)
+        self.assertEqual(document["segments"][0]["text"], "Hello there.")
+        self.assertIn("00:00:00,800", (self.dir / "a.srt").read_text())
+
+        # Losing one output re-runs only that file
+        (self.dir / "b.srt").unlink()
+        status, calls, output = self.run_batch()
+        self.assertEqual(status, 0)
+        self.assertEqual(calls, 1)
+        self.assertIn("Skipping 1 already transcribed", output)
+
+    def test_same_stem_writes_both(self):
+        """Two files with one stem should both get their outputs."""
+        soundfile.write(self.dir / "a.flac", tone(440, 22050, 1.0), 22050)
+        status, calls, _ = self.run_batch()
+        self.assertEqual(status, 0)
+        self.assertEqual(calls, 3)
+        self.assertTrue((self.dir / "a.wav.txt").exists())
+        self.assertTrue((self.dir / "a.flac.txt").exists())
+        self.assertTrue((self.dir / "b.txt").exists())
+
+    def test_write_error_counts_as_failed(self):
+        """An output that can't be written should not stop the batch."""
+        real_write = batch._write_atomic
+
+        def write(path, content):
+            if path.stem == "a":
+                raise OSError("No space left on device")
+            real_write(path, content)
+
+        with patch.object(batch, "_write_atomic", side_effect=write):
+            status, calls, output = self.run_batch()
+        self.assertEqual(status, 1)
+        self.assertEqual(calls, 2)
+        self.assertIn("a.wav: failed to write outputs", output)
+        self.assertIn("audio-hours per hour", output)
+        self.assertTrue((self.dir / "b.txt").exists())
+
+    def test_cleanup_gets_the_cancel_token(self):
+        """Claude cleanup should be abortable like the decode."""
+        postprocessor = MagicMock(available=True)
+        postprocessor.process.return_value = "Cleaned."
+        transcriber = MagicMock()
+        transcriber.transcribe_segments.return_value = [Segment(0.0, 0.8, "hello")]
+        token = CancelToken()
+
+        result = batch.transcribe_file(
+            str(self.dir / "a.wav"), transcriber, postprocessor, token
+        )
+        self.assertEqual(result.text, "Cleaned.")
+        postprocessor.process.assert_called_once_with("hello", token)
+
+    def test_failed_file_sets_status(self):
+        """An undecodable file should be reported without stopping the batch."""
+        (self.dir / "broken.wav").write_bytes(b"not a wav file")
+        status, calls, output = self.run_batch()
+        self.assertEqual(status, 1)
+        self.assertEqual(calls, 2)
+        self.assertIn("broken.wav: failed", output)
+        self.assertFalse((self.dir / "broken.txt").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for job cancellation.
+
+A cancel press has to stop the job at whatever stage it is in, so each
+stage is checked on its own: the token itself, the Whisper decode loop,
+the Claude request and the paste.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.config import Config
+from arch_whisper.postprocess.claude import ClaudePostProcessor
+from arch_whisper.transcription.whisper import WhisperTranscriber
+from tests.test_paste_manager import PasteManagerTestCase, make_backend, make_manager
+
+
+class TestCancelToken(unittest.TestCase):
+    """Tests for the token itself."""
+
+    def test_raise_if_cancelled(self):
+        """raise_if_cancelled() should only raise after cancel()."""
+        token = CancelToken()
+        token.raise_if_cancelled()
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        with self.assertRaises(Cancelled):
+            token.raise_if_cancelled()
+
+    def test_callbacks_run_once(self):
+        """Callbacks should run on the first cancel() only."""
+        token = CancelToken()
+        callback = MagicMock()
+        token.on_cancel(callback)
+        token.cancel()
+        token.cancel()
+        callback.assert_called_once()
+
+    def test_callback_after_cancel_runs_immediately(self):
+        """Registering on a cancelled token should run the callback now."""
+        token = CancelToken()
+        token.cancel()
+        callback = MagicMock()
+        token.on_cancel(callback)
+        callback.assert_called_once()
+
+    def test_unregister(self):
+        """Unregistered callbacks should not run."""
+        token = CancelToken()
+        callback = MagicMock()
+        unregister = token.on_cancel(callback)
+        unregister()
+        token.cancel()
+        callback.assert_not_called()
+
+    def test_failing_callback_does_not_stop_others(self):
+        """One failing callback should not skip the rest."""
+        token = CancelToken()
+        second = MagicMock()
+        token.on_cancel(MagicMock(side_effect=RuntimeError("closed")))
+        token.on_cancel(second)
+        token.cancel()
+        second.assert_called_once()
+
+
+class TestTranscriberCancel(unittest.TestCase):
+    """Tests for stopping the decode between segments."""
+
+    def test_stops_between_segments(self):
+        """Cancelling mid-decode should stop pulling segments."""
+        token = CancelToken()
+        pulled = []
+
+        def segments():
+            for text in ("one", "two", "three"):
+                pulled.append(text)
+                if text == "two":
+                    token.cancel()
+                yield SimpleNamespace(start=0.0, end=1.0, text=text)
+
+        model = MagicMock()
+        model.transcribe.return_value = (segments(), None)
+        transcriber = WhisperTranscriber(Config())
+        with patch.object(transcriber, '_ensure_model', return_value=model):
+            with self.assertRaises(Cancelled):
+                transcriber.transcribe(np.zeros(1600, dtype=np.float32), token)
+        self.assertEqual(pulled, ["one", "two"])
+
+
+class TestClaudeCancel(unittest.TestCase):
+    """Tests for aborting the Claude request."""
+
+    def test_cancel_aborts_request(self):
+        """Cancelling mid-request should abort it, close the client and raise."""
+        token = CancelToken()
+        client = AsyncMock()
+        started = threading.Event()
+
+        async def create(**kwargs):
+            started.set()
+            await asyncio.sleep(10)
+
+        client.messages.create.side_effect = create
+
+        with patch('arch_whisper.capabilities.which', return_value=None):
+            with patch.dict('os.environ', {}, clear=True):
+                with patch('anthropic.AsyncAnthropic', return_value=client):
+                    processor = ClaudePostProcessor(Config(anthropic_api_key="sk-ant-test"))
+                    threading.Thread(target=lambda: started.wait(2) and token.cancel()).start()
+                    start = time.monotonic()
+                    with self.assertRaises(Cancelled):
+                        processor.process("raw text", token)
+        self.assertLess(time.monotonic() - start, 1.0)
+        deadline = time.monotonic() + 1
+        while not client.close.await_count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        client.close.assert_awaited_once()
+
+    def test_uncancelled_error_returns_raw_text(self):
+        """Errors without a cancel should still fall back to the raw text."""
+        client = AsyncMock()
+        client.messages.create.side_effect = ConnectionError("down")
+
+        with patch('arch_whisper.capabilities.which', return_value=None):
+            with patch.dict('os.environ', {}, clear=True):
+                with patch('anthropic.AsyncAnthropic', return_value=client):
+                    processor = ClaudePostProcessor(Config(anthropic_api_key="sk-ant-test"))
+                    self.assertEqual(processor.process("raw text", CancelToken()), "raw text")
+
+
+class TestPasteCancel(PasteManagerTestCase):
+    """Tests for skipping the paste."""
+
+    def test_cancelled_job_is_not_pasted(self):
+        """A cancelled token should skip delivery and leave the clipboard."""
+        backend = make_backend()
+        manager = make_manager(backend)
+        token = CancelToken()
+        token.cancel()
+
+        with patch('arch_whisper.paste.manager.copy_to_clipboard') as copy:
+            with self.assertRaises(Cancelled):
+                manager.paste("hello", token)
+            copy.assert_not_called()
+        backend.type_text.assert_not_called()
+        backend.paste.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,164 @@
+"""Tests for the cached capability probe."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arch_whisper import capabilities
+from arch_whisper.capabilities import Capabilities
+from arch_whisper.preflight import check_dependencies, check_optional_dependencies
+
+
+class TestProbe(unittest.TestCase):
+    """Tests for probing and caching."""
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.path = self.dir / "capabilities.json"
+        patcher = patch.object(capabilities, "CAPABILITIES_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(capabilities, "_current", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_tool(self, name):
+        """Create an executable file standing in for a tool."""
+        tool = self.dir / name
+        tool.write_text("#!/bin/sh\n")
+        tool.chmod(0o755)
+        return str(tool)
+
+    def test_probe_finds_tools(self):
+        """Tools on PATH should be recorded with their mtimes."""
+        xdotool = self.make_tool("xdotool")
+        with patch("shutil.which", side_effect=lambda n: xdotool if n == "xdotool" else None):
+            caps = capabilities.probe("x11")
+
+        self.assertEqual(caps.tools["xdotool"], xdotool)
+        self.assertIsNone(caps.tools["wtype"])
+        self.assertIn(xdotool, caps.tool_mtimes)
+        self.assertIsNone(caps.evdev_devices)  # Only probed on Wayland
+
+    def test_cache_round_trip(self):
+        """Saved capabilities should load back under the same key only."""
+        caps = Capabilities(session="x11", tools={"xclip": None}, appindicator=True)
+        capabilities.save(caps, "key")
+
+        self.assertEqual(capabilities.load("key"), caps)
+        self.assertIsNone(capabilities.load("other"))
+
+    def test_changed_tool_invalidates_cache(self):
+        """A tool whose mtime changed should force a new probe."""
+        tool = self.make_tool("wtype")
+        caps = Capabilities(
+            session="wayland",
+            tools={"wtype": tool},
+            tool_mtimes={tool: os.stat(tool).st_mtime_ns},
+        )
+        capabilities.save(caps, "key")
+        os.utime(tool, ns=(0, 0))
+
+        self.assertIsNone(capabilities.load("key"))
+
+    def test_key_depends_on_path(self):
+        """Changing PATH should change the cache key."""
+        with patch.dict(os.environ, {"PATH": "/usr/bin"}):
+            first = capabilities.cache_key("x11")
+        with patch.dict(os.environ, {"PATH": f"/usr/bin:{self.dir}"}):
+            second = capabilities.cache_key("x11")
+        self.assertNotEqual(first, second)
+
+    def test_key_depends_on_typelibs_and_groups(self):
+        """New typelibs or group membership should change the cache key."""
+        first = capabilities.cache_key("wayland")
+        with patch.object(capabilities, "TYPELIB_DIRS", (str(self.dir),)):
+            self.assertNotEqual(capabilities.cache_key("wayland"), first)
+        with patch("os.getgroups", return_value=[12345]):
+            self.assertNotEqual(capabilities.cache_key("wayland"), first)
+
+    def test_no_evdev_devices_is_counted_again(self):
+        """A cached count of zero devices should not outlive a permission fix."""
+        caps = Capabilities(session="wayland", evdev_devices=0)
+        capabilities.save(caps, capabilities.cache_key("wayland"))
+
+        with patch.object(capabilities, "get_session_type", return_value="wayland"):
+            with patch.object(capabilities, "_count_evdev_devices", return_value=3):
+                with patch.object(capabilities, "probe") as probe:
+                    self.assertEqual(capabilities.get().evdev_devices, 3)
+        probe.assert_not_called()
+
+    def test_warm_start_skips_probe(self):
+        """A valid cache should be used instead of probing again."""
+        caps = Capabilities(session="x11", tools={"xdotool": None})
+        with patch.object(capabilities, "probe", return_value=caps) as probe:
+            capabilities.get()
+            with patch.object(capabilities, "_current", None):
+                capabilities.get()
+        probe.assert_called_once()
+
+    def test_headless_probe_skips_gi(self):
+        """Without gui, the GI checks should not run until they are needed."""
+        with patch.object(capabilities, "_check_gtk", return_value=(None, True)) as check:
+            caps = capabilities.get()
+            self.assertFalse(caps.gui_probed)
+            check.assert_not_called()
+
+            caps = capabilities.get(gui=True)
+        self.assertTrue(caps.gui_probed)
+        self.assertTrue(caps.appindicator)
+        check.assert_called_once()
+
+    def test_which_falls_back_for_unknown_tools(self):
+        """Tools outside the probe should be looked up directly."""
+        caps = Capabilities(session="x11", tools={"xdotool": None})
+        with patch.object(capabilities, "get", return_value=caps), \
+                patch("shutil.which", return_value="/usr/bin/foo") as which:
+            self.assertIsNone(capabilities.which("xdotool"))
+            self.assertEqual(capabilities.which("foo"), "/usr/bin/foo")
+        which.assert_called_once_with("foo")
+
+
+class TestPreflight(unittest.TestCase):
+    """Tests for preflight checks on a probe result."""
+
+    def test_wayland_missing_tools(self):
+        """Missing Wayland tools should be reported."""
+        caps = Capabilities(
+            session="wayland",
+            tools={"wl-copy": None, "wtype": None, "ydotool": None},
+            appindicator=True,
+            evdev_devices=0,
+        )
+        missing = check_dependencies(caps)
+        self.assertEqual(len(missing), 2)
+        self.assertEqual(check_optional_dependencies(caps), {
+            "claude_cli": False,
+            "evdev_access": False,
+        })
+
+    def test_x11_complete(self):
+        """Nothing should be missing when everything was found."""
+        caps = Capabilities(
+            session="x11",
+            tools={"xdotool": "/usr/bin/xdotool", "claude": "/usr/bin/claude"},
+            appindicator=True,
+        )
+        self.assertEqual(check_dependencies(caps), [])
+        self.assertEqual(check_optional_dependencies(caps), {"claude_cli": True})
+
+    def test_headless_ignores_gtk(self):
+        """Headless, missing GTK and AppIndicator should not be reported."""
+        caps = Capabilities(
+            session="x11",
+            tools={"xdotool": "/usr/bin/xdotool"},
+            gtk_error="No module named 'gi'",
+        )
+        self.assertEqual(len(check_dependencies(caps)), 2)
+        self.assertEqual(check_dependencies(caps, gui=False), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
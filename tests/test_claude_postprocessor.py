@@ -6,7 +6,7 @@ the app is broken for its primary use case.
 
 import os
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 from arch_whisper.config import Config
 from arch_whisper.postprocess.claude import ClaudePostProcessor, CLEANUP_PROMPT
@@ -17,7 +17,7 @@ class TestClaudePostProcessorAvailability(unittest.TestCase):
 
     def test_available_when_cli_exists(self):
         """Should be available when claude CLI is found."""
-        with patch('shutil.which', return_value='/usr/bin/claude'):
+        with patch('arch_whisper.capabilities.which', return_value='/usr/bin/claude'):
             with patch.dict('os.environ', {}, clear=True):
                 config = Config()
                 config.anthropic_api_key = None
@@ -26,7 +26,7 @@ class TestClaudePostProcessorAvailability(unittest.TestCase):
 
     def test_unavailable_when_cli_missing_and_no_api_key(self):
         """Should be unavailable when claude CLI and API key are missing."""
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
                 config = Config()
                 config.anthropic_api_key = None
@@ -35,7 +35,7 @@ class TestClaudePostProcessorAvailability(unittest.TestCase):
 
     def test_available_with_api_key(self):
         """Should be available when API key is provided."""
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
                 config = Config()
                 config.anthropic_api_key = "sk-ant-test"
@@ -44,7 +44,7 @@ class TestClaudePostProcessorAvailability(unittest.TestCase):
 
     def test_api_key_from_environment(self):
         """Should use API key from environment variable."""
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'sk-ant-env'}):
                 config = Config()
                 config.anthropic_api_key = None
@@ -53,7 +53,7 @@ class TestClaudePostProcessorAvailability(unittest.TestCase):
 
     def test_config_api_key_takes_precedence(self):
         """Config API key should take precedence over environment."""
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'sk-ant-env'}):
                 config = Config()
                 config.anthropic_api_key = "sk-ant-config"
@@ -83,7 +83,7 @@ class TestClaudePostProcessing(unittest.TestCase):
 
     def test_empty_input_returns_empty(self):
         """Empty input should return empty without calling Claude."""
-        with patch('shutil.which', return_value='/usr/bin/claude'):
+        with patch('arch_whisper.capabilities.which', return_value='/usr/bin/claude'):
             with patch.dict('os.environ', {}, clear=True):
                 config = Config()
                 config.anthropic_api_key = None
@@ -97,7 +97,7 @@ class TestClaudePostProcessing(unittest.TestCase):
 
     def test_returns_raw_text_when_unavailable(self):
         """Should return raw text when Claude is not available."""
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
                 config = Config()
                 config.anthropic_api_key = None
@@ -113,12 +113,12 @@ class TestClaudePostProcessing(unittest.TestCase):
         mock_content.text = "Cleaned output"
         mock_response.content = [mock_content]
 
-        mock_client = MagicMock()
+        mock_client = AsyncMock()
         mock_client.messages.create.return_value = mock_response
 
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
-                with patch('anthropic.Anthropic', return_value=mock_client):
+                with patch('anthropic.AsyncAnthropic', return_value=mock_client):
                     config = Config()
                     config.anthropic_api_key = "sk-ant-test"
                     processor = ClaudePostProcessor(config)
@@ -128,12 +128,12 @@ class TestClaudePostProcessing(unittest.TestCase):
 
     def test_api_error_returns_raw_text(self):
         """Should return raw text when API call fails."""
-        mock_client = MagicMock()
+        mock_client = AsyncMock()
         mock_client.messages.create.side_effect = Exception("API Error")
 
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
-                with patch('anthropic.Anthropic', return_value=mock_client):
+                with patch('anthropic.AsyncAnthropic', return_value=mock_client):
                     config = Config()
                     config.anthropic_api_key = "sk-ant-test"
                     processor = ClaudePostProcessor(config)
@@ -148,12 +148,12 @@ class TestClaudePostProcessing(unittest.TestCase):
         mock_content.text = ""
         mock_response.content = [mock_content]
 
-        mock_client = MagicMock()
+        mock_client = AsyncMock()
         mock_client.messages.create.return_value = mock_response
 
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
-                with patch('anthropic.Anthropic', return_value=mock_client):
+                with patch('anthropic.AsyncAnthropic', return_value=mock_client):
                     config = Config()
                     config.anthropic_api_key = "sk-ant-test"
                     processor = ClaudePostProcessor(config)
@@ -172,12 +172,12 @@ class TestClaudeIntegration(unittest.TestCase):
         mock_content.text = "cleaned"
         mock_response.content = [mock_content]
 
-        mock_client = MagicMock()
+        mock_client = AsyncMock()
         mock_client.messages.create.return_value = mock_response
 
-        with patch('shutil.which', return_value=None):
+        with patch('arch_whisper.capabilities.which', return_value=None):
             with patch.dict('os.environ', {}, clear=True):
-                with patch('anthropic.Anthropic', return_value=mock_client):
+                with patch('anthropic.AsyncAnthropic', return_value=mock_client):
                     config = Config()
                     config.anthropic_api_key = "sk-ant-test"
                     config.claude_model = "claude-test-model"
@@ -0,0 +1,156 @@
+"""Tests for clipboard readiness waiting.
+
+The paste shortcut must not be sent until the clipboard serves the new
+text, but the wait has to stay bounded and be recorded as a metric.
+"""
+
+import subprocess
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from Xlib import X
+
+from arch_whisper import metrics
+from arch_whisper.paste import readiness
+
+
+def wl_paste_result(stdout=b"", returncode=0, stderr=b""):
+    """Build a fake wl-paste result."""
+    result = MagicMock()
+    result.stdout = stdout
+    result.returncode = returncode
+    result.stderr = stderr
+    return result
+
+
+class TestWaylandReadiness(unittest.TestCase):
+    """Tests for the wl-paste based readiness check."""
+
+    def setUp(self):
+        """Start each test with empty metrics on a Wayland session."""
+        metrics.reset()
+        patcher = patch('arch_whisper.paste.readiness.get_session_type', return_value="wayland")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ready_when_text_offered(self):
+        """Should return as soon as the new text is offered."""
+        with patch('subprocess.run', return_value=wl_paste_result(b"hello")):
+            self.assertTrue(readiness.wait_for_clipboard("hello"))
+
+    def test_retries_until_new_text(self):
+        """Stale contents should be retried until the new text appears."""
+        results = [wl_paste_result(b"old"), wl_paste_result(b"old"), wl_paste_result(b"new")]
+        with patch('subprocess.run', side_effect=results) as run:
+            self.assertTrue(readiness.wait_for_clipboard("new"))
+            self.assertEqual(run.call_count, 3)
+
+    def test_timeout_is_bounded(self):
+        """Never-matching contents should give up at the timeout."""
+        with patch('subprocess.run', return_value=wl_paste_result(b"old")):
+            self.assertFalse(readiness.wait_for_clipboard("new", timeout=0.02))
+        self.assertEqual(metrics.counters()["clipboard_ready_timeouts_total"], 1)
+
+    def test_missing_wl_paste_falls_back(self):
+        """Missing wl-paste should fall back to the fixed delay."""
+        with patch('subprocess.run', side_effect=FileNotFoundError):
+            with patch('time.sleep') as sleep:
+                self.assertFalse(readiness.wait_for_clipboard("hello"))
+                sleep.assert_called_with(readiness.FALLBACK_DELAY)
+
+    def test_subprocess_timeout_returns_false(self):
+        """A hung wl-paste should count as not ready."""
+        with patch('subprocess.run', side_effect=subprocess.TimeoutExpired("wl-paste", 1)):
+            self.assertFalse(readiness.wait_for_clipboard("hello"))
+
+    def test_wait_time_recorded(self):
+        """Wait time should be recorded as a histogram observation."""
+        with patch('subprocess.run', return_value=wl_paste_result(b"hello")):
+            readiness.wait_for_clipboard("hello")
+        self.assertEqual(metrics.histograms()["clipboard_ready_seconds"].count, 1)
+
+
+class FakeWindow:
+    """Probe window whose selection requests are answered by an owner function."""
+
+    def __init__(self, display):
+        self.display = display
+
+    def convert_selection(self, selection, target, prop, when):
+        self.display.events.append(SimpleNamespace(type=X.SelectionNotify, property=prop))
+
+    def get_full_property(self, prop, kind):
+        value = self.display.owner()
+        return SimpleNamespace(property_type=self.display.intern_atom("UTF8_STRING"), value=value)
+
+    def delete_property(self, prop):
+        pass
+
+
+class FakeDisplay:
+    """Just enough of an Xlib display for the selection probe."""
+
+    def __init__(self, owner):
+        self.owner = owner  # Returns what the clipboard owner serves
+        self.events = []
+        self.closed = False
+        self.window = FakeWindow(self)
+        root = SimpleNamespace(create_window=lambda *args: self.window)
+        self.screen = lambda: SimpleNamespace(root=root)
+
+    def intern_atom(self, name):
+        return hash(name) & 0xFFFF
+
+    def flush(self):
+        pass
+
+    def fileno(self):
+        return -1
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+class TestX11Readiness(unittest.TestCase):
+    """Tests for the SelectionNotify based readiness check."""
+
+    def setUp(self):
+        """Start each test with empty metrics on an X11 session."""
+        metrics.reset()
+        patcher = patch('arch_whisper.paste.readiness.get_session_type', return_value="x11")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def probe(self, display):
+        """Run the readiness check against a fake display."""
+        probe = readiness.X11SelectionProbe()
+        with patch('arch_whisper.paste.readiness._x11_probe', probe):
+            with patch('arch_whisper.paste.readiness.xdisplay.Display', return_value=display):
+                return readiness.wait_for_clipboard("new", timeout=0.1)
+
+    def test_ready_once_owner_serves_text(self):
+        """Stale contents should be retried until the owner serves the new text."""
+        served = iter([b"old", b"old", b"new"])
+        self.assertTrue(self.probe(FakeDisplay(lambda: next(served))))
+
+    def test_failed_probe_closes_display(self):
+        """A probe that raises should close its display and fall back."""
+        def owner():
+            raise OSError("connection lost")
+
+        display = FakeDisplay(owner)
+        with patch('time.sleep') as sleep:
+            self.assertFalse(self.probe(display))
+            sleep.assert_called_with(readiness.FALLBACK_DELAY)
+        self.assertTrue(display.closed)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -8,7 +8,7 @@ import unittest
 from pathlib import Path
 
 from arch_whisper import config as config_module
-from arch_whisper.config import Config, load_config
+from arch_whisper.config import Config, load_config, save_config
 
 
 class TestConfigDefaults(unittest.TestCase):
@@ -87,6 +87,27 @@ class TestConfigLoading(unittest.TestCase):
         self.assertEqual(c.hotkey, "ctrl+space")  # Default preserved
         self.assertEqual(c.whisper_threads, 4)  # Default preserved
 
+    def test_output_sinks_table(self):
+        """An [output_sinks] table should load as a dict."""
+        config_file = Path(self.temp_dir) / "config.toml"
+        config_file.write_text('[output_sinks]\nemacs = "socket"\n"*" = "fifo"\n')
+        config_module.CONFIG_PATH = config_file
+
+        c = load_config()
+        self.assertEqual(c.output_sinks, {"emacs": "socket", "*": "fifo"})
+
+    def test_save_round_trip(self):
+        """Saved config should load back unchanged."""
+        config_module.CONFIG_PATH = Path(self.temp_dir) / "saved.toml"
+        c = Config()
+        c.whisper_model = "small"
+        c.output_sinks = {"emacs": "socket"}
+        save_config(c)
+
+        loaded = load_config()
+        self.assertEqual(loaded.whisper_model, "small")
+        self.assertEqual(loaded.output_sinks, {"emacs": "socket"})
+
 
 class TestConfigValidation(unittest.TestCase):
     """Tests for config validation and error handling."""
@@ -0,0 +1,215 @@
+"""Tests for the transcript history and re-paste."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from arch_whisper.app import App
+from arch_whisper.config import Config
+from arch_whisper.history import Entry, HistoryStore, match_query
+from arch_whisper.hotkey.bindings import Action
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Tests for storing, searching and pruning transcripts."""
+
+    def make_store(self, **kwargs):
+        store = HistoryStore(Path(tempfile.mkdtemp()) / "history.db", **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_round_trip(self):
+        store = self.make_store()
+        entry_id = store.add(
+            Entry(
+                raw_text="um so the meeting is at noon",
+                text="The meeting is at noon.",
+                app="firefox",
+                audio_seconds=2.5,
+                timings={"transcribe": 0.4, "cleanup": 0.3},
+            )
+        )
+        entry = store.last()
+        self.assertEqual(entry.id, entry_id)
+        self.assertEqual(entry.text, "The meeting is at noon.")
+        self.assertEqual(entry.raw_text, "um so the meeting is at noon")
+        self.assertEqual(entry.timings["cleanup"], 0.3)
+        self.assertTrue(entry.pasted)
+        self.assertEqual(store.get(entry_id).app, "firefox")
+
+    def test_search_matches_prefixes_newest_first(self):
+        """Every word should match, as a prefix, in either text or the app."""
+        store = self.make_store()
+        store.add(Entry("standup notes for monday", "Standup notes for Monday."))
+        store.add(Entry("lunch order", "Lunch order.", app="slack"))
+        store.add(Entry("standup moved", "Standup moved.", app="slack"))
+
+        self.assertEqual(
+            [e.text for e in store.search("stand")],
+            ["Standup moved.", "Standup notes for Monday."],
+        )
+        self.assertEqual([e.text for e in store.search("standup slack")], ["Standup moved."])
+        self.assertEqual(len(store.search("")), 3)
+        self.assertEqual(store.search("nothing"), [])
+
+    def test_query_syntax_is_literal(self):
+        """FTS5 operators typed by the user should not be parsed."""
+        store = self.make_store()
+        store.add(Entry('say "hi" OR bye', 'Say "hi" OR bye.'))
+        self.assertEqual(match_query('"hi" OR'), '"""hi"""* "OR"*')
+        self.assertEqual(len(store.search('"hi" OR')), 1)
+        self.assertEqual(store.search("NEAR("), [])
+
+    def test_prunes_by_count_on_every_add(self):
+        store = self.make_store(max_entries=2)
+        for word in ("one", "two", "three"):
+            store.add(Entry(word, word))
+        self.assertEqual([e.text for e in store.search()], ["three", "two"])
+        self.assertEqual(store.search("one"), [])  # Gone from the index too
+        self.assertEqual(store.prune(), 0)
+
+    def test_prunes_by_age(self):
+        store = self.make_store(max_days=1)
+        store.add(Entry("old", "Old.", created=time.time() - 2 * 86400))
+        store.add(Entry("new", "New."))
+        self.assertEqual(store.prune(), 1)
+        self.assertEqual([e.text for e in store.search()], ["New."])
+
+    def test_revise_replaces_raw_text(self):
+        """A better transcript should replace the raw text, and the text if uncleaned."""
+        store = self.make_store()
+        cleaned = store.add(Entry("helo there", "Hello there."))
+        uncleaned = store.add(Entry("meat at noon", "meat at noon"))
+
+        self.assertTrue(store.revise(cleaned, "Hello there."))
+        self.assertTrue(store.revise(uncleaned, "Meet at noon."))
+        self.assertFalse(store.revise(12345, "Gone."))
+
+        self.assertEqual(store.get(cleaned).text, "Hello there.")
+        self.assertEqual(store.get(uncleaned).raw_text, "Meet at noon.")
+        self.assertEqual(store.get(uncleaned).text, "Meet at noon.")
+        self.assertEqual([e.id for e in store.search("meet")], [uncleaned])
+        self.assertEqual(store.search("meat"), [])
+
+
+class FakeRecorder:
+    is_recording = False
+    first_block_at = None
+
+    def start(self, on_block=None, on_limit=None, rolling=False, feed=None):
+        pass
+
+    def stop(self):
+        return np.ones(1600, dtype=np.float32)
+
+
+class FakeTranscriber:
+    def transcribe(self, audio, cancel):
+        return "um hello there"
+
+
+class SlowFirstTranscriber:
+    """Finishes its first transcript only once the job is cancelled."""
+
+    def __init__(self):
+        self.started = threading.Event()
+
+    def transcribe(self, audio, cancel):
+        if not self.started.is_set():
+            self.started.set()
+            while not cancel.cancelled:
+                time.sleep(0.005)
+        return "um hello there"
+
+
+class FakePostProcessor:
+    available = True
+
+    def process(self, text, cancel=None):
+        return "Hello there."
+
+
+class FakePasteManager:
+    def __init__(self):
+        self.pasted = []
+        self.last_app = "kitty"
+
+    def paste(self, text, cancel=None):
+        self.pasted.append(text)
+        return True
+
+
+class TestRepaste(unittest.TestCase):
+    """Tests for recording transcripts and pasting them again."""
+
+    def test_repaste_serves_last_transcript_from_history(self):
+        """Re-paste should paste the stored text without transcribing."""
+        config = Config(ding_enabled=False, trace_enabled=False, status_enabled=False)
+        app = App(config, headless=True)
+        paste = FakePasteManager()
+        app._recorder = FakeRecorder()
+        app._transcriber = FakeTranscriber()
+        app._postprocessor = FakePostProcessor()
+        app._paste_manager = paste
+        app._history = HistoryStore(Path(tempfile.mkdtemp()) / "history.db")
+        self.addCleanup(app._history.close)
+        app._build_pipeline()
+        self.addCleanup(app._pipeline.close)
+        app._ready.set()
+
+        app._on_hotkey_event(Action.RECORD, True)
+        app._on_hotkey_event(Action.RECORD, False)
+        app._pipeline.join()
+
+        entry = app._history.last()
+        self.assertEqual((entry.raw_text, entry.text), ("um hello there", "Hello there."))
+        self.assertEqual(entry.app, "kitty")
+        self.assertIn("transcribe", entry.timings)
+
+        app._transcriber = None  # Nothing is transcribed again
+        app._on_hotkey_event(Action.REPASTE, True)
+        app._on_hotkey_event(Action.REPASTE, False)
+        deadline = time.monotonic() + 2
+        while len(paste.pasted) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(paste.pasted, ["Hello there.", "Hello there."])
+
+    def test_delivered_utterance_is_queued_with_its_entry(self):
+        """Only delivered utterances should be re-transcribed, linked to their entry."""
+        config = Config(ding_enabled=False, trace_enabled=False, status_enabled=False)
+        app = App(config, headless=True)
+        app._recorder = FakeRecorder()
+        app._transcriber = transcriber = SlowFirstTranscriber()
+        app._paste_manager = FakePasteManager()
+        app._history = HistoryStore(Path(tempfile.mkdtemp()) / "history.db")
+        self.addCleanup(app._history.close)
+        app._retranscriber = MagicMock()
+        app._build_pipeline()
+        self.addCleanup(app._pipeline.close)
+        app._ready.set()
+
+        # Cancelled after transcription but before delivery: nothing to improve
+        app._on_hotkey_event(Action.RECORD, True)
+        app._on_hotkey_event(Action.RECORD, False)
+        self.assertTrue(transcriber.started.wait(2))
+        app._on_cancel_press()
+        app._pipeline.join()
+
+        app._on_hotkey_event(Action.RECORD, True)
+        app._on_hotkey_event(Action.RECORD, False)
+        app._pipeline.join()
+
+        app._retranscriber.add.assert_called_once()
+        audio, text, history_id = app._retranscriber.add.call_args.args
+        self.assertEqual(audio.size, 1600)
+        self.assertEqual(text, "um hello there")
+        self.assertEqual(history_id, app._history.last().id)
+
+
+if __name__ == "__main__":
+    unittest.main()
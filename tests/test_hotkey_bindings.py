@@ -0,0 +1,177 @@
+"""Tests for the shared hotkey binding engine."""
+
+import unittest
+
+from arch_whisper.config import Config
+from arch_whisper.hotkey.bindings import (
+    MODIFIER_BITS,
+    Action,
+    BindingEngine,
+    BindingTable,
+    parse_combo,
+)
+from arch_whisper.hotkey.manager import build_bindings
+
+# Fake keycodes for a tiny keyboard
+KEYCODES = {
+    "ctrl": [10, 11],
+    "shift": [12],
+    "alt": [13],
+    "super": [14],
+    "space": [20],
+    "escape": [21],
+    "r": [22],
+}
+LCTRL, RCTRL, SHIFT, SPACE, ESCAPE, R = 10, 11, 12, 20, 21, 22
+
+
+def resolve(name):
+    """Resolve a key name against the fake keyboard."""
+    return KEYCODES.get(name, [])
+
+
+class TestParseCombo(unittest.TestCase):
+    """Tests for combo string parsing."""
+
+    def test_modifiers_and_key(self):
+        """Modifiers should combine into a mask, case-insensitively."""
+        mask, key = parse_combo("Ctrl+Shift+R")
+        self.assertEqual(mask, MODIFIER_BITS["ctrl"] | MODIFIER_BITS["shift"])
+        self.assertEqual(key, "r")
+
+    def test_aliases(self):
+        """Common modifier spellings should be accepted."""
+        self.assertEqual(parse_combo("control+space"), parse_combo("ctrl+space"))
+        self.assertEqual(parse_combo("meta+space"), parse_combo("super+space"))
+
+    def test_bare_key(self):
+        """A key without modifiers has an empty mask."""
+        self.assertEqual(parse_combo("escape"), (0, "escape"))
+
+    def test_invalid(self):
+        """Empty combos and unknown modifiers should be rejected."""
+        for combo in ("", "+", "hyper+space"):
+            with self.assertRaises(ValueError):
+                parse_combo(combo)
+
+
+class TestBindingTable(unittest.TestCase):
+    """Tests for compiling bindings."""
+
+    def test_unknown_key(self):
+        """A key the backend can't resolve should be rejected."""
+        with self.assertRaises(ValueError):
+            BindingTable.build({Action.RECORD: "ctrl+f13"}, resolve)
+
+    def test_conflicting_bindings(self):
+        """Two actions on one combo should be rejected."""
+        with self.assertRaises(ValueError):
+            BindingTable.build(
+                {Action.RECORD: "ctrl+space", Action.TOGGLE: "control+space"},
+                resolve,
+            )
+
+    def test_modifier_keycodes(self):
+        """Both sides of a modifier should map to its bit."""
+        table = BindingTable.build({Action.RECORD: "ctrl+space"}, resolve)
+        self.assertEqual(table.modifier_bits[LCTRL], MODIFIER_BITS["ctrl"])
+        self.assertEqual(table.modifier_bits[RCTRL], MODIFIER_BITS["ctrl"])
+
+
+class TestBindingEngine(unittest.TestCase):
+    """Tests for turning key events into actions."""
+
+    def setUp(self):
+        """Build an engine with several bindings."""
+        table = BindingTable.build({
+            Action.RECORD: "ctrl+space",
+            Action.TOGGLE: "ctrl+shift+space",
+            Action.CANCEL: "escape",
+        }, resolve)
+        self.events = []
+        self.engine = BindingEngine(table, lambda a, p: self.events.append((a, p)))
+
+    def feed(self, *events):
+        """Feed (keycode, value) pairs."""
+        for keycode, value in events:
+            self.engine.feed(keycode, value)
+
+    def test_press_and_release(self):
+        """Holding the combo should press once and release once."""
+        self.feed((LCTRL, 1), (SPACE, 1), (SPACE, 2), (SPACE, 2), (SPACE, 0), (LCTRL, 0))
+        self.assertEqual(self.events, [(Action.RECORD, True), (Action.RECORD, False)])
+
+    def test_exact_modifier_match(self):
+        """Extra modifiers should select the more specific binding."""
+        self.feed((LCTRL, 1), (SHIFT, 1), (SPACE, 1), (SPACE, 0))
+        self.assertEqual(self.events, [(Action.TOGGLE, True), (Action.TOGGLE, False)])
+
+    def test_modifier_release_ends_binding(self):
+        """Letting go of a required modifier first should release."""
+        self.feed((RCTRL, 1), (SPACE, 1), (RCTRL, 0))
+        self.assertEqual(self.events, [(Action.RECORD, True), (Action.RECORD, False)])
+        self.feed((SPACE, 0))
+        self.assertEqual(len(self.events), 2)
+
+    def test_other_side_modifier_still_held(self):
+        """Releasing one Ctrl while the other is held keeps the mask."""
+        self.feed((LCTRL, 1), (RCTRL, 1), (LCTRL, 0), (SPACE, 1))
+        self.assertEqual(self.events, [(Action.RECORD, True)])
+
+    def test_key_without_modifier(self):
+        """The trigger alone should not match a modified binding."""
+        self.feed((SPACE, 1), (SPACE, 0), (R, 1))
+        self.assertEqual(self.events, [])
+
+    def test_record_modifiers_prime(self):
+        """The record binding's modifiers going down should call on_modifiers once."""
+        primed = []
+        self.engine._on_modifiers = lambda: primed.append(True)
+        self.feed((LCTRL, 1), (LCTRL, 2), (RCTRL, 1))
+        self.assertEqual(len(primed), 1)
+        self.feed((SHIFT, 1), (SHIFT, 0))  # Back to just Ctrl
+        self.feed((RCTRL, 0), (LCTRL, 0), (SHIFT, 1))
+        self.assertEqual(len(primed), 1)
+        self.feed((SHIFT, 0), (LCTRL, 1))
+        self.assertEqual(len(primed), 2)
+
+    def test_reset_releases_active(self):
+        """reset() should release held bindings and clear modifiers."""
+        self.feed((LCTRL, 1), (SPACE, 1))
+        self.engine.reset()
+        self.assertEqual(self.events[-1], (Action.RECORD, False))
+        self.assertFalse(self.engine.active)
+        self.feed((SPACE, 1))
+        self.assertEqual(len(self.events), 2)
+
+    def test_forget_device_keeps_other_keyboards(self):
+        """A removed keyboard should only take its own held keys with it."""
+        self.engine.feed(LCTRL, 1, "laptop")
+        self.engine.feed(SHIFT, 1, "usb")
+        self.engine.forget_device("usb")
+        self.engine.feed(SPACE, 1, "laptop")
+        self.assertEqual(self.events, [(Action.RECORD, True)])
+
+    def test_forget_device_releases_its_bindings(self):
+        """Bindings needing a modifier held on the removed keyboard should release."""
+        self.engine.feed(LCTRL, 1, "usb")
+        self.engine.feed(SPACE, 1, "laptop")
+        self.engine.forget_device("usb")
+        self.assertEqual(self.events, [(Action.RECORD, True), (Action.RECORD, False)])
+        self.assertFalse(self.engine.active)
+
+
+class TestBuildBindings(unittest.TestCase):
+    """Tests for reading bindings from the config."""
+
+    def test_record_and_extra_bindings(self):
+        """hotkey should bind record and the hotkeys table the rest."""
+        config = Config(hotkey="super+r", hotkeys={"cancel": "escape", "bogus": "f1"})
+        self.assertEqual(build_bindings(config), {
+            Action.RECORD: "super+r",
+            Action.CANCEL: "escape",
+        })
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,82 @@
+"""Startup import budget for the arch-whisper entry point."""
+
+import subprocess
+import sys
+import unittest
+
+# Cumulative import time allowed for the entry point, in milliseconds
+IMPORT_BUDGET_MS = 250
+
+# Modules that must not load until they are needed
+HEAVY_MODULES = (
+    "numpy",
+    "sounddevice",
+    "faster_whisper",
+    "ctranslate2",
+    "anthropic",
+    "claude_agent_sdk",
+    "Xlib",
+    "evdev",
+    "gi",
+)
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f"{module} not in -X importtime output")
+
+
+def loaded_heavy_modules(module: str) -> list[str]:
+    """Heavy modules present after importing a module in a fresh interpreter."""
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+class TestImportTime(unittest.TestCase):
+    """Tests that startup stays cheap."""
+
+    def test_entry_point_within_budget(self):
+        """`python -X importtime` for the entry point should stay under budget."""
+        best = min(import_time_ms("arch_whisper.__main__") for _ in range(3))
+        self.assertLess(
+            best,
+            IMPORT_BUDGET_MS,
+            f"arch_whisper.__main__ took {best:.0f} ms to import",
+        )
+
+    def test_entry_point_skips_heavy_modules(self):
+        """The entry point should not import audio, ML or API libraries."""
+        self.assertEqual(loaded_heavy_modules("arch_whisper.__main__"), [])
+
+    def test_transcriber_defers_faster_whisper(self):
+        """faster-whisper should load with the model, not with the module."""
+        self.assertNotIn(
+            "faster_whisper", loaded_heavy_modules("arch_whisper.transcription.whisper")
+        )
+
+    def test_app_skips_heavy_modules(self):
+        """Importing the app should leave heavy modules to the prewarm thread.
+
+        GTK is loaded by App() itself, and only when not headless.
+        """
+        self.assertEqual(loaded_heavy_modules("arch_whisper.app"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Tests for the headless main loop and running the app without GTK."""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from arch_whisper.app import App, AppState
+from arch_whisper.config import Config
+from arch_whisper.hotkey.bindings import Action
+from arch_whisper.mainloop import MainLoop
+
+
+class TestMainLoop(unittest.TestCase):
+    """Tests for the queue-based main loop."""
+
+    def test_runs_callbacks_in_order_until_quit(self):
+        """Callbacks queued before quit() should all run, in order."""
+        loop = MainLoop()
+        calls = []
+        loop.call_soon(calls.append, 1)
+        loop.call_soon(calls.append, 2)
+        loop.quit()
+        loop.call_soon(calls.append, 3)
+
+        loop.run()
+        self.assertEqual(calls, [1, 2])
+
+    def test_failing_callback_does_not_stop_loop(self):
+        """An exception in one callback should be logged, not raised."""
+        loop = MainLoop()
+        calls = []
+        loop.call_soon(lambda: 1 / 0)
+        loop.call_soon(calls.append, "after")
+        loop.quit()
+
+        with self.assertLogs("arch_whisper.mainloop", level="ERROR"):
+            loop.run()
+        self.assertEqual(calls, ["after"])
+
+    def test_call_soon_from_another_thread(self):
+        """Callbacks from other threads should run on the loop thread."""
+        loop = MainLoop()
+        ran_on = []
+
+        def callback():
+            ran_on.append(threading.current_thread())
+            loop.quit()
+
+        threading.Thread(target=loop.call_soon, args=(callback,)).start()
+        loop.run()
+        self.assertEqual(ran_on, [threading.main_thread()])
+
+
+class FakeRecorder:
+    """Recorder returning a fixed clip."""
+
+    first_block_at = None
+    on_limit = None
+    feed = None
+
+    def start(self, on_block=None, on_limit=None, rolling=False, feed=None):
+        self.on_limit = on_limit
+        self.feed = feed
+
+    def stop(self):
+        return np.ones(1600, dtype=np.float32)
+
+    def take(self, feed=None):
+        self.feed = feed
+        return np.ones(1600, dtype=np.float32)
+
+
+class FakeTranscriber:
+    def transcribe(self, audio, cancel):
+        return "hello headless"
+
+
+class FakePasteManager:
+    def __init__(self):
+        self.pasted = []
+        self.last_app = None
+
+    def paste(self, text, cancel):
+        self.pasted.append(text)
+        return True
+
+
+class TestHeadlessApp(unittest.TestCase):
+    """Tests for the app with no tray or notifications."""
+
+    def make_app(self):
+        """Build a headless app around fake components."""
+        config = Config(
+            claude_enabled=False,
+            ding_enabled=False,
+            trace_enabled=False,
+            status_enabled=False,
+        )
+        app = App(config, headless=True)
+        app._recorder = FakeRecorder()
+        app._transcriber = FakeTranscriber()
+        app._paste_manager = FakePasteManager()
+        app._build_pipeline()
+        self.addCleanup(app._pipeline.close)
+        app._ready.set()
+        return app
+
+    def test_push_to_talk_pastes_without_gtk(self):
+        """A recording should go through the pipeline with no GTK loop."""
+        app = self.make_app()
+        self.assertIsInstance(app._loop, MainLoop)
+        paste = app._paste_manager
+
+        app._on_hotkey_event(Action.RECORD, True)
+        self.assertEqual(app.state, AppState.RECORDING)
+        app._on_hotkey_event(Action.RECORD, False)
+        app._pipeline.join()
+
+        self.assertEqual(paste.pasted, ["hello headless"])
+        self.assertEqual(app.state, AppState.IDLE)
+
+    def test_hotkey_during_startup_does_not_wait(self):
+        """A press before the components load should be dropped at once."""
+        app = self.make_app()
+        app._ready.clear()
+
+        with patch("arch_whisper.app.notify") as notify:
+            start = time.monotonic()
+            app._on_hotkey_event(Action.RECORD, True)
+            app._on_hotkey_event(Action.RECORD, False)
+        self.assertLess(time.monotonic() - start, 0.5)
+        notify.assert_called_once()
+        self.assertEqual(notify.call_args.args[0], "Still starting up")
+        self.assertEqual(app.state, AppState.IDLE)
+
+    def test_recording_stops_at_the_limit(self):
+        """Reaching max_record_seconds should stop and process the recording."""
+        app = self.make_app()
+        app._on_hotkey_event(Action.RECORD, True)
+
+        with patch("arch_whisper.app.notify") as notify:
+            app._recorder.on_limit()
+            app._loop.call_soon(app._loop.quit)
+            app._loop.run()
+        notify.assert_called_once()
+        self.assertEqual(notify.call_args.args[0], "Recording stopped")
+        app._pipeline.join()
+        self.assertEqual(app._paste_manager.pasted, ["hello headless"])
+
+        app._on_hotkey_event(Action.RECORD, False)  # The key comes up later
+        self.assertEqual(app.state, AppState.IDLE)
+
+    def test_cut_hands_the_next_upload_to_the_recorder(self):
+        """A continuous-mode cut should switch uploads at the recorder's cut."""
+        app = self.make_app()
+        first, second = MagicMock(), MagicMock()
+        app._remote = MagicMock()
+        app._remote.upload.side_effect = [first, second]
+        app._hands_free_mode = "continuous"
+
+        app._on_hotkey_press()
+        self.assertEqual(app._recorder.feed, first.feed)
+        app._cut_segment()
+        self.assertEqual(app._recorder.feed, second.feed)
+        first.end.assert_called_once()
+        second.end.assert_not_called()
+        app._pipeline.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
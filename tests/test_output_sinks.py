@@ -0,0 +1,140 @@
+"""Tests for direct output sinks.
+
+Editors and scripts read transcripts from a FIFO or a Unix socket instead
+of receiving clipboard pastes, so delivery must be reliable and must never
+block when nobody is listening.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arch_whisper.config import Config
+from arch_whisper.paste.sinks import FifoSink, SinkRouter, SocketSink, StdoutSink
+
+
+class TestFifoSink(unittest.TestCase):
+    """Tests for the named pipe sink."""
+
+    def setUp(self):
+        """Create the FIFO in a temporary directory."""
+        self.path = Path(tempfile.mkdtemp()) / "output.fifo"
+        self.sink = FifoSink(self.path)
+        self.addCleanup(self.sink.close)
+
+    def test_no_reader_does_not_block(self):
+        """Writing without a reader should fail immediately."""
+        self.assertFalse(self.sink.write("hello", None))
+
+    def test_reader_receives_line(self):
+        """A reader should receive the text as one line."""
+        fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            self.assertTrue(self.sink.write("hello world", None))
+            self.assertEqual(os.read(fd, 1024), b"hello world\n")
+        finally:
+            os.close(fd)
+
+    def test_close_removes_fifo(self):
+        """Closing should remove the FIFO."""
+        self.sink.close()
+        self.assertFalse(self.path.exists())
+
+    def test_foreign_fifo_is_refused(self):
+        """An existing FIFO owned by another user should not be written to."""
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(OSError):
+                FifoSink(self.path)
+
+    def test_symlink_is_refused(self):
+        """A symlink in place of the FIFO should not be followed."""
+        link = self.path.with_name("link.fifo")
+        link.symlink_to(self.path)
+        with self.assertRaises(OSError):
+            FifoSink(link)
+
+
+class TestSocketSink(unittest.TestCase):
+    """Tests for the Unix socket broadcast sink."""
+
+    def setUp(self):
+        """Start the socket in a temporary directory."""
+        self.path = Path(tempfile.mkdtemp()) / "output.sock"
+        self.sink = SocketSink(self.path)
+        self.addCleanup(self.sink.close)
+
+    def connect(self):
+        """Connect a subscriber and wait until it is registered."""
+        count = len(self.sink._clients)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(str(self.path))
+        client.settimeout(2)
+        self.addCleanup(client.close)
+        deadline = time.monotonic() + 2
+        while len(self.sink._clients) == count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return client
+
+    def test_no_subscribers_returns_false(self):
+        """Without subscribers the text is not delivered."""
+        self.assertFalse(self.sink.write("hello", None))
+
+    def test_broadcast_to_all_subscribers(self):
+        """Every subscriber should receive one JSON line."""
+        clients = [self.connect(), self.connect()]
+        self.assertTrue(self.sink.write("hello", "nvim"))
+
+        for client in clients:
+            line = client.makefile().readline()
+            message = json.loads(line)
+            self.assertEqual(message["text"], "hello")
+            self.assertEqual(message["app"], "nvim")
+
+    def test_disconnected_subscriber_dropped(self):
+        """A subscriber that went away should be dropped."""
+        client = self.connect()
+        client.close()
+        self.sink.write("one", None)
+        self.sink.write("two", None)
+        self.assertEqual(self.sink._clients, [])
+
+
+class TestSinkRouter(unittest.TestCase):
+    """Tests for per-app sink selection."""
+
+    def test_no_config_no_sinks(self):
+        """Without output_sinks nothing is routed."""
+        router = SinkRouter(Config())
+        self.assertIsNone(router.route("firefox"))
+
+    def test_route_by_app(self):
+        """Only configured apps should be routed."""
+        config = Config()
+        config.output_sinks = {"Emacs": "stdout"}
+        router = SinkRouter(config)
+        self.assertIsInstance(router.route("emacs"), StdoutSink)
+        self.assertIsNone(router.route("firefox"))
+        self.assertIsNone(router.route(None))
+
+    def test_wildcard_route(self):
+        """The "*" entry should apply to every other app."""
+        config = Config()
+        config.output_sinks = {"*": "stdout"}
+        router = SinkRouter(config)
+        self.assertIsInstance(router.route("firefox"), StdoutSink)
+        self.assertIsInstance(router.route(None), StdoutSink)
+
+    def test_unknown_sink_ignored(self):
+        """Unknown sink names should be ignored."""
+        config = Config()
+        config.output_sinks = {"*": "carrier-pigeon"}
+        self.assertIsNone(SinkRouter(config).route("firefox"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
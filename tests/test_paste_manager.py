@@ -0,0 +1,456 @@
+"""Tests for paste strategy selection.
+
+Short outputs are typed directly so the clipboard is left alone; everything
+else goes through the clipboard and a simulated paste shortcut.
+"""
+
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.config import Config
+from arch_whisper.paste.manager import PasteManager
+from arch_whisper.paste.snapshot import ClipboardKeeper, take_snapshot
+from arch_whisper.paste.strategy import StrategyCache
+
+
+def make_manager(backend, max_chars=40, strategy_path=None):
+    """Build a PasteManager around a mock backend."""
+    config = Config()
+    config.paste_typing_max_chars = max_chars
+    if strategy_path is None:
+        strategy_path = Path(tempfile.mkdtemp()) / "strategies.json"
+    with patch('arch_whisper.paste.strategy.STRATEGY_PATH', strategy_path):
+        with patch('arch_whisper.paste.manager.get_session_type', return_value="x11"):
+            with patch.object(PasteManager, '_try_x11_backend', return_value=backend):
+                return PasteManager(config)
+
+
+def remember(path, app, method, seconds):
+    """Save a strategy outcome to a cache file."""
+    cache = StrategyCache(path)
+    cache.record(app, method, True, seconds)
+    cache.flush()
+
+
+def make_backend(app=None):
+    """Build a mock backend where every operation succeeds."""
+    backend = MagicMock()
+    backend.can_type = True
+    backend.active_app.return_value = app
+    backend.default_method.return_value = "ctrl_v"
+    backend.type_text.return_value = True
+    backend.paste.return_value = True
+    return backend
+
+
+class PasteManagerTestCase(unittest.TestCase):
+    """Base class that keeps tests away from the real clipboard."""
+
+    def setUp(self):
+        """Stub out clipboard snapshots."""
+        self.snapshot = MagicMock()
+        patcher = patch(
+            'arch_whisper.paste.manager.ClipboardKeeper.save', return_value=self.snapshot
+        )
+        self.take_snapshot = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('arch_whisper.paste.manager.ClipboardKeeper.restore_later')
+        self.restore_later = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestDirectTyping(PasteManagerTestCase):
+    """Tests for choosing between typing and pasting."""
+
+    def test_short_text_is_typed(self):
+        """Short text should be typed without touching the clipboard."""
+        backend = make_backend()
+        manager = make_manager(backend)
+
+        self.assertTrue(manager.paste("hello there"))
+        backend.type_text.assert_called_once_with("hello there")
+        backend.paste.assert_not_called()
+
+    def test_long_text_is_pasted(self):
+        """Text over the length limit should be pasted."""
+        backend = make_backend()
+        manager = make_manager(backend, max_chars=5)
+
+        self.assertTrue(manager.paste("hello there"))
+        backend.type_text.assert_not_called()
+        backend.paste.assert_called_once_with("hello there", "ctrl_v")
+
+    def test_multiline_text_is_pasted(self):
+        """Newlines must never be typed, they would submit forms."""
+        backend = make_backend()
+        manager = make_manager(backend)
+
+        manager.paste("line one\nline two")
+        backend.type_text.assert_not_called()
+
+    def test_zero_limit_disables_typing(self):
+        """A limit of 0 should always paste."""
+        backend = make_backend()
+        manager = make_manager(backend, max_chars=0)
+
+        manager.paste("hi")
+        backend.type_text.assert_not_called()
+
+    def test_typing_failure_falls_back_to_paste(self):
+        """Failed typing should fall back to a clipboard paste."""
+        backend = make_backend()
+        backend.type_text.return_value = False
+        manager = make_manager(backend)
+
+        self.assertTrue(manager.paste("hello"))
+        backend.paste.assert_called_once_with("hello", "ctrl_v")
+
+    def test_slow_typing_prefers_paste(self):
+        """Measured slow typing should lose to a faster paste."""
+        backend = make_backend()
+        manager = make_manager(backend)
+        manager._latency = {"type": 0.01, "paste": 0.05}
+
+        manager.paste("a" * 10)  # 0.10s typed vs 0.05s pasted
+        backend.type_text.assert_not_called()
+        backend.paste.assert_called_once()
+
+    def test_long_text_in_new_app_is_pasted(self):
+        """Above the limit a paste is preferred before anything is measured."""
+        backend = make_backend(app="gimp")
+        manager = make_manager(backend, max_chars=10)
+
+        manager.paste("a much longer transcript")
+        backend.type_text.assert_not_called()
+        backend.paste.assert_called_once()
+
+    def test_backend_without_typing_pastes(self):
+        """Backends that cannot type should always paste."""
+        backend = make_backend()
+        backend.can_type = False
+        manager = make_manager(backend)
+
+        manager.paste("hi")
+        backend.type_text.assert_not_called()
+        backend.paste.assert_called_once_with("hi", "ctrl_v")
+
+
+class TestStrategyCache(unittest.TestCase):
+    """Tests for the per-application strategy cache."""
+
+    def setUp(self):
+        """Point the cache at a temporary file."""
+        self.path = Path(tempfile.mkdtemp()) / "strategies.json"
+
+    def test_unknown_app_has_no_strategy(self):
+        """Apps never seen before should have no cached method."""
+        cache = StrategyCache(self.path)
+        self.assertIsNone(cache.best("firefox", 10))
+
+    def test_fastest_working_method_wins(self):
+        """The lowest-latency method that worked should be picked."""
+        cache = StrategyCache(self.path)
+        cache.record("kitty", "ctrl_v", True, 0.05)
+        cache.record("kitty", "ctrl_shift_v", True, 0.02)
+        self.assertEqual(cache.best("kitty", 10), "ctrl_shift_v")
+
+    def test_failed_method_is_skipped(self):
+        """A method that failed since it last worked should not be picked."""
+        cache = StrategyCache(self.path)
+        cache.record("kitty", "ctrl_shift_v", True, 0.02)
+        cache.record("kitty", "ctrl_shift_v", False, 0.02)
+        cache.record("kitty", "ctrl_v", True, 0.05)
+        self.assertEqual(cache.best("kitty", 10), "ctrl_v")
+
+    def test_typing_cost_scales_with_length(self):
+        """Typing should win for short text and lose for long text."""
+        cache = StrategyCache(self.path)
+        cache.record("code", "type", True, 0.001)
+        cache.record("code", "ctrl_v", True, 0.02)
+        self.assertEqual(cache.best("code", 5), "type")
+        self.assertEqual(cache.best("code", 50), "ctrl_v")
+        self.assertEqual(cache.best("code", 5, can_type=False), "ctrl_v")
+
+    def test_typing_tried_where_only_pasted(self):
+        """An app only pasted into so far should still get short text typed."""
+        cache = StrategyCache(self.path)
+        cache.record("slack", "ctrl_v", True, 0.02)
+        self.assertEqual(cache.best("slack", 5, typing_max_chars=40), "type")
+        self.assertEqual(cache.best("slack", 50, typing_max_chars=40), "ctrl_v")
+        self.assertEqual(cache.best("slack", 5, can_type=False, typing_max_chars=40), "ctrl_v")
+
+    def test_strategies_persist(self):
+        """Recorded strategies should survive a reload."""
+        remember(self.path, "discord", "ctrl_v", 0.03)
+        self.assertEqual(StrategyCache(self.path).best("discord", 10), "ctrl_v")
+
+    def test_saves_are_batched(self):
+        """Recording an outcome should not write the file on the paste path."""
+        cache = StrategyCache(self.path)
+        cache.record("discord", "ctrl_v", True, 0.03)
+        cache.record("discord", "type", True, 0.001)
+        self.assertFalse(self.path.exists())
+        cache.flush()
+        self.assertEqual(StrategyCache(self.path).best("discord", 5), "type")
+
+    def test_clipboard_is_not_a_strategy(self):
+        """Old cache files listing the clipboard fallback should not pick it."""
+        self.path.write_text('{"kitty": {"clipboard": {"latency": 0.0, "failures": 0}}}')
+        cache = StrategyCache(self.path)
+        self.assertIsNone(cache.best("kitty", 10))
+        cache.record("kitty", "clipboard", True, 0.0)
+        self.assertIsNone(cache.best("kitty", 10))
+
+    def test_corrupt_file_ignored(self):
+        """A corrupt cache file should be treated as empty."""
+        self.path.write_text("{not json")
+        self.assertIsNone(StrategyCache(self.path).best("discord", 10))
+
+
+class TestStrategySelection(PasteManagerTestCase):
+    """Tests for PasteManager using the strategy cache."""
+
+    def test_cached_method_used_without_probing(self):
+        """A cached method should be used before the backend default."""
+        path = Path(tempfile.mkdtemp()) / "strategies.json"
+        remember(path, "kitty", "ctrl_shift_v", 0.02)
+        backend = make_backend(app="kitty")
+        manager = make_manager(backend, max_chars=0, strategy_path=path)
+
+        manager.paste("some text")
+        backend.paste.assert_called_once_with("some text", "ctrl_shift_v")
+
+    def test_outcome_recorded_per_app(self):
+        """Successful deliveries should be recorded for the focused app."""
+        path = Path(tempfile.mkdtemp()) / "strategies.json"
+        backend = make_backend(app="firefox")
+        manager = make_manager(backend, max_chars=0, strategy_path=path)
+
+        manager.paste("some text")
+        manager.close()
+        self.assertEqual(StrategyCache(path).best("firefox", 9), "ctrl_v")
+
+    def test_failed_cached_method_falls_through(self):
+        """A failing cached method should fall through to the default."""
+        path = Path(tempfile.mkdtemp()) / "strategies.json"
+        remember(path, "kitty", "ctrl_shift_v", 0.02)
+        backend = make_backend(app="kitty")
+        backend.paste.side_effect = [False, True]
+        manager = make_manager(backend, max_chars=0, strategy_path=path)
+
+        self.assertTrue(manager.paste("some text"))
+        self.assertEqual(backend.paste.call_args_list[-1].args, ("some text", "ctrl_v"))
+
+    def test_clipboard_fallback_is_retried(self):
+        """After a clipboard-only delivery the real methods should be tried again."""
+        backend = make_backend(app="kitty")
+        backend.paste.return_value = False
+        manager = make_manager(backend, max_chars=0)
+
+        with patch('arch_whisper.paste.manager.copy_to_clipboard', return_value=True):
+            self.assertFalse(manager.paste("some text"))
+            backend.paste.return_value = True
+            self.assertTrue(manager.paste("some text"))
+        self.assertEqual(backend.paste.call_count, 2)
+
+
+class TestClipboardRestore(PasteManagerTestCase):
+    """Tests for saving and restoring the user's clipboard."""
+
+    def test_clipboard_restored_after_paste(self):
+        """A clipboard paste should restore the previous contents."""
+        backend = make_backend()
+        manager = make_manager(backend, max_chars=0)
+
+        manager.paste("some text")
+        self.take_snapshot.assert_called_once()
+        self.restore_later.assert_called_once_with(self.snapshot, "some text")
+
+    def test_typing_leaves_clipboard_alone(self):
+        """Typed text should neither save nor restore the clipboard."""
+        backend = make_backend()
+        manager = make_manager(backend)
+
+        manager.paste("hi")
+        self.take_snapshot.assert_not_called()
+        self.restore_later.assert_not_called()
+
+    def test_no_restore_when_only_copied(self):
+        """When paste fails the text must stay on the clipboard."""
+        backend = make_backend()
+        backend.paste.return_value = False
+        manager = make_manager(backend, max_chars=0)
+
+        with patch('arch_whisper.paste.manager.copy_to_clipboard', return_value=True):
+            manager.paste("some text")
+        self.restore_later.assert_not_called()
+        self.snapshot.close.assert_called_once()
+
+    def test_restore_disabled_by_config(self):
+        """clipboard_restore = false should skip the snapshot."""
+        backend = make_backend()
+        manager = make_manager(backend, max_chars=0)
+        manager._config.clipboard_restore = False
+
+        manager.paste("some text")
+        self.take_snapshot.assert_not_called()
+        self.restore_later.assert_not_called()
+
+
+class TestConcurrentPastes(PasteManagerTestCase):
+    """Tests for a re-paste arriving while the pipeline is pasting."""
+
+    def test_pastes_do_not_overlap(self):
+        """Two threads pasting at once should deliver one after the other."""
+        backend = make_backend()
+        active = []
+        overlapped = []
+
+        def paste(text, method):
+            active.append(text)
+            overlapped.append(len(active) > 1)
+            time.sleep(0.05)
+            active.pop()
+            return True
+
+        backend.paste.side_effect = paste
+        manager = make_manager(backend, max_chars=0)
+        threads = [threading.Thread(target=manager.paste, args=(t,)) for t in ("one", "two")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(2)
+
+        self.assertEqual(overlapped, [False, False])
+
+    def test_cancelled_while_waiting(self):
+        """A paste cancelled while another runs should not be delivered."""
+        backend = make_backend()
+        manager = make_manager(backend, max_chars=0)
+        token = CancelToken()
+        with manager._lock:
+            waiter = threading.Thread(target=self.expect_cancelled, args=(manager, token))
+            waiter.start()
+            token.cancel()
+        waiter.join(2)
+        backend.paste.assert_not_called()
+        self.assertEqual(self.cancelled, [True])
+
+    def expect_cancelled(self, manager, token):
+        """Paste and record whether it raised Cancelled."""
+        self.cancelled = []
+        try:
+            manager.paste("some text", token)
+        except Cancelled:
+            self.cancelled.append(True)
+
+
+class TestClipboardKeeper(unittest.TestCase):
+    """Tests for serializing snapshots and restores across pastes."""
+
+    def setUp(self):
+        """Stub out the clipboard tools."""
+        patcher = patch('arch_whisper.paste.snapshot.take_snapshot')
+        self.take_snapshot = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('arch_whisper.paste.snapshot._restore', new_callable=AsyncMock)
+        self.restore = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_back_to_back_pastes_keep_the_users_clipboard(self):
+        """A paste before the last restore must not save the pasted text."""
+        keeper = ClipboardKeeper(delay=0.05)
+        users = keeper.save()
+        first = keeper.restore_later(users, "first")
+
+        self.assertIs(keeper.save(), users)  # Taken over, nothing read
+        self.take_snapshot.assert_called_once()
+        second = keeper.restore_later(users, "second")
+
+        first.result(2)
+        second.result(2)
+        self.restore.assert_awaited_once_with(users, "second")
+
+    def test_restore_after_a_single_paste(self):
+        keeper = ClipboardKeeper(delay=0.0)
+        snapshot = keeper.save()
+        keeper.restore_later(snapshot, "text").result(2)
+        self.restore.assert_awaited_once_with(snapshot, "text")
+        keeper.save()
+        self.assertEqual(self.take_snapshot.call_count, 2)
+
+
+class TestTakeSnapshot(unittest.TestCase):
+    """Tests for reading the clipboard before a paste."""
+
+    def setUp(self):
+        """Pretend to run on Wayland."""
+        patcher = patch('arch_whisper.paste.snapshot.get_session_type', return_value="wayland")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def clipboard(self, contents, types=""):
+        """Stand in shell commands for the clipboard tool.
+
+        Args:
+            contents: Shell command printing the contents, by type
+            types: Offered types, one per line
+        """
+        cases = " ".join(f'{name}) {command} ;;' for name, command in contents.items())
+        commands = {
+            "read": ["sh", "-c", f'case "$1" in {cases} *) exit 1 ;; esac', "sh"],
+            "types": ["printf", types],
+        }
+        patcher = patch('arch_whisper.paste.snapshot._commands', return_value=commands)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_text_is_read_in_one_call(self):
+        """Text should be saved without listing the offered types first."""
+        self.clipboard({"text": "printf hello"})
+        with patch('subprocess.Popen', wraps=subprocess.Popen) as popen:
+            snapshot = take_snapshot()
+        self.addCleanup(snapshot.close)
+        # The read and the head copying it, no type listing
+        self.assertEqual(popen.call_count, 2)
+        self.assertEqual(popen.call_args_list[0].args[0][-1], "text")
+        self.assertEqual(snapshot.mime_type, "text/plain;charset=utf-8")
+        self.assertEqual(snapshot.data.read(), b"hello")
+
+    def test_other_types_are_listed(self):
+        """A clipboard without text should fall back to the offered types."""
+        self.clipboard({"image/png": "printf PNG"}, types="image/png\nimage/jpeg\n")
+        snapshot = take_snapshot()
+        self.addCleanup(snapshot.close)
+        self.assertEqual(snapshot.mime_type, "image/png")
+        self.assertEqual(snapshot.data.read(), b"PNG")
+
+    def test_oversized_contents_are_skipped(self):
+        """Contents over the limit should not be saved."""
+        self.clipboard({"text": "yes"})
+        with patch('arch_whisper.paste.snapshot.MAX_SNAPSHOT_BYTES', 1024):
+            self.assertIsNone(take_snapshot())
+
+    def test_timeout_closes_the_temp_file(self):
+        """A tool that hangs should not leak the temp file."""
+        self.clipboard({"text": "exec sleep 5"})
+        files = []
+        make_file = tempfile.TemporaryFile
+
+        def temporary_file(**kwargs):
+            files.append(make_file(**kwargs))
+            return files[-1]
+
+        with patch('arch_whisper.paste.snapshot.READ_TIMEOUT', 0.1), \
+                patch('tempfile.TemporaryFile', side_effect=temporary_file):
+            self.assertIsNone(take_snapshot())
+        self.assertTrue(files[0].closed)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
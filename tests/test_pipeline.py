@@ -0,0 +1,175 @@
+"""Tests for the staged worker pipeline."""
+
+import queue
+import threading
+import time
+import unittest
+
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.pipeline import Pipeline, Stage
+
+
+def make_pipeline(stages, **kwargs):
+    """Build and start a pipeline that is closed after the test."""
+    completed = []
+    pipeline = Pipeline(stages, on_complete=completed.append, **kwargs)
+    pipeline.start()
+    return pipeline, completed
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests for running jobs through stages."""
+
+    def test_stages_chain(self):
+        """Each stage should get the previous stage's result."""
+        pipeline, completed = make_pipeline([
+            Stage("double", lambda v, c: v * 2),
+            Stage("inc", lambda v, c: v + 1),
+        ])
+        self.addCleanup(pipeline.close)
+
+        job = pipeline.submit(5)
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.value, 11)
+        self.assertEqual(set(job.timings), {"double", "inc"})
+
+    def test_none_skips_remaining_stages(self):
+        """Returning None should end the job without running later stages."""
+        later = []
+        pipeline, completed = make_pipeline([
+            Stage("filter", lambda v, c: None),
+            Stage("later", lambda v, c: later.append(v)),
+        ])
+        self.addCleanup(pipeline.close)
+
+        job = pipeline.submit("x")
+        self.assertTrue(job.wait(2))
+        self.assertTrue(job.skipped)
+        self.assertEqual(later, [])
+
+    def test_error_recorded_per_stage(self):
+        """A failing stage should be named on the job and stop the rest."""
+        def fail(v, c):
+            raise RuntimeError("boom")
+
+        pipeline, completed = make_pipeline([
+            Stage("ok", lambda v, c: v),
+            Stage("bad", fail),
+            Stage("never", lambda v, c: self.fail("ran after error")),
+        ])
+        self.addCleanup(pipeline.close)
+
+        job = pipeline.submit(1)
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.failed_stage, "bad")
+        self.assertIsInstance(job.error, RuntimeError)
+        self.assertEqual(completed, [job])
+
+    def test_cancelled_job_completes_without_error(self):
+        """A cancelled job should flow through without running stages."""
+        token = CancelToken()
+
+        def cancel_then_raise(v, cancel):
+            token.cancel()
+            cancel.raise_if_cancelled()
+
+        pipeline, completed = make_pipeline([
+            Stage("work", cancel_then_raise),
+            Stage("after", lambda v, c: self.fail("ran after cancel")),
+        ])
+        self.addCleanup(pipeline.close)
+
+        job = pipeline.submit(1, token)
+        self.assertTrue(job.wait(2))
+        self.assertTrue(job.cancelled)
+        self.assertIsNone(job.error)
+
+    def test_ordered_completion_with_parallel_stage(self):
+        """Parallel workers should not reorder completion or ordered stages."""
+        seen = []
+
+        def slow_first(v, c):
+            time.sleep(0.1 if v == 0 else 0.0)
+            return v
+
+        pipeline, completed = make_pipeline([
+            Stage("parallel", slow_first, workers=3),
+            Stage("sink", lambda v, c: seen.append(v) or v, ordered=True),
+        ])
+        self.addCleanup(pipeline.close)
+
+        jobs = [pipeline.submit(i) for i in range(3)]
+        self.assertTrue(pipeline.join(2))
+        self.assertEqual(seen, [0, 1, 2])
+        self.assertEqual(completed, jobs)
+
+    def test_stages_overlap(self):
+        """A second job should start stage one while the first is in stage two."""
+        in_second = threading.Event()
+        release = threading.Event()
+        started = []
+
+        def second(v, c):
+            in_second.set()
+            release.wait(2)
+            return v
+
+        pipeline, completed = make_pipeline([
+            Stage("first", lambda v, c: started.append(v) or v),
+            Stage("second", second),
+        ])
+        self.addCleanup(pipeline.close)
+
+        pipeline.submit(1)
+        self.assertTrue(in_second.wait(2))
+        pipeline.submit(2)
+        deadline = time.monotonic() + 2
+        while len(started) < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(started, [1, 2])
+        release.set()
+        self.assertTrue(pipeline.join(2))
+
+    def test_backpressure(self):
+        """A full first queue should refuse non-blocking submits."""
+        release = threading.Event()
+        pipeline, completed = make_pipeline([
+            Stage("blocked", lambda v, c: release.wait(2) and v, queue_size=1),
+        ])
+        self.addCleanup(pipeline.close)
+        self.addCleanup(release.set)
+
+        pipeline.submit(1)  # Taken by the worker
+        deadline = time.monotonic() + 2
+        while pipeline._queues[0].qsize() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        pipeline.submit(2)  # Fills the queue
+        with self.assertRaises(queue.Full):
+            pipeline.submit(3, block=False)
+
+        release.set()
+        self.assertTrue(pipeline.join(2))
+        self.assertEqual([job.value for job in completed], [1, 2])
+
+    def test_close_stops_workers(self):
+        """close() should drain queued jobs and stop every worker."""
+        pipeline, completed = make_pipeline([Stage("s", lambda v, c: v, workers=2)])
+        pipeline.submit(1)
+        pipeline.close()
+        self.assertEqual(len(completed), 1)
+        self.assertEqual(pipeline._threads, [])
+
+    def test_cancelled_exception_type(self):
+        """Cancelled raised by a stage should not count as an error."""
+        def raise_cancelled(v, c):
+            raise Cancelled()
+
+        pipeline, completed = make_pipeline([Stage("s", raise_cancelled)])
+        self.addCleanup(pipeline.close)
+        job = pipeline.submit(1)
+        self.assertTrue(job.wait(2))
+        self.assertIsNone(job.error)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,148 @@
+"""Tests for scheduling utterances across model replicas."""
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.config import Config
+from arch_whisper.transcription.pool import BACKGROUND, INTERACTIVE, Scheduler
+from arch_whisper.transcription.whisper import WhisperTranscriber
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestScheduler(unittest.TestCase):
+    """Tests for priority, reservation and cancellation."""
+
+    def start(self, scheduler, name, priority, order, release):
+        """Hold a slot in a thread until release is set."""
+
+        def run():
+            with scheduler.slot(priority):
+                order.append(name)
+                release.wait(2)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        return thread
+
+    def test_interactive_jumps_the_queue(self):
+        """A dictated utterance should run before queued background work."""
+        scheduler = Scheduler(replicas=1)
+        order = []
+        release = threading.Event()
+        self.start(scheduler, "busy", BACKGROUND, order, release)
+        self.assertTrue(wait_for(lambda: order == ["busy"]))
+
+        self.start(scheduler, "batch", BACKGROUND, order, release)
+        self.assertTrue(wait_for(lambda: scheduler.waiting == 1))
+        self.start(scheduler, "hotkey", INTERACTIVE, order, release)
+        self.assertTrue(wait_for(lambda: scheduler.waiting == 2))
+
+        release.set()
+        self.assertTrue(wait_for(lambda: len(order) >= 2))
+        self.assertEqual(order[1], "hotkey")
+
+    def test_background_leaves_a_replica_reserved(self):
+        """Background work should not take the last replica."""
+        scheduler = Scheduler(replicas=2, reserved=1)
+        order = []
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.start(scheduler, "batch1", BACKGROUND, order, release)
+        self.start(scheduler, "batch2", BACKGROUND, order, release)
+        self.assertTrue(wait_for(lambda: scheduler.waiting == 1 and len(order) == 1))
+
+        self.start(scheduler, "hotkey", INTERACTIVE, order, release)
+        self.assertTrue(wait_for(lambda: "hotkey" in order))
+        self.assertNotIn("batch2", order)
+
+    def test_reservation_keeps_one_background_replica(self):
+        """With a single replica, background work still runs."""
+        scheduler = Scheduler(replicas=1, reserved=1)
+        with scheduler.slot(BACKGROUND):
+            pass
+
+    def test_fifo_within_a_priority(self):
+        """Equal-priority callers should be served in arrival order."""
+        scheduler = Scheduler(replicas=1)
+        order = []
+        release = threading.Event()
+        self.start(scheduler, "first", INTERACTIVE, order, release)
+        self.assertTrue(wait_for(lambda: order == ["first"]))
+        for i, name in enumerate(["second", "third", "fourth"], 1):
+            self.start(scheduler, name, INTERACTIVE, order, release)
+            self.assertTrue(wait_for(lambda i=i: scheduler.waiting == i))
+
+        release.set()
+        self.assertTrue(wait_for(lambda: len(order) == 4))
+        self.assertEqual(order, ["first", "second", "third", "fourth"])
+
+    def test_cancel_while_waiting(self):
+        """Cancelling a waiting caller should raise and free its place."""
+        scheduler = Scheduler(replicas=1)
+        token = CancelToken()
+        with scheduler.slot():
+            threading.Timer(0.05, token.cancel).start()
+            with self.assertRaises(Cancelled):
+                with scheduler.slot(BACKGROUND, token):
+                    pass
+            self.assertEqual(scheduler.waiting, 0)
+        with scheduler.slot(BACKGROUND):
+            pass
+
+
+class TestWhisperTranscriber(unittest.TestCase):
+    """Tests for decodes on the shared model and their errors."""
+
+    def test_batch_holds_a_replica(self):
+        """A batched decode should take a replica and count as use."""
+        transcriber = WhisperTranscriber(Config())
+        busy = []
+
+        def decode(audio, **kwargs):
+            busy.append(transcriber.scheduler.busy)
+            return iter([SimpleNamespace(start=0.0, end=1.0, text=" hello")]), None
+
+        transcriber._batched = MagicMock()
+        transcriber._batched.transcribe.side_effect = decode
+        transcriber._last_used = 0.0
+        speech = [{"start": 0, "end": 16000}]
+        with patch.object(transcriber, "_ensure_model"):
+            with patch("faster_whisper.vad.get_speech_timestamps", return_value=speech):
+                results = transcriber.transcribe_batch([np.zeros(16000, dtype=np.float32)])
+
+        self.assertEqual(results[0][0].text, "hello")
+        self.assertEqual(busy, [True])
+        self.assertFalse(transcriber.scheduler.busy)
+        self.assertLess(transcriber.idle_seconds, 5)
+
+    def test_load_error_is_raised(self):
+        """A model that fails to load should not look like silence."""
+        transcriber = WhisperTranscriber(Config())
+        with patch.object(transcriber, "_ensure_model", side_effect=OSError("no such model")):
+            with self.assertRaises(OSError):
+                transcriber.transcribe(np.zeros(1600, dtype=np.float32))
+
+    def test_decode_error_is_empty_text(self):
+        """A failed decode should still come back as no text."""
+        transcriber = WhisperTranscriber(Config())
+        model = MagicMock()
+        model.transcribe.side_effect = RuntimeError("decode failed")
+        with patch.object(transcriber, "_ensure_model", return_value=model):
+            self.assertEqual(transcriber.transcribe(np.zeros(1600, dtype=np.float32)), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for on-demand profiling."""
+
+import json
+import tempfile
+import threading
+import unittest
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from arch_whisper import tracing
+from arch_whisper.pipeline import Pipeline, Stage
+from arch_whisper.profiling import Profiler, format_thread_stacks
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests for profiling the next N utterances."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.profiler = Profiler(sample_rate=16000, root=self.root)
+        self.addCleanup(self.profiler.cancel)
+
+    def run_utterance(self, pipeline):
+        """Submit one utterance like the app does and wait for it."""
+        trace = tracing.Trace()
+        self.profiler.claim(trace, np.zeros(1600, dtype=np.float32))
+        job = pipeline.submit("text", trace=trace)
+        self.assertTrue(job.wait(2))
+        return trace, self.profiler.complete(trace)
+
+    def make_pipeline(self):
+        stage = self.profiler.wrap("upper", lambda value, cancel: value.upper())
+        pipeline = Pipeline([Stage("upper", stage)])
+        pipeline.start()
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def test_idle_profiler_claims_nothing(self):
+        """Without arm(), utterances should run unprofiled."""
+        pipeline = self.make_pipeline()
+        _, session = self.run_utterance(pipeline)
+
+        self.assertIsNone(session)
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_profiles_next_utterances(self):
+        """Armed for two, the profiler should write two utterances then stop."""
+        session = self.profiler.arm(2)
+        self.assertIsNotNone(session)
+        self.assertTrue((session / "stacks.txt").exists())
+
+        pipeline = self.make_pipeline()
+        first, done = self.run_utterance(pipeline)
+        self.assertIsNone(done)
+        second, done = self.run_utterance(pipeline)
+        self.assertEqual(done, session)
+        self.assertFalse(self.profiler.armed)
+
+        directory = session / f"01-{first.id}"
+        self.assertTrue((directory / "upper.prof").exists())
+        self.assertIn("cumulative", (directory / "upper.txt").read_text())
+        self.assertEqual(json.loads((directory / "trace.json").read_text())["id"], first.id)
+        with wave.open(str(directory / "audio.wav")) as f:
+            self.assertEqual(f.getnframes(), 1600)
+        self.assertTrue((session / f"02-{second.id}").is_dir())
+        self.assertTrue((session / "samples.folded").exists())
+
+        # A third utterance is not profiled
+        third, _ = self.run_utterance(pipeline)
+        self.assertFalse(any(third.id in p.name for p in session.iterdir()))
+
+    def test_overlapping_stages(self):
+        """Stages running at once on two workers should both complete."""
+        self.profiler.arm(2)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(value, cancel):
+            entered.set()
+            release.wait(2)
+            return value
+
+        slow_stage = self.profiler.wrap("slow", slow)
+        fast_stage = self.profiler.wrap("fast", lambda value, cancel: value.upper())
+        first, second = tracing.Trace(), tracing.Trace()
+        for trace in (first, second):
+            self.profiler.claim(trace, np.zeros(160, dtype=np.float32))
+
+        def run_slow():
+            with tracing.activate(first):
+                results.append(slow_stage("slow", None))
+
+        results = []
+        thread = threading.Thread(target=run_slow)
+        thread.start()
+        self.assertTrue(entered.wait(2))
+        with tracing.activate(second):
+            self.assertEqual(fast_stage("fast", None), "FAST")  # Ran unprofiled
+        release.set()
+        thread.join(2)
+        self.assertEqual(results, ["slow"])
+
+        self.profiler.complete(first)
+        session = self.profiler.complete(second)
+        self.assertTrue((session / f"01-{first.id}" / "slow.prof").exists())
+        self.assertFalse((session / f"02-{second.id}" / "fast.prof").exists())
+
+    def test_arm_while_running_is_ignored(self):
+        """A second request during a session should not start another."""
+        self.assertIsNotNone(self.profiler.arm(1))
+        self.assertIsNone(self.profiler.arm(1))
+
+    def test_thread_stacks_include_main_thread(self):
+        """The thread dump should name each thread."""
+        self.assertIn("MainThread", format_thread_stacks())
+
+
+if __name__ == "__main__":
+    unittest.main()
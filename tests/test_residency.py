@@ -0,0 +1,166 @@
+"""Tests for unloading an idle model and reloading it ahead of use."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from arch_whisper.config import Config
+from arch_whisper.transcription.residency import (
+    ACTIVE_USES,
+    PRELOAD_LEAD,
+    ModelResidency,
+    UsageHistogram,
+    hour_of_week,
+)
+from arch_whisper.transcription.whisper import WhisperTranscriber
+from arch_whisper.utils import trim_memory
+
+# A Monday, 09:30 local time
+MONDAY_0930 = time.mktime((2026, 10, 19, 9, 30, 0, 0, 0, -1))
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+class FakeTranscriber:
+    """Stands in for WhisperTranscriber's residency interface."""
+
+    def __init__(self, loaded=True, idle_seconds=0.0):
+        self.loaded = loaded
+        self.idle_seconds = idle_seconds
+        self.loads = 0
+        self.loaded_event = threading.Event()
+
+    def load(self):
+        self.loads += 1
+        self.loaded = True
+        self.loaded_event.set()
+
+    def unload(self):
+        self.loaded = False
+        return True
+
+
+def usage_at(t, uses):
+    usage = UsageHistogram(Path(tempfile.mkdtemp()) / "usage.json")
+    for _ in range(uses):
+        usage.record(t)
+    return usage
+
+
+class TestUsageHistogram(unittest.TestCase):
+    """Tests for learning the usual hours of use."""
+
+    def test_hour_of_week(self):
+        self.assertEqual(hour_of_week(MONDAY_0930), 9)
+        self.assertEqual(hour_of_week(MONDAY_0930 + DAY), 33)
+
+    def test_likely_after_repeated_use(self):
+        # One more than needed, to outlast a week of decay
+        usage = usage_at(MONDAY_0930, int(ACTIVE_USES) + 1)
+        self.assertTrue(usage.likely(MONDAY_0930 + 7 * DAY))  # Next Monday
+        self.assertFalse(usage.likely(MONDAY_0930 + HOUR))
+
+    def test_old_use_decays(self):
+        """Habits from months ago should stop counting."""
+        usage = usage_at(MONDAY_0930, 3)
+        usage.record(MONDAY_0930 + 90 * DAY + 5 * HOUR)
+        self.assertFalse(usage.likely(MONDAY_0930 + 91 * DAY))
+
+    def test_habit_fades_without_new_recordings(self):
+        """An hour stops being usual once the user stops dictating at all."""
+        usage = usage_at(MONDAY_0930, int(ACTIVE_USES) + 1)
+        self.assertFalse(usage.likely(MONDAY_0930 + 70 * DAY))
+
+    def test_saves_and_loads(self):
+        path = Path(tempfile.mkdtemp()) / "usage.json"
+        usage = UsageHistogram(path)
+        usage.record(MONDAY_0930)
+        usage.record(MONDAY_0930)
+        usage.save()
+        self.assertTrue(UsageHistogram(path).likely(MONDAY_0930))
+
+    def test_corrupt_file_starts_empty(self):
+        path = Path(tempfile.mkdtemp()) / "usage.json"
+        path.write_text("{not json")
+        self.assertFalse(UsageHistogram(path).likely(MONDAY_0930))
+
+
+class TestModelResidency(unittest.TestCase):
+    """Tests for the unload and preload policy."""
+
+    def test_unloads_after_idle_time(self):
+        transcriber = FakeTranscriber(idle_seconds=100)
+        residency = ModelResidency(transcriber, idle_seconds=60, usage=usage_at(0, 0))
+        self.assertEqual(residency.check(MONDAY_0930), "unload")
+        self.assertFalse(transcriber.loaded)
+
+    def test_stays_loaded_while_recently_used(self):
+        transcriber = FakeTranscriber(idle_seconds=10)
+        residency = ModelResidency(transcriber, idle_seconds=60, usage=usage_at(0, 0))
+        self.assertIsNone(residency.check(MONDAY_0930))
+        self.assertTrue(transcriber.loaded)
+
+    def test_stays_loaded_in_usual_hours(self):
+        transcriber = FakeTranscriber(idle_seconds=1000)
+        residency = ModelResidency(
+            transcriber, idle_seconds=60, usage=usage_at(MONDAY_0930, 3)
+        )
+        self.assertIsNone(residency.check(MONDAY_0930 + 7 * DAY))
+        self.assertEqual(residency.check(MONDAY_0930 + 7 * DAY + 2 * HOUR), "unload")
+
+    def test_preloads_before_usual_hour(self):
+        """The model should load shortly before an hour the user dictates in."""
+        transcriber = FakeTranscriber(loaded=False)
+        residency = ModelResidency(
+            transcriber, idle_seconds=60, usage=usage_at(MONDAY_0930, 3)
+        )
+        ten_to_nine = MONDAY_0930 - 40 * 60
+        self.assertIsNone(residency.check(ten_to_nine - PRELOAD_LEAD))
+        self.assertEqual(residency.check(ten_to_nine + 8 * 60), "preload")
+        self.assertTrue(transcriber.loaded_event.wait(2))
+
+    def test_preload_disabled(self):
+        transcriber = FakeTranscriber(loaded=False)
+        residency = ModelResidency(
+            transcriber, idle_seconds=60, usage=usage_at(MONDAY_0930, 3), preload=False
+        )
+        self.assertIsNone(residency.check(MONDAY_0930))
+        residency.prime()
+        self.assertEqual(transcriber.loads, 0)
+
+    def test_hotkey_loads_once(self):
+        """Overlapping triggers should share one load."""
+        transcriber = FakeTranscriber(loaded=False)
+        gate = threading.Event()
+        original = transcriber.load
+        transcriber.load = lambda: (gate.wait(2), original())
+        residency = ModelResidency(transcriber, idle_seconds=60, usage=usage_at(0, 0))
+
+        residency.prime()
+        residency.touch()
+        gate.set()
+        self.assertTrue(transcriber.loaded_event.wait(2))
+        self.assertEqual(transcriber.loads, 1)
+
+
+class TestUnload(unittest.TestCase):
+    """Tests for dropping the real transcriber's model."""
+
+    def test_unload_skips_model_in_use(self):
+        transcriber = WhisperTranscriber(Config())
+        self.assertFalse(transcriber.unload())  # Not loaded
+        transcriber._model = object()
+        with transcriber.scheduler.slot():
+            self.assertFalse(transcriber.unload())
+            self.assertEqual(transcriber.idle_seconds, 0.0)
+        self.assertTrue(transcriber.unload())
+        self.assertFalse(transcriber.loaded)
+
+    def test_trim_memory(self):
+        self.assertIsInstance(trim_memory(), bool)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+"""Tests for the re-transcription job store and worker."""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from arch_whisper.cancel import Cancelled
+from arch_whisper.config import Config
+from arch_whisper.history import Entry, HistoryStore
+from arch_whisper.retranscribe import (
+    MAX_ATTEMPTS,
+    JobStore,
+    LoadMonitor,
+    Retranscriber,
+    on_ac_power,
+)
+from arch_whisper.transcription.whisper import Segment, WhisperTranscriber
+
+
+def speech(seconds=1.0):
+    t = np.arange(int(16000 * seconds)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+class TestJobStore(unittest.TestCase):
+    """Tests for queueing, claiming and recovering jobs."""
+
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp()) / "jobs.db"
+        self.store = JobStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_round_trip(self):
+        """A claimed job should carry the stored audio and transcript."""
+        audio = speech()
+        job_id = self.store.add(audio, "helo there", "base")
+
+        job = self.store.claim()
+        self.assertEqual(job.id, job_id)
+        self.assertEqual(job.text, "helo there")
+        np.testing.assert_allclose(job.audio, audio, atol=1e-4)
+        self.assertIsNone(self.store.claim())
+
+        self.store.complete(job_id, "Hello there.", "medium")
+        self.assertEqual(self.store.final_text(job_id), "Hello there.")
+        self.assertEqual(self.store.counts(), {"done": 1})
+
+    def test_adds_history_link_to_old_store(self):
+        """A store created before history links should gain the column."""
+        path = Path(tempfile.mkdtemp()) / "jobs.db"
+        db = sqlite3.connect(path)
+        db.executescript(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, created REAL NOT NULL, audio BLOB, "
+            "seconds REAL NOT NULL, model TEXT NOT NULL, text TEXT NOT NULL, "
+            "state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "final_model TEXT, final_text TEXT, finished REAL, error TEXT);"
+        )
+        db.close()
+
+        store = JobStore(path)
+        self.addCleanup(store.close)
+        store.add(speech(0.1), "one", "base", history_id=7)
+        self.assertEqual(store.claim().history_id, 7)
+
+    def test_claims_oldest_first(self):
+        first = self.store.add(speech(0.1), "one", "base")
+        self.store.add(speech(0.1), "two", "base")
+        self.assertEqual(self.store.claim().id, first)
+
+    def test_running_jobs_recovered_after_crash(self):
+        """A job running when the app died should be queued again."""
+        job_id = self.store.add(speech(0.1), "one", "base")
+        self.store.claim()
+        self.store.close()  # No complete(): the app crashed
+
+        store = JobStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(store.counts(), {"pending": 1})
+        self.assertEqual(store.claim().id, job_id)
+
+    def test_gives_up_after_max_attempts(self):
+        """Repeated failures should mark the job failed."""
+        job_id = self.store.add(speech(0.1), "one", "base")
+        for _ in range(MAX_ATTEMPTS):
+            self.assertEqual(self.store.claim().id, job_id)
+            self.store.release(job_id, "model failed")
+        self.assertIsNone(self.store.claim())
+        self.assertEqual(self.store.counts(), {"failed": 1})
+        db = sqlite3.connect(self.path)
+        self.addCleanup(db.close)
+        self.assertEqual(db.execute("SELECT audio FROM jobs").fetchall(), [(None,)])
+
+    def test_interruption_is_not_an_attempt(self):
+        job_id = self.store.add(speech(0.1), "one", "base")
+        for _ in range(MAX_ATTEMPTS + 1):
+            self.store.claim()
+            self.store.release(job_id)
+        self.assertEqual(self.store.counts(), {"pending": 1})
+
+    def test_prune_by_count_and_age(self):
+        """Pruning should keep the newest jobs and drop old ones."""
+        store = JobStore(Path(tempfile.mkdtemp()) / "jobs.db", max_entries=2, max_days=1)
+        self.addCleanup(store.close)
+        with patch('time.time', return_value=time.time() - 2 * 86400):
+            store.add(speech(0.1), "stale", "base")
+        ids = [store.add(speech(0.1), text, "base") for text in ("one", "two", "three")]
+
+        self.assertEqual(store.prune(), 2)
+        self.assertEqual(store.claim().id, ids[1])
+        self.assertEqual(store.counts(), {"pending": 1, "running": 1})
+
+    def test_prunes_as_jobs_are_added(self):
+        """Adding should prune every PRUNE_EVERY jobs without a prune() call."""
+        store = JobStore(Path(tempfile.mkdtemp()) / "jobs.db", max_entries=1)
+        self.addCleanup(store.close)
+        with patch('arch_whisper.retranscribe.PRUNE_EVERY', 3):
+            for text in ("one", "two", "three"):
+                store.add(speech(0.1), text, "base")
+        self.assertEqual(store.counts(), {"pending": 1})
+
+
+    """Tests for power and load checks."""
+
+    def make_supply(self, root, name, kind, online=None):
+        supply = root / name
+        supply.mkdir()
+        (supply / "type").write_text(kind + "\n")
+        if online is not None:
+            (supply / "online").write_text(f"{online}\n")
+
+    def test_ac_power(self):
+        root = Path(tempfile.mkdtemp())
+        self.assertTrue(on_ac_power(root))  # Desktop: no supplies
+
+        self.make_supply(root, "BAT0", "Battery")
+        self.make_supply(root, "AC", "Mains", online=0)
+        self.assertFalse(on_ac_power(root))
+
+        (root / "AC" / "online").write_text("1\n")
+        self.assertTrue(on_ac_power(root))
+
+    def test_load_excludes_own_cpu_time(self):
+        """Busy time charged to this process should not count as load."""
+        stat = Path(tempfile.mkdtemp()) / "stat"
+        stat.write_text("cpu  1000 0 0 9000 0 0 0 0 0 0\n")
+        clock = iter([100.0, 101.0])
+        times = iter([(0.0, 0.0), (0.5, 0.0)])
+
+        def fake_times():
+            user, system = next(times)
+            return type("T", (), {"user": user, "system": system})()
+
+        with (
+            patch("arch_whisper.retranscribe.time.monotonic", lambda: next(clock)),
+            patch("arch_whisper.retranscribe.os.times", fake_times),
+            patch("arch_whisper.retranscribe.os.cpu_count", return_value=2),
+            patch("arch_whisper.retranscribe.os.sysconf", return_value=100),
+        ):
+            monitor = LoadMonitor(stat)
+            # 1 s of busy time across 2 cores in 1 s, half of it ours
+            stat.write_text("cpu  1100 0 0 9100 0 0 0 0 0 0\n")
+            self.assertAlmostEqual(monitor.other_load(), 0.25)
+
+
+class TestRetranscriber(unittest.TestCase):
+    """Tests for the idle worker."""
+
+    def setUp(self):
+        self.store = JobStore(Path(tempfile.mkdtemp()) / "jobs.db")
+        self.addCleanup(self.store.close)
+        self.busy = False
+        self.worker = Retranscriber(
+            Config(retranscribe_model="medium"), self.store, busy=lambda: self.busy
+        )
+
+    def test_retranscribes_when_idle(self):
+        """Queued utterances should be stored and re-transcribed."""
+        self.worker.add(speech(), "helo there")
+        with (
+            patch.object(Retranscriber, "idle", return_value=True),
+            patch.object(
+                WhisperTranscriber,
+                "transcribe_segments",
+                return_value=[Segment(0.0, 1.0, "Hello there.")],
+            ) as transcribe,
+        ):
+            self.assertTrue(self.worker.run_once())
+
+        self.assertEqual(self.store.counts(), {"done": 1})
+        self.assertEqual(self.store.final_text(1), "Hello there.")
+        self.assertEqual(transcribe.call_args.kwargs["priority"], 1)
+
+    def test_updates_history_entry(self):
+        """The better transcript should replace the history entry's raw text."""
+        history = HistoryStore(Path(tempfile.mkdtemp()) / "history.db")
+        self.addCleanup(history.close)
+        entry_id = history.add(Entry("helo there", "helo there"))
+        worker = Retranscriber(Config(retranscribe_model="medium"), self.store, history=history)
+
+        worker.add(speech(), "helo there", entry_id)
+        with (
+            patch.object(Retranscriber, "idle", return_value=True),
+            patch.object(
+                WhisperTranscriber,
+                "transcribe_segments",
+                return_value=[Segment(0.0, 1.0, "Hello there.")],
+            ),
+        ):
+            self.assertTrue(worker.run_once())
+
+        entry = history.get(entry_id)
+        self.assertEqual((entry.raw_text, entry.text), ("Hello there.", "Hello there."))
+
+    def test_waits_while_busy(self):
+        """Nothing should be decoded during dictation."""
+        self.busy = True
+        self.worker.add(speech(), "one")
+        with patch.object(WhisperTranscriber, "transcribe_segments") as transcribe:
+            self.assertFalse(self.worker.run_once())
+        transcribe.assert_not_called()
+        self.assertEqual(self.store.counts(), {"pending": 1})
+
+    def test_interrupted_job_is_requeued(self):
+        """Dictation starting mid-job should put the job back."""
+        self.worker.add(speech(), "one")
+        with (
+            patch.object(Retranscriber, "idle", return_value=True),
+            patch.object(WhisperTranscriber, "transcribe_segments", side_effect=Cancelled),
+        ):
+            self.assertFalse(self.worker.run_once())
+        self.assertEqual(self.store.counts(), {"pending": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+"""Tests for the shared transcription server and its client."""
+
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from arch_whisper import metrics
+from arch_whisper.cancel import Cancelled, CancelToken
+from arch_whisper.config import Config
+from arch_whisper.server import Batcher, TranscriptionServer
+from arch_whisper.transcription import protocol
+from arch_whisper.transcription.remote import FRAME_SAMPLES, RemoteTranscriber, Upload
+from arch_whisper.transcription.whisper import Segment, WhisperTranscriber
+
+
+def audio_of(value, seconds=0.5):
+    """Constant audio whose level identifies the utterance."""
+    return np.full(int(16000 * seconds), value, dtype=np.float32)
+
+
+class RecordingDecoder:
+    """Fake batched decode that records each batch."""
+
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.audios = []
+        self.delay = delay
+
+    def __call__(self, audios):
+        self.batches.append([round(float(a[0]), 2) for a in audios])
+        self.audios.extend(audios)
+        time.sleep(self.delay)
+        return [
+            [Segment(0.0, a.size / 16000, f"level {float(a[0]):.2f}")] for a in audios
+        ]
+
+
+class TestBatcher(unittest.TestCase):
+    """Tests for batching, fairness and backpressure."""
+
+    def make_batcher(self, decode, **kwargs):
+        batcher = Batcher(decode, **kwargs)
+        self.addCleanup(batcher.stop)
+        return batcher
+
+    def test_concurrent_requests_share_a_decode(self):
+        """Requests within the window should be decoded together."""
+        decode = RecordingDecoder()
+        batcher = self.make_batcher(decode, window=0.05)
+        batcher.start()
+
+        futures = [batcher.submit(f"client{i}", audio_of(i / 10)) for i in range(3)]
+        results = [f.result(timeout=2) for f in futures]
+
+        self.assertEqual(decode.batches, [[0.0, 0.1, 0.2]])
+        self.assertEqual(results[1][0].text, "level 0.10")
+
+    def test_round_robin_across_clients(self):
+        """A client with a backlog should not crowd out the others."""
+        decode = RecordingDecoder()
+        batcher = self.make_batcher(decode, max_batch=3, max_per_client=10)
+        for i in range(4):
+            batcher.submit("busy", audio_of(0.1 + i / 100))
+        batcher.submit("quiet", audio_of(0.5))
+        batcher.start()
+        batcher.submit("busy", audio_of(0.9))  # Behind the backlog either way
+
+        deadline = time.monotonic() + 2
+        while sum(map(len, decode.batches)) < 6 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(decode.batches[0], [0.1, 0.5, 0.11])
+
+    def test_per_client_limit(self):
+        """A client over its queue limit should be refused."""
+        batcher = self.make_batcher(RecordingDecoder(), max_per_client=2)
+        batcher.submit("a", audio_of(0.1))
+        batcher.submit("a", audio_of(0.1))
+        with self.assertRaises(queue.Full):
+            batcher.submit("a", audio_of(0.1))
+        batcher.submit("b", audio_of(0.1))  # Others are unaffected
+
+    def test_decode_error_fails_batch(self):
+        """A failing decode should fail every request in the batch."""
+        batcher = self.make_batcher(lambda audios: 1 / 0)
+        batcher.start()
+        future = batcher.submit("a", audio_of(0.1))
+        with self.assertRaises(ZeroDivisionError):
+            future.result(timeout=2)
+
+
+class TestServer(unittest.TestCase):
+    """Tests for clients talking to a server over a Unix socket."""
+
+    def setUp(self):
+        self.decode = RecordingDecoder()
+        self.path = str(Path(tempfile.mkdtemp()) / "transcribe.sock")
+        self.server = TranscriptionServer(self.decode, self.path)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self):
+        client = RemoteTranscriber(Config(remote_transcriber=self.path))
+        self.addCleanup(client.close)
+        return client
+
+    def test_transcribes_remotely(self):
+        """A client should get the server's text and segments."""
+        client = self.make_client()
+        segments = client.transcribe_segments(audio_of(0.25, seconds=3))
+
+        self.assertEqual(segments, [Segment(0.0, 3.0, "level 0.25")])
+        self.assertEqual(client.transcribe(audio_of(0.5)), "level 0.50")
+        self.assertTrue(client.loaded)
+
+    def test_clients_batch_together(self):
+        """Several clients at once should share batched decodes."""
+        self.decode.delay = 0.05  # Let the others queue behind the first
+        clients = [self.make_client() for _ in range(4)]
+        results = [None] * 4
+
+        def run(i):
+            results[i] = clients[i].transcribe(audio_of(i / 10))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(results, [f"level {i / 10:.2f}" for i in range(4)])
+        self.assertLess(len(self.decode.batches), 4)
+
+    def test_falls_back_when_server_is_down(self):
+        """Without a server, the local model should transcribe."""
+        self.server.stop()
+        client = self.make_client()
+        with patch.object(
+            WhisperTranscriber, "transcribe_segments", return_value=[Segment(0, 1, "local")]
+        ) as local:
+            self.assertEqual(client.transcribe(audio_of(0.1)), "local")
+        local.assert_called_once()
+
+    def test_failed_server_is_skipped_for_a_while(self):
+        """After a failure the next utterances should go straight to the local model."""
+        self.server.stop()
+        client = self.make_client()
+        local = [Segment(0, 1, "local")]
+        with patch.object(WhisperTranscriber, "transcribe_segments", return_value=local):
+            client.transcribe(audio_of(0.1))
+            self.assertIsNone(client.upload())
+            with patch.object(protocol, "connect") as connect:
+                self.assertEqual(client.transcribe(audio_of(0.2)), "local")
+            connect.assert_not_called()
+
+            # Once the backoff is over the server is tried again
+            server = TranscriptionServer(self.decode, self.path)
+            server.start()
+            self.addCleanup(server.stop)
+            client._retry_at = 0.0
+            self.assertEqual(client.transcribe(audio_of(0.5)), "level 0.50")
+
+    def test_cancel_abandons_request(self):
+        """Cancelling should stop waiting on the server."""
+        self.decode.delay = 0.5
+        client = self.make_client()
+        token = CancelToken()
+        threading.Timer(0.1, token.cancel).start()
+
+        started = time.monotonic()
+        with self.assertRaises(Cancelled):
+            client.transcribe(audio_of(0.1), token)
+        self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_oversized_frame_is_rejected(self):
+        """The server should drop a client sending a frame over the limit."""
+        sock = protocol.connect(self.path)
+        self.addCleanup(sock.close)
+        protocol.send_json(sock, protocol.REQUEST, {"id": 1})
+        sock.sendall(protocol.HEADER.pack(protocol.AUDIO, protocol.MAX_PAYLOAD + 1))
+        with self.assertRaises(EOFError):
+            protocol.recv_frame(sock)
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for streaming compressed audio while recording."""
+
+    def setUp(self):
+        self.decode = RecordingDecoder()
+        self.path = str(Path(tempfile.mkdtemp()) / "transcribe.sock")
+        self.server = TranscriptionServer(self.decode, self.path)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def feed(self, upload, audio, block=1024):
+        for start in range(0, audio.size, block):
+            upload.feed(audio[start:start + block])
+
+    def test_encodings_round_trip(self):
+        """Each encoding should decode to the samples, compressed ones smaller."""
+        t = np.arange(FRAME_SAMPLES) / 16000
+        audio = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        raw = protocol.encode_audio(audio, "f32")
+        for encoding in protocol.ENCODINGS:
+            data = protocol.encode_audio(audio, encoding)
+            decoded = protocol.decode_audio(data, encoding)
+            np.testing.assert_allclose(decoded, audio, atol=1e-4)
+            if encoding != "f32":
+                self.assertLess(len(data), len(raw) / 2)
+
+    def test_upload_streams_while_recording(self):
+        """Only the tail should be left to send when recording ends."""
+        audio = np.linspace(-0.5, 0.5, 16000 * 2, dtype=np.float32)
+        upload = Upload(self.path, "test")
+        self.feed(upload, audio)
+        time.sleep(0.2)  # Frames go out while "recording"
+
+        started = time.monotonic()
+        upload.end()
+        self.assertTrue(upload.wait_sent(1))
+        self.assertLess(time.monotonic() - started, 0.1)
+
+        upload.result()
+        np.testing.assert_allclose(self.decode.audios[0], audio, atol=1e-4)
+
+    def test_resumes_after_dropped_connection(self):
+        """A dropped upload should continue from the first missing frame."""
+        metrics.reset()
+        audio = np.linspace(-0.5, 0.5, FRAME_SAMPLES * 6, dtype=np.float32)
+        upload = Upload(self.path, "test", encoding="s16z")
+        self.feed(upload, audio[:FRAME_SAMPLES * 3])
+        time.sleep(0.1)
+        upload._sock.shutdown(socket.SHUT_RDWR)  # The network goes away
+        time.sleep(0.1)
+
+        self.feed(upload, audio[FRAME_SAMPLES * 3:])
+        upload.result()
+
+        self.assertEqual(len(self.decode.audios), 1)
+        np.testing.assert_allclose(self.decode.audios[0], audio, atol=1e-4)
+        self.assertEqual(metrics.counters().get("server_resumes_total"), 1)
+
+    def test_transcribe_claims_streamed_upload(self):
+        """Audio that was streamed while recording should not be sent twice."""
+        client = RemoteTranscriber(Config(remote_transcriber=self.path))
+        self.addCleanup(client.close)
+        audio = np.full(FRAME_SAMPLES * 2, 0.25, dtype=np.float32)
+        upload = client.upload()
+        self.feed(upload, audio)
+        upload.end()
+
+        self.assertEqual(client.transcribe(audio), "level 0.25")
+        self.assertEqual(len(self.decode.audios), 1)
+        self.assertEqual(self.decode.audios[0].size, audio.size)
+
+
+class TestAddress(unittest.TestCase):
+    """Tests for parsing server addresses."""
+
+    def test_forms(self):
+        self.assertEqual(protocol.parse_address("/run/x.sock"), "/run/x.sock")
+        self.assertEqual(protocol.parse_address("gpu-box:9000"), ("gpu-box", 9000))
+        self.assertEqual(protocol.parse_address(":9000"), ("127.0.0.1", 9000))
+        self.assertEqual(
+            protocol.parse_address("gpu-box"), ("gpu-box", protocol.DEFAULT_PORT)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
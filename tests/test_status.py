@@ -0,0 +1,102 @@
+"""Tests for OpenMetrics rendering and the status socket."""
+
+import json
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+
+from arch_whisper import metrics
+from arch_whisper.status import StatusServer
+
+
+def get(path: Path, url: str) -> tuple[str, str]:
+    """Send a GET over a Unix socket; return the status line and body."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2)
+        sock.connect(str(path))
+        sock.sendall(f"GET {url} HTTP/1.0\r\nHost: localhost\r\n\r\n".encode())
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    head, _, body = data.decode().partition("\r\n\r\n")
+    return head.splitlines()[0], body
+
+
+class TestOpenMetrics(unittest.TestCase):
+    """Tests for metrics.render_openmetrics()."""
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_counters_gauges_and_histograms(self):
+        """Each metric type should render with its TYPE line and samples."""
+        metrics.inc("audio_xruns_total", 2)
+        metrics.gauge("pipeline_jobs_outstanding", lambda: 3)
+        metrics.observe("stage_paste_seconds", 0.02)
+        metrics.observe("stage_paste_seconds", 3.0)
+
+        text = metrics.render_openmetrics()
+        lines = text.splitlines()
+
+        self.assertIn("# TYPE audio_xruns counter", lines)
+        self.assertIn("audio_xruns_total 2", lines)
+        self.assertIn("# TYPE pipeline_jobs_outstanding gauge", lines)
+        self.assertIn("pipeline_jobs_outstanding 3", lines)
+        self.assertIn('stage_paste_seconds_bucket{le="0.025"} 1', lines)
+        self.assertIn('stage_paste_seconds_bucket{le="5.0"} 2', lines)
+        self.assertIn('stage_paste_seconds_bucket{le="+Inf"} 2', lines)
+        self.assertIn("stage_paste_seconds_count 2", lines)
+        self.assertEqual(lines[-1], "# EOF")
+
+    def test_failing_gauge_is_skipped(self):
+        """A gauge callback that raises should not break rendering."""
+        metrics.gauge("broken", lambda: 1 / 0)
+        self.assertNotIn("broken", metrics.render_openmetrics())
+
+    def test_unregister_gauge(self):
+        """Registering None should remove a gauge."""
+        metrics.gauge("recording", lambda: 1)
+        metrics.gauge("recording", None)
+        self.assertEqual(metrics.gauges(), {})
+
+
+class TestStatusServer(unittest.TestCase):
+    """Tests for serving metrics and status over a Unix socket."""
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.path = Path(tempfile.mkdtemp()) / "status.sock"
+        self.server = StatusServer(lambda: {"state": "idle"}, self.path)
+        self.assertTrue(self.server.start())
+        self.addCleanup(self.server.stop)
+
+    def test_metrics(self):
+        """GET /metrics should return OpenMetrics text."""
+        metrics.inc("claude_errors_total")
+        status, body = get(self.path, "/metrics")
+        self.assertIn("200", status)
+        self.assertIn("claude_errors_total 1", body)
+        self.assertTrue(body.endswith("# EOF\n"))
+
+    def test_status(self):
+        """GET /status should return the status document as JSON."""
+        status, body = get(self.path, "/status")
+        self.assertIn("200", status)
+        self.assertEqual(json.loads(body), {"state": "idle"})
+
+    def test_unknown_path(self):
+        """Other paths should be 404."""
+        status, _ = get(self.path, "/nope")
+        self.assertIn("404", status)
+
+    def test_stop_removes_socket(self):
+        """Stopping should remove the socket file."""
+        self.server.stop()
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""Tests for per-utterance latency tracing."""
+
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arch_whisper import tracing
+from arch_whisper.__main__ import main
+from arch_whisper.pipeline import Pipeline, Stage
+
+
+def make_trace(**durations):
+    """Build a trace record with spans of the given durations."""
+    spans = [{"name": n, "start": 0.0, "duration": d} for n, d in durations.items()]
+    return {"id": "x", "time": 0.0, "spans": spans}
+
+
+class TestTrace(unittest.TestCase):
+    """Tests for recording spans."""
+
+    def test_spans_are_relative_to_trace_start(self):
+        """Span starts should be offsets from when the trace began."""
+        trace = tracing.Trace()
+        trace.add_span("decode", trace.t0 + 0.5, trace.t0 + 0.75)
+
+        record = trace.to_dict()
+        self.assertEqual(record["spans"], [{"name": "decode", "start": 0.5, "duration": 0.25}])
+        self.assertEqual(record["id"], trace.id)
+
+    def test_end_without_begin_is_ignored(self):
+        """Closing a span that was never opened should record nothing."""
+        trace = tracing.Trace()
+        trace.end("processing")
+        trace.begin("recording")
+        trace.end("recording")
+
+        self.assertEqual([s["name"] for s in trace.to_dict()["spans"]], ["recording"])
+
+    def test_finish_writes_once(self):
+        """A trace should be written once with its attributes."""
+        trace = tracing.Trace()
+        with patch.object(tracing, "_write") as write:
+            trace.finish(status="ok")
+            trace.finish(status="error")
+
+        write.assert_called_once()
+        self.assertEqual(write.call_args[0][0]["status"], "ok")
+
+    def test_module_span_uses_current_trace(self):
+        """tracing.span() should record into the active trace only."""
+        with tracing.span("ignored"):
+            pass
+
+        trace = tracing.Trace()
+        with tracing.activate(trace):
+            with tracing.span("vad"):
+                pass
+        with tracing.span("after"):
+            pass
+
+        self.assertIsNone(tracing.current())
+        self.assertEqual([s["name"] for s in trace.to_dict()["spans"]], ["vad"])
+
+    def test_pipeline_records_stage_spans(self):
+        """Stages should get a span each and see the job's trace as current."""
+        seen = []
+
+        def stage(value, cancel):
+            seen.append(tracing.current())
+            return value
+
+        pipeline = Pipeline([Stage("first", stage), Stage("second", stage)])
+        pipeline.start()
+        self.addCleanup(pipeline.close)
+
+        trace = tracing.Trace()
+        job = pipeline.submit(1, trace=trace)
+        self.assertTrue(job.wait(2))
+
+        self.assertEqual(seen, [trace, trace])
+        names = {s["name"] for s in trace.to_dict()["spans"]}
+        self.assertEqual(names, {"first", "second"})
+
+
+class TestTraceLog(unittest.TestCase):
+    """Tests for the trace file and percentile summary."""
+
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp()) / "traces.jsonl"
+
+    def test_finish_appends_json_line(self):
+        """Finished traces should be appended to the trace file."""
+        with patch.object(tracing, "TRACE_PATH", self.path), \
+                patch.object(tracing, "_writer", None):
+            trace = tracing.Trace()
+            trace.finish(status="ok")
+            for handler in tracing._writer.handlers:
+                handler.close()
+            tracing._writer.handlers.clear()
+
+        lines = self.path.read_text().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["id"], trace.id)
+
+    def test_load_reads_rotated_files_oldest_first(self):
+        """Rotated backups should be read before the current file."""
+        self.path.with_name("traces.jsonl.1").write_text(json.dumps({"id": "old"}) + "\n")
+        self.path.write_text(json.dumps({"id": "new"}) + "\nnot json\n")
+
+        traces = tracing.load_traces(self.path)
+        self.assertEqual([t["id"] for t in traces], ["old", "new"])
+        self.assertEqual([t["id"] for t in tracing.load_traces(self.path, last=1)], ["new"])
+
+    def test_summarize_percentiles(self):
+        """Percentiles should use nearest rank over per-trace durations."""
+        traces = [make_trace(decode=i / 100) for i in range(1, 101)]
+        summary = tracing.summarize(traces)
+
+        self.assertEqual(summary["decode"]["count"], 100)
+        self.assertAlmostEqual(summary["decode"]["p50"], 0.50)
+        self.assertAlmostEqual(summary["decode"]["p95"], 0.95)
+        self.assertAlmostEqual(summary["decode"]["p99"], 0.99)
+
+    def test_summarize_sums_repeated_spans(self):
+        """A span recorded twice in one trace should count as one sample."""
+        trace = make_trace(inject=0.1)
+        trace["spans"].append({"name": "inject", "start": 0.2, "duration": 0.2})
+
+        summary = tracing.summarize([trace])
+        self.assertEqual(summary["inject"]["count"], 1)
+        self.assertAlmostEqual(summary["inject"]["p50"], 0.3)
+
+    def test_stats_command(self):
+        """`arch-whisper stats` should print a row per stage."""
+        self.path.write_text(json.dumps(make_trace(decode=0.2, paste=0.05)) + "\n")
+        out = io.StringIO()
+        with patch.object(tracing, "TRACE_PATH", self.path), contextlib.redirect_stdout(out):
+            main(["stats"])
+
+        text = out.getvalue()
+        self.assertIn("decode", text)
+        self.assertIn("200.0ms", text)
+        self.assertIn("paste", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Tests for the per-user runtime directory.
+
+Sockets and FIFOs live there, so a directory someone else created or can
+read must not be used.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from arch_whisper.utils import runtime_dir
+
+
+class TestRuntimeDir(unittest.TestCase):
+    """Tests for creating and checking the runtime directory."""
+
+    def setUp(self):
+        """Point the temp directory fallback at a scratch directory."""
+        self.tmp = Path(tempfile.mkdtemp())
+        self.path = self.tmp / f"arch-whisper-{os.getuid()}"
+        for patcher in (
+            patch.dict('os.environ', {}, clear=True),
+            patch('tempfile.gettempdir', return_value=str(self.tmp)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_creates_private_directory(self):
+        """The fallback directory should be created with mode 0700."""
+        self.assertEqual(runtime_dir(), self.path)
+        self.assertEqual(self.path.stat().st_mode & 0o777, 0o700)
+
+    def test_symlink_is_refused(self):
+        """A symlink planted at the fallback path should be refused."""
+        target = self.tmp / "elsewhere"
+        target.mkdir(mode=0o700)
+        self.path.symlink_to(target)
+        with self.assertRaises(OSError):
+            runtime_dir()
+
+    def test_foreign_directory_is_refused(self):
+        """A directory owned by another user should be refused."""
+        uid = os.getuid() + 1
+        (self.tmp / f"arch-whisper-{uid}").mkdir(mode=0o700)
+        with patch('os.getuid', return_value=uid):
+            with self.assertRaises(OSError):
+                runtime_dir()
+
+    def test_open_directory_is_refused(self):
+        """A directory others can read or write should be refused."""
+        self.path.mkdir()
+        self.path.chmod(0o777)
+        with self.assertRaises(OSError):
+            runtime_dir()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Tests for the energy-based silence tracker used by hands-free modes."""
+
+import unittest
+
+import numpy as np
+
+from arch_whisper.audio.vad import SilenceTracker, frame_rms
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=0.2):
+    """A sine tone loud enough to count as speech."""
+    t = np.arange(int(RATE * seconds), dtype=np.float32) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def quiet(seconds):
+    """Low-level noise below the speech threshold."""
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(RATE * seconds)) * 0.001).astype(np.float32)
+
+
+class TestFrameRms(unittest.TestCase):
+    """Tests for per-frame RMS."""
+
+    def test_constant_signal(self):
+        """RMS of a constant signal is its magnitude."""
+        rms = frame_rms(np.full(100, -0.5, dtype=np.float32), 25)
+        np.testing.assert_allclose(rms, [0.5] * 4, rtol=1e-6)
+
+    def test_short_and_empty_blocks(self):
+        """Short blocks are one frame; empty blocks have none."""
+        self.assertEqual(len(frame_rms(np.ones(10, dtype=np.float32), 320)), 1)
+        self.assertEqual(len(frame_rms(np.empty(0, dtype=np.float32), 320)), 0)
+
+
+class TestSilenceTracker(unittest.TestCase):
+    """Tests for speech and trailing-silence tracking."""
+
+    def setUp(self):
+        """Create a tracker at Whisper's sample rate."""
+        self.tracker = SilenceTracker(sample_rate=RATE)
+
+    def test_silence_before_speech(self):
+        """Quiet audio alone should not count as speech."""
+        self.tracker.feed(quiet(1.0))
+        self.assertFalse(self.tracker.heard_speech)
+
+    def test_trailing_silence_accumulates(self):
+        """Silence after speech should add up across blocks."""
+        self.tracker.feed(tone(0.5))
+        self.assertTrue(self.tracker.heard_speech)
+        self.assertLess(self.tracker.trailing_silence, 0.03)
+
+        for _ in range(10):
+            self.tracker.feed(quiet(0.1))
+        self.assertAlmostEqual(self.tracker.trailing_silence, 1.0, places=2)
+
+    def test_silence_within_block(self):
+        """Speech ending partway through a block counts the rest as silence."""
+        self.tracker.feed(np.concatenate([tone(0.2), quiet(0.3)]))
+        self.assertAlmostEqual(self.tracker.trailing_silence, 0.3, delta=0.03)
+
+    def test_speech_resets_silence(self):
+        """New speech should reset the trailing silence."""
+        self.tracker.feed(tone(0.2))
+        self.tracker.feed(quiet(1.0))
+        self.tracker.feed(tone(0.2))
+        self.assertLess(self.tracker.trailing_silence, 0.03)
+
+    def test_reset(self):
+        """reset() should forget speech and silence."""
+        self.tracker.feed(tone(0.2))
+        self.tracker.feed(quiet(0.5))
+        self.tracker.reset()
+        self.assertFalse(self.tracker.heard_speech)
+        self.assertEqual(self.tracker.trailing_silence, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,185 @@
+"""Tests for the evdev hotkey listener.
+
+The listener watches every keyboard from one selector loop. It has to see
+the combo across devices, survive a keyboard being unplugged, and stop
+promptly without waiting for another key event.
+"""
+
+import errno
+import os
+import tempfile
+import time
+import unittest
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from evdev import ecodes
+
+from arch_whisper.hotkey.bindings import Action
+from arch_whisper.hotkey.wayland import WaylandHotkeyBackend
+
+Event = namedtuple("Event", "type code value")
+
+
+class FakeKeyboard:
+    """Keyboard whose events are fed through a pipe so selectors can watch it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        self.fd = self._r
+        self.pending = []
+        self.unplugged = False
+
+    def send(self, *events):
+        """Queue events and make the fd readable."""
+        self.pending.extend(events)
+        os.write(self._w, b"x")
+
+    def unplug(self):
+        """Make the next read fail like a removed device."""
+        self.unplugged = True
+        os.write(self._w, b"x")
+
+    def read(self):
+        os.read(self._r, 4096)
+        if self.unplugged:
+            raise OSError(errno.ENODEV, "No such device")
+        events, self.pending = self.pending, []
+        return iter(events)
+
+    def close(self):
+        for fd in (self._r, self._w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def key(code, value):
+    """Build a key event."""
+    return Event(ecodes.EV_KEY, code, value)
+
+
+def wait_for(predicate, timeout=2.0):
+    """Poll until predicate() is true."""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestMultiDeviceListener(unittest.TestCase):
+    """Tests for the selector-based event loop."""
+
+    def start_backend(self, keyboards, bindings=None):
+        """Start the backend on fake keyboards."""
+        backend = WaylandHotkeyBackend(bindings)
+        self.on_press = MagicMock()
+        self.on_release = MagicMock()
+        self.events = []
+
+        def on_event(action, pressed):
+            self.events.append((action, pressed))
+            (self.on_press if pressed else self.on_release)()
+
+        with patch.object(WaylandHotkeyBackend, '_find_keyboards', return_value=keyboards):
+            backend.start(on_event)
+        self.addCleanup(backend.stop)
+        return backend
+
+    def test_combo_across_keyboards(self):
+        """Ctrl on one keyboard and Space on another should trigger."""
+        laptop, usb = FakeKeyboard("/dev/input/event0"), FakeKeyboard("/dev/input/event1")
+        self.start_backend([laptop, usb])
+
+        laptop.send(key(ecodes.KEY_LEFTCTRL, 1))
+        usb.send(key(ecodes.KEY_SPACE, 1))
+        self.assertTrue(wait_for(lambda: self.on_press.called))
+
+        usb.send(key(ecodes.KEY_SPACE, 0))
+        self.assertTrue(wait_for(lambda: self.on_release.called))
+
+    def test_batch_ignores_repeats(self):
+        """Repeats within one batch should not re-trigger the press."""
+        keyboard = FakeKeyboard("/dev/input/event0")
+        self.start_backend([keyboard])
+
+        keyboard.send(
+            key(ecodes.KEY_LEFTCTRL, 1),
+            key(ecodes.KEY_SPACE, 1),
+            key(ecodes.KEY_SPACE, 2),
+            key(ecodes.KEY_SPACE, 2),
+        )
+        self.assertTrue(wait_for(lambda: self.on_press.called))
+        time.sleep(0.05)
+        self.assertEqual(self.on_press.call_count, 1)
+
+    def test_unplug_releases_combo(self):
+        """Unplugging mid-combo should release and keep other keyboards."""
+        laptop, usb = FakeKeyboard("/dev/input/event0"), FakeKeyboard("/dev/input/event1")
+        backend = self.start_backend([laptop, usb])
+
+        usb.send(key(ecodes.KEY_LEFTCTRL, 1), key(ecodes.KEY_SPACE, 1))
+        self.assertTrue(wait_for(lambda: self.on_press.called))
+
+        usb.unplug()
+        self.assertTrue(wait_for(lambda: self.on_release.called))
+        self.assertTrue(wait_for(lambda: list(backend._devices) == ["/dev/input/event0"]))
+
+    def test_unplug_keeps_modifiers_on_other_keyboards(self):
+        """Ctrl held on the laptop should survive unplugging another keyboard."""
+        laptop, usb = FakeKeyboard("/dev/input/event0"), FakeKeyboard("/dev/input/event1")
+        backend = self.start_backend([laptop, usb])
+
+        laptop.send(key(ecodes.KEY_LEFTCTRL, 1))
+        usb.unplug()
+        self.assertTrue(wait_for(lambda: list(backend._devices) == ["/dev/input/event0"]))
+        laptop.send(key(ecodes.KEY_SPACE, 1))
+        self.assertTrue(wait_for(lambda: self.on_press.called))
+
+    def test_configured_bindings(self):
+        """Each configured combo should report its own action."""
+        keyboard = FakeKeyboard("/dev/input/event0")
+        self.start_backend([keyboard], {
+            Action.RECORD: "super+r",
+            Action.CANCEL: "escape",
+        })
+
+        keyboard.send(
+            key(ecodes.KEY_ESC, 1), key(ecodes.KEY_ESC, 0),
+            key(ecodes.KEY_LEFTMETA, 1), key(ecodes.KEY_R, 1),
+        )
+        self.assertTrue(wait_for(lambda: len(self.events) == 3))
+        self.assertEqual(self.events, [
+            (Action.CANCEL, True), (Action.CANCEL, False), (Action.RECORD, True),
+        ])
+
+    def test_stop_is_prompt_without_key_events(self):
+        """stop() should return quickly even if no key is ever pressed."""
+        backend = self.start_backend([FakeKeyboard("/dev/input/event0")])
+
+        start = time.monotonic()
+        backend.stop()
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertIsNone(backend._thread)
+
+    def test_keyboard_plugged_in_after_start(self):
+        """Starting with no keyboards should still pick one up when it appears."""
+        input_dir = tempfile.mkdtemp()
+        keyboard = FakeKeyboard(os.path.join(input_dir, "event3"))
+        with patch('arch_whisper.hotkey.wayland.INPUT_DIR', input_dir), \
+                patch.object(WaylandHotkeyBackend, '_open_keyboard', return_value=keyboard):
+            backend = self.start_backend([])
+            self.assertIsNotNone(backend._thread)
+
+            open(keyboard.path, "w").close()
+            self.assertTrue(wait_for(lambda: keyboard.path in backend._devices))
+        keyboard.send(key(ecodes.KEY_LEFTCTRL, 1), key(ecodes.KEY_SPACE, 1))
+        self.assertTrue(wait_for(lambda: self.on_press.called))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,204 @@
+"""Tests for the X11 passive-grab hotkey backend.
+
+Event handling is tested with synthetic events. The end-to-end test grabs
+the hotkey on a real X server and runs when Xvfb is installed.
+"""
+
+import os
+import shutil
+import subprocess
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from Xlib import XK, X
+
+from arch_whisper.hotkey.bindings import Action, BindingEngine, BindingTable
+from arch_whisper.hotkey.x11 import (
+    STATE_TO_MASK,
+    X11HotkeyBackend,
+    resolve_keysyms,
+    to_x_mask,
+)
+
+SPACE = 65
+CTRL_L = 37
+ESCAPE = 9
+KEYCODES = {"space": [SPACE], "ctrl": [CTRL_L], "escape": [ESCAPE]}
+
+
+def event(kind, keycode, state=X.ControlMask, when=1000):
+    """Build a fake key event."""
+    return SimpleNamespace(type=kind, detail=keycode, state=state, time=when)
+
+
+class FakeDisplay:
+    """Display whose event queue is a list."""
+
+    def __init__(self, events=()):
+        self.events = list(events)
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+
+class TestKeyNames(unittest.TestCase):
+    """Tests for mapping key names to keysyms and masks."""
+
+    def test_key_names(self):
+        """Lowercase names should find case-sensitive keysyms."""
+        self.assertEqual(resolve_keysyms("space"), [XK.XK_space])
+        self.assertEqual(resolve_keysyms("escape"), [XK.XK_Escape])
+        self.assertEqual(resolve_keysyms("f5"), [XK.XK_F5])
+        self.assertEqual(resolve_keysyms("notakey"), [])
+
+    def test_modifiers_cover_both_sides(self):
+        """Modifier names should resolve to the left and right keys."""
+        self.assertEqual(resolve_keysyms("ctrl"), [XK.XK_Control_L, XK.XK_Control_R])
+
+    def test_masks_round_trip(self):
+        """Engine masks should survive conversion to X state and back."""
+        for mask in range(16):
+            self.assertEqual(STATE_TO_MASK[to_x_mask(mask) | X.LockMask | X.Mod2Mask], mask)
+
+    def test_unknown_key_rejected(self):
+        """Bindings with unknown keys should be rejected up front."""
+        with self.assertRaises(ValueError):
+            X11HotkeyBackend({Action.RECORD: "ctrl+notakey"})
+
+
+class TestGrabEvents(unittest.TestCase):
+    """Tests for translating grab events into callbacks."""
+
+    def setUp(self):
+        """Create a backend as if the grab had succeeded."""
+        bindings = {Action.RECORD: "ctrl+space", Action.CANCEL: "escape"}
+        self.backend = X11HotkeyBackend(bindings)
+        table = BindingTable.build(bindings, lambda name: KEYCODES.get(name, []))
+        self.on_press, self.on_release = MagicMock(), MagicMock()
+        self.events = []
+
+        def on_event(action, pressed):
+            self.events.append((action, pressed))
+            (self.on_press if pressed else self.on_release)()
+
+        self.backend._engine = BindingEngine(table, on_event)
+
+    def test_press_and_release(self):
+        """Press then release of the key should fire both callbacks once."""
+        display = FakeDisplay()
+        self.backend._handle_event(display, event(X.KeyPress, SPACE))
+        self.backend._handle_event(display, event(X.KeyRelease, SPACE))
+        self.on_press.assert_called_once()
+        self.on_release.assert_called_once()
+
+    def test_detectable_autorepeat_presses_ignored(self):
+        """Repeated KeyPress while held should not re-trigger."""
+        self.backend._detectable_autorepeat = True
+        display = FakeDisplay()
+        for _ in range(3):
+            self.backend._handle_event(display, event(X.KeyPress, SPACE))
+        self.on_press.assert_called_once()
+        self.on_release.assert_not_called()
+
+    def test_legacy_autorepeat_release_ignored(self):
+        """Release+press pairs with one timestamp are autorepeat."""
+        display = FakeDisplay([event(X.KeyPress, SPACE, when=2000)])
+        self.backend._handle_event(display, event(X.KeyPress, SPACE))
+        self.backend._handle_event(display, event(X.KeyRelease, SPACE, when=2000))
+        self.on_release.assert_not_called()
+
+    def test_modifier_release_ends_combo(self):
+        """Releasing Ctrl first should end the combo."""
+        display = FakeDisplay()
+        self.backend._handle_event(display, event(X.KeyPress, SPACE))
+        self.backend._handle_event(display, event(X.KeyRelease, CTRL_L))
+        self.on_release.assert_called_once()
+
+    def test_repeat_without_modifier_not_a_press(self):
+        """Space repeating after Ctrl was let go should not start a new combo."""
+        display = FakeDisplay()
+        self.backend._handle_event(display, event(X.KeyPress, SPACE))
+        self.backend._handle_event(display, event(X.KeyRelease, CTRL_L))
+        self.backend._handle_event(display, event(X.KeyPress, SPACE, state=0))
+        self.on_press.assert_called_once()
+
+    def test_lock_modifiers_ignored(self):
+        """Caps Lock and Num Lock should not change the matched binding."""
+        display = FakeDisplay()
+        state = X.ControlMask | X.LockMask | X.Mod2Mask
+        self.backend._handle_event(display, event(X.KeyPress, SPACE, state=state))
+        self.assertEqual(self.events, [(Action.RECORD, True)])
+
+    def test_second_binding(self):
+        """A plain key binding should dispatch its own action."""
+        display = FakeDisplay()
+        self.backend._handle_event(display, event(X.KeyPress, ESCAPE, state=0))
+        self.backend._handle_event(display, event(X.KeyRelease, ESCAPE, state=0))
+        self.assertEqual(self.events, [(Action.CANCEL, True), (Action.CANCEL, False)])
+
+
+@unittest.skipUnless(shutil.which("Xvfb"), "Xvfb not installed")
+class TestXvfbGrab(unittest.TestCase):
+    """End-to-end grab on a virtual X server."""
+
+    def setUp(self):
+        """Start Xvfb on a free display number."""
+        self.display_name = ":97"
+        self.xvfb = subprocess.Popen(
+            ["Xvfb", self.display_name, "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(self.xvfb.wait)
+        self.addCleanup(self.xvfb.terminate)
+        self.old_display = os.environ.get("DISPLAY")
+        os.environ["DISPLAY"] = self.display_name
+        self.addCleanup(self.restore_display)
+        time.sleep(0.5)
+
+    def restore_display(self):
+        """Put DISPLAY back."""
+        if self.old_display is None:
+            os.environ.pop("DISPLAY", None)
+        else:
+            os.environ["DISPLAY"] = self.old_display
+
+    def test_grabbed_combo_fires_callbacks(self):
+        """XTest key presses should reach the grab as press and release."""
+        from Xlib import display as xdisplay
+        from Xlib.ext import xtest
+
+        on_press, on_release = MagicMock(), MagicMock()
+        backend = X11HotkeyBackend({Action.RECORD: "ctrl+space"})
+        backend.start(lambda action, pressed: (on_press if pressed else on_release)())
+        self.addCleanup(backend.stop)
+
+        d = xdisplay.Display(self.display_name)
+        ctrl = d.keysym_to_keycode(XK.XK_Control_L)
+        space = d.keysym_to_keycode(XK.XK_space)
+        for kind, keycode in [
+            (X.KeyPress, ctrl), (X.KeyPress, space),
+            (X.KeyRelease, space), (X.KeyRelease, ctrl),
+        ]:
+            xtest.fake_input(d, kind, keycode)
+            d.sync()
+            time.sleep(0.05)
+
+        deadline = time.monotonic() + 2
+        while not on_release.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        on_press.assert_called_once()
+        on_release.assert_called_once()
+
+        start = time.monotonic()
+        backend.stop()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
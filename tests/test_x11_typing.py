@@ -0,0 +1,103 @@
+"""Tests for typing through XTest with spare keycodes.
+
+Characters missing from the keymap are bound to spare keycodes. The
+bindings have to outlive the keystrokes, since the focused app may read a
+key only after a later mapping change, and are released after a delay.
+"""
+
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from Xlib import X
+
+from arch_whisper.paste import x11
+from arch_whisper.paste.x11 import XTestTyper
+
+SPARE = [200, 201]
+LETTERS = {ord("a"): 38, ord("b"): 56}  # Keysyms already on the keyboard
+
+
+class FakeDisplay:
+    """Display recording keymap changes and faked key events."""
+
+    def __init__(self):
+        self.display = SimpleNamespace(info=SimpleNamespace(min_keycode=200, max_keycode=202))
+        self.changes = []  # (keycode, keysym)
+        self.keys = []  # Keycodes pressed, in order
+
+    def keysym_to_keycodes(self, keysym):
+        return [(LETTERS[keysym], 0)] if keysym in LETTERS else []
+
+    def keysym_to_keycode(self, keysym):
+        return 50
+
+    def get_keyboard_mapping(self, first, count):
+        # 202 is already in use
+        return [(0, 0), (0, 0), (97, 97)]
+
+    def change_keyboard_mapping(self, keycode, keysyms):
+        self.changes.append((keycode, keysyms[0][0]))
+
+    def sync(self):
+        pass
+
+
+def keysym(char):
+    return 0x01000000 | ord(char)
+
+
+class TestXTestTyper(unittest.TestCase):
+    """Tests for binding unmapped characters across batches and calls."""
+
+    def setUp(self):
+        self.display = FakeDisplay()
+        for target, kwargs in [
+            ("arch_whisper.paste.x11.xdisplay.Display", {"return_value": self.display}),
+            ("arch_whisper.paste.x11.xtest.fake_input", {"side_effect": self.fake_input}),
+            ("arch_whisper.paste.x11.REMAP_DELAY", {"new": 0}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.typer = XTestTyper()
+        self.addCleanup(self.typer.release)
+
+    def fake_input(self, display, kind, keycode):
+        if kind == X.KeyPress:
+            self.display.keys.append(keycode)
+
+    def test_bindings_outlive_the_keystrokes(self):
+        """Spare keycodes should only be unbound after the release delay."""
+        with patch.object(x11, "RELEASE_DELAY", 0.05):
+            self.assertTrue(self.typer.type_text("aαb"))
+            self.assertEqual(self.display.changes, [(200, keysym("α"))])
+            self.assertEqual(self.display.keys, [38, 200, 56])
+
+            deadline = time.monotonic() + 2
+            while len(self.display.changes) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(self.display.changes[1], (200, X.NoSymbol))
+
+    def test_repeated_characters_reuse_bindings(self):
+        """A character typed again, in a later batch or call, keeps its keycode."""
+        self.assertTrue(self.typer.type_text("αβαγ"))
+        self.assertTrue(self.typer.type_text("γα"))
+
+        self.assertEqual(self.display.keys, [200, 201, 200, 201, 201, 200])
+        # β's keycode is the least recently used when γ needs one
+        self.assertEqual(
+            self.display.changes,
+            [(200, keysym("α")), (201, keysym("β")), (201, keysym("γ"))],
+        )
+
+    def test_release_unbinds_everything(self):
+        """release() should reset every spare keycode it bound."""
+        self.typer.type_text("αβ")
+        self.typer.release()
+        self.assertEqual(self.display.changes[2:], [(200, X.NoSymbol), (201, X.NoSymbol)])
+
+
+if __name__ == "__main__":
+    unittest.main()